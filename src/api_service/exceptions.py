@@ -16,3 +16,8 @@ class CouldNotDeleteInMongo(Exception):
 class ExperimentStopped(Exception):
     """Raised when user stops the experiment"""
     pass
+
+
+class CollectionReplaced(Exception):
+    """Raised when a MongoDB collection is replaced (e.g. by a CGDSDataset re-synchronization) while it's being read"""
+    pass
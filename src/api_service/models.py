@@ -4,10 +4,11 @@ from django.contrib.auth import get_user_model
 from django.db.models import QuerySet
 from common.constants import PATIENT_ID_COLUMN, SAMPLE_ID_COLUMN, SAMPLES_TYPE_COLUMN, PRIMARY_TYPE_VALUE
 from common.methylation import get_methylation_platform_dataframe
+from common.samples_bitmap import SamplesBitmap
 from genes.models import Gene
 from statistical_properties.models import SourceDataStatisticalProperties
 from tags.models import Tag
-from user_files.models import UserFile
+from user_files.models import UserFile, get_samples_bitmap_from_barcodes
 from user_files.models_choices import FileType
 from .models_choices import ExperimentType, ExperimentState, CorrelationMethod, PValuesAdjustmentMethod
 from .websocket_functions import send_update_experiments_command
@@ -62,6 +63,13 @@ class ExperimentSource(models.Model):
         """
         return self.get_valid_source().get_column_names()
 
+    def get_samples_bitmap(self) -> SamplesBitmap:
+        """
+        Gets the SamplesBitmap of the samples of a ExperimentSource (stored in the UserFile/CGDSDataset)
+        @return: SamplesBitmap instance
+        """
+        return self.get_valid_source().get_samples_bitmap()
+
     def get_specific_row_and_columns(self, row: str, columns_idx: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Gets a specific row and columns values from the source
@@ -87,14 +95,23 @@ class ExperimentSource(models.Model):
         """
         return self.get_valid_source().get_df(only_matching)
 
-    def get_df_in_chunks(self, only_matching: bool = False) -> Iterable[pd.DataFrame]:
+    def get_df_in_chunks(self, only_matching: bool = False,
+                         molecules_to_skip: Optional[pd.Index] = None) -> Iterable[pd.DataFrame]:
         """
         Returns an Iterator of a DataFrame in divided in chunks from an experiment source.
         @param only_matching: @param only_matching: If True only returns the molecules that are equal in both columns MOLECULE_SYMBOL and
         STANDARD_SYMBOL (only used for CGDSDatasets).
+        @param molecules_to_skip: Molecules (rows) which are not retrieved (optional).
         @return: A DataFrame Iterator with the data to work.
         """
-        return self.get_valid_source().get_df_in_chunks(only_matching)
+        return self.get_valid_source().get_df_in_chunks(only_matching, molecules_to_skip=molecules_to_skip)
+
+    def get_molecules_stats(self) -> Optional[pd.DataFrame]:
+        """
+        Gets the per-molecule statistics (mean, std and NaN count over all the samples) of the UserFile/CGDSDataset
+        @return: DataFrame with the statistics or None if they weren't computed
+        """
+        return self.get_valid_source().get_molecules_stats()
 
     @property
     def number_of_rows(self) -> int:
@@ -141,6 +158,16 @@ class ExperimentClinicalSource(ExperimentSource):
         samples = self.__get_cgds_datasets_joined_df().index
         return list(set(samples))
 
+    def get_samples_bitmap(self) -> SamplesBitmap:
+        """
+        Gets the SamplesBitmap of the samples of a ExperimentClinicalSource. CGDS clinical sources join two datasets,
+        so their bitmap is computed from the samples every time
+        @return: SamplesBitmap instance
+        """
+        if self.user_file:
+            return self.user_file.get_samples_bitmap()
+        return get_samples_bitmap_from_barcodes(self.get_samples())
+
     def get_attributes(self) -> List[str]:
         """
         Gets the clinical attributes of the source without the special attributes like sample ids or patient ids
@@ -280,14 +307,23 @@ class ExperimentClinicalSource(ExperimentSource):
 
         return self.__get_cgds_datasets_joined_df()
 
-    def get_df_in_chunks(self, _only_matching: bool = False) -> Iterable[pd.DataFrame]:
+    def get_df_in_chunks(self, _only_matching: bool = False,
+                         molecules_to_skip: Optional[pd.Index] = None) -> Iterable[pd.DataFrame]:
         """
         It nos necessary to get the clinical data in chunks as it's little
         @param _only_matching: If True, returns only the matching samples. Not used for clinical sources.
+        @param molecules_to_skip: Not used for clinical sources.
         @return: A DataFrame Iterator with the data to work
         """
         return self.get_df()
 
+    def get_molecules_stats(self) -> Optional[pd.DataFrame]:
+        """
+        Clinical source doesn't have molecules statistics.
+        @return: None.
+        """
+        return None
+
     def get_survival_columns(self) -> QuerySet[Union[SurvivalColumnsTupleCGDSDataset, SurvivalColumnsTupleUserFile]]:
         """
         Gets the related survival columns tuples to the UserFile or CGDSDataset
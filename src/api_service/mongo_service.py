@@ -1,4 +1,3 @@
-from copy import deepcopy
 from typing import List, Dict, Any, Iterator, Optional, Union
 import pandas as pd
 from pymongo import MongoClient
@@ -9,8 +8,9 @@ import string
 from django.conf import settings
 import logging
 from user_files.models_choices import FileType
-from .exceptions import CouldNotDeleteInMongo
-from .mrna_service import global_mrna_service
+from .exceptions import CouldNotDeleteInMongo, CollectionReplaced
+from genes.models import StandardSymbolSource
+from .standard_symbols import get_standard_symbols
 
 # Symbol used by cBioPortal to indicate the code of molecule (gene, miRNA, of Methylation CpG site ID)
 MOLECULE_SYMBOL = 'Hugo_Symbol'
@@ -125,8 +125,18 @@ class MongoService(object):
         df.set_index(STANDARD_SYMBOL, inplace=True)
         return df
 
+    def __get_collection_uuid(self, collection_name: str) -> Optional[Any]:
+        """
+        Gets the UUID of a collection, which changes when the collection is replaced (renameCollection with dropTarget)
+        @param collection_name: Collection's name
+        @return: Collection's UUID or None if the collection doesn't exist
+        """
+        collection_info = next(self.db.list_collections(filter={'name': collection_name}), None)
+        return collection_info['info'].get('uuid') if collection_info is not None else None
+
     def get_collection_as_df_in_chunks(self, collection_name: str, chunk_size: int,
-                                       only_matching: bool = False) -> Iterator[pd.DataFrame]:
+                                       only_matching: bool = False,
+                                       molecules_to_skip: Optional[pd.Index] = None) -> Iterator[pd.DataFrame]:
         """
         Gets a MongoDB collection as a DataFrame.
         NOTE: uses this kind of pagination as cursor is closed after 30 minutes by Mongo raising
@@ -135,8 +145,17 @@ class MongoService(object):
         @param chunk_size: Chunk size in which the collection is retrieved.
         @param only_matching: If True only returns the molecules that are equal in both columns MOLECULE_SYMBOL and
         STANDARD_SYMBOL.
+        @param molecules_to_skip: Molecules (STANDARD_SYMBOL) to not retrieve. They are excluded in the query if there
+        are at most MOLECULES_STATS_MAX_SKIPPED_IN_QUERY, otherwise they are removed from the retrieved chunks.
         @return: DataFrame with the collection data.
+        @raise CollectionReplaced If the collection is replaced while it's being read, as the rest of the chunks would
+        be retrieved from the new collection.
         """
+        collection_uuid = self.__get_collection_uuid(collection_name)
+        skip_in_query = molecules_to_skip is not None and \
+            0 < molecules_to_skip.size <= settings.MOLECULES_STATS_MAX_SKIPPED_IN_QUERY
+        skip_in_chunks = molecules_to_skip is not None and not skip_in_query and molecules_to_skip.size > 0
+
         last_id = None
         while True:
             # When it is first page doesn't apply filter
@@ -149,6 +168,10 @@ class MongoService(object):
             # Concatenates where and filter_query
             filter_query = {**filter_query, **where}
 
+            # Excludes the molecules to skip (if needed)
+            if skip_in_query:
+                filter_query[STANDARD_SYMBOL] = {'$nin': molecules_to_skip.tolist()}
+
             cursor = self.db[collection_name].find(
                 filter_query,
                 self.default_non_used_fields_pagination
@@ -160,10 +183,18 @@ class MongoService(object):
             if not batch:
                 break
 
+            # Every page is a new query, so checks that the documents are from the same collection
+            if self.__get_collection_uuid(collection_name) != collection_uuid:
+                raise CollectionReplaced(f'The collection {collection_name} was replaced while it was being read')
+
             # It's indexed by ID
             last_id = batch[-1]['_id']
 
-            yield self.__process_batch(batch)
+            chunk = self.__process_batch(batch)
+            if skip_in_chunks:
+                chunk = chunk[~chunk.index.isin(molecules_to_skip)]
+
+            yield chunk
 
     def get_only_columns_names(self, collection_name: str, exclude_special_fields: bool = True) -> List[str]:
         """
@@ -203,31 +234,19 @@ class MongoService(object):
     @staticmethod
     def __get_standard_ids(file_type: FileType, molecules: List[str]) -> Optional[Dict]:
         """
-        Gets standard IDs for a list of molecules from Modulector/BioAPI APIs.
+        Gets standard IDs for a list of molecules from Modulector/BioAPI APIs. The symbols are stored in the DB, so
+        only the ones that were not standardized before are requested (see get_standard_symbols()).
         @param file_type: File type to check if it is a request for Modulector (miRNA, Methylation), or BioAPI (genes).
         @param molecules: List of molecules to send.
-        @return:
+        @return: Dict with the molecules as keys and their standard symbols as values. None if they couldn't be
+        retrieved.
         """
-        is_for_bioapi = file_type in [FileType.MRNA, FileType.CNA]
-        if is_for_bioapi:
+        if file_type in [FileType.MRNA, FileType.CNA]:
             logging.warning('Retrieving data from BioAPI')
+            data = get_standard_symbols(StandardSymbolSource.BIOAPI, molecules)
         elif file_type == FileType.MIRNA:
             logging.warning('Retrieving data from Modulector')
-
-        if is_for_bioapi:
-            data = global_mrna_service.get_bioapi_service_content(
-                'gene-symbols',
-                request_params={'gene_ids': molecules},
-                is_paginated=False,
-                method='post'
-            )
-        elif file_type == FileType.MIRNA:
-            data = global_mrna_service.get_modulector_service_content(
-                'mirna-codes',
-                request_params={'mirna_codes': molecules},
-                is_paginated=False,
-                method='post'
-            )
+            data = get_standard_symbols(StandardSymbolSource.MODULECTOR, molecules)
         else:
             # In case of methylation, cBioPortal don't manage the methylation sites, so we don't need to use Modulector.
             # Generates a dummy dict with the same keys and values as the molecules list
@@ -237,8 +256,9 @@ class MongoService(object):
 
     def insert_cgds_dataset(self, dataset_df: pd.DataFrame, table_name: str, file_type: FileType) -> bool:
         """
-        Inserts a CGDS dataset Pandas DataFrame in MongoDB
-        @param dataset_df: DataFrame to Insert
+        Inserts a CGDS dataset Pandas DataFrame in MongoDB. Large datasets must be inserted in chunks to keep the
+        memory bounded, as all the documents of the DataFrame are generated before inserting them
+        @param dataset_df: DataFrame (or chunk of a dataset) to Insert
         @param table_name: Name of the MongoDB's collection where the DataFrame will be inserted
         @param file_type: File type to check which service needs to invoke.
         @return: True if everything gone well, False otherwise
@@ -264,7 +284,7 @@ class MongoService(object):
             ambiguous_symbols: List[Dict[str, Any]] = []
             for elem in data_list:
                 symbol = elem[MOLECULE_SYMBOL]
-                standard_symbols: Union[str, List[str]] = molecules_std_ids[symbol]
+                standard_symbols: Optional[Union[str, List[str]]] = molecules_std_ids.get(symbol)
                 standard_symbol: str
                 if standard_symbols:
                     if file_type in [FileType.MRNA, FileType.CNA, FileType.METHYLATION]:
@@ -279,11 +299,12 @@ class MongoService(object):
                             # In case of ambiguity, copies the element for all the aliases
                             standard_symbol = symbol  # To prevent later addition
 
-                            # Clones the element and adds standard symbol
+                            # Clones the element and adds standard symbol. The values are scalars, so a shallow
+                            # copy is enough
                             for aux_symbol in standard_symbols:
                                 # Omits the original symbol
                                 if aux_symbol != symbol:
-                                    new_elem = deepcopy(elem)
+                                    new_elem = dict(elem)
                                     new_elem[STANDARD_SYMBOL] = aux_symbol
                                     ambiguous_symbols.append(new_elem)
                     else:
@@ -299,8 +320,9 @@ class MongoService(object):
             # Concatenates ambiguous elements
             data_list.extend(ambiguous_symbols)
 
-        # Inserts in DB
-        result = cgds_table.insert_many(data_list)
+        # Inserts in DB. The order of the documents doesn't matter, so an unordered bulk write lets the server
+        # insert them in parallel and continue after a failing document
+        result = cgds_table.insert_many(data_list, ordered=False)
 
         # Returns the True if everything gone well
         return len(result.inserted_ids) == len(data_list)
@@ -315,6 +337,72 @@ class MongoService(object):
         if collection_to_remove in self.db.list_collection_names():
             raise CouldNotDeleteInMongo('The collection still exists in the DB')
 
+    def collection_exists(self, collection_name: str) -> bool:
+        """
+        Checks if a collection exists in the db
+        @param collection_name: Collection's name
+        @return: True if the collection exists, False otherwise
+        """
+        return collection_name in self.db.list_collection_names(filter={'name': collection_name})
+
+    def copy_collection(self, source_collection: str, target_collection: str):
+        """
+        Copies all the documents of a collection into another one in the server (without transferring them). The
+        target collection is replaced
+        @param source_collection: Name of the collection to copy
+        @param target_collection: Name of the new collection
+        """
+        self.db[source_collection].aggregate([{'$out': target_collection}])
+
+    def delete_rows(self, collection_name: str, key_field: str, keys: List[Any]) -> int:
+        """
+        Removes the documents whose key field is in a list of values. The deletion is done in batches of
+        INSERT_CHUNK_SIZE keys
+        @param collection_name: Collection's name
+        @param key_field: Field to filter the documents
+        @param keys: Values of the key field of the documents to remove
+        @return: Number of removed documents
+        """
+        collection = self.db[collection_name]
+        batch_size = settings.INSERT_CHUNK_SIZE
+        deleted = 0
+        for i in range(0, len(keys), batch_size):
+            deleted += collection.delete_many({key_field: {'$in': keys[i:i + batch_size]}}).deleted_count
+        return deleted
+
+    def create_indexes(self, collection_name: str, fields: List[str]):
+        """
+        Creates an ascending index for every field of a collection (if it doesn't exist)
+        @param collection_name: Collection's name
+        @param fields: Fields to index
+        """
+        collection = self.db[collection_name]
+        for field in fields:
+            collection.create_index(field)
+
+    def get_distinct_count(self, collection_name: str, field: str) -> int:
+        """
+        Gets the number of different values of a field in a collection. It's computed in the server with an
+        aggregation, so it's not limited by the max document size as distinct()
+        @param collection_name: Collection's name
+        @param field: Field to count its values
+        @return: Number of different values
+        """
+        result = list(self.db[collection_name].aggregate([
+            {'$group': {'_id': f'${field}'}},
+            {'$count': 'count'}
+        ]))
+        return result[0]['count'] if result else 0
+
+    def replace_collection(self, source_collection: str, target_collection: str):
+        """
+        Renames a collection replacing the target one (if exists) in a single atomic operation (renameCollection with
+        dropTarget), so readers see the old or the new documents, never a mix of them
+        @param source_collection: Collection to rename (e.g. a staging collection)
+        @param target_collection: Final collection's name
+        """
+        self.db[source_collection].rename(target_collection, dropTarget=True)
+
     def close_mongo_db_connection(self):
         """
         Closes the current connection. When the client instance is used again it'll be re-opened
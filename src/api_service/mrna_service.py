@@ -4,12 +4,15 @@ from typing import Any, Dict, Optional, Literal, Union
 import requests
 from django.conf import settings
 from django.http import QueryDict
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
+from urllib3.util.retry import Retry
 
 
 class MRNAService(object):
     url_modulector_prefix: str
     url_bioapi_prefix: str
+    session: requests.Session  # Session shared by all the requests to reuse the connections
 
     def __init__(self):
         modulector_settings = settings.MODULECTOR_SETTINGS
@@ -18,6 +21,28 @@ class MRNAService(object):
         bioapi_settings = settings.BIOAPI_SETTINGS
         self.url_bioapi_prefix = f"http://{bioapi_settings['host']}:{bioapi_settings['port']}"
 
+        self.session = self.__create_session()
+
+    @staticmethod
+    def __create_session() -> requests.Session:
+        """
+        Creates a Session with a pool of connections to Modulector/BioAPI. Connection errors and 502, 503 and 504
+        responses are retried with an exponential backoff (all the requests are queries, so POSTs are retried too)
+        @return: Session instance
+        """
+        retries = Retry(
+            total=settings.MODULECTOR_BIOAPI_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=None,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_maxsize=settings.MODULECTOR_BIOAPI_POOL_SIZE, max_retries=retries)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
     @staticmethod
     def __generate_rest_query_params(get_request: QueryDict) -> str:
         """
@@ -54,13 +79,13 @@ class MRNAService(object):
                 params = self.__generate_rest_query_params(request_params)
                 if params:
                     url += f'/?{params}'
-                data = requests.get(url)
+                data = self.session.get(url)
             else:
                 # Prevents issues with Django APPEND_SLASH option
                 if append_slash and not url.endswith('/'):
                     url += '/'
 
-                data = requests.post(url, json=request_params)
+                data = self.session.post(url, json=request_params)
 
             if data.status_code != 200:
                 logging.warning(f'{method.upper()} to {url} returned status_code {data.status_code} and '
@@ -8,8 +8,10 @@ from common.constants import GEM_INDEX_NAME
 from common.functions import check_if_stopped
 from common.methylation import get_cpg_from_cpg_format_gem, get_gene_from_cpg_format_gem, \
     map_cpg_to_genes_df
+from common.molecules_stats import get_molecules_to_skip
 from common.typing import AbortEvent
-from .exceptions import NoSamplesInCommon, ExperimentStopped, ExperimentFailed
+from user_files.models import get_samples_barcodes
+from .exceptions import NoSamplesInCommon, ExperimentStopped, ExperimentFailed, CollectionReplaced
 from django.conf import settings
 from typing import Tuple, Type, List, cast, Optional, Union, Iterator, IO
 from .models import ExperimentSource, Experiment, GeneGEMCombination
@@ -310,6 +312,69 @@ def __save_result_in_db(combinations: List[ggca.CorResult], experiment: Experime
         logging.warning(f'INSERT execution time -> {time.time() - start} seconds')
 
 
+def __get_molecules_to_skip(source: ExperimentSource, common_samples: np.ndarray,
+                            minimum_std: float) -> Optional[pd.Index]:
+    """
+    Gets the molecules of a source which would be removed by __prepare_df() using the statistics computed at
+    ingestion time, so they are not fetched. The statistics are computed over all the samples of the dataset, so they
+    are only used if all the samples are in common
+    @param source: Experiment's source
+    @param common_samples: Common samples used in the experiment
+    @param minimum_std: Minimum Standard Deviation to filter
+    @return: Index with the molecules to skip or None if the statistics can't be used
+    """
+    if len(source.get_samples_bitmap()) != common_samples.size:
+        return None
+
+    stats_df = source.get_molecules_stats()
+    if stats_df is None:
+        return None
+
+    return get_molecules_to_skip(stats_df, minimum_std)
+
+
+def __write_clean_temp_file(
+        source: ExperimentSource,
+        common_samples: np.ndarray,
+        experiment: Experiment,
+        index: str,
+        gem_platform_df: Optional[pd.DataFrame]
+) -> Tuple[IO, int]:
+    """
+    Reads a source in chunks and writes them in a NamedTemporaryFile with the needed format for Rust library (GGCA).
+    The file is removed if the source can't be read
+    @param source: Experiment's source to retrieve data in chunks
+    @param common_samples: Common samples to filter and prepare dataset
+    @param experiment: Experiment to retrieve some information
+    @param index: Index to apply to the DataFrame to prevent some errors in Pandas
+    @param gem_platform_df: Methylation platform to map the CpG Site IDs to genes. None if mapping is not needed
+    @return: Temp file object and number of rows saved in it
+    """
+    # Skips the molecules which would be filtered anyway
+    molecules_to_skip = __get_molecules_to_skip(source, common_samples, experiment.minimum_std_gene)
+
+    # Delete is set to False to prevent errors in Rust
+    temp_file = tempfile.NamedTemporaryFile(mode='a', delete=False)
+    number_of_rows = 0
+    try:
+        for chunk in source.get_df_in_chunks(molecules_to_skip=molecules_to_skip):
+            chunk = __prepare_df(chunk, experiment.minimum_std_gene, common_samples, index)
+
+            # CpG Site IDs mapping
+            if gem_platform_df is not None:
+                chunk = map_cpg_to_genes_df(chunk, gem_platform_df)
+
+            chunk.to_csv(temp_file, header=temp_file.tell() == 0, sep='\t', decimal='.')
+            number_of_rows += chunk.shape[0]
+    except Exception:
+        temp_file.close()
+        os.unlink(temp_file.name)
+        raise
+
+    temp_file.close()
+    return temp_file, number_of_rows
+
+
 def __generate_clean_temp_file(
         source: ExperimentSource,
         common_samples: np.ndarray,
@@ -318,7 +383,9 @@ def __generate_clean_temp_file(
         check_cpg_platform: bool,
 ) -> Tuple[IO, int, bool]:
     """
-    Creates a NamedTemporaryFile and adds all the information of source with needed format for Rust library (GGCA)
+    Creates a NamedTemporaryFile and adds all the information of source with needed format for Rust library (GGCA).
+    If the source's collection is replaced (i.e. the dataset is re-synchronized) while it's being read, it's read
+    again from the new collection
     @param source: Experiment's source to retrieve data in chunks
     @param common_samples: Common samples to filter and prepare dataset
     @param experiment: Experiment to retrieve some information
@@ -329,20 +396,14 @@ def __generate_clean_temp_file(
     # Checks if CpG Site ID mapping is needed
     gem_platform_df = None if not check_cpg_platform else experiment.gem_source.get_methylation_platform_df()
 
-    # Delete is set to False to prevent errors in Rust
-    temp_file = tempfile.NamedTemporaryFile(mode='a', delete=False)
-    number_of_rows = 0
-    for chunk in source.get_df_in_chunks():
-        chunk = __prepare_df(chunk, experiment.minimum_std_gene, common_samples, index)
-
-        # CpG Site IDs mapping
-        if gem_platform_df is not None:
-            chunk = map_cpg_to_genes_df(chunk, gem_platform_df)
-
-        chunk.to_csv(temp_file, header=temp_file.tell() == 0, sep='\t', decimal='.')
-        number_of_rows += chunk.shape[0]
+    try:
+        temp_file, number_of_rows = __write_clean_temp_file(source, common_samples, experiment, index,
+                                                            gem_platform_df)
+    except CollectionReplaced as ex:
+        logging.warning(f'{ex}. Reading it again')
+        temp_file, number_of_rows = __write_clean_temp_file(source, common_samples, experiment, index,
+                                                            gem_platform_df)
 
-    temp_file.close()
     return temp_file, number_of_rows, gem_platform_df is not None
 
 
@@ -456,8 +517,10 @@ def compute_correlation_experiment(experiment: Experiment, is_aborted: AbortEven
     @raise NoSamplesInCommon If there's not any sample in common between both sources.
     @return Total row count, the final row count (used in case it's truncated) and number of evaluated combinations.
     """
-    # First checks if there's any sample in common
-    common_samples = get_common_samples(experiment.mRNA_source, experiment.gem_source)
+    # First checks if there's any sample in common (intersecting the samples bitmaps, without reading the datasets)
+    common_samples = get_samples_barcodes(
+        experiment.mRNA_source.get_samples_bitmap() & experiment.gem_source.get_samples_bitmap()
+    )
     if common_samples.size == 0:
         raise NoSamplesInCommon
 
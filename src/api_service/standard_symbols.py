@@ -0,0 +1,124 @@
+import logging
+from datetime import timedelta
+from typing import List, Dict, Any, Optional, Iterator, Set
+from django.conf import settings
+from django.utils import timezone
+from genes.models import StandardSymbol, StandardSymbolSource
+from .mrna_service import global_mrna_service
+
+
+def __get_batches(elements: List[str], batch_size: int) -> Iterator[List[str]]:
+    """Yields consecutive batches of a list."""
+    for i in range(0, len(elements), batch_size):
+        yield elements[i:i + batch_size]
+
+
+def __request_standard_symbols(source: StandardSymbolSource, molecules: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Requests the standard symbols of some molecules to BioAPI or Modulector
+    @param source: Service to request
+    @param molecules: Molecules to standardize
+    @return: Dict with the molecules as keys and their standard symbols as values. None if the request failed
+    """
+    if source == StandardSymbolSource.BIOAPI:
+        data = global_mrna_service.get_bioapi_service_content(
+            'gene-symbols',
+            request_params={'gene_ids': molecules},
+            is_paginated=False,
+            method='post'
+        )
+    else:
+        data = global_mrna_service.get_modulector_service_content(
+            'mirna-codes',
+            request_params={'mirna_codes': molecules},
+            is_paginated=False,
+            method='post'
+        )
+
+    return data if isinstance(data, dict) else None
+
+
+def store_standard_symbols(source: StandardSymbolSource, standard_symbols: Dict[str, Any]):
+    """
+    Stores (or updates) the standard symbols of some molecules
+    @param source: Service that standardized the molecules
+    @param standard_symbols: Dict with the molecules as keys and their standard symbols as values (None for the molecules
+    that were not found)
+    """
+    now = timezone.now()
+    max_length = StandardSymbol._meta.get_field('symbol').max_length
+    instances = [
+        StandardSymbol(source=source, symbol=symbol, standard_symbols=value, date_updated=now)
+        for symbol, value in standard_symbols.items()
+        if len(symbol) <= max_length  # Invalid symbols are not stored
+    ]
+    StandardSymbol.objects.bulk_create(
+        instances,
+        batch_size=settings.STANDARD_SYMBOLS_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['source', 'symbol'],
+        update_fields=['standard_symbols', 'date_updated']
+    )
+
+
+def get_standard_symbols(source: StandardSymbolSource, molecules: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Gets the standard symbols of some molecules. The stored ones are reused and the missing (or expired) ones are
+    requested to BioAPI/Modulector in batches of STANDARD_SYMBOLS_BATCH_SIZE and stored for the next calls. The
+    molecules not found by the service are stored too (with a null value), so they are not requested again until they
+    expire
+    @param source: Service which standardizes the molecules
+    @param molecules: Molecules to standardize (can be repeated)
+    @return: Dict with the found molecules as keys and their standard symbols as values (the same format returned by
+    BioAPI/Modulector). The molecules that were not found are not included. None if some molecule is not stored and
+    could not be requested
+    """
+    unique_molecules = list(dict.fromkeys(molecules))
+    batch_size = max(settings.STANDARD_SYMBOLS_BATCH_SIZE, 1)
+    cache_days = settings.STANDARD_SYMBOLS_CACHE_DAYS
+    expiration_date = timezone.now() - timedelta(days=cache_days) if cache_days > 0 else None
+
+    # Gets the stored symbols
+    result: Dict[str, Any] = {}
+    stored_molecules: Set[str] = set()
+    to_request: List[str] = []
+    for batch in __get_batches(unique_molecules, batch_size):
+        stored = {
+            symbol: (standard_symbols, date_updated)
+            for symbol, standard_symbols, date_updated in StandardSymbol.objects.filter(
+                source=source,
+                symbol__in=batch
+            ).values_list('symbol', 'standard_symbols', 'date_updated')
+        }
+        for molecule in batch:
+            if molecule in stored:
+                stored_molecules.add(molecule)
+                if stored[molecule][0] is not None:
+                    result[molecule] = stored[molecule][0]
+                if expiration_date is not None and stored[molecule][1] < expiration_date:
+                    to_request.append(molecule)
+            else:
+                to_request.append(molecule)
+
+    if to_request:
+        logging.warning(f'{len(unique_molecules) - len(to_request)} of {len(unique_molecules)} standard symbols '
+                        f'are stored and up to date. Requesting the rest to {StandardSymbolSource(source).label}')
+
+    # Requests the missing/expired ones
+    for batch in __get_batches(to_request, batch_size):
+        data = __request_standard_symbols(source, batch)
+        if data is None:
+            # The expired symbols are used anyway
+            if any(molecule not in stored_molecules for molecule in batch):
+                return None
+            continue
+
+        requested = {molecule: data.get(molecule) for molecule in batch}
+        store_standard_symbols(source, requested)
+        for molecule, standard_symbols in requested.items():
+            if standard_symbols is not None:
+                result[molecule] = standard_symbols
+            else:
+                result.pop(molecule, None)
+
+    return result
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from django.test import TestCase
 from api_service.models import ExperimentSource, Experiment, GeneMiRNACombination
 from api_service.pipelines import get_valid_data_from_sources, get_common_samples
@@ -42,6 +43,11 @@ class GeneGEMTestCase(TestCase):
 
     def setUp(self):
         """Test setup"""
+        # Uploaded files and molecules stats are stored in a temporary MEDIA_ROOT
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=temp_dir.name))
+
         self.user = User.objects.create_user(username='test_user', email='test@test.com', password='test')
 
         # UserFiles
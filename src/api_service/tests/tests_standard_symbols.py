@@ -0,0 +1,143 @@
+from datetime import timedelta
+from typing import List, Dict, Any, Optional
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from api_service import standard_symbols
+from api_service.standard_symbols import get_standard_symbols
+from biomarkers.views import get_gene_aliases
+from genes.models import StandardSymbol, StandardSymbolSource
+
+# Genes known by the fake BioAPI
+BIOAPI_SYMBOLS = {
+    'BRCA1': ['BRCA1'],
+    'p53': ['TP53'],
+    'EGFR': ['EGFR'],
+    'AMBIGUOUS': ['GENE_A', 'GENE_B']
+}
+
+
+@override_settings(STANDARD_SYMBOLS_BATCH_SIZE=2, STANDARD_SYMBOLS_CACHE_DAYS=30)
+class StandardSymbolsTestCase(TestCase):
+    """Tests the standard symbols stored in the DB as a cache of BioAPI/Modulector."""
+    requested: List[List[str]]  # Molecules of every request to the fake service
+    service_available: bool
+
+    def setUp(self):
+        self.requested = []
+        self.service_available = True
+        self.enterContext(mock.patch.object(standard_symbols, '__request_standard_symbols',
+                                            side_effect=self.__fake_request))
+
+    def __fake_request(self, source: StandardSymbolSource, molecules: List[str]) -> Optional[Dict[str, Any]]:
+        """BioAPI doesn't return the genes that were not found. Modulector returns null for them."""
+        self.requested.append(molecules)
+        if not self.service_available:
+            return None
+        if source == StandardSymbolSource.BIOAPI:
+            return {molecule: BIOAPI_SYMBOLS[molecule] for molecule in molecules if molecule in BIOAPI_SYMBOLS}
+        return {molecule: molecule.lower() if molecule.startswith('MIR') else None for molecule in molecules}
+
+    def __requested_molecules(self) -> List[str]:
+        return [molecule for batch in self.requested for molecule in batch]
+
+    @staticmethod
+    def __expire(symbols: List[str]):
+        StandardSymbol.objects.filter(symbol__in=symbols).update(date_updated=timezone.now() - timedelta(days=31))
+
+    def test_miss(self):
+        """Tests that the missing molecules are requested in batches and stored (also the not found ones)."""
+        result = get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'p53', 'UNKNOWN', 'BRCA1', 'AMBIGUOUS'])
+        self.assertDictEqual(result, {'BRCA1': ['BRCA1'], 'p53': ['TP53'], 'AMBIGUOUS': ['GENE_A', 'GENE_B']})
+        self.assertListEqual(self.requested, [['BRCA1', 'p53'], ['UNKNOWN', 'AMBIGUOUS']])
+
+        stored = dict(StandardSymbol.objects.filter(source=StandardSymbolSource.BIOAPI)
+                      .values_list('symbol', 'standard_symbols'))
+        self.assertDictEqual(stored, {'BRCA1': ['BRCA1'], 'p53': ['TP53'], 'UNKNOWN': None,
+                                      'AMBIGUOUS': ['GENE_A', 'GENE_B']})
+
+    def test_hit(self):
+        """Tests that the stored molecules (found or not) are not requested again."""
+        get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'UNKNOWN'])
+        self.requested.clear()
+
+        result = get_standard_symbols(StandardSymbolSource.BIOAPI, ['UNKNOWN', 'BRCA1', 'EGFR'])
+        self.assertDictEqual(result, {'BRCA1': ['BRCA1'], 'EGFR': ['EGFR']})
+        self.assertListEqual(self.__requested_molecules(), ['EGFR'])
+
+        # Sources are stored separately
+        self.requested.clear()
+        result = get_standard_symbols(StandardSymbolSource.MODULECTOR, ['MIR-1', 'BRCA1'])
+        self.assertDictEqual(result, {'MIR-1': 'mir-1'})
+        self.assertListEqual(self.__requested_molecules(), ['MIR-1', 'BRCA1'])
+        self.requested.clear()
+        self.assertDictEqual(get_standard_symbols(StandardSymbolSource.MODULECTOR, ['BRCA1', 'MIR-1']),
+                             {'MIR-1': 'mir-1'})
+        self.assertListEqual(self.requested, [])
+
+    def test_expiry(self):
+        """Tests that the molecules stored more than STANDARD_SYMBOLS_CACHE_DAYS days ago are requested again."""
+        StandardSymbol.objects.create(source=StandardSymbolSource.BIOAPI, symbol='BRCA1', standard_symbols=['OLD'],
+                                      date_updated=timezone.now())
+        StandardSymbol.objects.create(source=StandardSymbolSource.BIOAPI, symbol='EGFR', standard_symbols=None,
+                                      date_updated=timezone.now())
+        StandardSymbol.objects.create(source=StandardSymbolSource.BIOAPI, symbol='p53', standard_symbols=['OLD'],
+                                      date_updated=timezone.now())
+        self.__expire(['BRCA1', 'EGFR'])
+
+        result = get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'EGFR', 'p53'])
+        self.assertDictEqual(result, {'BRCA1': ['BRCA1'], 'EGFR': ['EGFR'], 'p53': ['OLD']})
+        self.assertListEqual(self.__requested_molecules(), ['BRCA1', 'EGFR'])
+        self.assertEqual(StandardSymbol.objects.get(symbol='BRCA1').standard_symbols, ['BRCA1'])
+        self.assertGreater(StandardSymbol.objects.get(symbol='EGFR').date_updated,
+                           timezone.now() - timedelta(days=1))
+
+        # A molecule that is not found anymore
+        self.__expire(['BRCA1'])
+        with mock.patch.dict(BIOAPI_SYMBOLS, clear=True):
+            self.assertDictEqual(get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1']), {})
+        self.assertIsNone(StandardSymbol.objects.get(symbol='BRCA1').standard_symbols)
+
+    @override_settings(STANDARD_SYMBOLS_CACHE_DAYS=0)
+    def test_no_expiration(self):
+        StandardSymbol.objects.create(source=StandardSymbolSource.BIOAPI, symbol='BRCA1', standard_symbols=['OLD'],
+                                      date_updated=timezone.now() - timedelta(days=1000))
+        self.assertDictEqual(get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1']), {'BRCA1': ['OLD']})
+        self.assertListEqual(self.requested, [])
+
+    def test_stale_fallback(self):
+        """Tests that the expired molecules are used if the service fails, but not if some molecule is not stored."""
+        get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'UNKNOWN'])
+        self.__expire(['BRCA1', 'UNKNOWN'])
+        self.service_available = False
+
+        self.assertDictEqual(get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'UNKNOWN']),
+                             {'BRCA1': ['BRCA1']})
+        self.assertIsNone(get_standard_symbols(StandardSymbolSource.BIOAPI, ['BRCA1', 'EGFR']))
+
+        # The stored ones are not modified
+        self.assertEqual(StandardSymbol.objects.get(symbol='BRCA1').standard_symbols, ['BRCA1'])
+        self.assertLess(StandardSymbol.objects.get(symbol='BRCA1').date_updated, timezone.now() - timedelta(days=30))
+
+    def test_gene_aliases(self):
+        """Tests that the genes validator uses the stored symbols and returns an empty list for the unknown genes."""
+        self.assertDictEqual(get_gene_aliases(['BRCA1', 'UNKNOWN']), {'BRCA1': ['BRCA1'], 'UNKNOWN': []})
+        self.requested.clear()
+        self.assertDictEqual(get_gene_aliases(['UNKNOWN', 'BRCA1']), {'UNKNOWN': [], 'BRCA1': ['BRCA1']})
+        self.assertListEqual(self.requested, [])
+
+        self.service_available = False
+        self.assertIsNone(get_gene_aliases(['EGFR']))
+
+    def test_mirna_codes(self):
+        """Tests that the miRNA validator uses the stored symbols and keeps its response format."""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='test_user', password='test'))
+
+        for _ in range(2):
+            response = client.post('/biomarkers/mirna-codes', {'mirna_codes': ['MIR-1', 'NOT-MIRNA']}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertDictEqual(response.json(), {'MIR-1': ['mir-1'], 'NOT-MIRNA': []})
+        self.assertListEqual(self.requested, [['MIR-1', 'NOT-MIRNA']])
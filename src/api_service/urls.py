@@ -26,6 +26,8 @@ urlpatterns = [
         views.get_number_samples_in_common_action_one_front,
         name='get_number_samples_in_common_one_front'
     ),
+    path('number-of-molecules-kept', views.get_number_of_molecules_kept_action,
+         name='get_number_of_molecules_kept'),
     # Correlation Graph
     path('correlation-graph', views.get_correlation_graph_action,
          name='correlation_graph'),
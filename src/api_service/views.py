@@ -19,15 +19,17 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from common.enums import ResponseCode
 from common.functions import get_enum_from_value, get_integer_enum_from_value, encode_json_response_status, \
-    request_bool_to_python_bool, get_intersection, create_survival_columns_from_json
+    request_bool_to_python_bool, create_survival_columns_from_json
+from common.molecules_stats import get_number_of_molecules_kept
 from common.pagination import StandardResultsSetPagination
 from common.response import ResponseStatus, generate_json_response_or_404
+from common.samples_bitmap import SamplesBitmap
 from datasets_synchronization.models import CGDSStudy, CGDSDataset, SurvivalColumnsTupleCGDSDataset, \
     SurvivalColumnsTupleUserFile
 from genes.models import Gene
 from statistical_properties.survival_functions import generate_survival_groups_by_median_expression
 from tags.models import Tag
-from user_files.models import UserFile
+from user_files.models import UserFile, get_samples_bitmap_from_barcodes
 from user_files.models_choices import FileType
 from user_files.serializers import SurvivalColumnsTupleUserFileSimpleSerializer
 from user_files.utils import get_invalid_format_response
@@ -353,21 +355,21 @@ def get_correlation_graph_action(request):
     return encode_json_response_status(response)
 
 
-def get_samples_list(
+def get_source_dataset(
         id_source: int,
         type_source: Optional[SourceType],
         file_type: Optional[FileType],
         user
-) -> Tuple[Optional[List[str]], Optional[Dict]]:
+) -> Tuple[Optional[Union[UserFile, CGDSDataset]], Optional[Dict]]:
     """
-    Gets a DataFrame from the file retrieve from DB or MongoDB with an id and SourceType.
+    Gets the UserFile or CGDSDataset from DB with an id and SourceType.
     @param id_source: ID of the UserFile/CGDSDataset to retrieve.
     @param type_source: Source type to check if it's a UserFile or a CGDSDataset.
     @param file_type: FileType (mRNA, miRNA, etc.) to get the corresponding CGDSDataset.
     @param user: Current logged user to retrieve only his datasets.
-    @return: A DataFrame (if corresponds) and a Response dict (the dataset doesn't exist).
+    @return: The dataset (if corresponds) and a Response dict (the dataset doesn't exist).
     """
-    list_of_samples = None
+    dataset = None
     response = None
     if type_source is None:
         response = {
@@ -379,8 +381,7 @@ def get_samples_list(
         }
     elif type_source == SourceType.UPLOADED_DATASETS:
         try:
-            user_file = get_an_user_file(user=user, user_file_pk=id_source)
-            list_of_samples = user_file.get_column_names()
+            dataset = get_an_user_file(user=user, user_file_pk=id_source)
         except UserFile.DoesNotExist:
             response = {
                 'status': ResponseStatus(
@@ -395,9 +396,7 @@ def get_samples_list(
             cgds_study = CGDSStudy.objects.get(pk=id_source)
 
             # Gets the corresponding Study's Dataset
-            cgds_dataset = get_cgds_dataset(cgds_study, file_type)
-
-            list_of_samples = cgds_dataset.get_column_names()
+            dataset = get_cgds_dataset(cgds_study, file_type)
         except CGDSDataset.DoesNotExist:
             response = {
                 'status': ResponseStatus(
@@ -407,9 +406,48 @@ def get_samples_list(
                 ),
             }
 
+    return dataset, response
+
+
+def get_samples_list(
+        id_source: int,
+        type_source: Optional[SourceType],
+        file_type: Optional[FileType],
+        user
+) -> Tuple[Optional[List[str]], Optional[Dict]]:
+    """
+    Gets the list of columns' names of the file retrieve from DB or MongoDB with an id and SourceType.
+    @param id_source: ID of the UserFile/CGDSDataset to retrieve.
+    @param type_source: Source type to check if it's a UserFile or a CGDSDataset.
+    @param file_type: FileType (mRNA, miRNA, etc.) to get the corresponding CGDSDataset.
+    @param user: Current logged user to retrieve only his datasets.
+    @return: A list of columns' names (if corresponds) and a Response dict (the dataset doesn't exist).
+    """
+    dataset, response = get_source_dataset(id_source, type_source, file_type, user)
+    list_of_samples = dataset.get_column_names() if dataset is not None else None
     return list_of_samples, response
 
 
+def get_samples_bitmap(
+        id_source: int,
+        type_source: Optional[SourceType],
+        file_type: Optional[FileType],
+        user
+) -> Tuple[Optional[SamplesBitmap], Optional[Dict]]:
+    """
+    Gets the SamplesBitmap of a UserFile/CGDSDataset with an id and SourceType. The bitmap is stored in the DB, so the
+    file or MongoDB collection is read only the first time.
+    @param id_source: ID of the UserFile/CGDSDataset to retrieve.
+    @param type_source: Source type to check if it's a UserFile or a CGDSDataset.
+    @param file_type: FileType (mRNA, miRNA, etc.) to get the corresponding CGDSDataset.
+    @param user: Current logged user to retrieve only his datasets.
+    @return: A SamplesBitmap (if corresponds) and a Response dict (the dataset doesn't exist).
+    """
+    dataset, response = get_source_dataset(id_source, type_source, file_type, user)
+    bitmap = dataset.get_samples_bitmap() if dataset is not None else None
+    return bitmap, response
+
+
 @login_required
 def get_number_samples_in_common_action(request):
     """Gets the number of in common samples between two datasets"""
@@ -436,8 +474,8 @@ def get_number_samples_in_common_action(request):
         gem_source_id = int(gem_source_id)
         gem_source_type = get_enum_from_value(int(gem_source_type), SourceType)
 
-        # Gets df
-        samples_list_mrna, response = get_samples_list(
+        # Gets the samples bitmaps (no need to read the datasets)
+        samples_bitmap_mrna, response = get_samples_bitmap(
             mrna_source_id,
             mrna_source_type,
             FileType.MRNA,
@@ -447,24 +485,23 @@ def get_number_samples_in_common_action(request):
         # Response will be != None if an error occurred
         gem_file_type_enum = get_enum_from_value(int(gem_file_type), FileType)
         if response is None:
-            samples_list_gem, response = get_samples_list(
+            samples_bitmap_gem, response = get_samples_bitmap(
                 gem_source_id,
                 gem_source_type,
                 gem_file_type_enum,
                 request.user
             )
 
-            # Gets intersection
-            intersection = get_intersection(
-                samples_list_mrna, samples_list_gem)
-
             if response is None:
+                # Gets intersection
+                intersection = samples_bitmap_mrna & samples_bitmap_gem
+
                 response = {
                     'status': ResponseStatus(ResponseCode.SUCCESS),
                     'data': {
-                        'number_samples_mrna': len(samples_list_mrna) if samples_list_mrna is not None else 0,
-                        'number_samples_gem': len(samples_list_gem) if samples_list_gem is not None else 0,
-                        'number_samples_in_common': intersection.size
+                        'number_samples_mrna': len(samples_bitmap_mrna),
+                        'number_samples_gem': len(samples_bitmap_gem),
+                        'number_samples_in_common': len(intersection)
                     }
                 }
 
@@ -495,8 +532,8 @@ def get_number_samples_in_common_action_one_front(request):
         other_source_type = get_enum_from_value(
             int(other_source_type), SourceType)
 
-        # Gets df
-        samples_list_1, response = get_samples_list(
+        # Gets the samples bitmap (no need to read the dataset)
+        samples_bitmap_1, response = get_samples_bitmap(
             other_source_id,
             other_source_type,
             FileType.MRNA,
@@ -505,13 +542,14 @@ def get_number_samples_in_common_action_one_front(request):
 
         # Response will be != None if an error occurred
         if response is None:
-            intersection: np.ndarray = get_intersection(
-                samples_list_1, headers_in_front)
+            # Headers which are not in the registry can't be in common with the dataset, so they are not registered
+            headers_bitmap = get_samples_bitmap_from_barcodes(headers_in_front, register=False)
+            intersection = samples_bitmap_1 & headers_bitmap
             response = {
                 'status': ResponseStatus(ResponseCode.SUCCESS),
                 'data': {
-                    'number_samples_backend': len(samples_list_1) if samples_list_1 else 0,
-                    'number_samples_in_common': intersection.size
+                    'number_samples_backend': len(samples_bitmap_1),
+                    'number_samples_in_common': len(intersection)
                 }
             }
 
@@ -519,6 +557,58 @@ def get_number_samples_in_common_action_one_front(request):
     return encode_json_response_status(response)
 
 
+@login_required
+def get_number_of_molecules_kept_action(request):
+    """
+    Gets the number of molecules of a dataset which are kept with a specific minimum standard deviation (computed over
+    all the samples of the dataset with the statistics stored at ingestion time)
+    """
+    source_id = request.GET.get('sourceId')
+    source_type = request.GET.get('sourceType')
+    file_type = request.GET.get('fileType')
+    minimum_std = request.GET.get('minimumStd')
+
+    if None in [source_id, source_type, file_type, minimum_std]:
+        response = {
+            'status': ResponseStatus(
+                ResponseCode.ERROR,
+                message='Invalid request params',
+                internal_code=CommonSamplesStatusErrorCode.INVALID_PARAMS
+            ),
+        }
+    else:
+        # Cast parameters
+        source_id = int(source_id)
+        source_type = get_enum_from_value(int(source_type), SourceType)
+        file_type = get_enum_from_value(int(file_type), FileType)
+        minimum_std = float(minimum_std)
+
+        dataset, response = get_source_dataset(source_id, source_type, file_type, request.user)
+
+        # Response will be != None if an error occurred
+        if response is None:
+            stats_df = dataset.get_molecules_stats(compute_if_missing=True)
+            if stats_df is None:
+                response = {
+                    'status': ResponseStatus(
+                        ResponseCode.ERROR,
+                        message='The dataset does not have molecules statistics',
+                        internal_code=CommonSamplesStatusErrorCode.INVALID_PARAMS
+                    ),
+                }
+            else:
+                response = {
+                    'status': ResponseStatus(ResponseCode.SUCCESS),
+                    'data': {
+                        'number_of_molecules': stats_df.shape[0],
+                        'number_of_molecules_kept': get_number_of_molecules_kept(stats_df, minimum_std)
+                    }
+                }
+
+    # Formats to JSON the ResponseStatus object
+    return encode_json_response_status(response)
+
+
 @login_required
 def mirna_data_action(request):
     """Gets miRNA data from Modulector"""
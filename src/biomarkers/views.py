@@ -11,11 +11,13 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from api_service.mrna_service import global_mrna_service
+from api_service.standard_symbols import get_standard_symbols
 from biomarkers.models import Biomarker, BiomarkerState, BiomarkerOrigin, MoleculeIdentifier
 from biomarkers.serializers import BiomarkerSerializer, MoleculeIdentifierSerializer, \
     BiomarkerSimpleSerializer, BiomarkerSimpleUpdateSerializer
 from common.pagination import StandardResultsSetPagination
 from common.response import generate_json_response_or_404
+from genes.models import StandardSymbolSource
 from django.db.models import QuerySet
 
 
@@ -134,13 +136,17 @@ def biomarkers_action(request):
 
 
 def get_gene_aliases(genes_ids: List[str]) -> Optional[Dict]:
-    """Get the aliases for a list of genes from BioAPI"""
-    return global_mrna_service.get_bioapi_service_content(
-        'gene-symbols',
-        request_params={'gene_ids': genes_ids},
-        is_paginated=False,
-        method='post'
-    )
+    """
+    Get the aliases for a list of genes from BioAPI (reusing the stored ones, see get_standard_symbols()). Genes that
+    were not found have an empty list of aliases
+    """
+    if not isinstance(genes_ids, list):
+        return None
+
+    aliases = get_standard_symbols(StandardSymbolSource.BIOAPI, genes_ids)
+    if aliases is None:
+        return None
+    return {gene: aliases.get(gene, []) for gene in genes_ids}
 
 def find_genes_from_request(request: Request) -> List[Dict]:
     """
@@ -150,7 +156,7 @@ def find_genes_from_request(request: Request) -> List[Dict]:
     genes_found = global_mrna_service.get_bioapi_service_content('gene-symbols-finder',
                                                                  request.GET, is_paginated=False)
     aliases = get_gene_aliases(genes_found)
-    return [{'molecule': gene, 'standard': aliases.get(gene, [None])[0]} for gene in genes_found]
+    return [{'molecule': gene, 'standard': (aliases.get(gene) or [None])[0]} for gene in genes_found]
 
 
 class GeneSymbols(APIView):
@@ -177,13 +183,17 @@ class MiRNACodes(APIView):
 
     @staticmethod
     def __get_mirna_aliases(mirna_codes: List[str]) -> Optional[Dict]:
-        """Get the aliases for a list of miRNAs through Modulector"""
-        return global_mrna_service.get_modulector_service_content(
-            'mirna-codes',
-            request_params={'mirna_codes': mirna_codes},
-            is_paginated=False,
-            method='post'
-        )
+        """
+        Get the aliases for a list of miRNAs through Modulector (reusing the stored ones, see get_standard_symbols()).
+        miRNAs that were not found have a null alias
+        """
+        if not isinstance(mirna_codes, list):
+            return None
+
+        aliases = get_standard_symbols(StandardSymbolSource.MODULECTOR, mirna_codes)
+        if aliases is None:
+            return None
+        return {mirna: aliases.get(mirna) for mirna in mirna_codes}
 
     def get(self, request):
         """Generates a query to search miRNAs through Modulector"""
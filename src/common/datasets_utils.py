@@ -1,15 +1,19 @@
+import logging
 import os
 import tempfile
 import numpy as np
-from typing import Union, Optional, cast, List, Literal, Tuple, Any
+from typing import Union, Optional, cast, List, Literal, Tuple, Any, Iterator
 import pandas as pd
+from api_service.exceptions import CollectionReplaced
 from api_service.models import ExperimentSource
+from common.samples_bitmap import SamplesBitmap
 from common.exceptions import NoSamplesInCommon, NumberOfSamplesFewerThanCVFolds, NoValidMoleculesForModel, EmptyDataset
 from datasets_synchronization.models import SurvivalColumnsTupleCGDSDataset, SurvivalColumnsTupleUserFile
 from feature_selection.fs_algorithms import SurvModel
 from feature_selection.models import FSExperiment, TrainedModel
 from inferences.models import InferenceExperiment
 from statistical_properties.models import StatisticalValidation
+from user_files.models import get_samples_barcodes
 from user_files.models_choices import FileType
 
 # Axis to remove invalid values from Pandas DataFrames
@@ -32,48 +36,27 @@ def create_folder_with_permissions(dir_path: str):
     os.chmod(dir_path, mode)  # Mode in mkdir is sometimes ignored: https://stackoverflow.com/a/5231994/7058363
 
 
-def get_samples_intersection(source: ExperimentSource, last_intersection: np.ndarray) -> np.ndarray:
-    """
-    Gets the intersection of the samples of the current source with the last intersection.
-    @param source: Source to get the samples from.
-    @param last_intersection: Last intersection of samples.
-    @return: Intersection of the samples of the current source with the last intersection.
-    """
-    # Clean all the samples name to prevent issues with CGDS suffix
-    current_samples = source.get_samples()
-
-    if last_intersection is not None:
-        cur_intersection = np.intersect1d(
-            last_intersection,
-            current_samples
-        )
-    else:
-        cur_intersection = np.array(current_samples)
-    last_intersection = cast(np.ndarray, cur_intersection)
-    return last_intersection
-
-
 def get_common_samples(experiment: ExperimentObjType) -> np.ndarray:
     """
     Gets a sorted Numpy array with the samples ID in common between both ExperimentSources.
     @param experiment: Feature Selection experiment.
     @return: Sorted Numpy array with the samples in common
     """
-    # NOTE: the intersection is already sorted by Numpy
-    last_intersection: Optional[np.ndarray] = None
-
+    # Intersects the samples bitmaps (computed only once per dataset) without reading the datasets
+    intersection: Optional[SamplesBitmap] = None
     for source in experiment.get_all_sources():
         if source is None:
             continue
 
-        last_intersection = get_samples_intersection(source, last_intersection)
+        source_bitmap = source.get_samples_bitmap()
+        intersection = source_bitmap if intersection is None else intersection & source_bitmap
 
     # Checks empty intersection
-    last_intersection = cast(np.ndarray, last_intersection)
-    if last_intersection.size == 0:
+    if intersection is None or len(intersection) == 0:
         raise NoSamplesInCommon
 
-    return last_intersection
+    # NOTE: the barcodes are sorted as the previous Numpy intersection
+    return get_samples_barcodes(intersection)
 
 
 def __process_chunk(chunk: pd.DataFrame, file_type: FileType, molecules: List[str],
@@ -141,10 +124,27 @@ def generate_clinical_file(experiment: ExperimentObjType, samples_in_common: np.
     return clinical_temp_file_path
 
 
+def __get_processed_chunks(source: ExperimentSource, file_type: FileType, molecules: List[str],
+                           samples_in_common: np.ndarray) -> Iterator[pd.DataFrame]:
+    """
+    Reads a source in chunks and processes them with __process_chunk().
+    @param source: Source to read.
+    @param file_type: Source's file type.
+    @param molecules: Molecules to keep.
+    @param samples_in_common: Samples in common between all the sources.
+    @return: Iterator of the processed chunks.
+    @raise CollectionReplaced If the source's collection is replaced while it's being read.
+    """
+    only_matching = file_type in [FileType.MRNA, FileType.CNA]  # Only genes must be disambiguated
+    for chunk in source.get_df_in_chunks(only_matching=only_matching):
+        yield __process_chunk(chunk, file_type, molecules, samples_in_common)
+
+
 def generate_molecules_dataframe(experiment: ExperimentObjType, samples_in_common: np.ndarray) -> pd.DataFrame:
     """
     Generates the molecules DataFrame for a specific InferenceExperiment, FSExperiment or StatisticalValidation
-    with the samples in common.
+    with the samples in common. If a source's collection is replaced (i.e. the dataset is re-synchronized) while it's
+    being read, the source is read again from the new collection.
     @param experiment: Instance to get the sources from.
     @param samples_in_common: Samples in common between all the sources.
     @return: Molecules Pandas DataFrame.
@@ -154,11 +154,12 @@ def generate_molecules_dataframe(experiment: ExperimentObjType, samples_in_commo
         if source is None:
             continue
 
-        only_matching = file_type in [FileType.MRNA, FileType.CNA]  # Only genes must be disambiguated
-        chunks.extend([
-            __process_chunk(chunk, file_type, molecules, samples_in_common)
-            for chunk in source.get_df_in_chunks(only_matching)
-        ])
+        try:
+            source_chunks = list(__get_processed_chunks(source, file_type, molecules, samples_in_common))
+        except CollectionReplaced as ex:
+            logging.warning(f'{ex}. Reading it again')
+            source_chunks = list(__get_processed_chunks(source, file_type, molecules, samples_in_common))
+        chunks.extend(source_chunks)
 
     # Concatenates all the chunks for all the molecules
     return pd.concat(chunks, axis=0, sort=False)
@@ -167,7 +168,9 @@ def generate_molecules_dataframe(experiment: ExperimentObjType, samples_in_commo
 def generate_molecules_file(experiment: ExperimentObjType, samples_in_common: np.ndarray) -> str:
     """
     Generates the molecules DataFrame for a specific InferenceExperiment, FSExperiment or StatisticalValidation
-    with the samples in common and saves it in disk.
+    with the samples in common and saves it in disk. If a source's collection is replaced (i.e. the dataset is
+    re-synchronized) while it's being read, the rows already saved from that source are removed and it's read again
+    from the new collection.
     @param experiment: Instance to get the sources from.
     @param samples_in_common: Samples in common between all the sources.
     @return: Molecules file path saved in disk.
@@ -180,12 +183,17 @@ def generate_molecules_file(experiment: ExperimentObjType, samples_in_common: np
             if source is None:
                 continue
 
-            only_matching = file_type in [FileType.MRNA, FileType.CNA]  # Only genes must be disambiguated
-            for chunk in source.get_df_in_chunks(only_matching=only_matching):
-                chunk = __process_chunk(chunk, file_type, molecules, samples_in_common)
-
-                # Saves in disk
-                chunk.to_csv(temp_file, header=temp_file.tell() == 0, sep='\t', decimal='.')
+            source_start = temp_file.tell()
+            try:
+                for chunk in __get_processed_chunks(source, file_type, molecules, samples_in_common):
+                    # Saves in disk
+                    chunk.to_csv(temp_file, header=temp_file.tell() == 0, sep='\t', decimal='.')
+            except CollectionReplaced as ex:
+                logging.warning(f'{ex}. Reading it again')
+                temp_file.seek(source_start)
+                temp_file.truncate()
+                for chunk in __get_processed_chunks(source, file_type, molecules, samples_in_common):
+                    chunk.to_csv(temp_file, header=temp_file.tell() == 0, sep='\t', decimal='.')
 
     return molecules_temp_file_path
 
@@ -217,21 +225,33 @@ def clinical_df_to_struct_array(clinical_df: pd.DataFrame) -> np.ndarray:
     return clinical_data
 
 
+def read_dataset_file(file_path: str) -> pd.DataFrame:
+    """
+    Reads a dataset generated to run the FS experiments. Files with the '.parquet' extension are read as Parquet files,
+    the rest as tab separated CSV files.
+    @param file_path: Dataset's file path.
+    @return: The dataset as a Pandas DataFrame with the first column as index.
+    """
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path)
+    return pd.read_csv(file_path, sep='\t', decimal='.', index_col=0)
+
+
 def format_data(molecules_temp_file_path: str, clinical_temp_file_path: str,
                 is_regression: bool) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
     """
     Reads both molecules and clinical data and formats them to be used in the models: replaces NaNs values, removes
     0 values (if needed), and removes inconsistencies where the event occurred but there's no time data. Always keeping
     the samples in common after filtering.
-    @param molecules_temp_file_path: Molecular data file path.
-    @param clinical_temp_file_path: Clinical data file path.
+    @param molecules_temp_file_path: Molecular data file path (CSV or Parquet, see read_dataset_file()).
+    @param clinical_temp_file_path: Clinical data file path (CSV or Parquet, see read_dataset_file()).
     @param is_regression: Whether the experiment is a regression or not. In case it's a regression task, removes the
     samples with time == 0.
     @return: Molecules as Pandas DataFrame and the clinical data as a Pandas DataFrame and as a Numpy structured array.
     """
     # Gets molecules and clinical DataFrames
-    molecules_df = pd.read_csv(molecules_temp_file_path, sep='\t', decimal='.', index_col=0)
-    clinical_df = pd.read_csv(clinical_temp_file_path, sep='\t', decimal='.', index_col=0)
+    molecules_df = read_dataset_file(molecules_temp_file_path)
+    clinical_df = read_dataset_file(clinical_temp_file_path)
 
     # NOTE: The event and time columns are ALWAYS the first and second one at this point
     event_column, time_column = clinical_df.columns.tolist()
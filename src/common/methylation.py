@@ -1,15 +1,23 @@
-from typing import Optional, List
+import logging
+from typing import Optional, List, Dict
 from django.db import models
+import numpy as np
 import pandas as pd
 import os
 import re
-from common.constants import PLATFORM_CG_INDEX_NAME, PLATFORM_CG_GENE_COLUMN_NAME, PLATFORM_CG_INDEX_NAME_FINAL, \
-    GEM_INDEX_NAME
+from common.constants import PLATFORM_CG_INDEX_NAME, PLATFORM_CG_GENE_COLUMN_NAME, PLATFORM_CG_INDEX_NAME_FINAL
 
 # Compiles frequent regex to improve performance
 CPG_REGEX_COMPILED = re.compile(r'cg[\d]+')
 GENE_REGEX_COMPILED = re.compile(r'\([a-zA-Z0-9]+\)')
 
+# Gene assigned to the CpG Site IDs without gene in the platform
+MISSING_GENE_VALUE = '-'
+
+# Version of the format of the platforms' Parquet sidecar files. Must be incremented when __read_platform_csv() changes
+# so the sidecar files generated by previous versions are not used
+PLATFORM_SIDECAR_VERSION = 2
+
 
 # TODO: move this class to a general structure in the future in Methylation type entity
 class MethylationPlatform(models.IntegerChoices):
@@ -18,28 +26,90 @@ class MethylationPlatform(models.IntegerChoices):
     PLATFORM_450 = 450
 
 
-def get_methylation_platform_dataframe(platform: MethylationPlatform) -> Optional[pd.DataFrame]:
+# Compact CpG -> gene mapping of every platform already loaded in the current process
+__platforms_cache: Dict[MethylationPlatform, pd.DataFrame] = {}
+
+
+def __get_platform_file_name(platform: MethylationPlatform) -> Optional[str]:
     """
-    Gets a DataFrame with CpG site IDs as index and the corresponding gene as column
+    Gets the file's name (without extension) of a Methylation's platform
     @param platform: Platform to retrieve
-    @return: Pandas DataFrame of the corresponding Methylation's platform
+    @return: File's name or None if the platform is not supported
     """
-    file_name = None  # File's name without extension
     if platform == MethylationPlatform.PLATFORM_450:
-        file_name = 'Platform450'
+        return 'Platform450'
+    return None
 
-    if file_name is None:
-        return None
 
-    # Get in relative folder
-    dir_name = os.path.dirname(__file__)
-    file_path = os.path.join(dir_name, f'methylation_platforms/{file_name}.csv')
+def __read_platform_csv(file_path: str) -> pd.DataFrame:
+    """
+    Reads the original platform CSV and converts it to a compact mapping: a CpG site ID index and a categorical gene
+    column where the CpG site IDs without gene are '-'. CpG site IDs with several genes keep a row for every gene
+    @param file_path: Platform CSV file path
+    @return: Pandas DataFrame with the compact mapping
+    """
     platform_df = pd.read_csv(file_path, sep=None, engine='python', index_col=0)
 
     # Renames for generalization
     platform_df.index.rename(PLATFORM_CG_INDEX_NAME, inplace=True)
     platform_df.rename(columns={platform_df.columns[0]: PLATFORM_CG_GENE_COLUMN_NAME}, inplace=True)
 
+    # Only the gene column is used
+    platform_df = platform_df[[PLATFORM_CG_GENE_COLUMN_NAME]].copy()
+    platform_df[PLATFORM_CG_GENE_COLUMN_NAME] = platform_df[PLATFORM_CG_GENE_COLUMN_NAME] \
+        .fillna(MISSING_GENE_VALUE).astype(str).astype('category')
+    return platform_df
+
+
+def __load_platform_df(file_name: str) -> pd.DataFrame:
+    """
+    Loads the compact mapping of a platform. It's read from a Parquet sidecar file next to the CSV which is generated
+    the first time (or when the CSV is modified). If the sidecar can't be written, the CSV is used.
+    @param file_name: Platform's file name without extension
+    @return: Pandas DataFrame with the compact mapping
+    """
+    # Get in relative folder
+    dir_name = os.path.dirname(__file__)
+    file_path = os.path.join(dir_name, f'methylation_platforms/{file_name}.csv')
+    sidecar_path = os.path.join(dir_name, f'methylation_platforms/{file_name}.v{PLATFORM_SIDECAR_VERSION}.parquet')
+
+    if os.path.exists(sidecar_path) and os.path.getmtime(sidecar_path) >= os.path.getmtime(file_path):
+        try:
+            return pd.read_parquet(sidecar_path)
+        except Exception as ex:
+            logging.warning(f'Error reading Methylation platform sidecar file "{sidecar_path}": {ex}')
+
+    platform_df = __read_platform_csv(file_path)
+
+    # Writes in a temporary file and renames it to prevent other processes from reading an incomplete file
+    temp_sidecar_path = f'{sidecar_path}.{os.getpid()}.tmp'
+    try:
+        platform_df.to_parquet(temp_sidecar_path)
+        os.replace(temp_sidecar_path, sidecar_path)
+    except Exception as ex:
+        logging.warning(f'Error writing Methylation platform sidecar file "{sidecar_path}": {ex}')
+        if os.path.exists(temp_sidecar_path):
+            os.remove(temp_sidecar_path)
+
+    return platform_df
+
+
+def get_methylation_platform_dataframe(platform: MethylationPlatform) -> Optional[pd.DataFrame]:
+    """
+    Gets a DataFrame with CpG site IDs as index and the corresponding gene as a categorical column. The
+    platform is loaded only once per process, so the returned DataFrame is shared and MUST NOT be modified
+    @param platform: Platform to retrieve
+    @return: Pandas DataFrame of the corresponding Methylation's platform
+    """
+    if platform in __platforms_cache:
+        return __platforms_cache[platform]
+
+    file_name = __get_platform_file_name(platform)  # File's name without extension
+    if file_name is None:
+        return None
+
+    platform_df = __load_platform_df(file_name)
+    __platforms_cache[platform] = platform_df
     return platform_df
 
 
@@ -60,28 +130,34 @@ def map_cpg_to_genes_df(
     df_platform: pd.DataFrame
 ) -> pd.DataFrame:
     """
-    Makes the mapping from CpG to Genes using an specific platform
+    Makes the mapping from CpG to Genes using an specific platform. CpG Site IDs which are not in the platform are
+    mapped to '-'. CpG Site IDs with several genes in the platform get a row for every gene (in the platform's order)
     @param df_source: DataFrame with CpG site IDs
     @param df_platform: Specific platform DataFrame
     @return: DataFrame with the first column as index, the second one as CpG index and the rest as the samples
     """
-    # Merges to get, for every CpG Site ID, the corresponding gene
-    result = df_source.reset_index().merge(
-        df_platform.reset_index(),
-        how='left',
-        left_on=GEM_INDEX_NAME,
-        right_on=PLATFORM_CG_INDEX_NAME
-    )
-
-    # Fills NaN values (missing gene for current CpG Site ID) with '-'
-    result = result.fillna(value={PLATFORM_CG_GENE_COLUMN_NAME: '-'})
-
-    # Set gene column as index, removes redundant CpG Site ID column (created during merge) and renames CpG Site ID
-    # column name
-    result = result.set_index(PLATFORM_CG_GENE_COLUMN_NAME)
-    result = result.drop(PLATFORM_CG_INDEX_NAME, axis=1)
-    first_column = result.columns[0]
-    result = result.rename(columns={first_column: PLATFORM_CG_INDEX_NAME_FINAL})
+    genes = df_platform[PLATFORM_CG_GENE_COLUMN_NAME]
+    if not isinstance(genes.dtype, pd.CategoricalDtype):
+        genes = genes.astype('category')
+
+    # Looks up the position of every CpG Site ID in the platform's (hashed) index. The position -1 (missing CpG Site
+    # ID) gets the last element of the codes, which points to the '-' gene
+    categories = np.append(genes.cat.categories.to_numpy(dtype=object), MISSING_GENE_VALUE)
+    codes = np.append(genes.cat.codes.to_numpy(), len(categories) - 1)
+    codes[codes == -1] = len(categories) - 1  # NaN genes
+
+    result = df_source.reset_index()
+    if df_platform.index.is_unique:
+        positions = df_platform.index.get_indexer(df_source.index)
+    else:
+        # Gets all the positions of every CpG Site ID (one for the missing ones) and repeats its row for every gene
+        positions, _missing = df_platform.index.get_indexer_non_unique(df_source.index)
+        n_genes = df_platform.index.value_counts().reindex(df_source.index, fill_value=0).to_numpy()
+        result = result.iloc[np.repeat(np.arange(result.shape[0]), np.maximum(n_genes, 1))]
+
+    # Sets gene column as index and keeps the CpG Site ID as the first column
+    result = result.rename(columns={result.columns[0]: PLATFORM_CG_INDEX_NAME_FINAL})
+    result.index = pd.Index(categories[codes[positions]], name=PLATFORM_CG_GENE_COLUMN_NAME)
 
     return result
 
@@ -0,0 +1,125 @@
+import logging
+import os
+from typing import Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+# Columns of the per-molecule statistics
+MOLECULES_STATS_MEAN = 'mean'
+MOLECULES_STATS_STD = 'std'
+MOLECULES_STATS_NAN_COUNT = 'nan_count'
+
+# Relative tolerance applied to the stored standard deviations when they are compared with the minimum std. The
+# experiment computes the std with the columns in another order, so the last digits could be slightly different
+STD_RELATIVE_TOLERANCE = 1e-9
+
+
+def __get_molecules_stats_file_path(file_name: str) -> str:
+    """
+    Gets the path of a molecules statistics file
+    @param file_name: File's name (without folder)
+    @return: Absolute file path inside MEDIA_ROOT/MOLECULES_STATS_FOLDER
+    """
+    return os.path.join(settings.MEDIA_ROOT, settings.MOLECULES_STATS_FOLDER, file_name)
+
+
+def compute_molecules_stats(chunks: Iterable[pd.DataFrame], samples: List[str]) -> pd.DataFrame:
+    """
+    Computes the mean, standard deviation (same ddof as the experiments' filter) and number of NaN values of every
+    molecule (row) over all the samples of a dataset
+    @param chunks: Dataset's chunks with the molecules as index
+    @param samples: Samples (columns) to consider. The rest of the columns (e.g. the molecule symbol) are ignored
+    @return: DataFrame with the molecules as index and the mean, std and nan_count columns
+    """
+    stats_chunks: List[pd.DataFrame] = []
+    for chunk in chunks:
+        values = chunk[samples].apply(pd.to_numeric, errors='coerce')
+        stats_chunks.append(pd.DataFrame({
+            MOLECULES_STATS_MEAN: values.mean(axis=1),
+            MOLECULES_STATS_STD: values.std(axis=1),
+            MOLECULES_STATS_NAN_COUNT: values.isnull().sum(axis=1).astype(np.int32)
+        }))
+
+    if not stats_chunks:
+        return pd.DataFrame(columns=[MOLECULES_STATS_MEAN, MOLECULES_STATS_STD, MOLECULES_STATS_NAN_COUNT])
+
+    stats_df = pd.concat(stats_chunks)
+    stats_df.index = stats_df.index.astype(str)
+    return stats_df
+
+
+def save_molecules_stats(stats_df: pd.DataFrame, file_name: str):
+    """
+    Stores the molecules statistics of a dataset as a Parquet file
+    @param stats_df: DataFrame generated by compute_molecules_stats()
+    @param file_name: File's name (without folder)
+    """
+    file_path = __get_molecules_stats_file_path(file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    stats_df.to_parquet(file_path)
+
+
+def read_molecules_stats(file_name: str) -> Optional[pd.DataFrame]:
+    """
+    Reads the molecules statistics of a dataset
+    @param file_name: File's name (without folder)
+    @return: DataFrame generated by compute_molecules_stats() or None if it was not computed (or can't be read)
+    """
+    file_path = __get_molecules_stats_file_path(file_name)
+    if not os.path.exists(file_path):
+        return None
+
+    try:
+        return pd.read_parquet(file_path)
+    except Exception as ex:
+        logging.warning(f'Error reading molecules statistics file "{file_path}": {ex}')
+        return None
+
+
+def remove_molecules_stats(file_name: str):
+    """
+    Removes the molecules statistics of a dataset (if exists)
+    @param file_name: File's name (without folder)
+    """
+    file_path = __get_molecules_stats_file_path(file_name)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+
+
+def __get_kept_mask(stats_df: pd.DataFrame, minimum_std: float, tolerance: float) -> pd.Series:
+    """
+    Gets which molecules are kept by the experiments' filter: rows without NaNs and, if a minimum std is specified,
+    with a standard deviation greater or equal than it
+    """
+    kept = stats_df[MOLECULES_STATS_NAN_COUNT] == 0
+    if minimum_std:
+        kept &= stats_df[MOLECULES_STATS_STD] >= minimum_std * (1 - tolerance)
+    return kept
+
+
+def get_number_of_molecules_kept(stats_df: pd.DataFrame, minimum_std: float) -> int:
+    """
+    Computes the number of molecules which are kept with a specific minimum standard deviation considering all the
+    samples of the dataset
+    @param stats_df: DataFrame generated by compute_molecules_stats()
+    @param minimum_std: Minimum standard deviation
+    @return: Number of molecules kept
+    """
+    return int(__get_kept_mask(stats_df, minimum_std, tolerance=0.0).sum())
+
+
+def get_molecules_to_skip(stats_df: pd.DataFrame, minimum_std: float) -> pd.Index:
+    """
+    Gets the molecules which would be removed by the experiments' filter (NaN values or std lower than minimum_std),
+    so they don't need to be fetched. The statistics are computed over all the samples, so this is only valid if all
+    the samples of the dataset are used. A small tolerance is applied, so the filter must be applied to the fetched
+    rows anyway
+    @param stats_df: DataFrame generated by compute_molecules_stats()
+    @param minimum_std: Minimum standard deviation
+    @return: Index with the molecules to skip
+    """
+    kept = __get_kept_mask(stats_df, minimum_std, tolerance=STD_RELATIVE_TOLERANCE)
+
+    # Repeated molecules are skipped only if none of their rows is kept
+    return stats_df.index[~kept].unique().difference(stats_df.index[kept])
@@ -0,0 +1,76 @@
+import zlib
+from typing import Iterable, Optional
+import numpy as np
+
+
+class SamplesBitmap:
+    """
+    Compressed bitmap of a set of samples where the bit N is set if the sample with integer ID N (see the Sample
+    registry in user_files.models) is in the set. Intersections, unions and counts of the samples of any number of
+    datasets are bitwise operations over Python's arbitrary precision integers, so they don't need to read the datasets.
+    NOTE: this module must not import any Django model.
+    """
+    value: int  # Integer whose bits represent the samples IDs
+
+    def __init__(self, value: int = 0):
+        self.value = value
+
+    @staticmethod
+    def from_ids(ids: Iterable[int]) -> 'SamplesBitmap':
+        """
+        Generates a bitmap from a collection of samples IDs.
+        @param ids: Samples IDs (non-negative integers).
+        @return: Bitmap with the bits of the IDs set.
+        """
+        ids = np.fromiter(ids, dtype=np.int64)
+        if ids.size == 0:
+            return SamplesBitmap()
+
+        bits = np.zeros(int(ids.max()) + 1, dtype=bool)
+        bits[ids] = True
+        packed = np.packbits(bits, bitorder='little')
+        return SamplesBitmap(int.from_bytes(packed.tobytes(), byteorder='little'))
+
+    @staticmethod
+    def from_bytes(data: Optional[bytes]) -> 'SamplesBitmap':
+        """
+        Decompresses a bitmap generated with to_bytes().
+        @param data: Compressed bitmap. None or empty for an empty bitmap.
+        @return: Bitmap instance.
+        """
+        if not data:
+            return SamplesBitmap()
+        return SamplesBitmap(int.from_bytes(zlib.decompress(bytes(data)), byteorder='little'))
+
+    def to_bytes(self) -> bytes:
+        """
+        Compresses the bitmap to be stored in the DB. The IDs of a dataset are usually contiguous, so long runs of
+        zeroes and ones are compressed efficiently.
+        @return: Compressed bitmap.
+        """
+        n_bytes = (self.value.bit_length() + 7) // 8
+        return zlib.compress(self.value.to_bytes(n_bytes, byteorder='little'))
+
+    def ids(self) -> np.ndarray:
+        """
+        Gets the samples IDs of the bitmap.
+        @return: Sorted Numpy array with the IDs.
+        """
+        n_bytes = (self.value.bit_length() + 7) // 8
+        packed = np.frombuffer(self.value.to_bytes(n_bytes, byteorder='little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+
+    def __and__(self, other: 'SamplesBitmap') -> 'SamplesBitmap':
+        return SamplesBitmap(self.value & other.value)
+
+    def __or__(self, other: 'SamplesBitmap') -> 'SamplesBitmap':
+        return SamplesBitmap(self.value | other.value)
+
+    def __len__(self) -> int:
+        return self.value.bit_count()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, SamplesBitmap) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return hash(self.value)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from common import methylation
+from common.constants import GEM_INDEX_NAME, PLATFORM_CG_INDEX_NAME, PLATFORM_CG_GENE_COLUMN_NAME, \
+    PLATFORM_CG_INDEX_NAME_FINAL
+from common.methylation import map_cpg_to_genes_df
+
+# Private function of the module to read the platforms' CSV files
+read_platform_csv = getattr(methylation, '__read_platform_csv')
+
+# Platform with CpG Site IDs with several genes (cg03 and cg05), without gene (cg04) and duplicated rows (cg06)
+PLATFORM_CSV = """ID,UCSC_RefGene_Name
+cg01,BRCA1
+cg02,TP53
+cg03,EGFR
+cg04,
+cg03,KRAS
+cg05,MYC
+cg05,BRCA1
+cg05,TP53
+cg06,PTEN
+cg06,PTEN
+"""
+
+
+class MethylationMappingTestCase(SimpleTestCase):
+    platform_df: pd.DataFrame
+    source_df: pd.DataFrame
+
+    def setUp(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'Platform.csv')
+            with open(file_path, 'w') as fp:
+                fp.write(PLATFORM_CSV)
+            self.platform_df = read_platform_csv(file_path)
+
+        # Source with CpG Site IDs which are not in the platform (cg99) and repeated (cg01)
+        cpg_site_ids = ['cg05', 'cg01', 'cg99', 'cg03', 'cg04', 'cg06', 'cg02', 'cg01']
+        self.source_df = pd.DataFrame(
+            np.arange(len(cpg_site_ids) * 3, dtype=float).reshape(-1, 3),
+            index=pd.Index(cpg_site_ids, name=GEM_INDEX_NAME),
+            columns=['SAMPLE_1', 'SAMPLE_2', 'SAMPLE_3']
+        )
+
+    def __map_with_merge(self) -> pd.DataFrame:
+        """Maps the CpG Site IDs with the left merge used before the compact platforms."""
+        platform_df = self.platform_df.copy()
+        platform_df[PLATFORM_CG_GENE_COLUMN_NAME] = platform_df[PLATFORM_CG_GENE_COLUMN_NAME].astype(str) \
+            .replace(methylation.MISSING_GENE_VALUE, np.nan)
+        result = self.source_df.reset_index().merge(
+            platform_df.reset_index(),
+            how='left',
+            left_on=GEM_INDEX_NAME,
+            right_on=PLATFORM_CG_INDEX_NAME
+        )
+        result = result.fillna(value={PLATFORM_CG_GENE_COLUMN_NAME: '-'})
+        result = result.set_index(PLATFORM_CG_GENE_COLUMN_NAME)
+        result = result.drop(PLATFORM_CG_INDEX_NAME, axis=1)
+        return result.rename(columns={result.columns[0]: PLATFORM_CG_INDEX_NAME_FINAL})
+
+    def test_same_as_merge(self):
+        """Tests that the mapping keeps a row for every gene of the CpG Site IDs, as the previous merge."""
+        result = map_cpg_to_genes_df(self.source_df, self.platform_df)
+        expected = self.__map_with_merge()
+
+        pd.testing.assert_frame_equal(result, expected, check_index_type=False)
+        self.assertListEqual(result.loc[result[PLATFORM_CG_INDEX_NAME_FINAL] == 'cg05'].index.tolist(),
+                             ['MYC', 'BRCA1', 'TP53'])
+        self.assertListEqual(result.loc[result[PLATFORM_CG_INDEX_NAME_FINAL].isin(['cg99', 'cg04'])].index.tolist(),
+                             ['-', '-'])
+
+    def test_unique_platform(self):
+        """Tests the mapping with a platform with a gene per CpG Site ID."""
+        self.platform_df = self.platform_df[~self.platform_df.index.duplicated(keep='first')]
+        result = map_cpg_to_genes_df(self.source_df, self.platform_df)
+
+        pd.testing.assert_frame_equal(result, self.__map_with_merge(), check_index_type=False)
+        self.assertEqual(result.shape[0], self.source_df.shape[0])
+        self.assertListEqual(result.index.tolist(), ['MYC', 'BRCA1', '-', 'EGFR', '-', 'PTEN', 'TP53', 'BRCA1'])
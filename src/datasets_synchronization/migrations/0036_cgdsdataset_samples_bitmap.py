@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2024-07-02 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets_synchronization', '0035_auto_20230922_2356'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgdsdataset',
+            name='samples_bitmap',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+    ]
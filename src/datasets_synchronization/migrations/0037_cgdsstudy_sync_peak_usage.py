@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2024-07-08 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets_synchronization', '0036_cgdsdataset_samples_bitmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_peak_disk_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_peak_memory_bytes',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
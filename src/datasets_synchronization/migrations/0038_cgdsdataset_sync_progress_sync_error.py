@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2024-07-10 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets_synchronization', '0037_cgdsstudy_sync_peak_usage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgdsdataset',
+            name='sync_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cgdsdataset',
+            name='sync_progress',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='cgdsdataset',
+            name='state',
+            field=models.IntegerField(choices=[(0, 'Not Synchronized'), (1, 'Success'), (2, 'Finished With Error'), (3, 'File Does Not Exist'), (4, 'Could Not Save In Mongo'), (5, 'No Patient Id Column Found'), (6, 'In Process')], default=0),
+        ),
+    ]
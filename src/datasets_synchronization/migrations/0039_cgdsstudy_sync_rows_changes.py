@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2024-07-15 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datasets_synchronization', '0038_cgdsdataset_sync_progress_sync_error'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_rows_added',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_rows_changed',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_rows_removed',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='cgdsstudy',
+            name='sync_rows_unchanged',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Iterable, cast
+from typing import List, Iterable, Optional, cast
 from django.conf import settings
 from django.db import models, transaction
 import numpy as np
@@ -8,9 +8,13 @@ from api_service.exceptions import CouldNotDeleteInMongo
 from api_service.mongo_service import global_mongo_service
 from api_service.websocket_functions import send_update_cgds_studies_command
 from common.methylation import MethylationPlatform
-from user_files.models import UserFile
+from common.molecules_stats import compute_molecules_stats, save_molecules_stats, read_molecules_stats, \
+    remove_molecules_stats
+from common.samples_bitmap import SamplesBitmap
+from user_files.models import UserFile, get_samples_bitmap_from_barcodes
 from user_files.models_choices import FileType
-from pandas import DataFrame
+from pandas import DataFrame, Index
+from .rows_hashes import remove_rows_hashes
 
 
 class DatasetSeparator(models.TextChoices):
@@ -44,6 +48,7 @@ class CGDSDatasetSynchronizationState(models.IntegerChoices):
     FILE_DOES_NOT_EXIST = 3
     COULD_NOT_SAVE_IN_MONGO = 4
     NO_PATIENT_ID_COLUMN_FOUND = 5
+    IN_PROCESS = 6
 
 
 class CGDSDataset(models.Model):
@@ -66,6 +71,13 @@ class CGDSDataset(models.Model):
     is_cpg_site_id = models.BooleanField(blank=False, null=False, default=True)
     platform = models.IntegerField(choices=MethylationPlatform.choices, blank=True, null=True)
 
+    # Compressed SamplesBitmap of the columns' samples (not computed for clinical datasets). None if not computed yet
+    samples_bitmap = models.BinaryField(blank=True, null=True, editable=False)
+
+    # Progress (percentage) of the current/last synchronization and its error message (if any)
+    sync_progress = models.PositiveSmallIntegerField(default=0)
+    sync_error = models.TextField(blank=True, null=True)
+
     @property
     def file_type(self) -> FileType:
         if hasattr(self, 'mrna_dataset'):
@@ -108,6 +120,60 @@ class CGDSDataset(models.Model):
         self.number_of_rows = self.__get_row_count()
         self.number_of_samples = len(self.get_column_names())
 
+    def __compute_samples_bitmap(self) -> SamplesBitmap:
+        """Registers the samples of the dataset and computes its samples_bitmap field"""
+        bitmap = get_samples_bitmap_from_barcodes(self.get_column_names())
+        self.samples_bitmap = bitmap.to_bytes()
+        return bitmap
+
+    @property
+    def molecules_stats_file_name(self) -> str:
+        """File's name of the per-molecule statistics (see common.molecules_stats)"""
+        return f'cgds_dataset_{self.pk}.parquet'
+
+    @property
+    def rows_hashes_file_name(self) -> str:
+        """File's name of the rows' content hashes used in incremental syncs (see rows_hashes)"""
+        return f'cgds_dataset_{self.pk}_rows.parquet'
+
+    def __compute_molecules_stats(self) -> Optional[DataFrame]:
+        """
+        Computes and stores the per-molecule statistics over all the samples. Clinical datasets have the samples in
+        rows, so they don't have statistics
+        @return: DataFrame with the statistics or None if it's a clinical dataset
+        """
+        if self.file_type == FileType.CLINICAL:
+            return None
+
+        stats_df = compute_molecules_stats(self.get_df_in_chunks(), self.get_column_names())
+        save_molecules_stats(stats_df, self.molecules_stats_file_name)
+        return stats_df
+
+    def get_molecules_stats(self, compute_if_missing: bool = False) -> Optional[DataFrame]:
+        """
+        Gets the per-molecule statistics (mean, std and NaN count over all the samples) computed at synchronization
+        time
+        @param compute_if_missing: If True, computes them if they weren't computed (e.g. datasets synchronized before
+        the statistics were introduced)
+        @return: DataFrame with the statistics or None if they aren't available
+        """
+        stats_df = read_molecules_stats(self.molecules_stats_file_name)
+        if stats_df is None and compute_if_missing:
+            stats_df = self.__compute_molecules_stats()
+        return stats_df
+
+    def get_samples_bitmap(self) -> SamplesBitmap:
+        """
+        Gets the SamplesBitmap of the dataset's columns. It's computed (and stored) only the first time
+        @return: SamplesBitmap instance
+        """
+        if self.samples_bitmap is not None:
+            return SamplesBitmap.from_bytes(self.samples_bitmap)
+
+        bitmap = self.__compute_samples_bitmap()
+        CGDSDataset.objects.filter(pk=self.pk).update(samples_bitmap=self.samples_bitmap)
+        return bitmap
+
     def get_df(self, use_standard_column: bool = True, only_matching: bool = False) -> DataFrame:
         """
         Generates a DataFrame from a CGDSDataset's MongoDB collection
@@ -119,17 +185,20 @@ class CGDSDataset(models.Model):
         """
         return global_mongo_service.get_collection_as_df(self.mongo_collection_name, use_standard_column, only_matching)
 
-    def get_df_in_chunks(self, only_matching: bool = False) -> Iterable[DataFrame]:
+    def get_df_in_chunks(self, only_matching: bool = False,
+                         molecules_to_skip: Optional[Index] = None) -> Iterable[DataFrame]:
         """
         Returns an Iterator of a DataFrame in divided in chunks from a CGDSDataset's MongoDB collection
         @param only_matching: If True only returns the molecules that are equal in both columns MOLECULE_SYMBOL and
         STANDARD_SYMBOL.
+        @param molecules_to_skip: Molecules (STANDARD_SYMBOL) which are not retrieved (optional).
         @return: A DataFrame Iterator with the data to work
         """
         return global_mongo_service.get_collection_as_df_in_chunks(
             self.mongo_collection_name,
             chunk_size=settings.EXPERIMENT_CHUNK_SIZE,
-            only_matching=only_matching
+            only_matching=only_matching,
+            molecules_to_skip=molecules_to_skip
         )
 
     def get_row_indexes(self) -> List[str]:
@@ -148,8 +217,16 @@ class CGDSDataset(models.Model):
         # Computed number of rows and samples
         self.__compute_number_of_row_and_samples_and_save()
 
+        # Registers the samples and computes the statistics of every molecule (clinical datasets have the samples in
+        # rows and are joined in the experiments)
+        if self.file_type != FileType.CLINICAL:
+            self.__compute_samples_bitmap()
+            self.__compute_molecules_stats()
+        else:
+            self.samples_bitmap = None
+
         # Saves again with the new computed fields
-        super().save(update_fields=['number_of_rows', 'number_of_samples'])
+        super().save(update_fields=['number_of_rows', 'number_of_samples', 'samples_bitmap'])
 
     def get_column_names(self) -> List[str]:
         """
@@ -176,6 +253,9 @@ class CGDSDataset(models.Model):
 
     def delete(self, *args, **kwargs):
         """Deletes the instance and its related MongoDB result (if exists)"""
+        # The pk is removed after delete()
+        molecules_stats_file_name = self.molecules_stats_file_name
+        rows_hashes_file_name = self.rows_hashes_file_name
         try:
             with transaction.atomic():
                 # Call the "real" delete() method.
@@ -184,6 +264,8 @@ class CGDSDataset(models.Model):
                 # The next line will raise CouldNotDeleteInMongo exception if something gone wrong
                 # preventing DB commit
                 global_mongo_service.drop_collection(self.mongo_collection_name)
+                remove_molecules_stats(molecules_stats_file_name)
+                remove_rows_hashes(rows_hashes_file_name)
 
                 # Sends a websocket message to update the state in the frontend
                 send_update_cgds_studies_command()
@@ -269,6 +351,17 @@ class CGDSStudy(models.Model):
     )
     task_id = models.CharField(max_length=100, blank=True, null=True)  # Celery Task ID
 
+    # Peak memory (RSS of the worker) and disk usage of the last synchronization
+    sync_peak_memory_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+    sync_peak_disk_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+
+    # Rows written in the last synchronization. In incremental syncs only the added, removed and changed rows are
+    # written. In full syncs every row is counted as added
+    sync_rows_added = models.PositiveIntegerField(blank=True, null=True)
+    sync_rows_removed = models.PositiveIntegerField(blank=True, null=True)
+    sync_rows_changed = models.PositiveIntegerField(blank=True, null=True)
+    sync_rows_unchanged = models.PositiveIntegerField(blank=True, null=True)
+
     def __str__(self):
         return self.name
 
@@ -0,0 +1,113 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+# Seconds between two samples of the process memory usage
+RESOURCES_SAMPLING_INTERVAL: float = 0.5
+
+
+def get_current_rss_bytes() -> int:
+    """
+    Gets the Resident Set Size of the current process. It reads /proc/self/statm (Linux). In other platforms it falls
+    back to the maximum RSS reported by the OS, which is the peak of the whole process lifetime.
+    @return: RSS in bytes. 0 if it can't be retrieved.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return 0
+
+
+def format_bytes(n_bytes: int) -> str:
+    """Gets a human-readable representation of a number of bytes (e.g. '12.3 MB')."""
+    size = float(n_bytes)
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} TB'
+
+
+class ResourcesMonitor:
+    """
+    Tracks the peak memory and disk usage of a CGDSStudy synchronization. The memory (RSS of the current process) is
+    sampled in a background thread every sampling_interval seconds. The disk usage is not sampled: the synchronization
+    reports every file it writes or removes with add_disk_usage() and release_disk_usage().
+    """
+    sampling_interval: float  # Seconds between two memory samples
+    peak_memory_bytes: int  # Maximum RSS of the process seen while the monitor was running
+    current_disk_bytes: int  # Bytes currently written to disk by the synchronization
+    peak_disk_bytes: int  # Maximum value of current_disk_bytes
+
+    def __init__(self, sampling_interval: float = RESOURCES_SAMPLING_INTERVAL):
+        self.sampling_interval = sampling_interval
+        self.peak_memory_bytes = 0
+        self.current_disk_bytes = 0
+        self.peak_disk_bytes = 0
+        self.__stop_event = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__disk_lock = threading.Lock()  # The datasets synchronized concurrently report their temporary files
+
+    def __sample_memory(self):
+        """Updates the memory peak with the current RSS."""
+        self.peak_memory_bytes = max(self.peak_memory_bytes, get_current_rss_bytes())
+
+    def __sampling_loop(self):
+        """Samples the memory until the monitor is stopped."""
+        while not self.__stop_event.wait(self.sampling_interval):
+            self.__sample_memory()
+
+    def start(self):
+        """Starts sampling the memory usage."""
+        self.__sample_memory()
+        self.__stop_event.clear()
+        self.__thread = threading.Thread(target=self.__sampling_loop, daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        """Stops sampling the memory usage. The peaks are kept."""
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+        self.__sample_memory()
+
+    def add_disk_usage(self, n_bytes: int):
+        """
+        Registers bytes written to disk.
+        @param n_bytes: Number of bytes written.
+        """
+        with self.__disk_lock:
+            self.current_disk_bytes += n_bytes
+            self.peak_disk_bytes = max(self.peak_disk_bytes, self.current_disk_bytes)
+
+    def release_disk_usage(self, n_bytes: int):
+        """
+        Registers bytes removed from disk.
+        @param n_bytes: Number of bytes removed.
+        """
+        with self.__disk_lock:
+            self.current_disk_bytes = max(self.current_disk_bytes - n_bytes, 0)
+
+    def log_peaks(self, description: str):
+        """
+        Logs the peak memory and disk usage.
+        @param description: Description of the monitored process to include in the log.
+        """
+        logging.warning(f'{description} peak memory usage: {format_bytes(self.peak_memory_bytes)}. '
+                        f'Peak disk usage: {format_bytes(self.peak_disk_bytes)}')
+
+    def __enter__(self) -> 'ResourcesMonitor':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
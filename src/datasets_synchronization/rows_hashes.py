@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from api_service.mongo_service import MOLECULE_SYMBOL
+from common.constants import PATIENT_ID_COLUMN, SAMPLE_ID_COLUMN
+from user_files.models_choices import FileType
+
+# Column with the content hash of every row
+ROWS_HASH_COLUMN = 'hash'
+
+
+class RowsChanges:
+    """
+    Number of rows added, removed, changed and unchanged in the synchronization of the datasets of a CGDSStudy. The
+    datasets are synchronized concurrently, so the counters are updated with a lock.
+    """
+    added: int
+    removed: int
+    changed: int
+    unchanged: int
+
+    def __init__(self):
+        self.added = 0
+        self.removed = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.__lock = threading.Lock()
+
+    def add(self, added: int, removed: int = 0, changed: int = 0, unchanged: int = 0):
+        """Adds the changes of a dataset."""
+        with self.__lock:
+            self.added += added
+            self.removed += removed
+            self.changed += changed
+            self.unchanged += unchanged
+
+
+def __get_rows_hashes_file_path(file_name: str) -> str:
+    """
+    Gets the path of a rows hashes file
+    @param file_name: File's name (without folder)
+    @return: Absolute file path inside MEDIA_ROOT/CGDS_ROWS_HASHES_FOLDER
+    """
+    return os.path.join(settings.MEDIA_ROOT, settings.CGDS_ROWS_HASHES_FOLDER, file_name)
+
+
+def get_rows_key_column(columns: pd.Index, file_type: FileType) -> Optional[str]:
+    """
+    Gets the column that identifies every row of a dataset: the molecule symbol for molecules datasets and the sample
+    (or patient) id for clinical datasets
+    @param columns: Dataset's columns
+    @param file_type: Dataset's type
+    @return: Key column or None if the dataset doesn't have it
+    """
+    if file_type != FileType.CLINICAL:
+        key_column = MOLECULE_SYMBOL
+    elif SAMPLE_ID_COLUMN in columns:
+        key_column = SAMPLE_ID_COLUMN
+    else:
+        key_column = PATIENT_ID_COLUMN
+
+    return key_column if key_column in columns else None
+
+
+def are_valid_rows_keys(keys: pd.Series) -> bool:
+    """
+    Checks that the keys of some rows are non-null strings, otherwise the dataset can't be synchronized incrementally.
+    The uniqueness of the keys must be checked by the caller as the rows are processed in chunks
+    @param keys: Values of the key column
+    @return: True if the keys are valid, False otherwise
+    """
+    return pd.api.types.is_string_dtype(keys) and not keys.isnull().any()
+
+
+def compute_rows_hashes(dataset_df: pd.DataFrame, key_column: str) -> pd.DataFrame:
+    """
+    Computes a content hash of every row of a dataset. The columns' names are part of the hash, so adding, removing or
+    renaming a column (e.g. a sample) changes the hash of every row. Numeric columns are hashed as floats, so the
+    hash doesn't depend on the dtype inferred for the chunk where the row was read
+    @param dataset_df: Dataset's content (or a chunk of it)
+    @param key_column: Column returned by get_rows_key_column()
+    @return: DataFrame with the keys as index and the ROWS_HASH_COLUMN column
+    """
+    columns_signature = '\x1f'.join(str(column) for column in dataset_df.columns)
+    columns_hash = np.uint64(int(hashlib.sha1(columns_signature.encode('utf-8')).hexdigest()[:16], 16))
+    normalized_df = dataset_df.apply(
+        lambda column: column.astype(np.float64) if pd.api.types.is_numeric_dtype(column)
+        and not pd.api.types.is_bool_dtype(column) else column
+    )
+    hashes = pd.util.hash_pandas_object(normalized_df, index=False).to_numpy() ^ columns_hash
+    return pd.DataFrame({ROWS_HASH_COLUMN: hashes}, index=pd.Index(dataset_df[key_column], name=key_column))
+
+
+def compare_rows_hashes(previous_hashes: pd.DataFrame, current_hashes: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compares the rows hashes of some rows of a dataset with the hashes of the previous version of the dataset
+    @param previous_hashes: Hashes of the previous version
+    @param current_hashes: Hashes of the rows to compare
+    @return: Two boolean masks over the current rows: if the row's key is in the previous version and if the row has
+    the same content in both versions
+    """
+    positions = previous_hashes.index.get_indexer(current_hashes.index)
+    in_previous = positions >= 0
+    same_content = np.zeros(positions.shape[0], dtype=bool)
+    previous_values = previous_hashes[ROWS_HASH_COLUMN].to_numpy()[positions[in_previous]]
+    same_content[in_previous] = previous_values == current_hashes[ROWS_HASH_COLUMN].to_numpy()[in_previous]
+    return in_previous, same_content
+
+
+def save_rows_hashes(hashes_df: pd.DataFrame, file_name: str):
+    """
+    Stores the rows hashes of a dataset as a Parquet file
+    @param hashes_df: DataFrame generated by compute_rows_hashes()
+    @param file_name: File's name (without folder)
+    """
+    file_path = __get_rows_hashes_file_path(file_name)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    hashes_df.to_parquet(file_path)
+
+
+def read_rows_hashes(file_name: str) -> Optional[pd.DataFrame]:
+    """
+    Reads the rows hashes of a dataset
+    @param file_name: File's name (without folder)
+    @return: DataFrame generated by compute_rows_hashes() or None if it was not computed (or can't be read)
+    """
+    file_path = __get_rows_hashes_file_path(file_name)
+    if not os.path.exists(file_path):
+        return None
+
+    try:
+        return pd.read_parquet(file_path)
+    except Exception as ex:
+        logging.warning(f'Error reading rows hashes file "{file_path}": {ex}')
+        return None
+
+
+def remove_rows_hashes(file_name: str):
+    """
+    Removes the rows hashes of a dataset (if exists)
+    @param file_name: File's name (without folder)
+    """
+    file_path = __get_rows_hashes_file_path(file_name)
+    if os.path.exists(file_path):
+        os.remove(file_path)
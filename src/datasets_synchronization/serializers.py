@@ -14,7 +14,8 @@ from django.db.models import Q
 class CGDSDatasetSerializer(serializers.ModelSerializer):
     class Meta:
         model = CGDSDataset
-        fields = '__all__'
+        exclude = ['samples_bitmap']  # Internal binary field
+        read_only_fields = ['sync_progress', 'sync_error']
 
 
 class SurvivalColumnsTupleCGDSSimpleSerializer(serializers.ModelSerializer):
@@ -40,7 +41,8 @@ class CGDSDatasetWithSurvivalDataSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CGDSDataset
-        fields = '__all__'
+        exclude = ['samples_bitmap']  # Internal binary field
+        read_only_fields = ['sync_progress', 'sync_error']
 
 
 class CGDSStudySerializer(serializers.ModelSerializer):
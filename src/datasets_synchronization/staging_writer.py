@@ -0,0 +1,253 @@
+import logging
+from collections import Counter
+from typing import Optional, List, Set
+import numpy as np
+import pandas as pd
+from api_service.mongo_service import global_mongo_service, MOLECULE_SYMBOL, STANDARD_SYMBOL
+from user_files.models_choices import FileType
+from .models import CGDSDataset
+from .rows_hashes import RowsChanges, get_rows_key_column, are_valid_rows_keys, compute_rows_hashes, \
+    compare_rows_hashes, read_rows_hashes, save_rows_hashes, remove_rows_hashes
+
+# Suffix of the collection where a CGDSDataset is written before replacing its current collection
+STAGING_COLLECTION_SUFFIX = '_staging'
+
+
+class InvalidStagingCollection(Exception):
+    """Raised when the staging collection of a CGDSDataset doesn't have the expected rows or samples"""
+    pass
+
+
+class StagingCollectionWriter:
+    """
+    Writes the content of a CGDSDataset, chunk by chunk, in a staging collection which is indexed, validated and then
+    atomically renamed to the dataset's collection (replacing the previous one). Experiments running during the
+    synchronization read the old or the new data, never an empty or partial collection.
+    If there's a baseline (the same dataset of the previous version of the study) with rows hashes and the first chunk
+    has unchanged rows, the baseline's collection is copied in the server and only the added and changed rows are
+    written (so only those are standardized with Modulector/BioAPI). Otherwise, all the rows are inserted.
+    Molecules whose symbol is repeated (ignoring the case) are removed once all the chunks were written, as the
+    repetitions could be in different chunks.
+    The staging collection is removed if the writer is closed without replacing the dataset's collection.
+    """
+    dataset: CGDSDataset
+    staging_collection: str
+    n_rows: int  # Number of rows written (including the repeated molecules)
+    columns: Optional[pd.Index]  # Columns of the dataset (taken from the first chunk)
+
+    def __init__(self, dataset: CGDSDataset, baseline: Optional[CGDSDataset], rows_changes: RowsChanges):
+        """
+        @param dataset: Dataset being synchronized.
+        @param baseline: Dataset to compare with. None to rewrite the whole collection.
+        @param rows_changes: RowsChanges to add the changes of this dataset when the collection is replaced.
+        """
+        self.dataset = dataset
+        self.staging_collection = f'{dataset.mongo_collection_name}{STAGING_COLLECTION_SUFFIX}'
+        self.n_rows = 0
+        self.columns = None
+        self.__baseline = baseline
+        self.__rows_changes = rows_changes
+        self.__key_column: Optional[str] = None
+        self.__previous_hashes: Optional[pd.DataFrame] = None
+        self.__incremental: Optional[bool] = None  # None until the first non-empty chunk is written
+        self.__hashes_chunks: List[pd.DataFrame] = []
+        self.__valid_hashes = True
+        self.__seen_keys: Set[str] = set()
+        self.__parsed_symbols: Counter = Counter()  # Symbols read from the file (before removing NaN values)
+        self.__written_symbols: Counter = Counter()  # Symbols of the written rows
+        self.__counts = {'added': 0, 'removed': 0, 'changed': 0, 'unchanged': 0}
+        self.__replaced = False
+
+    def __enter__(self) -> 'StagingCollectionWriter':
+        # Removes the staging collection of a previous failed synchronization (if any)
+        global_mongo_service.drop_collection(self.staging_collection)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # The current collection is kept untouched if anything failed
+        if not self.__replaced:
+            global_mongo_service.drop_collection(self.staging_collection)
+
+    def __start(self, chunk_hashes: Optional[pd.DataFrame]):
+        """
+        Decides with the first non-empty chunk if the dataset is written incrementally: the baseline must have hashes
+        with the same key and some of the chunk's rows must be unchanged (the columns are part of the hashes, so a new
+        sample changes all the rows).
+        """
+        if self.__baseline is not None and chunk_hashes is not None and self.__valid_hashes \
+                and global_mongo_service.collection_exists(self.__baseline.mongo_collection_name):
+            previous_hashes = read_rows_hashes(self.__baseline.rows_hashes_file_name)
+            if previous_hashes is not None and previous_hashes.index.name == self.__key_column \
+                    and previous_hashes.index.is_unique:
+                _, same_content = compare_rows_hashes(previous_hashes, chunk_hashes)
+                if same_content.any():
+                    self.__previous_hashes = previous_hashes
+
+        self.__incremental = self.__previous_hashes is not None
+        if self.__incremental:
+            logging.warning(f"Incremental sync of the dataset '{self.dataset}' from "
+                            f"'{self.__baseline.mongo_collection_name}'")
+            global_mongo_service.copy_collection(self.__baseline.mongo_collection_name, self.staging_collection)
+
+    def __insert(self, rows: pd.DataFrame) -> bool:
+        """Inserts some rows in the staging collection. True if everything gone well, False otherwise."""
+        return rows.empty or global_mongo_service.insert_cgds_dataset(rows, self.staging_collection,
+                                                                      self.dataset.file_type)
+
+    def write_chunk(self, chunk: pd.DataFrame, parsed_symbols: Optional[pd.Series] = None) -> bool:
+        """
+        Writes a processed chunk of the dataset in the staging collection.
+        @param chunk: Processed chunk (without NaN values). All the chunks must have the same columns.
+        @param parsed_symbols: Molecules symbols of the chunk before removing the rows with NaN values, to detect the
+        repeated molecules. None for clinical datasets.
+        @return: True if everything gone well, False otherwise.
+        """
+        if self.columns is None:
+            self.columns = chunk.columns
+            self.__key_column = get_rows_key_column(chunk.columns, self.dataset.file_type)
+            self.__valid_hashes = self.__key_column is not None
+
+        if parsed_symbols is not None:
+            self.__parsed_symbols.update(parsed_symbols.dropna())
+            self.__written_symbols.update(chunk[MOLECULE_SYMBOL])
+
+        if chunk.empty:
+            return True
+        self.n_rows += chunk.shape[0]
+
+        # Computes the hashes of the rows. Repeated keys are written as new rows. Invalid keys prevent storing the
+        # hashes as baseline of the next version (repeated keys too, unless they are repeated molecules, which are
+        # removed at the end)
+        chunk_hashes: Optional[pd.DataFrame] = None
+        repeated = np.zeros(chunk.shape[0], dtype=bool)
+        if self.__key_column is not None:
+            keys = chunk[self.__key_column]
+            repeated = (keys.duplicated() | keys.isin(self.__seen_keys)).to_numpy()
+            self.__seen_keys.update(keys)
+            chunk_hashes = compute_rows_hashes(chunk, self.__key_column)
+            if not are_valid_rows_keys(keys):
+                self.__valid_hashes = False
+            if self.__valid_hashes:
+                self.__hashes_chunks.append(chunk_hashes)
+
+        if self.__incremental is None:
+            self.__start(chunk_hashes)
+
+        if not self.__incremental:
+            self.__counts['added'] += chunk.shape[0]
+            return self.__insert(chunk)
+
+        # Removes the previous version of the changed rows and inserts the added and changed ones
+        if chunk_hashes is not None:
+            in_previous, same_content = compare_rows_hashes(self.__previous_hashes, chunk_hashes)
+            unchanged = in_previous & same_content & ~repeated
+            changed = in_previous & ~same_content & ~repeated
+        else:
+            unchanged = changed = np.zeros(chunk.shape[0], dtype=bool)
+
+        if changed.any():
+            global_mongo_service.delete_rows(self.staging_collection, self.__key_column,
+                                             chunk.loc[changed, self.__key_column].tolist())
+        self.__counts['unchanged'] += int(unchanged.sum())
+        self.__counts['changed'] += int(changed.sum())
+        self.__counts['added'] += int((~unchanged & ~changed).sum())
+        return self.__insert(chunk[~unchanged])
+
+    def __remove_repeated_molecules(self) -> Set[str]:
+        """
+        Removes the molecules whose symbol is repeated ignoring the case (e.g. discontinued identifiers). All their
+        rows are removed.
+        @return: Removed symbols.
+        """
+        uppers_counts = Counter()
+        for symbol, count in self.__parsed_symbols.items():
+            uppers_counts[symbol.upper()] += count
+        repeated_symbols = {symbol for symbol in self.__parsed_symbols if uppers_counts[symbol.upper()] > 1}
+        if repeated_symbols:
+            deleted = global_mongo_service.delete_rows(self.staging_collection, MOLECULE_SYMBOL,
+                                                       list(repeated_symbols))
+            logging.warning(f"Removed {deleted} rows of repeated molecules from the dataset '{self.dataset}'")
+        return repeated_symbols
+
+    def __validate(self, n_expected_rows: int):
+        """
+        Checks that the staging collection has all the rows and samples of the dataset. Ambiguous molecules are stored
+        once per standard symbol, so molecules are counted by their original symbol.
+        @param n_expected_rows: Number of rows of the dataset (without the repeated molecules).
+        @raise InvalidStagingCollection If the number of rows or the samples are not the expected ones.
+        """
+        if self.dataset.file_type != FileType.CLINICAL:
+            n_rows = global_mongo_service.get_distinct_count(self.staging_collection, MOLECULE_SYMBOL)
+        else:
+            n_rows = global_mongo_service.get_collection_row_count(self.staging_collection)
+
+        if n_rows != n_expected_rows:
+            raise InvalidStagingCollection(f'The new collection has {n_rows} rows but the dataset has '
+                                           f'{n_expected_rows}')
+
+        if n_rows > 0:
+            excluded_fields = global_mongo_service.default_non_used_fields_query
+            expected_samples = {column for column in self.columns if column not in excluded_fields}
+            samples = set(global_mongo_service.get_only_columns_names(self.staging_collection))
+            if samples != expected_samples:
+                raise InvalidStagingCollection(f'The new collection has {len(samples)} samples but the dataset has '
+                                               f'{len(expected_samples)}')
+
+    def replace_collection(self):
+        """
+        Finishes the staging collection (removes the repeated molecules and the rows that are not in the new version),
+        indexes it, validates it and replaces the dataset's collection with it. Then, stores the rows hashes to be the
+        baseline of the next version.
+        @raise InvalidStagingCollection If the staging collection doesn't have the dataset's rows or samples.
+        """
+        if self.__incremental is None:
+            # All the chunks were empty
+            self.__start(None)
+
+        # Rows of the previous version which are not in the new one
+        if self.__incremental:
+            removed_keys = self.__previous_hashes.index.difference(pd.Index(list(self.__seen_keys)))
+            global_mongo_service.delete_rows(self.staging_collection, self.__key_column, removed_keys.tolist())
+            self.__counts['removed'] = len(removed_keys)
+
+        repeated_symbols = self.__remove_repeated_molecules()
+        rows_hashes: Optional[pd.DataFrame] = None
+        if self.__valid_hashes and self.__hashes_chunks:
+            rows_hashes = pd.concat(self.__hashes_chunks)
+            rows_hashes = rows_hashes[~rows_hashes.index.isin(repeated_symbols)]
+            if not rows_hashes.index.is_unique:
+                rows_hashes = None
+
+        # Indexes the fields used to query the collection and checks it before replacing the current one
+        indexed_fields = [STANDARD_SYMBOL] if self.dataset.file_type != FileType.CLINICAL else []
+        if self.__key_column is not None:
+            indexed_fields.append(self.__key_column)
+        global_mongo_service.create_indexes(self.staging_collection, indexed_fields)
+        n_repeated_rows = sum(self.__written_symbols[symbol] for symbol in repeated_symbols)
+        n_expected_rows = self.n_rows - n_repeated_rows
+        self.__validate(n_expected_rows)
+
+        # The changes are computed again without the repeated molecules (if possible), as they were counted when
+        # they were written
+        if not self.__incremental:
+            self.__counts = {'added': n_expected_rows, 'removed': 0, 'changed': 0, 'unchanged': 0}
+        elif rows_hashes is not None:
+            in_previous, same_content = compare_rows_hashes(self.__previous_hashes, rows_hashes)
+            self.__counts = {
+                'added': int((~in_previous).sum()),
+                'removed': self.__previous_hashes.shape[0] - int(in_previous.sum()),
+                'changed': int((in_previous & ~same_content).sum()),
+                'unchanged': int(same_content.sum())
+            }
+
+        # The previous hashes don't describe the collection anymore. Then, stores the new ones
+        remove_rows_hashes(self.dataset.rows_hashes_file_name)
+        global_mongo_service.replace_collection(self.staging_collection, self.dataset.mongo_collection_name)
+        self.__replaced = True
+        if rows_hashes is not None:
+            save_rows_hashes(rows_hashes, self.dataset.rows_hashes_file_name)
+
+        logging.warning(f"Dataset '{self.dataset}' written: {self.__counts['added']} added, "
+                        f"{self.__counts['removed']} removed, {self.__counts['changed']} changed and "
+                        f"{self.__counts['unchanged']} unchanged rows")
+        self.__rows_changes.add(**self.__counts)
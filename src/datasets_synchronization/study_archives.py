@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional, Dict, Callable, Tuple
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+import requests
+from django.conf import settings
+from common.exceptions import ExperimentStopped
+from common.functions import check_if_stopped
+from common.typing import AbortEvent
+
+# Downloaded archives are named by the SHA-256 of their content
+ARCHIVE_NAME_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Partial downloads are named by the SHA-1 of their URL (with their validators in a '.part.json' file)
+PARTIAL_DOWNLOAD_NAME_PATTERN = re.compile(r'^[0-9a-f]{40}\.part$')
+
+# Seconds after which a partial download that was not resumed is removed (abandoned URLs are never resumed)
+PARTIAL_DOWNLOADS_TTL: float = 7 * 24 * 3600
+
+# Size of the blocks used to compute the archives' hashes
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def __get_archives_folder() -> str:
+    """
+    Gets the folder where the downloaded CGDSStudy archives are stored (creating it if needed)
+    @return: Absolute path inside MEDIA_ROOT/CGDS_ARCHIVES_FOLDER
+    """
+    folder = os.path.join(settings.MEDIA_ROOT, settings.CGDS_ARCHIVES_FOLDER)
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def __get_url_key(url: str) -> str:
+    """Gets the name used for the metadata and partial download files of a URL."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def __read_json(file_path: str) -> Optional[Dict]:
+    """Reads a metadata file. None if it doesn't exist or it's corrupted."""
+    try:
+        with open(file_path) as fp:
+            return json.load(fp)
+    except (OSError, ValueError):
+        return None
+
+
+def __write_json(file_path: str, content: Dict):
+    """Writes a metadata file atomically, so other workers never read an incomplete file."""
+    tmp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as fp:
+        json.dump(content, fp)
+    os.replace(tmp_path, file_path)
+
+
+def __remove_if_exists(file_path: str):
+    """Removes a file ignoring errors if it doesn't exist."""
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def __compute_sha256(file_path: str) -> str:
+    """Computes the SHA-256 of a file reading it in blocks."""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as fp:
+        for block in iter(lambda: fp.read(HASH_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def __check_local_sources_root(path: str):
+    """
+    Checks that a local source is inside CGDS_LOCAL_SOURCES_ROOT (if it's set).
+    @param path: Local path of a CGDSStudy's URL.
+    @raise ValueError If the path is outside the allowed folder.
+    """
+    if not settings.CGDS_LOCAL_SOURCES_ROOT:
+        return
+
+    root = os.path.realpath(settings.CGDS_LOCAL_SOURCES_ROOT)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([root, real_path]) != root:
+        raise ValueError(f'The local source "{path}" is not inside CGDS_LOCAL_SOURCES_ROOT')
+
+
+def __get_local_source(url: str) -> Optional[str]:
+    """
+    Gets the local path of a CGDSStudy's URL if it's a file:// URL or a path (to a tar/tar.gz file or to an already
+    extracted study directory). Local sources are read only if CGDS_ALLOW_LOCAL_SOURCES is enabled, as any file of the
+    server could be read otherwise.
+    @param url: CGDSStudy's URL.
+    @return: Local path or None if it's a remote URL.
+    @raise ValueError If it's a local source but they are not allowed or it's outside CGDS_LOCAL_SOURCES_ROOT.
+    @raise FileNotFoundError If it's a file:// URL but the path does not exist.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ('file', ''):
+        return None
+
+    if not settings.CGDS_ALLOW_LOCAL_SOURCES:
+        raise ValueError(f'"{url}" is not a remote URL and CGDS_ALLOW_LOCAL_SOURCES is disabled')
+
+    if parsed.scheme == 'file':
+        path = url2pathname(parsed.path)
+        if parsed.netloc and parsed.netloc != 'localhost':
+            path = f'//{parsed.netloc}{path}'
+        __check_local_sources_root(path)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return path
+
+    if os.path.exists(url):
+        __check_local_sources_root(url)
+        return url
+
+    return None
+
+
+def __remove_partial_download(partial_path: str):
+    """Removes a partial download and its validators."""
+    logging.warning(f'Removing partial CGDS download "{partial_path}"')
+    __remove_if_exists(partial_path)
+    __remove_if_exists(f'{partial_path}.json')
+
+
+def __remove_expired_partial_downloads():
+    """
+    Removes the partial downloads that were not resumed in PARTIAL_DOWNLOADS_TTL seconds (e.g. the ones of studies
+    whose URL changed) and the validators files without partial download.
+    """
+    folder = __get_archives_folder()
+    min_mtime = time.time() - PARTIAL_DOWNLOADS_TTL
+    for file_name in os.listdir(folder):
+        file_path = os.path.join(folder, file_name)
+        try:
+            if PARTIAL_DOWNLOAD_NAME_PATTERN.match(file_name):
+                if os.path.getmtime(file_path) < min_mtime:
+                    __remove_partial_download(file_path)
+            elif file_name.endswith('.part.json') and PARTIAL_DOWNLOAD_NAME_PATTERN.match(file_name[:-len('.json')]):
+                if not os.path.exists(file_path[:-len('.json')]) and os.path.getmtime(file_path) < min_mtime:
+                    __remove_if_exists(file_path)
+        except FileNotFoundError:
+            # Removed by another worker
+            pass
+
+
+def __evict_archives(keep_path: str):
+    """
+    Removes the least recently used archives and partial downloads until the total size is lower than
+    CGDS_ARCHIVES_CACHE_MAX_SIZE MB. A partial download being written is the most recently modified file, so it's
+    removed last.
+    @param keep_path: Archive that must not be removed (the one being used).
+    """
+    max_size = settings.CGDS_ARCHIVES_CACHE_MAX_SIZE * 1024 * 1024
+    folder = __get_archives_folder()
+    files = []
+    for file_name in os.listdir(folder):
+        if ARCHIVE_NAME_PATTERN.match(file_name) or PARTIAL_DOWNLOAD_NAME_PATTERN.match(file_name):
+            try:
+                stat = os.stat(os.path.join(folder, file_name))
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, os.path.join(folder, file_name)))
+
+    total_size = sum(size for _, size, _ in files)
+    for _, size, file_path in sorted(files):
+        if total_size <= max_size:
+            break
+        if file_path != keep_path:
+            if file_path.endswith('.part'):
+                __remove_partial_download(file_path)
+            else:
+                logging.warning(f'Removing cached CGDS archive "{file_path}"')
+                __remove_if_exists(file_path)
+            total_size -= size
+
+
+def __download_archive(url: str, is_aborted: AbortEvent, on_chunk_written: Callable[[int], None]) -> str:
+    """
+    Downloads a CGDSStudy archive into the archives folder. The request is conditional if the URL was downloaded
+    before (ETag/Last-Modified), so an unchanged archive is not transferred again. An interrupted download is resumed
+    from the partial file with a Range request (only if the server's validators didn't change), also from a previous
+    sync task.
+    @param url: CGDSStudy's URL.
+    @param is_aborted: AbortEvent to check if the process was aborted.
+    @param on_chunk_written: Callback called with the number of bytes written to disk after every chunk.
+    @return: Path of the archive.
+    """
+    folder = __get_archives_folder()
+    url_key = __get_url_key(url)
+    source_meta_path = os.path.join(folder, f'{url_key}.json')
+    partial_path = os.path.join(folder, f'{url_key}.part')
+    partial_meta_path = f'{partial_path}.json'
+
+    # Archive of the last download of this URL (if it's still in the cache)
+    source_meta = __read_json(source_meta_path)
+    cached_path: Optional[str] = None
+    if source_meta is not None and os.path.exists(os.path.join(folder, source_meta['sha256'])):
+        cached_path = os.path.join(folder, source_meta['sha256'])
+
+    connection_timeout = float(settings.CGDS_CONNECTION_TIMEOUT)
+    read_timeout = float(settings.CGDS_READ_TIMEOUT)
+    chunk_size = int(settings.CGDS_CHUNK_SIZE)
+    retries = max(settings.CGDS_DOWNLOAD_RETRIES, 0)
+    attempt = 0
+    while True:
+        check_if_stopped(is_aborted, ExperimentStopped)
+        headers: Dict[str, str] = {}
+        if cached_path is not None:
+            if source_meta.get('etag'):
+                headers['If-None-Match'] = source_meta['etag']
+            if source_meta.get('last_modified'):
+                headers['If-Modified-Since'] = source_meta['last_modified']
+
+        # Resumes the partial download only if it can be validated (If-Range)
+        partial_meta = __read_json(partial_meta_path)
+        partial_validator = (partial_meta.get('etag') or partial_meta.get('last_modified')) if partial_meta else None
+        partial_size = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        if partial_size > 0 and partial_validator:
+            headers['Range'] = f'bytes={partial_size}-'
+            headers['If-Range'] = partial_validator
+        else:
+            partial_size = 0
+
+        try:
+            with requests.get(url, stream=True, timeout=(connection_timeout, read_timeout), headers=headers) as req:
+                if req.status_code == 304:
+                    logging.warning(f'{url} was not modified. Using the cached archive')
+                    os.utime(cached_path)
+                    return cached_path
+
+                if req.status_code == 416:
+                    # The partial file is not valid anymore
+                    __remove_if_exists(partial_path)
+                    __remove_if_exists(partial_meta_path)
+                    continue
+
+                req.raise_for_status()
+                if req.status_code != 206:
+                    partial_size = 0
+
+                # Stores the validators before writing to resume the download if it's interrupted
+                etag = req.headers.get('ETag')
+                last_modified = req.headers.get('Last-Modified')
+                __write_json(partial_meta_path, {'url': url, 'etag': etag, 'last_modified': last_modified})
+
+                content_length = req.headers.get('Content-Length')
+                size = partial_size + int(content_length.strip()) if content_length else None
+                downloaded_bytes = partial_size
+                if partial_size > 0:
+                    logging.warning(f'Resuming {url} download from byte {partial_size}')
+
+                # Reads in chunks and logs the progress
+                with open(partial_path, mode='ab' if partial_size > 0 else 'wb') as out_file:
+                    for chunk in req.iter_content(chunk_size=chunk_size):
+                        check_if_stopped(is_aborted, ExperimentStopped)
+                        out_file.write(chunk)
+                        on_chunk_written(len(chunk))
+
+                        # Logs the progress status
+                        downloaded_bytes += len(chunk)
+                        if size:
+                            logging.warning(f'{url} downloaded at -> {(100 * downloaded_bytes) // size}%')
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            # Connection errors before any byte was received are not retried
+            if attempt >= retries or not os.path.exists(partial_path):
+                raise
+            attempt += 1
+            logging.warning(f'Error downloading {url} ({e}). Retrying ({attempt}/{retries})')
+
+    logging.warning(f'{url} downloading finished')
+
+    # Stores the archive by its content, so the same archive is stored only once
+    sha256 = __compute_sha256(partial_path)
+    archive_path = os.path.join(folder, sha256)
+    if os.path.exists(archive_path):
+        __remove_if_exists(partial_path)
+        os.utime(archive_path)
+    else:
+        os.replace(partial_path, archive_path)
+    __remove_if_exists(partial_meta_path)
+    __write_json(source_meta_path, {'url': url, 'sha256': sha256, 'etag': etag, 'last_modified': last_modified})
+
+    return archive_path
+
+
+def get_study_archive(url: str, is_aborted: AbortEvent,
+                      on_chunk_written: Callable[[int], None] = lambda _: None) -> Tuple[str, bool]:
+    """
+    Gets the archive of a CGDSStudy. Remote archives are downloaded (or reused from the archives folder if they were not
+    modified) and local sources (file:// URLs, paths to a tar/tar.gz file or to an extracted study directory) are used
+    directly if CGDS_ALLOW_LOCAL_SOURCES is enabled.
+    @param url: CGDSStudy's URL.
+    @param is_aborted: AbortEvent to check if the process was aborted.
+    @param on_chunk_written: Callback called with the number of bytes written to disk after every downloaded chunk.
+    @return: Path of the archive (or directory) and True if it must be removed after the synchronization (i.e. if the
+    archives cache is disabled).
+    """
+    local_path = __get_local_source(url)
+    if local_path is not None:
+        return local_path, False
+
+    archive_path = __download_archive(url, is_aborted, on_chunk_written)
+    __remove_expired_partial_downloads()
+    if settings.CGDS_ARCHIVES_CACHE_MAX_SIZE <= 0:
+        return archive_path, True
+
+    __evict_archives(keep_path=archive_path)
+    return archive_path, False
@@ -1,15 +1,20 @@
+import io
 import logging
 import os.path
+import shutil
 import tarfile
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
 import pandas as pd
-from os import listdir
-from os.path import isfile
-from typing import List, Optional
+from typing import List, Optional, IO, Dict, Tuple, Iterator, Callable
 from urllib.parse import urlparse
+from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 from pymongo.errors import InvalidName
-from api_service.mongo_service import global_mongo_service, MOLECULE_SYMBOL
+from api_service.mongo_service import MOLECULE_SYMBOL
+from api_service.websocket_functions import send_update_cgds_studies_command
 from common.constants import PATIENT_ID_COLUMN, TCGA_CONVENTION, SAMPLE_ID_COLUMN
 from common.datasets_utils import clean_dataset
 from common.exceptions import ExperimentStopped
@@ -17,136 +22,203 @@ from common.functions import check_if_stopped
 from common.typing import AbortEvent
 from user_files.models_choices import FileType
 from .models import CGDSStudy, CGDSDataset, CGDSDatasetSynchronizationState
+from .resources_monitor import ResourcesMonitor
+from .rows_hashes import RowsChanges
+from .staging_writer import StagingCollectionWriter, InvalidStagingCollection
 
 # Prefix to concatenate to MongoDB collection names
 VERSION_PREFIX = '_version_'
 
+# Progress (percentage) of a CGDSDataset synchronization after every step
+SYNC_PROGRESS_STARTED = 0
+SYNC_PROGRESS_PARSED = 25
+SYNC_PROGRESS_PROCESSED = 50
+SYNC_PROGRESS_INSERTED = 75
+SYNC_PROGRESS_FINISHED = 100
+
 
 class SkipRowsIsIncorrect(Exception):
     """Raised when the Pandas "skiprows" parameter is incorrect"""
     pass
 
 
-def __get_files_of_directory(dir_path: str) -> List[str]:
+class DatasetSyncError(Exception):
+    """Raised when a CGDSDataset could not be synchronized. Its state and sync_error fields have the details"""
+    pass
+
+
+class ArchiveMemberReader(io.RawIOBase):
     """
-    Gets a list of files (excludes directories) of a specific directory path.
-    @param dir_path: Directory path to check.
-    @return: List of file names in the directory.
+    Read-only, non-seekable wrapper of a member of a tar file opened as a stream. Pandas checks if the file objects are
+    seekable, which fails with the members returned by tarfile in stream mode.
     """
-    return sorted([filename for filename in listdir(dir_path) if isfile(os.path.join(dir_path, filename))])
+    def __init__(self, member_file: IO[bytes]):
+        self.member_file = member_file
+
+    def readable(self) -> bool:
+        return True
 
-def __sync_dataset(dataset: CGDSDataset, extract_path: str, only_failed: bool,
-                   check_patient_column: bool, is_aborted: AbortEvent):
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer) -> int:
+        data = self.member_file.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def __update_dataset_progress(dataset: CGDSDataset, progress: int):
+    """
+    Stores the progress of a CGDSDataset synchronization and notifies the frontend.
+    @param dataset: Dataset being synchronized.
+    @param progress: Percentage of the synchronization (one of the SYNC_PROGRESS_* constants).
     """
-    Synchronizes a CGDS Dataset from a compressed file downloaded in 'sync_study' method.
+    dataset.sync_progress = progress
+    dataset.save(update_fields=['state', 'sync_progress', 'sync_error'])
+    send_update_cgds_studies_command()
+
+
+def __process_chunk(dataset: CGDSDataset, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[pd.Series]]:
+    """
+    Processes a chunk of a dataset's file to be inserted in MongoDB.
+    @param dataset: Dataset being synchronized.
+    @param chunk: Chunk read from the dataset's file.
+    @return: Processed chunk and, for molecules datasets, the molecules symbols of the chunk before removing the rows
+    with NaN values (used to remove the repeated molecules, which could be in different chunks).
+    """
+    # Replaces '.' with '_dot_' to prevent MongoDB errors
+    chunk.columns = chunk.columns.str.replace(".", "_dot_")
+
+    # Replaces TCGA suffix: '-01' (primary tumor), -06 (metastatic) and '-11' (normal) from samples
+    # to avoid breaking df join. There's also '-03' suffix in some Firehose Legacy studies
+    if dataset.file_type == FileType.CLINICAL:
+        # Clinical data has a PATIENT_ID or SAMPLE_ID column. In the samples file (data_clinical_sample.txt)
+        # there is a SAMPLE_ID column that has the TCGA suffix. In the patients file
+        # (data_clinical_patient.txt) there's not, so we have to check if it's that file and replaces the
+        # suffix in the PATIENT_ID column
+        if SAMPLE_ID_COLUMN in chunk.columns and PATIENT_ID_COLUMN in chunk.columns:
+            chunk[PATIENT_ID_COLUMN] = chunk[PATIENT_ID_COLUMN].str.replace(TCGA_CONVENTION, '', regex=True)
+        return chunk, None
+
+    # Samples in molecules datasets are in the header (as columns)
+    chunk.columns = chunk.columns.str.replace(TCGA_CONVENTION, '', regex=True)
+
+    # Removes NaNs values to prevent errors in JSON sent to BioAPI/Modulector. The duplicated molecules (if any)
+    # are removed by the StagingCollectionWriter once all the chunks were written
+    parsed_symbols = chunk[MOLECULE_SYMBOL]
+    return clean_dataset(chunk, axis='index'), parsed_symbols
+
+
+def __sync_dataset(dataset: CGDSDataset, dataset_file: Optional[IO[bytes]], archive_files: List[str],
+                   check_patient_column: bool, baseline: Optional[CGDSDataset], rows_changes: RowsChanges,
+                   is_aborted: AbortEvent):
+    """
+    Synchronizes a CGDS Dataset from a member of the compressed file downloaded in 'sync_study' method.
     @param dataset: Dataset to synchronize.
-    @param extract_path: System path where the extracted files will be temporarily stored.
-    @param only_failed: If True, only synchronizes the dataset if It's not synchronized yet.
+    @param dataset_file: File object of the archive's member to read. None if the file is not in the archive.
+    @param archive_files: Files of the archive (used to log the possible files if dataset_file is None).
     @param check_patient_column: If True it checks that the patient id column is present (useful for clinical).
+    @param baseline: Same dataset of the previous version of the study to sync incrementally. None for a full sync.
+    @param rows_changes: RowsChanges to add the changes of this dataset.
     @param is_aborted: AbortEvent to check if the process was aborted.
+    @raise DatasetSyncError If the dataset could not be synchronized.
     """
     check_if_stopped(is_aborted, ExperimentStopped)
     if dataset is not None:
-        # Checks if the dataset is already synchronized
-        if only_failed and dataset.state == CGDSDatasetSynchronizationState.SUCCESS:
-            logging.warning(f'Dataset "{dataset}" is already synchronized and only_failed is True. Ignoring it.')
-            return
+        dataset.state = CGDSDatasetSynchronizationState.IN_PROCESS
+        dataset.sync_error = None
+        __update_dataset_progress(dataset, SYNC_PROGRESS_STARTED)
 
-        # Gets file
-        check_if_stopped(is_aborted, ExperimentStopped)
-        dataset_file_path = os.path.join(extract_path, dataset.file_path)
         skip_rows = dataset.header_row_index if dataset.header_row_index else 0
 
-        dataset_content: Optional[pd.DataFrame] = None
+        columns: Optional[pd.Index] = None
         sync_went_fine = False
         try:
             check_if_stopped(is_aborted, ExperimentStopped)
-            dataset_content = pd.read_csv(
-                dataset_file_path,
+            if dataset_file is None:
+                raise FileNotFoundError(dataset.file_path)
+
+            # Parses the member directly from the archive's stream, without writing it to disk, in chunks of
+            # CGDS_SYNC_CHUNK_SIZE rows to keep the memory bounded regardless of the file's size. Keys are read as
+            # strings, so they have the same type in all the chunks
+            key_columns = [PATIENT_ID_COLUMN, SAMPLE_ID_COLUMN] if dataset.file_type == FileType.CLINICAL \
+                else [MOLECULE_SYMBOL]
+            chunks = pd.read_csv(
+                io.BufferedReader(ArchiveMemberReader(dataset_file)),
                 sep=dataset.separator,
-                skiprows=skip_rows
+                skiprows=skip_rows,
+                dtype={key_column: str for key_column in key_columns},
+                chunksize=max(settings.CGDS_SYNC_CHUNK_SIZE, 1)
             )
 
-            # Checks, in case of clinical datasets that PATIENT_ID_COLUMN is present
-            if check_patient_column and PATIENT_ID_COLUMN not in dataset_content.columns:
-                raise SkipRowsIsIncorrect
+            with chunks, StagingCollectionWriter(dataset, baseline, rows_changes) as writer:
+                inserted_successfully = True
+                for chunk_content in chunks:
+                    if columns is None:
+                        columns = chunk_content.columns
+                        __update_dataset_progress(dataset, SYNC_PROGRESS_PARSED)
 
-            # Replaces '.' with '_dot_' to prevent MongoDB errors
-            check_if_stopped(is_aborted, ExperimentStopped)
-            dataset_content.columns = dataset_content.columns.str.replace(".", "_dot_")
+                        # Checks, in case of clinical datasets that PATIENT_ID_COLUMN is present
+                        if check_patient_column and PATIENT_ID_COLUMN not in columns:
+                            raise SkipRowsIsIncorrect
 
-            # Replaces TCGA suffix: '-01' (primary tumor), -06 (metastatic) and '-11' (normal) from samples
-            # to avoid breaking df join. There's also '-03' suffix in some Firehose Legacy studies
-            check_if_stopped(is_aborted, ExperimentStopped)
-            if dataset.file_type == FileType.CLINICAL:
-                # Clinical data has a PATIENT_ID or SAMPLE_ID column. In the samples file (data_clinical_sample.txt)
-                # there is a SAMPLE_ID column that has the TCGA suffix. In the patients file
-                # (data_clinical_patient.txt) there's not, so we have to check if it's that file and replaces the
-                # suffix in the PATIENT_ID column
-                if SAMPLE_ID_COLUMN in dataset_content.columns and PATIENT_ID_COLUMN in dataset_content.columns:
-                    dataset_content[PATIENT_ID_COLUMN] = dataset_content[PATIENT_ID_COLUMN].str.replace(
-                        TCGA_CONVENTION, '', regex=True
-                    )
-            else:
-                # Samples in molecules datasets are in the header (as columns)
-                dataset_content.columns = dataset_content.columns.str.replace(TCGA_CONVENTION, '', regex=True)
+                    check_if_stopped(is_aborted, ExperimentStopped)
+                    chunk_content, parsed_symbols = __process_chunk(dataset, chunk_content)
 
-                # Removes the duplicated molecules (if any). This is necessary because some datasets have
-                # duplicated due to discontinued molecules identifiers.
-                # First, generates a column with all the values of the MOLECULE_SYMBOL column as upper case as
-                # cBioPortal contains some duplicated identifiers in different cases (upper and lower)
-                check_if_stopped(is_aborted, ExperimentStopped)
-                upper_col = f'{MOLECULE_SYMBOL}_upper'
-                dataset_content[upper_col] = dataset_content[MOLECULE_SYMBOL].str.upper()
+                    # Writes the documents in the staging collection
+                    check_if_stopped(is_aborted, ExperimentStopped)
+                    if not writer.write_chunk(chunk_content, parsed_symbols):
+                        inserted_successfully = False
+                        break
 
-                # Removes duplicated molecules and the generated column
+                # Replaces the dataset's collection
                 check_if_stopped(is_aborted, ExperimentStopped)
-                dataset_content = dataset_content.drop_duplicates(subset=[upper_col], keep=False)
-                dataset_content = dataset_content.drop(columns=[upper_col])
-
-                # Removes NaNs values to prevent errors in JSON sent to BioAPI/Modulector
-                check_if_stopped(is_aborted, ExperimentStopped)
-                dataset_content = clean_dataset(dataset_content, axis='index')
-
-            # Removes the collection
-            check_if_stopped(is_aborted, ExperimentStopped)
-            global_mongo_service.drop_collection(dataset.mongo_collection_name)
-
-            # Inserts the documents in the collection
-            check_if_stopped(is_aborted, ExperimentStopped)
-            inserted_successfully = global_mongo_service.insert_cgds_dataset(
-                dataset_content,
-                dataset.mongo_collection_name,
-                dataset.file_type
-            )
+                if inserted_successfully:
+                    __update_dataset_progress(dataset, SYNC_PROGRESS_PROCESSED)
+                    writer.replace_collection()
 
             # If everything goes well, change the dataset info
             check_if_stopped(is_aborted, ExperimentStopped)
             dataset.date_last_synchronization = timezone.now()
             if inserted_successfully:
                 dataset.state = CGDSDatasetSynchronizationState.SUCCESS
+                dataset.sync_progress = SYNC_PROGRESS_INSERTED
                 sync_went_fine = True
             else:
                 dataset.state = CGDSDatasetSynchronizationState.COULD_NOT_SAVE_IN_MONGO
+                dataset.sync_error = 'Could not get the standard symbols from Modulector/BioAPI'
+        except ExperimentStopped:
+            # The sync was stopped by the user, so the dataset remains as not synchronized
+            dataset.state = CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED
+            __update_dataset_progress(dataset, SYNC_PROGRESS_STARTED)
+            raise
         except SkipRowsIsIncorrect:
-            columns = dataset_content.columns.tolist() if dataset_content else []
+            columns = columns.tolist() if columns is not None else []
             logging.error(f"The dataset '{dataset}' seems to have an invalid skiprows parameter as it does not "
                           f"contains '{PATIENT_ID_COLUMN}' column. Columns with current skiprows "
                           f"value ({dataset.header_row_index}) are: {columns}")
             dataset.state = CGDSDatasetSynchronizationState.NO_PATIENT_ID_COLUMN_FOUND
+            dataset.sync_error = f"'{PATIENT_ID_COLUMN}' column not found. Columns: {columns}"
+        except InvalidStagingCollection as e:
+            logging.error(f"The new collection of the dataset '{dataset}' is not valid: {e}")
+            dataset.state = CGDSDatasetSynchronizationState.COULD_NOT_SAVE_IN_MONGO
+            dataset.sync_error = str(e)
         except InvalidName:
             logging.error(f"The dataset '{dataset}' has an invalid MongoDB collection's name")
             dataset.state = CGDSDatasetSynchronizationState.COULD_NOT_SAVE_IN_MONGO
+            dataset.sync_error = f"Invalid MongoDB collection's name '{dataset.mongo_collection_name}'"
         except FileNotFoundError:
             logging.error(f"The file '{dataset.file_path}' does not exist in the tar.gz of the dataset '{dataset}'")
-            logging.error(f'Possible files to select in dataset: {__get_files_of_directory(extract_path)}')
+            logging.error(f'Possible files to select in dataset: {sorted(archive_files)}')
             dataset.state = CGDSDatasetSynchronizationState.FILE_DOES_NOT_EXIST
+            dataset.sync_error = f"The file '{dataset.file_path}' does not exist in the tar.gz file"
         except Exception as e:
             logging.error(
                 f"The CGDS dataset '{dataset}' had a sync problem: {e}"
             )
             logging.exception(e)
             dataset.state = CGDSDatasetSynchronizationState.FINISHED_WITH_ERROR
+            dataset.sync_error = str(e)
 
         # Saves changes in the DB
         dataset.save()
@@ -154,35 +226,83 @@ def __sync_dataset(dataset: CGDSDataset, extract_path: str, only_failed: bool,
         # If everything is ok, computes some others fields
         if sync_went_fine:
             dataset.compute_post_saved_field()
+            __update_dataset_progress(dataset, SYNC_PROGRESS_FINISHED)
         else:
-            # Raises an Exception to stop the CGDSStudy synchronization process
-            msg = f'The dataset {dataset} had a sync problem. Stopping the CGDSStudy synchronization process'
+            # Raises an Exception to mark the CGDSStudy synchronization as failed
+            send_update_cgds_studies_command()
+            msg = f'The dataset {dataset} had a sync problem'
             logging.error(msg)
-            raise Exception(msg)
+            raise DatasetSyncError(msg)
 
 
-def __detect_sub_folder(dir_path: str) -> Optional[str]:
+def __sync_dataset_in_thread(dataset: CGDSDataset, dataset_file: Optional[IO[bytes]], archive_files: List[str],
+                             check_patient_column: bool, baseline: Optional[CGDSDataset], rows_changes: RowsChanges,
+                             is_aborted: AbortEvent) -> Optional[Exception]:
     """
-    Detects if there is a sub folder and not files in a specific directory path. This prevents errors
-    on CGDS studies which has a sub folder in its tar.gz file
-    @param dir_path: Directory path to check
-    @return: The name of sub folder if detected, None otherwise
+    Runs __sync_dataset() returning the raised exception (if any) instead of raising it, so a failing dataset does not
+    stop the synchronization of the rest of datasets of the study. The thread's DB connection is closed at the end.
+    @return: The exception raised by __sync_dataset() or None if the dataset was synchronized successfully.
     """
-    there_are_files = False
-    directory: Optional[str] = None
-    for filename in listdir(dir_path):
-        if isfile(os.path.join(dir_path, filename)):
-            there_are_files = True
-        elif directory is None:
-            directory = filename
+    try:
+        __sync_dataset(dataset, dataset_file, archive_files, check_patient_column, baseline, rows_changes, is_aborted)
+        return None
+    except Exception as e:
+        return e
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
 
-        if directory is not None and there_are_files:
-            # In this case it has all the needed information
-            break
 
-    if directory is not None and not there_are_files:
-        return directory
-    return None
+def __sync_dataset_from_file(dataset: CGDSDataset, file_path: str, archive_files: List[str],
+                             check_patient_column: bool, baseline: Optional[CGDSDataset], rows_changes: RowsChanges,
+                             is_aborted: AbortEvent) -> Optional[Exception]:
+    """
+    Runs __sync_dataset_in_thread() reading the dataset from a copy of the archive's member.
+    @param file_path: Path of the copy of the archive's member.
+    @return: The exception raised by __sync_dataset() or None if the dataset was synchronized successfully.
+    """
+    with open(file_path, 'rb') as dataset_file:
+        return __sync_dataset_in_thread(dataset, dataset_file, archive_files, check_patient_column, baseline,
+                                        rows_changes, is_aborted)
+
+
+def __get_member_relative_paths(member_name: str) -> List[str]:
+    """
+    Gets the paths that a member of the archive could match with a CGDSDataset's file_path: the member's path itself
+    and, as some CGDS studies have a sub folder in their tar.gz file, the path without its first folder
+    @param member_name: Name of the archive's member
+    @return: List of candidate paths
+    """
+    member_path = member_name
+    while member_path.startswith('./'):
+        member_path = member_path[2:]
+
+    paths = [member_path]
+    parts = member_path.split('/', maxsplit=1)
+    if len(parts) == 2:
+        paths.append(parts[1])
+    return paths
+
+
+def __iterate_study_files(archive_path: str, mode: str) -> Iterator[Tuple[str, IO[bytes]]]:
+    """
+    Iterates over the files of a study. Every file object is only valid until the next one is yielded
+    @param archive_path: Path of a tar/tar.gz file (read as a stream) or of a directory with the study's files
+    @param mode: Mode to open the tar file
+    @return: Generator of the relative path and the file object of every file
+    """
+    if os.path.isdir(archive_path):
+        for root, dirs, files in os.walk(archive_path):
+            dirs.sort()
+            for file_name in sorted(files):
+                file_path = os.path.join(root, file_name)
+                with open(file_path, 'rb') as study_file:
+                    yield os.path.relpath(file_path, archive_path).replace(os.sep, '/'), study_file
+    else:
+        with tarfile.open(archive_path, mode) as downloaded_tar_file:
+            for member in downloaded_tar_file:
+                if member.isfile():
+                    yield member.name, downloaded_tar_file.extractfile(member)
 
 
 def __copy_dataset(dataset: Optional[CGDSDataset], new_version: int,
@@ -223,6 +343,8 @@ def __copy_dataset(dataset: Optional[CGDSDataset], new_version: int,
 
     dataset_copy.mongo_collection_name = mongo_collection_name
     dataset_copy.state = CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED
+    dataset_copy.sync_progress = SYNC_PROGRESS_STARTED
+    dataset_copy.sync_error = None
 
     # Saves the copy to add survival columns (if needed)
     dataset_copy.save()
@@ -247,8 +369,14 @@ def generate_study_new_version(study: CGDSStudy) -> CGDSStudy:
     new_version = study.get_last_version() + 1
     study_copy.version = new_version
 
-    # Removes also the date of last synchronization
+    # Removes also the date and resources usage of last synchronization
     study_copy.date_last_synchronization = None
+    study_copy.sync_peak_memory_bytes = None
+    study_copy.sync_peak_disk_bytes = None
+    study_copy.sync_rows_added = None
+    study_copy.sync_rows_removed = None
+    study_copy.sync_rows_changed = None
+    study_copy.sync_rows_unchanged = None
 
     # Creates a copy of its datasets and edits the collection name to prevent conflicts
     study_copy.mrna_dataset = __copy_dataset(study.mrna_dataset, new_version)
@@ -265,48 +393,207 @@ def generate_study_new_version(study: CGDSStudy) -> CGDSStudy:
     return study_copy
 
 
-def extract_file_and_sync_datasets(cgds_study: CGDSStudy, tar_file_path: str, only_failed: bool,
-                                   is_aborted: AbortEvent):
+def __get_baseline_dataset(dataset: CGDSDataset, previous_dataset: Optional[CGDSDataset]) -> Optional[CGDSDataset]:
+    """
+    Gets the dataset of the previous version of a study that can be used to sync a dataset incrementally: it must be
+    synchronized successfully and be read from the same file with the same parameters
+    @param dataset: Dataset to synchronize
+    @param previous_dataset: Same dataset in the previous version of the study
+    @return: Baseline dataset or None if the dataset must be fully synchronized
+    """
+    if previous_dataset is None or previous_dataset.state != CGDSDatasetSynchronizationState.SUCCESS:
+        return None
+
+    if (previous_dataset.file_path, previous_dataset.separator, previous_dataset.header_row_index) != \
+            (dataset.file_path, dataset.separator, dataset.header_row_index):
+        return None
+
+    return previous_dataset
+
+
+def __remove_member_copy(member_copy_path: str, resources_monitor: Optional[ResourcesMonitor]):
+    """
+    Removes the temporary copy of an archive's member (if it was not removed yet)
+    @param member_copy_path: Path of the copy
+    @param resources_monitor: ResourcesMonitor to release the copy's disk usage. None to not track it
     """
-    Extracts the recently downloaded tar file of a CGDSStudy and syncs its CGDSDataset which
-    are inside the tar file
+    try:
+        size = os.path.getsize(member_copy_path)
+        os.remove(member_copy_path)
+    except FileNotFoundError:
+        return
+
+    if resources_monitor is not None:
+        resources_monitor.release_disk_usage(size)
+
+
+def __get_member_copy_release(member_copy_path: str, n_datasets: int,
+                              resources_monitor: Optional[ResourcesMonitor]) -> Callable[[Future], None]:
+    """
+    Gets a done-callback for the futures of the datasets read from a member's temporary copy, which removes the copy
+    when the last of them finishes, so every copy is kept on disk only while it's being read
+    @param member_copy_path: Path of the copy
+    @param n_datasets: Number of datasets (futures) which read the copy
+    @param resources_monitor: ResourcesMonitor to release the copy's disk usage. None to not track it
+    @return: Callback to add to every future
+    """
+    remaining = [n_datasets]
+    lock = threading.Lock()
+
+    def release(_: Future):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        __remove_member_copy(member_copy_path, resources_monitor)
+
+    return release
+
+
+def extract_file_and_sync_datasets(cgds_study: CGDSStudy, archive_path: str, only_failed: bool,
+                                   is_aborted: AbortEvent, incremental: bool = False,
+                                   resources_monitor: Optional[ResourcesMonitor] = None):
+    """
+    Reads the recently downloaded tar file of a CGDSStudy as a stream and syncs its CGDSDataset which
+    are inside the tar file. Only the members referenced by the datasets are read (in the archive's order). If the
+    datasets are synchronized sequentially (CGDS_MAX_PARALLEL_DATASETS = 1) they are parsed directly from the stream,
+    so nothing is extracted to disk. Otherwise, every member is copied to a temporary file which is removed as soon as
+    all its datasets finish
     @param cgds_study: CGDSStudy to gets the reading mode of the tar file
-    @param tar_file_path: Path of downloaded tar file to decompress it
+    @param archive_path: Path of downloaded tar file to decompress it (or of a directory with the study's files)
     @param only_failed: If True, only synchronizes the datasets that are not synchronized yet.
     @param is_aborted: AbortEvent to check if the process was aborted.
+    @param incremental: If True, the datasets are compared with the ones of the previous version of the study and only
+    the changed rows are written.
+    @param resources_monitor: ResourcesMonitor to track the disk usage of the members' temporary copies. None to not
+    track it.
     """
-    # Infers the mode of downloaded compressed file to open it
+    # Infers the mode of downloaded compressed file to open it as a stream
     check_if_stopped(is_aborted, ExperimentStopped)
     path = urlparse(cgds_study.url).path
     ext = os.path.splitext(path)[1]
-    mode = "r:gz" if ext == ".gz" else "r:"
-
-    # Creates a temp dir
-    with tempfile.TemporaryDirectory() as extract_path:
-        # Open the tar/tar.gz file into the temp dir
-        check_if_stopped(is_aborted, ExperimentStopped)
-        with tarfile.open(tar_file_path, mode) as downloaded_tar_file:
-            downloaded_tar_file.extractall(extract_path)
-
-        # Checks if there is a sub folder and concatenates its name
-        check_if_stopped(is_aborted, ExperimentStopped)
-        sub_folder_name = __detect_sub_folder(extract_path)
-        if sub_folder_name is not None:
-            extract_path = os.path.join(extract_path, sub_folder_name)
-
-        # Syncs CGDS study's datasets
-        __sync_dataset(cgds_study.mrna_dataset, extract_path, only_failed, check_patient_column=False,
-                       is_aborted=is_aborted)
-        __sync_dataset(cgds_study.mirna_dataset, extract_path, only_failed, check_patient_column=False,
-                       is_aborted=is_aborted)
-        __sync_dataset(cgds_study.cna_dataset, extract_path, only_failed, check_patient_column=False,
-                       is_aborted=is_aborted)
-        __sync_dataset(cgds_study.methylation_dataset, extract_path, only_failed, check_patient_column=False,
-                       is_aborted=is_aborted)
-        __sync_dataset(cgds_study.clinical_patient_dataset, extract_path, only_failed,
-                            check_patient_column=True, is_aborted=is_aborted)
-        __sync_dataset(cgds_study.clinical_sample_dataset, extract_path, only_failed,
-                            check_patient_column=True, is_aborted=is_aborted)
+    mode = "r|gz" if ext == ".gz" else "r|"
+
+    # Fields of the study's datasets and if the patient id column must be checked (clinical datasets)
+    datasets_fields_and_checks: List[Tuple[str, bool]] = [
+        ('mrna_dataset', False),
+        ('mirna_dataset', False),
+        ('cna_dataset', False),
+        ('methylation_dataset', False),
+        ('clinical_patient_dataset', True),
+        ('clinical_sample_dataset', True),
+    ]
+
+    # In incremental syncs the datasets are compared with the ones in the previous version of the study
+    previous_study: Optional[CGDSStudy] = None
+    if incremental:
+        previous_study = CGDSStudy.objects.filter(
+            url=cgds_study.url,
+            version__lt=cgds_study.version
+        ).order_by('-version').first()
+
+    # Datasets to sync (with their check and baseline) by file path
+    pending: Dict[str, List[Tuple[CGDSDataset, bool, Optional[CGDSDataset]]]] = {}
+    for dataset_field, check_patient_column in datasets_fields_and_checks:
+        dataset: Optional[CGDSDataset] = getattr(cgds_study, dataset_field)
+        if dataset is None:
+            continue
+
+        # Checks if the dataset is already synchronized
+        if only_failed and dataset.state == CGDSDatasetSynchronizationState.SUCCESS:
+            logging.warning(f'Dataset "{dataset}" is already synchronized and only_failed is True. Ignoring it.')
+            continue
+
+        baseline: Optional[CGDSDataset] = None
+        if previous_study is not None:
+            baseline = __get_baseline_dataset(dataset, getattr(previous_study, dataset_field))
+
+        pending.setdefault(dataset.file_path, []).append((dataset, check_patient_column, baseline))
+
+    if not pending:
+        return
+
+    # Streams the tar/tar.gz file syncing every dataset when its member is reached. Up to
+    # CGDS_MAX_PARALLEL_DATASETS datasets are parsed and inserted concurrently while the archive keeps being read
+    max_parallel_datasets = max(settings.CGDS_MAX_PARALLEL_DATASETS, 1)
+    free_slots = threading.BoundedSemaphore(max_parallel_datasets)
+    sync_futures: List[Future] = []
+    sync_results: List[Optional[Exception]] = []
+    rows_changes = RowsChanges()
+    archive_files: List[str] = []
+    member_copies: List[str] = []
+    check_if_stopped(is_aborted, ExperimentStopped)
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel_datasets) as executor:
+            for member_name, member_file in __iterate_study_files(archive_path, mode):
+                check_if_stopped(is_aborted, ExperimentStopped)
+                archive_files.append(member_name)
+                file_path = next(
+                    (candidate for candidate in __get_member_relative_paths(member_name) if candidate in pending),
+                    None
+                )
+                if file_path is None:
+                    continue
+
+                member_datasets = pending.pop(file_path)
+                if max_parallel_datasets == 1 and len(member_datasets) == 1:
+                    # Without parallelism the member is parsed directly from the stream
+                    dataset, check_patient_column, baseline = member_datasets[0]
+                    sync_results.append(__sync_dataset_in_thread(dataset, member_file, archive_files,
+                                                                 check_patient_column, baseline, rows_changes,
+                                                                 is_aborted))
+                else:
+                    # The stream can't be rewound nor shared between threads, so the member is copied to a temporary
+                    # file (instead of keeping it in memory) which every dataset reads with its own file object. Waits
+                    # for a free slot to bound the memory usage
+                    with tempfile.NamedTemporaryFile(mode='wb', delete=False) as member_copy:
+                        member_copies.append(member_copy.name)
+                        shutil.copyfileobj(member_file, member_copy)
+                    if resources_monitor is not None:
+                        resources_monitor.add_disk_usage(os.path.getsize(member_copy.name))
+
+                    release_member_copy = __get_member_copy_release(member_copy.name, len(member_datasets),
+                                                                    resources_monitor)
+                    for dataset, check_patient_column, baseline in member_datasets:
+                        while not free_slots.acquire(timeout=1):
+                            check_if_stopped(is_aborted, ExperimentStopped)
+
+                        future = executor.submit(__sync_dataset_from_file, dataset, member_copy.name,
+                                                 list(archive_files), check_patient_column, baseline, rows_changes,
+                                                 is_aborted)
+                        future.add_done_callback(lambda _: free_slots.release())
+                        future.add_done_callback(release_member_copy)
+                        sync_futures.append(future)
+
+                # The rest of the archive is not decompressed if all the datasets were found
+                if not pending:
+                    break
+
+            # Datasets whose file is not in the archive
+            for datasets in pending.values():
+                for dataset, check_patient_column, baseline in datasets:
+                    sync_results.append(__sync_dataset_in_thread(dataset, None, archive_files, check_patient_column,
+                                                                 baseline, rows_changes, is_aborted))
+    finally:
+        # Copies whose datasets were not submitted (e.g. if the sync was aborted)
+        for member_copy_path in member_copies:
+            __remove_member_copy(member_copy_path, resources_monitor)
+
+    # Stores the changes (the study is saved by the sync task)
+    cgds_study.sync_rows_added = rows_changes.added
+    cgds_study.sync_rows_removed = rows_changes.removed
+    cgds_study.sync_rows_changed = rows_changes.changed
+    cgds_study.sync_rows_unchanged = rows_changes.unchanged
+
+    # Raises the errors once all the datasets finished
+    sync_results += [future.result() for future in sync_futures]
+    errors = [error for error in sync_results if error is not None]
+    if any(isinstance(error, ExperimentStopped) for error in errors):
+        raise ExperimentStopped
+    if errors:
+        msg = f'{len(errors)} dataset/s of the CGDSStudy {cgds_study} had a sync problem'
+        logging.error(msg)
+        raise DatasetSyncError(msg)
 
 
 def all_dataset_finished_correctly(cgds_study: CGDSStudy) -> bool:
@@ -1,7 +1,7 @@
 import logging
 import os
 import tarfile
-import tempfile
+from typing import Optional
 import requests
 from urllib.error import URLError
 from billiard.exceptions import SoftTimeLimitExceeded
@@ -13,17 +13,20 @@ from common.exceptions import ExperimentStopped
 from common.functions import check_if_stopped
 from multiomics_intermediate.celery import app
 from .models import CGDSStudy, CGDSStudySynchronizationState
+from .resources_monitor import ResourcesMonitor
+from .study_archives import get_study_archive
 from .synchronization_service import extract_file_and_sync_datasets, all_dataset_finished_correctly
 
 
 @app.task(bind=True, base=AbortableTask, acks_late=True, reject_on_worker_lost=True,
           soft_time_limit=settings.SYNC_STUDY_SOFT_TIME_LIMIT)
-def sync_study(self, cgds_study_pk: int, only_failed: bool):
+def sync_study(self, cgds_study_pk: int, only_failed: bool, incremental: bool = False):
     """
     Synchronizes a CGDS Study from CBioportal (https://www.cbioportal.org/)
     @param self: Self instance of the Celery task (available due to bind=True).
     @param cgds_study_pk: CGDS Study's PK to synchronize
     @param only_failed: If True, only synchronizes the datasets that are not synchronized yet.
+    @param incremental: If True, only the rows that changed from the previous version of the study are written.
     """
     # Due to Celery getting old jobs from the queue, we need to check if the experiment still exists
     try:
@@ -36,40 +39,24 @@ def sync_study(self, cgds_study_pk: int, only_failed: bool):
     cgds_study.state = CGDSStudySynchronizationState.IN_PROCESS
     cgds_study.save(update_fields=['state'])
 
+    # Tracks the peak memory and disk usage of the whole synchronization
+    resources_monitor = ResourcesMonitor()
+    resources_monitor.start()
+
     # Gets the tar.gz file
+    archive_path: Optional[str] = None
+    remove_archive = False
     try:
-        # Downloads the file in a temporary file
+        # Downloads the file (or reuses it if it was not modified since the last synchronization)
         logging.warning(f'Starting {cgds_study.name} downloading')
         check_if_stopped(self.is_aborted, ExperimentStopped)
+        archive_path, remove_archive = get_study_archive(cgds_study.url, self.is_aborted,
+                                                         resources_monitor.add_disk_usage)
 
-        # Creates a temporary file to store the downloaded file. Uses this instead of NamedTemporaryFile
-        # to prevent issues on Windows (read more at https://stackoverflow.com/q/23212435/7058363)
-        downloaded_path = os.path.join(tempfile.gettempdir(), os.urandom(24).hex())
-        with open(downloaded_path, mode='wb') as out_file:
-            # Sets the variables to logs the download progress
-            check_if_stopped(self.is_aborted, ExperimentStopped)
-            connection_timeout = float(settings.CGDS_CONNECTION_TIMEOUT)
-            read_timeout = float(settings.CGDS_READ_TIMEOUT)
-            req = requests.get(cgds_study.url, stream=True, timeout=(connection_timeout, read_timeout))
-            size = int(req.headers['Content-Length'].strip())
-            downloaded_bytes = 0
-
-            # Reads in chunks and logs the progress
-            chunk_size = int(settings.CGDS_CHUNK_SIZE)
-            for chunk in req.iter_content(chunk_size=chunk_size):
-                check_if_stopped(self.is_aborted, ExperimentStopped)
-                out_file.write(chunk)
-
-                # Logs the progress status
-                downloaded_bytes += len(chunk)
-                downloaded_bytes_percentage = (100 * downloaded_bytes) // size
-                logging.warning(f'{cgds_study.name} downloaded at -> {downloaded_bytes_percentage}%')
-
-            logging.warning(f'{cgds_study.name} downloading finished')
-
-            # Extracts and synchronizes the CGDSStudy's Datasets
-            check_if_stopped(self.is_aborted, ExperimentStopped)
-            extract_file_and_sync_datasets(cgds_study, downloaded_path, only_failed, self.is_aborted)
+        # Extracts and synchronizes the CGDSStudy's Datasets
+        check_if_stopped(self.is_aborted, ExperimentStopped)
+        extract_file_and_sync_datasets(cgds_study, archive_path, only_failed, self.is_aborted, incremental,
+                                       resources_monitor)
 
         # Saves new state of the CGDSStudy
         check_if_stopped(self.is_aborted, ExperimentStopped)
@@ -78,10 +65,10 @@ def sync_study(self, cgds_study_pk: int, only_failed: bool):
             cgds_study.date_last_synchronization = timezone.now()
         else:
             cgds_study.state = CGDSStudySynchronizationState.FINISHED_WITH_ERROR
-    except (ConnectionError, URLError, ValueError) as e:
+    except (ConnectionError, URLError, ValueError, FileNotFoundError, requests.exceptions.HTTPError) as e:
         logging.error(f'The URL {cgds_study.url} of study with pk {cgds_study.pk} was not found: {e}')
         cgds_study.state = CGDSStudySynchronizationState.URL_ERROR
-    except tarfile.ReadError as e:
+    except (tarfile.ReadError, tarfile.StreamError) as e:
         logging.error(f'Error reading {cgds_study}: {e}')
         cgds_study.state = CGDSStudySynchronizationState.FINISHED_WITH_ERROR
     except requests.exceptions.ConnectTimeout as e:
@@ -105,6 +92,18 @@ def sync_study(self, cgds_study_pk: int, only_failed: bool):
         )
         logging.exception(e)
         cgds_study.state = CGDSStudySynchronizationState.FINISHED_WITH_ERROR
+    finally:
+        # Removes the downloaded file if the archives cache is disabled
+        if remove_archive and os.path.exists(archive_path):
+            resources_monitor.release_disk_usage(os.path.getsize(archive_path))
+            os.remove(archive_path)
+
+        resources_monitor.stop()
+
+    # Stores the resources usage
+    resources_monitor.log_peaks(f'CGDSStudy {cgds_study}')
+    cgds_study.sync_peak_memory_bytes = resources_monitor.peak_memory_bytes
+    cgds_study.sync_peak_disk_bytes = resources_monitor.peak_disk_bytes
 
     # Saves changes in the DB
     cgds_study.save()
\ No newline at end of file
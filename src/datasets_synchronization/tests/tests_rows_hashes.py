@@ -0,0 +1,102 @@
+import tempfile
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from api_service.mongo_service import MOLECULE_SYMBOL
+from common.constants import PATIENT_ID_COLUMN, SAMPLE_ID_COLUMN
+from datasets_synchronization.rows_hashes import compute_rows_hashes, compare_rows_hashes, get_rows_key_column, \
+    are_valid_rows_keys, save_rows_hashes, read_rows_hashes, remove_rows_hashes, ROWS_HASH_COLUMN
+from user_files.models_choices import FileType
+
+
+def get_molecules_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        MOLECULE_SYMBOL: ['BRCA1', 'TP53', 'EGFR', 'KRAS'],
+        'SAMPLE_1': [1.5, 2.0, -0.5, 3.25],
+        'SAMPLE_2': [0.0, 1.0, 2.0, 3.0]
+    })
+
+
+class RowsHashesTestCase(SimpleTestCase):
+    def test_compute_rows_hashes(self):
+        """Tests that every row has a hash indexed by its key and that it only depends on the row's content."""
+        df = get_molecules_df()
+        hashes = compute_rows_hashes(df, MOLECULE_SYMBOL)
+        self.assertEqual(hashes.index.name, MOLECULE_SYMBOL)
+        self.assertListEqual(hashes.index.tolist(), df[MOLECULE_SYMBOL].tolist())
+        self.assertListEqual(hashes.columns.tolist(), [ROWS_HASH_COLUMN])
+        self.assertTrue(hashes[ROWS_HASH_COLUMN].is_unique)
+
+        # Same hashes computed in other chunks or in other order
+        chunks_hashes = pd.concat([compute_rows_hashes(df.iloc[2:], MOLECULE_SYMBOL),
+                                   compute_rows_hashes(df.iloc[:2], MOLECULE_SYMBOL)])
+        pd.testing.assert_frame_equal(chunks_hashes.sort_index(), hashes.sort_index())
+
+    def test_numeric_dtypes(self):
+        """Tests that the hash doesn't depend on the dtype inferred for the chunk (e.g. int or float)."""
+        df = get_molecules_df()
+        int_df = df.copy()
+        int_df['SAMPLE_2'] = int_df['SAMPLE_2'].astype(np.int64)
+        pd.testing.assert_frame_equal(compute_rows_hashes(int_df, MOLECULE_SYMBOL),
+                                      compute_rows_hashes(df, MOLECULE_SYMBOL))
+
+    def test_changes(self):
+        """Tests that changing a value changes only its row's hash and that renaming a column changes all of them."""
+        df = get_molecules_df()
+        hashes = compute_rows_hashes(df, MOLECULE_SYMBOL)[ROWS_HASH_COLUMN]
+
+        changed_df = df.copy()
+        changed_df.loc[1, 'SAMPLE_1'] = 2.5
+        changed_hashes = compute_rows_hashes(changed_df, MOLECULE_SYMBOL)[ROWS_HASH_COLUMN]
+        self.assertListEqual((changed_hashes != hashes).tolist(), [False, True, False, False])
+
+        renamed_df = df.rename(columns={'SAMPLE_2': 'SAMPLE_3'})
+        renamed_hashes = compute_rows_hashes(renamed_df, MOLECULE_SYMBOL)[ROWS_HASH_COLUMN]
+        self.assertTrue((renamed_hashes != hashes).all())
+
+        new_column_df = df.assign(SAMPLE_3=1.0)
+        new_column_hashes = compute_rows_hashes(new_column_df, MOLECULE_SYMBOL)[ROWS_HASH_COLUMN]
+        self.assertTrue((new_column_hashes != hashes).all())
+
+    def test_compare_rows_hashes(self):
+        """Tests the masks of the rows in the previous version and of the unchanged ones."""
+        df = get_molecules_df()
+        previous_hashes = compute_rows_hashes(df, MOLECULE_SYMBOL)
+
+        # TP53 changed, KRAS removed and MYC added. Rows are in other order
+        current_df = pd.DataFrame({
+            MOLECULE_SYMBOL: ['MYC', 'EGFR', 'TP53', 'BRCA1'],
+            'SAMPLE_1': [7.0, -0.5, 20.0, 1.5],
+            'SAMPLE_2': [1.0, 2.0, 1.0, 0.0]
+        })
+        in_previous, same_content = compare_rows_hashes(previous_hashes,
+                                                        compute_rows_hashes(current_df, MOLECULE_SYMBOL))
+        self.assertListEqual(in_previous.tolist(), [False, True, True, True])
+        self.assertListEqual(same_content.tolist(), [False, True, False, True])
+
+        # Empty previous version
+        in_previous, same_content = compare_rows_hashes(previous_hashes.iloc[:0],
+                                                        compute_rows_hashes(current_df, MOLECULE_SYMBOL))
+        self.assertFalse(in_previous.any())
+        self.assertFalse(same_content.any())
+
+    def test_rows_keys(self):
+        columns = pd.Index([SAMPLE_ID_COLUMN, PATIENT_ID_COLUMN, 'AGE'])
+        self.assertEqual(get_rows_key_column(columns, FileType.CLINICAL), SAMPLE_ID_COLUMN)
+        self.assertEqual(get_rows_key_column(columns.drop(SAMPLE_ID_COLUMN), FileType.CLINICAL), PATIENT_ID_COLUMN)
+        self.assertIsNone(get_rows_key_column(pd.Index(['AGE']), FileType.CLINICAL))
+        self.assertEqual(get_rows_key_column(get_molecules_df().columns, FileType.MRNA), MOLECULE_SYMBOL)
+        self.assertIsNone(get_rows_key_column(columns, FileType.CNA))
+
+        self.assertTrue(are_valid_rows_keys(pd.Series(['BRCA1', 'TP53'])))
+        self.assertFalse(are_valid_rows_keys(pd.Series(['BRCA1', None])))
+        self.assertFalse(are_valid_rows_keys(pd.Series([1, 2])))
+
+    def test_save_and_read(self):
+        hashes = compute_rows_hashes(get_molecules_df(), MOLECULE_SYMBOL)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            self.assertIsNone(read_rows_hashes('dataset_rows.parquet'))
+            save_rows_hashes(hashes, 'dataset_rows.parquet')
+            pd.testing.assert_frame_equal(read_rows_hashes('dataset_rows.parquet'), hashes)
+            remove_rows_hashes('dataset_rows.parquet')
+            self.assertIsNone(read_rows_hashes('dataset_rows.parquet'))
@@ -0,0 +1,255 @@
+import itertools
+import os
+import tempfile
+from types import SimpleNamespace
+from typing import List, Optional
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import TestCase
+from api_service import pipelines
+from api_service.exceptions import CollectionReplaced
+from api_service.mongo_service import MOLECULE_SYMBOL, STANDARD_SYMBOL, global_mongo_service
+from common.datasets_utils import generate_molecules_dataframe, generate_molecules_file, read_dataset_file
+from datasets_synchronization import staging_writer
+from datasets_synchronization.models import CGDSStudy, CGDSDataset, CGDSDatasetSynchronizationState, \
+    CGDSStudySynchronizationState
+from datasets_synchronization.rows_hashes import RowsChanges
+from datasets_synchronization.staging_writer import StagingCollectionWriter, STAGING_COLLECTION_SUFFIX
+from datasets_synchronization.tests.tests_utils import FakeMongoService, FakeMongoDatabase
+from user_files.models_choices import FileType
+
+# Number of rows of every written (and read) chunk
+CHUNK_SIZE = 2
+
+# Private function of the correlation analysis pipeline to write a source in a temp file
+generate_clean_temp_file = getattr(pipelines, '__generate_clean_temp_file')
+
+
+def get_version_1_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        MOLECULE_SYMBOL: ['BRCA1', 'TP53', 'EGFR', 'KRAS', 'MYC', 'PTEN'],
+        'SAMPLE_1': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+        'SAMPLE_2': [0.5, 0.25, 0.75, 1.5, 2.5, 3.5]
+    })
+
+
+def get_version_2_df() -> pd.DataFrame:
+    """Version 1 with TP53 and MYC changed, KRAS removed and ALK and RET added."""
+    return pd.DataFrame({
+        MOLECULE_SYMBOL: ['BRCA1', 'TP53', 'EGFR', 'ALK', 'MYC', 'PTEN', 'RET'],
+        'SAMPLE_1': [1.0, 20.0, 3.0, 7.0, 5.0, 6.0, 8.0],
+        'SAMPLE_2': [0.5, 0.25, 0.75, 1.0, 25.0, 3.5, 2.0]
+    })
+
+
+class StagingCollectionWriterTestCase(TestCase):
+    """Tests the rows added, removed, changed and unchanged counted when a dataset's collection is replaced."""
+    mongo_service: FakeMongoService
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=temp_dir.name))
+        self.mongo_service = FakeMongoService()
+        self.enterContext(mock.patch.object(staging_writer, 'global_mongo_service', self.mongo_service))
+
+    @staticmethod
+    def __create_mrna_dataset(version: int) -> CGDSDataset:
+        dataset = CGDSDataset.objects.create(file_path='data_mrna.txt', separator='\t',
+                                             state=CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED,
+                                             mongo_collection_name=f'mrna_dataset_{version}')
+        CGDSStudy.objects.create(name='Test study', description='Test', url='http://not.exists.org/study.tar.gz',
+                                 version=version, state=CGDSStudySynchronizationState.IN_PROCESS,
+                                 mrna_dataset=dataset)
+        return dataset
+
+    def __write(self, dataset: CGDSDataset, df: pd.DataFrame, baseline: Optional[CGDSDataset] = None) -> RowsChanges:
+        """Writes a dataset in chunks of CHUNK_SIZE rows (as the synchronization does) and replaces its collection."""
+        rows_changes = RowsChanges()
+        with StagingCollectionWriter(dataset, baseline, rows_changes) as writer:
+            for i in range(0, df.shape[0], CHUNK_SIZE):
+                chunk = df.iloc[i:i + CHUNK_SIZE]
+                self.assertTrue(writer.write_chunk(chunk, chunk[MOLECULE_SYMBOL]))
+            writer.replace_collection()
+        return rows_changes
+
+    def __assert_changes(self, rows_changes: RowsChanges, added: int, removed: int, changed: int, unchanged: int):
+        self.assertListEqual(
+            [rows_changes.added, rows_changes.removed, rows_changes.changed, rows_changes.unchanged],
+            [added, removed, changed, unchanged]
+        )
+
+    def __assert_collection(self, collection_name: str, expected_df: pd.DataFrame):
+        df = self.mongo_service.get_df(collection_name).drop(columns=[STANDARD_SYMBOL])
+        pd.testing.assert_frame_equal(df.sort_values(MOLECULE_SYMBOL).reset_index(drop=True),
+                                      expected_df.sort_values(MOLECULE_SYMBOL).reset_index(drop=True))
+
+    def __inserted_rows(self, dataset: CGDSDataset) -> List[int]:
+        staging_collection = f'{dataset.mongo_collection_name}{STAGING_COLLECTION_SUFFIX}'
+        return [n_rows for collection, n_rows in self.mongo_service.inserted_chunks if collection == staging_collection]
+
+    def test_full_sync(self):
+        """Tests that all the rows are added without baseline."""
+        dataset = self.__create_mrna_dataset(1)
+        rows_changes = self.__write(dataset, get_version_1_df())
+        self.__assert_changes(rows_changes, added=6, removed=0, changed=0, unchanged=0)
+        self.__assert_collection('mrna_dataset_1', get_version_1_df())
+        self.assertNotIn(f'mrna_dataset_1{STAGING_COLLECTION_SUFFIX}', self.mongo_service.collections)
+
+    def test_incremental_sync(self):
+        """Tests that only the added and changed rows are inserted and that the removed ones are deleted."""
+        baseline = self.__create_mrna_dataset(1)
+        self.__write(baseline, get_version_1_df())
+        dataset = self.__create_mrna_dataset(2)
+        rows_changes = self.__write(dataset, get_version_2_df(), baseline)
+
+        self.__assert_changes(rows_changes, added=2, removed=1, changed=2, unchanged=3)
+        self.assertEqual(sum(self.__inserted_rows(dataset)), 4)
+        self.__assert_collection('mrna_dataset_2', get_version_2_df())
+        self.__assert_collection('mrna_dataset_1', get_version_1_df())
+
+        # The new version is the baseline of the next one
+        dataset_3 = self.__create_mrna_dataset(3)
+        rows_changes = self.__write(dataset_3, get_version_2_df(), dataset)
+        self.__assert_changes(rows_changes, added=0, removed=0, changed=0, unchanged=7)
+        self.assertListEqual(self.__inserted_rows(dataset_3), [])
+        self.__assert_collection('mrna_dataset_3', get_version_2_df())
+
+    def test_new_sample(self):
+        """Tests that a new sample (which changes all the rows) rewrites the whole collection."""
+        baseline = self.__create_mrna_dataset(1)
+        self.__write(baseline, get_version_1_df())
+        dataset = self.__create_mrna_dataset(2)
+        new_df = get_version_1_df().assign(SAMPLE_3=1.0)
+        rows_changes = self.__write(dataset, new_df, baseline)
+
+        self.__assert_changes(rows_changes, added=6, removed=0, changed=0, unchanged=0)
+        self.assertEqual(sum(self.__inserted_rows(dataset)), 6)
+        self.__assert_collection('mrna_dataset_2', new_df)
+
+    def test_repeated_molecules(self):
+        """Tests that the repeated molecules (ignoring the case) are removed and not counted."""
+        baseline = self.__create_mrna_dataset(1)
+        self.__write(baseline, get_version_1_df())
+
+        # 'tp53' (in another chunk) and the changed TP53 are removed. Then, TP53 is counted as removed
+        version_2_df = get_version_2_df()
+        repeated_df = pd.concat([version_2_df, pd.DataFrame({MOLECULE_SYMBOL: ['tp53'], 'SAMPLE_1': [9.0],
+                                                             'SAMPLE_2': [9.0]})], ignore_index=True)
+        dataset = self.__create_mrna_dataset(2)
+        rows_changes = self.__write(dataset, repeated_df, baseline)
+
+        self.__assert_changes(rows_changes, added=2, removed=2, changed=1, unchanged=3)
+        self.__assert_collection('mrna_dataset_2', version_2_df[version_2_df[MOLECULE_SYMBOL] != 'TP53'])
+
+    def test_failed_write(self):
+        """Tests that the staging collection is removed and the changes are not counted if anything fails."""
+        dataset = self.__create_mrna_dataset(1)
+        self.__write(dataset, get_version_1_df())
+        rows_changes = RowsChanges()
+        with self.assertRaises(ValueError):
+            with StagingCollectionWriter(dataset, None, rows_changes) as writer:
+                writer.write_chunk(get_version_2_df(), get_version_2_df()[MOLECULE_SYMBOL])
+                raise ValueError
+
+        self.__assert_changes(rows_changes, added=0, removed=0, changed=0, unchanged=0)
+        self.assertNotIn(f'mrna_dataset_1{STAGING_COLLECTION_SUFFIX}', self.mongo_service.collections)
+        self.__assert_collection('mrna_dataset_1', get_version_1_df())
+
+
+class CollectionReplacedTestCase(TestCase):
+    """Tests the reading in chunks of a dataset whose collection is replaced by a re-synchronization."""
+    mongo_service: FakeMongoService
+    mongo_db: FakeMongoDatabase
+    dataset: CGDSDataset
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=temp_dir.name, EXPERIMENT_CHUNK_SIZE=CHUNK_SIZE))
+        self.mongo_service = FakeMongoService()
+        self.mongo_db = FakeMongoDatabase(self.mongo_service)
+        self.enterContext(mock.patch.object(staging_writer, 'global_mongo_service', self.mongo_service))
+        self.enterContext(mock.patch.object(global_mongo_service, 'db', self.mongo_db))
+
+        self.dataset = CGDSDataset.objects.create(file_path='data_mrna.txt', separator='\t',
+                                                  state=CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED,
+                                                  mongo_collection_name='mrna_dataset')
+        CGDSStudy.objects.create(name='Test study', description='Test', url='http://not.exists.org/study.tar.gz',
+                                 version=1, state=CGDSStudySynchronizationState.COMPLETED, mrna_dataset=self.dataset)
+        self.__write(get_version_1_df())
+
+    def __write(self, df: pd.DataFrame):
+        """Writes the whole dataset in the staging collection and replaces the dataset's collection with it."""
+        with StagingCollectionWriter(self.dataset, None, RowsChanges()) as writer:
+            writer.write_chunk(df, df[MOLECULE_SYMBOL])
+            writer.replace_collection()
+
+    def __replace_in_query(self, query_number: int, df: pd.DataFrame):
+        """Replaces the dataset's collection with a new version right before a query to it."""
+        queries = itertools.count(1)
+
+        def on_find(collection_name: str):
+            if collection_name == self.dataset.mongo_collection_name and next(queries) == query_number:
+                self.__write(df)
+
+        self.mongo_db.on_find = on_find
+
+    @staticmethod
+    def __get_experiment(molecules: List[str]) -> SimpleNamespace:
+        """Experiment with the dataset as its only source."""
+        return SimpleNamespace(get_sources_and_molecules=lambda: [(dataset, molecules, FileType.MRNA)
+                                                                  for dataset in CGDSDataset.objects.all()])
+
+    @staticmethod
+    def __expected_molecules_df(df: pd.DataFrame) -> pd.DataFrame:
+        """The rows of a version as returned by generate_molecules_dataframe()."""
+        expected_df = df.set_index(MOLECULE_SYMBOL)[['SAMPLE_1', 'SAMPLE_2']]
+        expected_df.index = expected_df.index + f'_{FileType.MRNA}'
+        return expected_df.sort_index()
+
+    def test_replaced_while_reading(self):
+        """Tests that the reading fails if the collection is replaced between two chunks, instead of mixing them."""
+        self.__replace_in_query(2, get_version_2_df())
+        chunks = self.dataset.get_df_in_chunks()
+        first_chunk = next(chunks)
+        self.assertListEqual(first_chunk.index.tolist(), ['BRCA1', 'TP53'])
+        with self.assertRaises(CollectionReplaced):
+            next(chunks)
+
+        # A new reading gets the whole new version
+        molecules = pd.concat(self.dataset.get_df_in_chunks()).index.tolist()
+        self.assertListEqual(sorted(molecules), sorted(get_version_2_df()[MOLECULE_SYMBOL]))
+
+    def test_molecules_read_again(self):
+        """Tests that the molecules of an experiment are read again from the new collection."""
+        molecules = get_version_2_df()[MOLECULE_SYMBOL].tolist() + ['KRAS']
+        samples = np.array(['SAMPLE_1', 'SAMPLE_2'])
+
+        self.__replace_in_query(3, get_version_2_df())
+        molecules_df = generate_molecules_dataframe(self.__get_experiment(molecules), samples)
+        pd.testing.assert_frame_equal(molecules_df.sort_index(), self.__expected_molecules_df(get_version_2_df()),
+                                      check_names=False)
+
+        # The rows of the first reading are removed from the file
+        self.__replace_in_query(2, get_version_1_df())
+        molecules_file_path = generate_molecules_file(self.__get_experiment(molecules), samples)
+        self.addCleanup(os.unlink, molecules_file_path)
+        pd.testing.assert_frame_equal(read_dataset_file(molecules_file_path).sort_index(),
+                                      self.__expected_molecules_df(get_version_1_df()), check_names=False)
+
+    def test_correlation_file_read_again(self):
+        """Tests that the temp file of a correlation analysis is written again from the new collection."""
+        self.__replace_in_query(2, get_version_2_df())
+        experiment = SimpleNamespace(minimum_std_gene=0.0)
+        with mock.patch.object(pipelines, '__get_molecules_to_skip', return_value=None):
+            temp_file, number_of_rows, is_cpg_analysis = generate_clean_temp_file(
+                self.dataset, np.array(['SAMPLE_1', 'SAMPLE_2']), experiment, 'Gene', check_cpg_platform=False
+            )
+        self.addCleanup(os.unlink, temp_file.name)
+
+        self.assertEqual(number_of_rows, get_version_2_df().shape[0])
+        self.assertFalse(is_cpg_analysis)
+        written_df = pd.read_csv(temp_file.name, sep='\t', index_col=0)
+        self.assertListEqual(sorted(written_df.index), sorted(get_version_2_df()[MOLECULE_SYMBOL]))
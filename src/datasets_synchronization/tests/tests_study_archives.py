@@ -0,0 +1,141 @@
+import os
+import tempfile
+import time
+from unittest import mock
+from django.test import SimpleTestCase
+from datasets_synchronization import study_archives
+from datasets_synchronization.study_archives import get_study_archive, PARTIAL_DOWNLOADS_TTL
+
+# Private functions of the archives cache
+get_local_source = getattr(study_archives, '__get_local_source')
+evict_archives = getattr(study_archives, '__evict_archives')
+remove_expired_partial_downloads = getattr(study_archives, '__remove_expired_partial_downloads')
+
+# Names of the archives (SHA-256 of their content) and partial downloads (SHA-1 of their URL)
+ARCHIVE_A = 'a' * 64
+ARCHIVE_B = 'b' * 64
+PARTIAL_DOWNLOAD = f'{"c" * 40}.part'
+
+
+class LocalSourcesTestCase(SimpleTestCase):
+    """Tests that the local sources of the CGDSStudies are only read if they are allowed."""
+    temp_dir: tempfile.TemporaryDirectory
+    archive_path: str
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.archive_path = os.path.join(self.temp_dir.name, 'study.tar.gz')
+        with open(self.archive_path, 'wb') as fp:
+            fp.write(b'content')
+
+    def test_local_sources_disabled(self):
+        """Tests that local sources are rejected by default (without checking if they exist)."""
+        with self.settings(CGDS_ALLOW_LOCAL_SOURCES=False):
+            for url in [self.archive_path, f'file://{self.archive_path}', 'file:///etc/passwd', '/not/exists.tar.gz']:
+                with self.assertRaises(ValueError, msg=url):
+                    get_study_archive(url, is_aborted=lambda: False)
+
+    def test_local_sources_allowed(self):
+        with self.settings(CGDS_ALLOW_LOCAL_SOURCES=True, CGDS_LOCAL_SOURCES_ROOT=''):
+            self.assertEqual(get_local_source(self.archive_path), self.archive_path)
+            self.assertEqual(get_local_source(f'file://{self.archive_path}'), self.archive_path)
+            self.assertEqual(get_study_archive(self.temp_dir.name, is_aborted=lambda: False),
+                             (self.temp_dir.name, False))
+            self.assertIsNone(get_local_source('https://cbioportal-datahub.s3.amazonaws.com/study.tar.gz'))
+            with self.assertRaises(FileNotFoundError):
+                get_local_source(f'file://{self.temp_dir.name}/not_exists.tar.gz')
+
+    def test_local_sources_root(self):
+        """Tests that local sources must be inside CGDS_LOCAL_SOURCES_ROOT (also following links)."""
+        root = os.path.join(self.temp_dir.name, 'studies')
+        os.makedirs(root)
+        study_path = os.path.join(root, 'study.tar.gz')
+        os.replace(self.archive_path, study_path)
+        link_path = os.path.join(root, 'passwd')
+        os.symlink('/etc/passwd', link_path)
+        other_folder = os.path.join(self.temp_dir.name, 'studies_other')
+        os.makedirs(other_folder)
+
+        with self.settings(CGDS_ALLOW_LOCAL_SOURCES=True, CGDS_LOCAL_SOURCES_ROOT=root):
+            self.assertEqual(get_local_source(study_path), study_path)
+            self.assertEqual(get_local_source(f'file://{study_path}'), study_path)
+            for url in ['/etc/passwd', 'file:///etc/passwd', link_path, other_folder,
+                        os.path.join(root, '..', 'studies_other')]:
+                with self.assertRaises(ValueError, msg=url):
+                    get_local_source(url)
+
+
+class ArchivesCacheTestCase(SimpleTestCase):
+    """Tests the removal of the cached archives and partial downloads."""
+    temp_dir: tempfile.TemporaryDirectory
+    folder: str
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=self.temp_dir.name, CGDS_ARCHIVES_FOLDER='cgds_archives'))
+        self.folder = os.path.join(self.temp_dir.name, 'cgds_archives')
+        os.makedirs(self.folder)
+
+    def __create_file(self, file_name: str, size_mb: float, age: float) -> str:
+        """Creates a file in the archives folder modified 'age' seconds ago."""
+        file_path = os.path.join(self.folder, file_name)
+        with open(file_path, 'wb') as fp:
+            fp.write(b'0' * int(size_mb * 1024 * 1024))
+        modification_time = time.time() - age
+        os.utime(file_path, (modification_time, modification_time))
+        return file_path
+
+    def __files(self) -> set:
+        return set(os.listdir(self.folder))
+
+    def test_evict_partial_downloads(self):
+        """Tests that the partial downloads count in the cache's size and are removed with their validators."""
+        self.__create_file(PARTIAL_DOWNLOAD, size_mb=1, age=300)
+        self.__create_file(f'{PARTIAL_DOWNLOAD}.json', size_mb=0, age=300)
+        self.__create_file(ARCHIVE_A, size_mb=1, age=200)
+        keep_path = self.__create_file(ARCHIVE_B, size_mb=1, age=0)
+
+        with self.settings(CGDS_ARCHIVES_CACHE_MAX_SIZE=2):
+            evict_archives(keep_path)
+        self.assertSetEqual(self.__files(), {ARCHIVE_A, ARCHIVE_B})
+
+        with self.settings(CGDS_ARCHIVES_CACHE_MAX_SIZE=1):
+            evict_archives(keep_path)
+        self.assertSetEqual(self.__files(), {ARCHIVE_B})
+
+    def test_recent_partial_downloads_kept(self):
+        """Tests that a partial download being written (the most recent file) is removed after the archives."""
+        self.__create_file(ARCHIVE_A, size_mb=1, age=300)
+        self.__create_file(PARTIAL_DOWNLOAD, size_mb=1, age=0)
+        keep_path = self.__create_file(ARCHIVE_B, size_mb=1, age=100)
+
+        with self.settings(CGDS_ARCHIVES_CACHE_MAX_SIZE=2):
+            evict_archives(keep_path)
+        self.assertSetEqual(self.__files(), {PARTIAL_DOWNLOAD, ARCHIVE_B})
+
+    def test_expired_partial_downloads(self):
+        """Tests that the partial downloads not resumed in PARTIAL_DOWNLOADS_TTL seconds are removed."""
+        recent_partial = f'{"d" * 40}.part'
+        orphan_validators = f'{"e" * 40}.part.json'
+        self.__create_file(PARTIAL_DOWNLOAD, size_mb=0.1, age=PARTIAL_DOWNLOADS_TTL + 60)
+        self.__create_file(f'{PARTIAL_DOWNLOAD}.json', size_mb=0, age=PARTIAL_DOWNLOADS_TTL + 60)
+        self.__create_file(recent_partial, size_mb=0.1, age=60)
+        self.__create_file(f'{recent_partial}.json', size_mb=0, age=PARTIAL_DOWNLOADS_TTL + 60)
+        self.__create_file(orphan_validators, size_mb=0, age=PARTIAL_DOWNLOADS_TTL + 60)
+        self.__create_file(ARCHIVE_A, size_mb=0.1, age=PARTIAL_DOWNLOADS_TTL + 60)
+        self.__create_file('other_file.txt', size_mb=0, age=PARTIAL_DOWNLOADS_TTL + 60)
+
+        remove_expired_partial_downloads()
+        self.assertSetEqual(self.__files(), {recent_partial, f'{recent_partial}.json', ARCHIVE_A, 'other_file.txt'})
+
+    def test_expired_partial_downloads_without_cache(self):
+        """Tests that the expired partial downloads are removed after a download even if the cache is disabled."""
+        self.__create_file(PARTIAL_DOWNLOAD, size_mb=0.1, age=PARTIAL_DOWNLOADS_TTL + 60)
+        archive_path = self.__create_file(ARCHIVE_A, size_mb=0.1, age=0)
+        with self.settings(CGDS_ARCHIVES_CACHE_MAX_SIZE=0), \
+                mock.patch.object(study_archives, '__download_archive', return_value=archive_path):
+            self.assertEqual(get_study_archive('https://cbioportal.org/study.tar.gz', is_aborted=lambda: False),
+                             (archive_path, True))
+        self.assertSetEqual(self.__files(), {ARCHIVE_A})
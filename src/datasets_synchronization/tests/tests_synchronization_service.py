@@ -0,0 +1,268 @@
+import io
+import os
+import tempfile
+from typing import Optional, Dict
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import TestCase, TransactionTestCase, override_settings
+from api_service.mongo_service import MOLECULE_SYMBOL, STANDARD_SYMBOL
+from common.constants import TCGA_CONVENTION, PATIENT_ID_COLUMN
+from common.datasets_utils import clean_dataset
+from datasets_synchronization import staging_writer, synchronization_service
+from datasets_synchronization.models import CGDSStudy, CGDSDataset, CGDSDatasetSynchronizationState, \
+    CGDSStudySynchronizationState
+from datasets_synchronization.resources_monitor import ResourcesMonitor
+from datasets_synchronization.staging_writer import STAGING_COLLECTION_SUFFIX
+from datasets_synchronization.synchronization_service import extract_file_and_sync_datasets, DatasetSyncError
+from datasets_synchronization.tests.tests_utils import FakeMongoService, create_study_archive, get_tsv
+
+# Number of rows of every chunk read from the datasets' files
+SYNC_CHUNK_SIZE = 3
+
+# Private function which removes the temporary copy of a member when all its datasets finish
+get_member_copy_release = getattr(synchronization_service, '__get_member_copy_release')
+
+# Samples of the molecules datasets
+SAMPLES = ['TCGA-AB-0001-01', 'TCGA-AB-0002-03', 'TCGA-AB-0003-11', 'TCGA-AB-0004']
+
+
+def get_mrna_df() -> pd.DataFrame:
+    """
+    Gets a mRNA dataset with a molecule repeated with different case in different chunks (BRCA1), a molecule repeated
+    in the same chunk (TP53) and rows with NaN values.
+    """
+    symbols = ['BRCA1', 'EGFR', 'TP53', 'TP53', 'KRAS', 'MYC', 'brca1', 'PTEN', 'NAN_GENE', 'ALK', 'RET']
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(len(symbols), len(SAMPLES)))
+    values[8, 1] = np.nan
+    values[4, 3] = np.inf
+    df = pd.DataFrame(values, columns=SAMPLES)
+    df.insert(0, MOLECULE_SYMBOL, symbols)
+    df.insert(1, 'Entrez_Gene_Id', np.arange(len(symbols)))
+    return df
+
+
+def get_clinical_patient_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        PATIENT_ID_COLUMN: ['TCGA-AB-0001', 'TCGA-AB-0002', 'TCGA-AB-0003', 'TCGA-AB-0004'],
+        'OS_STATUS': ['1:DECEASED', '0:LIVING', '0:LIVING', '1:DECEASED'],
+        'OS_MONTHS': [10.5, 20.0, 7.25, 3.0]
+    })
+
+
+@override_settings(CGDS_SYNC_CHUNK_SIZE=SYNC_CHUNK_SIZE, CGDS_MAX_PARALLEL_DATASETS=1)
+class CGDSStudySynchronizationTestCase(TestCase):
+    """Tests the synchronization of the datasets of a CGDSStudy from a tar.gz file."""
+    study: CGDSStudy
+    mongo_service: FakeMongoService
+    temp_dir: tempfile.TemporaryDirectory
+    archive_path: str
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.archive_path = os.path.join(self.temp_dir.name, 'study.tar.gz')
+
+        self.mongo_service = FakeMongoService()
+        self.enterContext(mock.patch.object(staging_writer, 'global_mongo_service', self.mongo_service))
+        self.enterContext(mock.patch.object(synchronization_service, 'send_update_cgds_studies_command'))
+        self.enterContext(mock.patch.object(CGDSDataset, 'compute_post_saved_field'))
+        self.enterContext(self.settings(MEDIA_ROOT=self.temp_dir.name))
+
+        self.study = CGDSStudy.objects.create(
+            name='Test study',
+            description='Study read from a local tar.gz file',
+            url='http://not.exists.org/test_study.tar.gz',
+            state=CGDSStudySynchronizationState.IN_PROCESS,
+            mrna_dataset=self.__create_dataset('data_mrna.txt', 'mrna_dataset'),
+            clinical_patient_dataset=self.__create_dataset('data_clinical_patient.txt', 'clinical_dataset', 4)
+        )
+
+    @staticmethod
+    def __create_dataset(file_path: str, mongo_collection_name: str, header_row_index: int = 0) -> CGDSDataset:
+        return CGDSDataset.objects.create(
+            file_path=file_path,
+            separator='\t',
+            header_row_index=header_row_index,
+            state=CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED,
+            mongo_collection_name=mongo_collection_name
+        )
+
+    def __create_archive(self, files: Optional[Dict[str, str]] = None):
+        """Creates the study's tar.gz with a sub folder (like some cBioPortal studies) and other files."""
+        if files is None:
+            files = {
+                'test_study/meta_study.txt': 'type_of_cancer: aml\n',
+                'test_study/data_mrna.txt': get_tsv(get_mrna_df()),
+                'test_study/case_lists/cases_all.txt': 'case_list_ids: TCGA-AB-0001\n',
+                'test_study/data_clinical_patient.txt': get_tsv(get_clinical_patient_df(), comment_lines=4),
+                'test_study/data_cna.txt': get_tsv(get_mrna_df()),
+            }
+        create_study_archive(self.archive_path, files)
+
+    def __sync(self):
+        extract_file_and_sync_datasets(self.study, self.archive_path, only_failed=False, is_aborted=lambda: False)
+
+    def __refresh_datasets(self):
+        self.study.mrna_dataset.refresh_from_db()
+        self.study.clinical_patient_dataset.refresh_from_db()
+
+    def test_sync_selected_members(self):
+        """Tests that only the members of the study's datasets are read (ignoring the sub folder)."""
+        self.__create_archive()
+        with mock.patch.object(synchronization_service.pd, 'read_csv', wraps=pd.read_csv) as read_csv:
+            self.__sync()
+        self.__refresh_datasets()
+
+        self.assertEqual(read_csv.call_count, 2)
+        self.assertEqual(self.study.mrna_dataset.state, CGDSDatasetSynchronizationState.SUCCESS)
+        self.assertEqual(self.study.clinical_patient_dataset.state, CGDSDatasetSynchronizationState.SUCCESS)
+        self.assertSetEqual(set(self.mongo_service.collections), {'mrna_dataset', 'clinical_dataset'})
+
+        clinical_df = self.mongo_service.get_df('clinical_dataset')
+        pd.testing.assert_frame_equal(clinical_df, get_clinical_patient_df())
+
+    def test_file_does_not_exist(self):
+        """Tests that a dataset whose file is not in the archive fails without affecting the rest."""
+        mirna_dataset = self.__create_dataset('data_mirna.txt', 'mirna_dataset')
+        self.study.mirna_dataset = mirna_dataset
+        self.study.save()
+        self.__create_archive()
+
+        with self.assertRaises(DatasetSyncError):
+            self.__sync()
+        self.__refresh_datasets()
+        mirna_dataset.refresh_from_db()
+
+        self.assertEqual(mirna_dataset.state, CGDSDatasetSynchronizationState.FILE_DOES_NOT_EXIST)
+        self.assertIn('data_mirna.txt', mirna_dataset.sync_error)
+        self.assertEqual(self.study.mrna_dataset.state, CGDSDatasetSynchronizationState.SUCCESS)
+        self.assertEqual(self.study.clinical_patient_dataset.state, CGDSDatasetSynchronizationState.SUCCESS)
+        self.assertNotIn('mirna_dataset', self.mongo_service.collections)
+
+    def test_chunked_insertion(self):
+        """Tests that the datasets are inserted in chunks of CGDS_SYNC_CHUNK_SIZE rows (without the NaN values)."""
+        self.__create_archive()
+        self.__sync()
+
+        mrna_df = get_mrna_df()
+        expected_chunks_sizes = [
+            clean_dataset(mrna_df.iloc[i:i + SYNC_CHUNK_SIZE], axis='index').shape[0]
+            for i in range(0, mrna_df.shape[0], SYNC_CHUNK_SIZE)
+        ]
+        staging_collection = f'mrna_dataset{STAGING_COLLECTION_SUFFIX}'
+        chunks_sizes = [n_documents for collection, n_documents in self.mongo_service.inserted_chunks
+                        if collection == staging_collection]
+        self.assertListEqual(chunks_sizes, expected_chunks_sizes)
+
+        # Repeated molecules (BRCA1, TP53) and rows with NaN/Inf values (NAN_GENE, KRAS) are not counted
+        self.assertEqual(self.study.sync_rows_added, 5 + get_clinical_patient_df().shape[0])
+        self.assertEqual(self.study.sync_rows_removed, 0)
+
+    def test_repeated_molecules(self):
+        """
+        Tests that the molecules repeated in different chunks (ignoring the case) are removed as the previous
+        drop_duplicates(keep=False) over the whole dataset.
+        """
+        self.__create_archive()
+        self.__sync()
+
+        # Previous implementation with the whole dataset in memory
+        expected_df = pd.read_csv(io.StringIO(get_tsv(get_mrna_df())), sep='\t')
+        expected_df.columns = expected_df.columns.str.replace(TCGA_CONVENTION, '', regex=True)
+        upper_col = f'{MOLECULE_SYMBOL}_upper'
+        expected_df[upper_col] = expected_df[MOLECULE_SYMBOL].str.upper()
+        expected_df = expected_df.drop_duplicates(subset=[upper_col], keep=False)
+        expected_df = expected_df.drop(columns=[upper_col])
+        expected_df = clean_dataset(expected_df, axis='index')
+
+        mrna_df = self.mongo_service.get_df('mrna_dataset')
+        self.assertTrue((mrna_df[STANDARD_SYMBOL] == mrna_df[MOLECULE_SYMBOL]).all())
+        mrna_df = mrna_df.drop(columns=[STANDARD_SYMBOL])
+        self.assertListEqual(sorted(mrna_df[MOLECULE_SYMBOL]), ['ALK', 'EGFR', 'MYC', 'PTEN', 'RET'])
+        pd.testing.assert_frame_equal(mrna_df.sort_values(MOLECULE_SYMBOL).reset_index(drop=True),
+                                      expected_df.sort_values(MOLECULE_SYMBOL).reset_index(drop=True))
+
+
+@override_settings(CGDS_SYNC_CHUNK_SIZE=SYNC_CHUNK_SIZE, CGDS_MAX_PARALLEL_DATASETS=3)
+class ParallelCGDSStudySynchronizationTestCase(TransactionTestCase):
+    """
+    Tests the concurrent synchronization of the datasets, which read temporary copies of the archive's members. The
+    datasets are synchronized in other threads with their own DB connection, so the changes must be committed.
+    """
+    temp_dir: tempfile.TemporaryDirectory
+    copies_dir: str  # Folder of the temporary copies of the members
+    mongo_service: FakeMongoService
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.copies_dir = os.path.join(self.temp_dir.name, 'copies')
+        os.makedirs(self.copies_dir)
+
+        self.mongo_service = FakeMongoService()
+        self.enterContext(mock.patch.object(staging_writer, 'global_mongo_service', self.mongo_service))
+        self.enterContext(mock.patch.object(synchronization_service, 'send_update_cgds_studies_command'))
+        self.enterContext(mock.patch.object(CGDSDataset, 'compute_post_saved_field'))
+        self.enterContext(mock.patch.object(synchronization_service.tempfile, 'tempdir', self.copies_dir))
+        self.enterContext(self.settings(MEDIA_ROOT=self.temp_dir.name))
+
+    @staticmethod
+    def __create_dataset(file_path: str, mongo_collection_name: str, header_row_index: int = 0) -> CGDSDataset:
+        return CGDSDataset.objects.create(file_path=file_path, separator='\t', header_row_index=header_row_index,
+                                          state=CGDSDatasetSynchronizationState.NOT_SYNCHRONIZED,
+                                          mongo_collection_name=mongo_collection_name)
+
+    def test_parallel_sync(self):
+        """
+        Tests that the datasets synchronized concurrently (two of them from the same member) get the same content as
+        the sequential sync and that the members' copies are removed and counted in the disk usage.
+        """
+        archive_path = os.path.join(self.temp_dir.name, 'study.tar.gz')
+        mrna_content = get_tsv(get_mrna_df())
+        create_study_archive(archive_path, {
+            'test_study/data_mrna.txt': mrna_content,
+            'test_study/data_clinical_patient.txt': get_tsv(get_clinical_patient_df(), comment_lines=4),
+        })
+        study = CGDSStudy.objects.create(
+            name='Test study', description='Test', url='http://not.exists.org/test_study.tar.gz',
+            state=CGDSStudySynchronizationState.IN_PROCESS,
+            mrna_dataset=self.__create_dataset('data_mrna.txt', 'mrna_dataset'),
+            cna_dataset=self.__create_dataset('data_mrna.txt', 'cna_dataset'),
+            clinical_patient_dataset=self.__create_dataset('data_clinical_patient.txt', 'clinical_dataset', 4)
+        )
+
+        resources_monitor = ResourcesMonitor()
+        extract_file_and_sync_datasets(study, archive_path, only_failed=False, is_aborted=lambda: False,
+                                       resources_monitor=resources_monitor)
+
+        for dataset in study.get_all_valid_datasets():
+            dataset.refresh_from_db()
+            self.assertEqual(dataset.state, CGDSDatasetSynchronizationState.SUCCESS)
+        pd.testing.assert_frame_equal(self.mongo_service.get_df('mrna_dataset'),
+                                      self.mongo_service.get_df('cna_dataset'))
+        self.assertListEqual(sorted(self.mongo_service.get_df('mrna_dataset')[MOLECULE_SYMBOL]),
+                             ['ALK', 'EGFR', 'MYC', 'PTEN', 'RET'])
+
+        self.assertListEqual(os.listdir(self.copies_dir), [])
+        self.assertEqual(resources_monitor.current_disk_bytes, 0)
+        self.assertGreaterEqual(resources_monitor.peak_disk_bytes, len(mrna_content.encode('utf-8')))
+
+    def test_member_copy_release(self):
+        """Tests that a member's copy is removed when the last of its datasets finishes."""
+        member_copy_path = os.path.join(self.copies_dir, 'member_copy')
+        with open(member_copy_path, 'wb') as fp:
+            fp.write(b'0' * 100)
+        resources_monitor = ResourcesMonitor()
+        resources_monitor.add_disk_usage(100)
+
+        release = get_member_copy_release(member_copy_path, 2, resources_monitor)
+        release(mock.Mock())
+        self.assertTrue(os.path.exists(member_copy_path))
+        self.assertEqual(resources_monitor.current_disk_bytes, 100)
+
+        release(mock.Mock())
+        self.assertFalse(os.path.exists(member_copy_path))
+        self.assertEqual(resources_monitor.current_disk_bytes, 0)
+        self.assertEqual(resources_monitor.peak_disk_bytes, 100)
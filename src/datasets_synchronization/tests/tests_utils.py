@@ -0,0 +1,163 @@
+import io
+import itertools
+import tarfile
+from typing import Dict, List, Any, Tuple, Optional, Callable, Iterator
+import pandas as pd
+from api_service.mongo_service import global_mongo_service, MOLECULE_SYMBOL, STANDARD_SYMBOL
+from user_files.models_choices import FileType
+
+
+class FakeMongoService:
+    """
+    In-memory replacement of the MongoService methods used by the CGDS synchronization, as MongoDB is not available
+    during tests. The standard symbol of every molecule is the molecule itself.
+    """
+    collections: Dict[str, List[Dict[str, Any]]]
+    inserted_chunks: List[Tuple[str, int]]  # Collection and number of documents of every insert_cgds_dataset() call
+    default_non_used_fields_query: Dict[str, int]
+
+    def __init__(self):
+        self.collections = {}
+        self.inserted_chunks = []
+        self.default_non_used_fields_query = global_mongo_service.default_non_used_fields_query
+
+    def insert_cgds_dataset(self, dataset_df: pd.DataFrame, table_name: str, file_type: FileType) -> bool:
+        documents = dataset_df.to_dict('records')
+        if file_type != FileType.CLINICAL:
+            for document in documents:
+                document[STANDARD_SYMBOL] = document[MOLECULE_SYMBOL]
+        self.collections.setdefault(table_name, []).extend(documents)
+        self.inserted_chunks.append((table_name, len(documents)))
+        return True
+
+    def drop_collection(self, collection_to_remove: str):
+        self.collections.pop(collection_to_remove, None)
+
+    def collection_exists(self, collection_name: str) -> bool:
+        return collection_name in self.collections
+
+    def copy_collection(self, source_collection: str, target_collection: str):
+        self.collections[target_collection] = [dict(document) for document in self.collections[source_collection]]
+
+    def delete_rows(self, collection_name: str, key_field: str, keys: List[Any]) -> int:
+        documents = self.collections.get(collection_name, [])
+        keys = set(keys)
+        kept = [document for document in documents if document.get(key_field) not in keys]
+        self.collections[collection_name] = kept
+        return len(documents) - len(kept)
+
+    def create_indexes(self, collection_name: str, fields: List[str]):
+        pass
+
+    def get_distinct_count(self, collection_name: str, field: str) -> int:
+        return len({document.get(field) for document in self.collections.get(collection_name, [])})
+
+    def get_collection_row_count(self, collection_name: str) -> int:
+        return len(self.collections.get(collection_name, []))
+
+    def get_only_columns_names(self, collection_name: str) -> List[str]:
+        first_document = self.collections[collection_name][0]
+        return [key for key in first_document if key not in self.default_non_used_fields_query]
+
+    def replace_collection(self, source_collection: str, target_collection: str):
+        self.collections[target_collection] = self.collections.pop(source_collection)
+
+    def get_df(self, collection_name: str) -> pd.DataFrame:
+        """Gets the documents of a collection as a DataFrame (only for tests)."""
+        return pd.DataFrame(self.collections.get(collection_name, []))
+
+
+class FakeMongoCursor:
+    """Result of FakeMongoCollection.find()."""
+    documents: List[Dict[str, Any]]
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.documents = documents
+
+    def limit(self, n_documents: int) -> List[Dict[str, Any]]:
+        return self.documents[:n_documents]
+
+
+class FakeMongoCollection:
+    """Collection of a FakeMongoDatabase."""
+    database: 'FakeMongoDatabase'
+    name: str
+
+    def __init__(self, database: 'FakeMongoDatabase', name: str):
+        self.database = database
+        self.name = name
+
+    def find(self, filter_query: Dict[str, Any], projection: Dict[str, int]) -> FakeMongoCursor:
+        """Supports the _id pagination, the $where of only matching molecules and the $nin of molecules to skip."""
+        if self.database.on_find is not None:
+            self.database.on_find(self.name)
+
+        documents = self.database.get_documents(self.name)
+        last_id = filter_query.get('_id', {}).get('$gt')
+        if last_id is not None:
+            documents = [document for document in documents if document['_id'] > last_id]
+        if '$where' in filter_query:
+            documents = [document for document in documents
+                         if document[MOLECULE_SYMBOL] == document[STANDARD_SYMBOL]]
+        if STANDARD_SYMBOL in filter_query:
+            molecules_to_skip = set(filter_query[STANDARD_SYMBOL]['$nin'])
+            documents = [document for document in documents if document[STANDARD_SYMBOL] not in molecules_to_skip]
+
+        return FakeMongoCursor([{key: value for key, value in document.items() if projection.get(key, 1) != 0}
+                                for document in documents])
+
+
+class FakeMongoDatabase:
+    """
+    In-memory replacement of the pymongo Database used by MongoService.get_collection_as_df_in_chunks() over the
+    collections of a FakeMongoService. Like in MongoDB, the _ids are increasing (a new collection has higher _ids than
+    the collection it replaces) and the UUID of a collection changes when it's replaced.
+    """
+    mongo_service: FakeMongoService
+    on_find: Optional[Callable[[str], None]]  # Called with the collection's name before every query
+
+    def __init__(self, mongo_service: FakeMongoService):
+        self.mongo_service = mongo_service
+        self.on_find = None
+        self.__ids = itertools.count()
+
+    def get_documents(self, collection_name: str) -> List[Dict[str, Any]]:
+        """Gets the documents of a collection assigning an _id to the new ones."""
+        documents = self.mongo_service.collections.get(collection_name, [])
+        for document in documents:
+            if '_id' not in document:
+                document['_id'] = next(self.__ids)
+        return documents
+
+    def __getitem__(self, collection_name: str) -> FakeMongoCollection:
+        return FakeMongoCollection(self, collection_name)
+
+    def list_collections(self, filter: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+        collection_name = filter['name']
+        if collection_name in self.mongo_service.collections:
+            yield {'name': collection_name, 'info': {'uuid': id(self.mongo_service.collections[collection_name])}}
+
+
+def create_study_archive(archive_path: str, files: Dict[str, str]):
+    """
+    Creates a tar.gz file like the ones of cBioPortal
+    @param archive_path: Path of the tar.gz file
+    @param files: Content of every file of the archive by its path inside the archive
+    """
+    with tarfile.open(archive_path, 'w:gz') as archive:
+        for file_path, content in files.items():
+            data = content.encode('utf-8')
+            member = tarfile.TarInfo(file_path)
+            member.size = len(data)
+            archive.addfile(member, io.BytesIO(data))
+
+
+def get_tsv(df: pd.DataFrame, comment_lines: int = 0) -> str:
+    """
+    Gets the content of a dataset's file
+    @param df: Dataset's content
+    @param comment_lines: Number of comment lines before the header (like cBioPortal clinical files)
+    @return: Content of the file
+    """
+    comments = ''.join(f'#Comment {i}\n' for i in range(comment_lines))
+    return comments + df.to_csv(sep='\t', index=False, lineterminator='\n')
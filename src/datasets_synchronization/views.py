@@ -3,6 +3,7 @@ from common.enums import ResponseCode
 from .synchronization_service import generate_study_new_version
 from .tasks import sync_study
 from celery.contrib.abortable import AbortableAsyncResult
+from django.conf import settings
 from django.db.models import OuterRef, F, Subquery
 from django.contrib.auth.decorators import login_required
 from rest_framework.request import Request
@@ -133,8 +134,12 @@ class SyncCGDSStudy(APIView):
             # Gets SynchronizationService and adds the study
             only_failed = sync_strategy == SyncStrategy.SYNC_ONLY_FAILED
 
+            # "Sync all" always rewrites all the datasets. The rest of strategies only write the rows that changed
+            # from the previous version of the study
+            incremental = settings.CGDS_INCREMENTAL_SYNC and sync_strategy != SyncStrategy.SYNC_ALL
+
             # Adds the experiment to the TaskQueue and gets Task id
-            async_res: AbortableAsyncResult = sync_study.apply_async((cgds_study.pk, only_failed),
+            async_res: AbortableAsyncResult = sync_study.apply_async((cgds_study.pk, only_failed, incremental),
                                                                      queue='sync_datasets')
 
             cgds_study.task_id = async_res.task_id
@@ -8,7 +8,7 @@ from django_object_actions import DjangoObjectActions
 from biomarkers.models import BiomarkerState
 from feature_selection.models import FSExperiment, SVMParameters, ClusteringParameters, TrainedModel, \
     ClusterLabelsSet, ClusterLabel, SVMTimesRecord, RFTimesRecord, ClusteringTimesRecord, RFParameters, \
-    CoxRegressionParameters, BBHAParameters, GeneticAlgorithmsParameters
+    CoxRegressionParameters, BBHAParameters, GeneticAlgorithmsParameters, ScreeningParameters, ScreenedOutMolecule
 
 
 class Echo:
@@ -162,6 +162,16 @@ class CoxRegressionParametersAdmin(admin.ModelAdmin):
     list_display = ('top_n',)
 
 
+class ScreeningParametersAdmin(admin.ModelAdmin):
+    list_display = ('top_k', 'max_q_value', 'n_molecules_before', 'n_molecules_after', 'fs_experiment')
+
+
+class ScreenedOutMoleculeAdmin(admin.ModelAdmin):
+    list_display = ('identifier', 'type', 'statistic', 'p_value', 'q_value', 'fs_experiment')
+    list_filter = ('type',)
+    search_fields = ('identifier',)
+
+
 admin.site.register(FSExperiment, FSExperimentAdmin)
 admin.site.register(SVMParameters)
 admin.site.register(RFParameters)
@@ -175,3 +185,5 @@ admin.site.register(RFTimesRecord, RFTimesRecordAdmin)
 admin.site.register(ClusteringTimesRecord, ClusteringTimesRecordAdmin)
 admin.site.register(BBHAParameters, BBHAParametersAdmin)
 admin.site.register(CoxRegressionParameters, CoxRegressionParametersAdmin)
+admin.site.register(ScreeningParameters, ScreeningParametersAdmin)
+admin.site.register(ScreenedOutMolecule, ScreenedOutMoleculeAdmin)
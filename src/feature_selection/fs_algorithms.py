@@ -1,33 +1,54 @@
+import hashlib
 import logging
 import random
 import warnings
 import itertools
+import time
 import numpy as np
 import pandas as pd
+from collections import OrderedDict
 from math import tanh
 from django.conf import settings
+from joblib import Parallel, delayed, effective_n_jobs
 from lifelines.exceptions import ConvergenceError
 from sklearn import clone
-from typing import Iterable, List, Callable, Tuple, Union, Optional, cast
-from lifelines import CoxPHFitter
+from typing import Iterable, List, Callable, Tuple, Union, Optional, Dict, cast
 from scipy.special import factorial
-from sklearn.model_selection import StratifiedKFold, GridSearchCV
+from sklearn.model_selection import StratifiedKFold
 from sksurv.ensemble import RandomSurvivalForest
 from sksurv.exceptions import NoComparablePairException
-from sksurv.linear_model import CoxnetSurvivalAnalysis
 from sksurv.svm import FastKernelSurvivalSVM
-from common.exceptions import ExperimentFailed
+from common.exceptions import ExperimentFailed, ExperimentStopped
+from common.functions import check_if_stopped
+from common.typing import AbortEvent
 from common.utils import get_subset_of_features
 from feature_selection.fs_models import ClusteringModels
+from feature_selection.fs_checkpoint import FSCheckpoint
+from feature_selection.fs_fold_plan import CVFoldPlan
+from feature_selection.fs_racing import CVRacing
+from feature_selection.fs_times_recorder import FSTimesRecorder
+from feature_selection.fs_warm_start import CVWarmStart
+from feature_selection.fs_workers import get_cox_net_model, compute_cox_net_fold_path_scores, COX_NET_MAX_ITER
 from feature_selection.models import ClusteringScoringMethod
 from feature_selection.utils import get_random_subset_of_features_bbha, get_best_bbha
-from sklearn.exceptions import FitFailedWarning
+from statistical_properties.survival_scoring import cox_c_index_and_log_likelihood
+from sklearn.exceptions import FitFailedWarning, ConvergenceWarning
 from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import StandardScaler
 
 # Number of folds to use in the GridSearch of CoxNetSurvivalAnalysis
 GRID_SEARCH_CV_FOLDS: int = 3
 
+# Maximum number of CoxNet results (coefficients of the best alpha) kept in memory by select_top_cox_regression()
+COX_NET_CACHE_SIZE: int = 32
+
+# Number of incremental updates of the Gram matrix of a BBHA star after which it's computed from scratch again to
+# discard the accumulated rounding errors
+GRAM_MATRIX_REBUILD_INTERVAL: int = 50
+
+# Number of combinations of features evaluated by every task in the parallel Blind Search
+BLIND_SEARCH_CHUNK_SIZE: int = 16
+
 # Negative and positive infinity constants
 NEG_INF: float = float("-inf")
 POS_INF: float = float("inf")
@@ -41,9 +62,22 @@ SurvModel = Union[FastKernelSurvivalSVM, RandomSurvivalForest, ClusteringModels]
 # Result of Blind Search or metaheuristics
 FSResult = Tuple[Optional[List[str]], Optional[SurvModel], Optional[float]]
 
+# Result of a chunk of combinations evaluated in Blind Search: best mean score, best features, best model, best score,
+# number of evaluated combinations and number of CV fits saved by racing
+BlindSearchChunkResult = Tuple[float, Optional[List[str]], Optional[SurvModel], Optional[float], int, int]
+
+# Result of evolving a GA island: offspring, elites, elites' fitness values, best solution, its fitness value and model,
+# fitness cache, number of CV fits saved by racing and the CVWarmStart instance used (with its seeds and stats)
+GAIslandResult = Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[np.ndarray], float, Optional[SurvModel],
+                       Dict[bytes, float], int, Optional[CVWarmStart]]
+
 # Result of Cox net analysis
 CoxNetAnalysisResult = Tuple[Optional[List[str]], Optional[SurvModel], List[float]]
 
+# CoxNet coefficients of the best alpha by hash of the input data (LRU cache). Statistical validations of the same
+# Biomarker and datasets reuse them instead of computing the CV of the regularization path again
+__cox_net_cache: 'OrderedDict[str, np.ndarray]' = OrderedDict()
+
 
 def __all_combinations(any_list: List) -> Iterable[List]:
     """
@@ -55,9 +89,18 @@ def __all_combinations(any_list: List) -> Iterable[List]:
     )
 
 
+def __deadline_reached(deadline: Optional[float]) -> bool:
+    """Returns True if the deadline (timestamp as returned by time.time()) was reached. None means no deadline."""
+    return deadline is not None and time.time() >= deadline
+
+
 def __compute_cross_validation_sequential(classifier: SurvModel, subset: pd.DataFrame, y: np.ndarray,
                                           cross_validation_folds: int,
-                                          more_is_better: bool) -> Tuple[float, SurvModel, float]:
+                                          more_is_better: bool,
+                                          incumbent_score: Optional[float] = None,
+                                          racing: Optional[CVRacing] = None,
+                                          warm_start: Optional[CVWarmStart] = None,
+                                          fold_plan: Optional[CVFoldPlan] = None) -> Tuple[float, SurvModel, float]:
     """
     Computes CrossValidation to get the Concordance Index (using StratifiedKFold to prevent "All samples are censored"
     error).
@@ -65,17 +108,24 @@ def __compute_cross_validation_sequential(classifier: SurvModel, subset: pd.Data
     @param subset: Subset of features to be used in the model evaluated in the CrossValidation.
     @param y: Classes.
     @param cross_validation_folds: Number of folds in the CrossValidation process.
+    @param more_is_better: If True, higher scores are better.
+    @param incumbent_score: Best mean score found so far by the FS algorithm. Only used if racing is not None.
+    @param racing: CVRacing instance to abandon the candidate after some folds if it can't beat the incumbent. If
+    it's abandoned, the average of the evaluated folds is returned. None to evaluate all the folds.
+    @param warm_start: CVWarmStart instance to start the fit of every fold from the nearest previously fitted model.
+    None to fit every fold from scratch.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
     @return: Average of the C-Index obtained in each CV fold, best model during CV and its fitness score.
     """
-    # Create StratifiedKFold object.
-    skf = StratifiedKFold(n_splits=cross_validation_folds, shuffle=True)
+    if fold_plan is None:
+        fold_plan = CVFoldPlan(y, cross_validation_folds, random_state=None)
     lst_score_stratified: List[float] = []
     estimators: List[SurvModel] = []
 
-    for train_index, test_index in skf.split(subset, y):
+    for train_index, test_index, y_train_fold, y_test_fold in fold_plan:
         # Splits
         x_train_fold, x_test_fold = subset.iloc[train_index], subset.iloc[test_index]
-        y_train_fold, y_test_fold = y[train_index], y[test_index]
 
         # Creates a cloned instance of the model to store in the list. This HAVE TO be done before fit() because
         # clone() method does not clone the fit_X_ attribute (needed to restore the model during statistical
@@ -84,7 +134,10 @@ def __compute_cross_validation_sequential(classifier: SurvModel, subset: pd.Data
         cloned = cast(SurvModel, cloned)
 
         # Train and stores fitness
-        cloned.fit(x_train_fold, y_train_fold)
+        if warm_start is not None:
+            warm_start.fit(cloned, x_train_fold, y_train_fold, train_index, subset.shape[0], subset.columns)
+        else:
+            cloned.fit(x_train_fold, y_train_fold)
         try:
             score = cloned.score(x_test_fold, y_test_fold)
         except NoComparablePairException:
@@ -95,6 +148,11 @@ def __compute_cross_validation_sequential(classifier: SurvModel, subset: pd.Data
         # Stores trained model
         estimators.append(cloned)
 
+        # Racing: stops evaluating folds if this candidate is not going to beat the incumbent
+        if racing is not None and racing.must_abandon(lst_score_stratified, incumbent_score, more_is_better):
+            racing.add_saved_fits(len(fold_plan) - len(lst_score_stratified))
+            break
+
     # Gets best fitness
     if more_is_better:
         best_model_idx = np.argmax(lst_score_stratified)
@@ -107,6 +165,121 @@ def __compute_cross_validation_sequential(classifier: SurvModel, subset: pd.Data
     return fitness_value_mean, best_model, best_fitness_value
 
 
+def __can_use_incremental_gram(classifier: SurvModel, is_clustering: bool, is_improved_version: bool,
+                               n_stars: int, n_samples: int) -> bool:
+    """
+    Checks if the fitness of the stars can be computed using a precomputed Gram matrix which is updated incrementally
+    every time a star changes its subset of features. Only valid for the improved BBHA using a linear-kernel
+    FastKernelSurvivalSVM. It also checks that the Gram matrices of all the stars fit in the configured memory limit.
+    @param classifier: Classifier used as fitness function.
+    @param is_clustering: If True, a clustering model is being used.
+    @param is_improved_version: If True, the improved version of BBHA is being used.
+    @param n_stars: Number of stars in the BBHA.
+    @param n_samples: Number of samples in the dataset.
+    @return: True if the incremental Gram matrix path can be used.
+    """
+    if is_clustering or not is_improved_version:
+        return False
+
+    if not isinstance(classifier, FastKernelSurvivalSVM) or classifier.kernel != 'linear':
+        return False
+
+    # One (n_samples x n_samples) float64 matrix is kept for every star
+    needed_memory_mb = (n_stars * n_samples * n_samples * 8) / (1024 * 1024)
+    return needed_memory_mb <= settings.FS_INCREMENTAL_GRAM_MAX_MEMORY_MB
+
+
+def __update_gram_matrix(gram: Optional[np.ndarray], x_values: np.ndarray, old_subset: Optional[np.ndarray],
+                         new_subset: np.ndarray, n_updates: int = 0) -> Tuple[np.ndarray, int]:
+    """
+    Updates the linear-kernel Gram matrix (samples x samples) of a star whose subset of features changed from
+    old_subset to new_subset. Every added/removed feature is a rank-1 update (the outer product of that feature's
+    column), so when only a few bits were toggled the update costs O(n_samples^2) per toggled feature instead of
+    O(n_samples^2 * n_features) of computing it from scratch. As rounding errors accumulate with every update, the
+    matrix is computed from scratch after GRAM_MATRIX_REBUILD_INTERVAL incremental updates.
+    @param gram: Current Gram matrix of the star. None to compute it from scratch.
+    @param x_values: Numpy array with all the molecules' data (samples as rows, features as columns).
+    @param old_subset: Binary array of features the Gram matrix currently represents. None if gram is None.
+    @param new_subset: Binary array of features the Gram matrix has to represent.
+    @param n_updates: Number of incremental updates applied to gram since it was computed from scratch.
+    @return: The updated Gram matrix and the number of incremental updates applied to it since it was computed from
+    scratch (0 if it was computed from scratch in this call).
+    """
+    new_mask = new_subset.astype(bool)
+    if gram is not None and old_subset is not None and n_updates < GRAM_MATRIX_REBUILD_INTERVAL:
+        old_mask = old_subset.astype(bool)
+        added = np.flatnonzero(new_mask & ~old_mask)
+        removed = np.flatnonzero(old_mask & ~new_mask)
+
+        # If the subset changed too much it's cheaper (and numerically cleaner) to compute it from scratch
+        if added.size + removed.size < np.count_nonzero(new_mask):
+            if added.size == 0 and removed.size == 0:
+                return gram, n_updates
+            if added.size > 0:
+                x_added = x_values[:, added]
+                gram += x_added @ x_added.T
+            if removed.size > 0:
+                x_removed = x_values[:, removed]
+                gram -= x_removed @ x_removed.T
+            return gram, n_updates + 1
+
+    x_subset = x_values[:, new_mask]
+    return x_subset @ x_subset.T, 0
+
+
+def __compute_cross_validation_precomputed(classifier: FastKernelSurvivalSVM, gram: np.ndarray, y: np.ndarray,
+                                           cross_validation_folds: int, more_is_better: bool,
+                                           incumbent_score: Optional[float] = None,
+                                           racing: Optional[CVRacing] = None,
+                                           warm_start: Optional[CVWarmStart] = None,
+                                           features: Iterable[str] = (),
+                                           fold_plan: Optional[CVFoldPlan] = None) -> float:
+    """
+    Same as __compute_cross_validation_sequential but using a linear-kernel Gram matrix (samples x samples) with
+    a FastKernelSurvivalSVM fitted with kernel='precomputed'. Only the mean fitness is returned as the fitted models
+    are not valid to make predictions with the molecules' data.
+    @param classifier: FastKernelSurvivalSVM to train.
+    @param gram: Gram matrix of the subset of features to evaluate.
+    @param y: Classes.
+    @param cross_validation_folds: Number of folds in the CrossValidation process.
+    @param more_is_better: If True, higher scores are better.
+    @param incumbent_score: Best mean score found so far by the FS algorithm. Only used if racing is not None.
+    @param racing: CVRacing instance to abandon the candidate after some folds if it can't beat the incumbent.
+    @param warm_start: CVWarmStart instance to start the fit of every fold from the nearest previously fitted model.
+    None to fit every fold from scratch.
+    @param features: Molecules of the subset represented by the Gram matrix. Only used by warm_start.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: Average of the C-Index obtained in each CV fold.
+    """
+    if fold_plan is None:
+        fold_plan = CVFoldPlan(y, cross_validation_folds, random_state=None)
+    lst_score_stratified: List[float] = []
+
+    for train_index, test_index, y_train_fold, y_test_fold in fold_plan:
+        # Kernels between training samples to fit, and between testing and training samples to score
+        gram_train = gram[np.ix_(train_index, train_index)]
+        gram_test = gram[np.ix_(test_index, train_index)]
+
+        cloned = cast(FastKernelSurvivalSVM, clone(classifier))
+        cloned.set_params(kernel='precomputed')
+        if warm_start is not None:
+            warm_start.fit(cloned, gram_train, y_train_fold, train_index, gram.shape[0], features)
+        else:
+            cloned.fit(gram_train, y_train_fold)
+        try:
+            score = cloned.score(gram_test, y_test_fold)
+        except NoComparablePairException:
+            score = 0.0
+        lst_score_stratified.append(score)
+
+        if racing is not None and racing.must_abandon(lst_score_stratified, incumbent_score, more_is_better):
+            racing.add_saved_fits(len(fold_plan) - len(lst_score_stratified))
+            break
+
+    return cast(float, np.mean(lst_score_stratified))
+
+
 def __compute_clustering_sequential(classifier: ClusteringModels, subset: pd.DataFrame, y: np.ndarray,
                                     score_method: ClusteringScoringMethod,
                                     more_is_better: bool) -> Tuple[float, SurvModel, float]:
@@ -135,24 +308,14 @@ def __compute_clustering_sequential(classifier: ClusteringModels, subset: pd.Dat
         warnings.simplefilter("ignore")
         clustering_result = cloned.fit(subset.values)
 
-    # Generates a DataFrame with a column for time, event and the group
+    # Fits a Cox Regression model using the cluster of every sample as the variable to consider
     labels = clustering_result.labels_
-    dfs: List[pd.DataFrame] = []
-    for cluster_id in range(cloned.n_clusters):
-        current_group_y = y[np.where(labels == cluster_id)]
-        dfs.append(
-            pd.DataFrame({'E': current_group_y['event'], 'T': current_group_y['time'], 'group': cluster_id})
-        )
-    df = pd.concat(dfs)
-
-    # Fits a Cox Regression model using the column group as the variable to consider
     try:
-        cph: CoxPHFitter = CoxPHFitter().fit(df, duration_col='T', event_col='E')
+        c_index, log_likelihood = cox_c_index_and_log_likelihood(y['time'], y['event'], labels)
 
         # This documentation recommends using log-likelihood to optimize:
         # https://lifelines.readthedocs.io/en/latest/fitters/regression/CoxPHFitter.html#lifelines.fitters.coxph_fitter.SemiParametricPHFitter.score
-        scoring_method = 'concordance_index' if score_method == ClusteringScoringMethod.C_INDEX else 'log_likelihood'
-        fitness_value = cph.score(df, scoring_method=scoring_method)
+        fitness_value = c_index if score_method == ClusteringScoringMethod.C_INDEX else log_likelihood
     except ConvergenceError as ex:
         n_features = subset.shape[1]
 
@@ -165,36 +328,62 @@ def __compute_clustering_sequential(classifier: ClusteringModels, subset: pd.Dat
     return fitness_value, cloned, fitness_value
 
 
-def blind_search_sequential(classifier: SurvModel,
-                            molecules_df: pd.DataFrame,
-                            clinical_data: np.ndarray,
-                            is_clustering: bool,
-                            cross_validations_folds: int,
-                            clustering_score_method: Optional[ClusteringScoringMethod]) -> FSResult:
+def evaluate_blind_search_chunk(classifier: SurvModel,
+                                molecules_df: pd.DataFrame,
+                                clinical_data: np.ndarray,
+                                is_clustering: bool,
+                                cross_validation_folds: int,
+                                clustering_score_method: Optional[ClusteringScoringMethod],
+                                combinations: Iterable[Tuple[str, ...]],
+                                deadline: Optional[float],
+                                racing: Optional[CVRacing] = None,
+                                incumbent_score: float = NEG_INF,
+                                is_aborted: Optional[AbortEvent] = None,
+                                times_recorder: Optional[FSTimesRecorder] = None,
+                                fold_plan: Optional[CVFoldPlan] = None) -> BlindSearchChunkResult:
     """
-    Runs a Blind Search running a specific classifier using the molecular and clinical data passed by params.
+    Evaluates a chunk of combinations of features of the Blind Search keeping the best one.
     @param classifier: Classifier to use in every blind search iteration.
     @param molecules_df: DataFrame with all the molecules' data.
     @param clinical_data: Numpy array with the time and event columns.
     @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
-    @param cross_validations_folds: Number of folds to use in the Cross Validation.
+    @param cross_validation_folds: Number of folds to use in the Cross Validation.
     @param clustering_score_method: Clustering scoring method to optimize.
-    @return: The combination of features with the highest fitness score and the highest fitness score achieved by
-    any combination of features.
+    @param combinations: Combinations of features to evaluate.
+    @param deadline: Timestamp (as returned by time.time()) from which no more combinations are evaluated. None to
+    evaluate all of them.
+    @param racing: CVRacing instance to abandon the combinations that can't beat the best one. None to evaluate all the
+    CV folds of every combination.
+    @param incumbent_score: Best mean score found before evaluating this chunk (e.g. in other chunks). Only used to
+    abandon combinations during racing.
+    @param is_aborted: Method to call to check if the experiment has been stopped. None to not check it.
+    @param times_recorder: FSTimesRecorder instance to record the execution time of every evaluation. None to not
+    record them.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The best mean score, the combination of features with that score, its best model and score, the
+    number of evaluated combinations and the number of CV fits saved by racing.
     """
     # Even in case of Log-likelihood (only used in clustering) it has to be maximized:
     # https://github.com/CamDavidsonPilon/lifelines/issues/1545
     # For the moment there is no model that needs to be minimized
     more_is_better = True
 
-    list_of_molecules: List[str] = molecules_df.index.tolist()
     best_mean_score = NEG_INF if more_is_better else POS_INF
     best_features: Optional[List[str]] = None
     best_model: Optional[SurvModel] = None
     best_score: Optional[float] = None
+    n_evaluated = 0
+    fits_saved_before = racing.fits_saved if racing is not None else 0
+
+    for combination in combinations:
+        if is_aborted is not None:
+            check_if_stopped(is_aborted, ExperimentStopped)
+        if __deadline_reached(deadline):
+            break
 
-    for combination in __all_combinations(list_of_molecules):
         subset = get_subset_of_features(molecules_df, combination)
+        n_evaluated += 1
 
         # If no molecules are present in the subset due to NaNs values, just discards this combination
         number_of_columns = subset.shape[1]
@@ -203,6 +392,7 @@ def blind_search_sequential(classifier: SurvModel,
 
         # Computes the fitness function and checks if this combination of features has a higher score
         # than the best found so far
+        evaluation_start = FSTimesRecorder.start()
         try:
             if is_clustering:
                 current_mean_score, current_best_model, current_best_score = __compute_clustering_sequential(
@@ -218,26 +408,214 @@ def blind_search_sequential(classifier: SurvModel,
                     classifier,
                     subset,
                     clinical_data,
-                    cross_validations_folds,
-                    more_is_better=more_is_better
+                    cross_validation_folds,
+                    more_is_better=more_is_better,
+                    incumbent_score=max(best_mean_score, incumbent_score),
+                    racing=racing,
+                    fold_plan=fold_plan
                 )
         except ValueError:
             continue
 
+        if times_recorder is not None:
+            times_recorder.record(evaluation_start, number_of_columns, subset.shape[0], current_mean_score,
+                                  current_best_model)
+
         if (more_is_better and current_mean_score > best_mean_score) or \
                 (not more_is_better and current_mean_score < best_mean_score):
             best_mean_score = current_mean_score
-            best_features = combination
+            best_features = list(combination)
             best_model = current_best_model
             best_score = current_best_score
 
+    fits_saved = racing.fits_saved - fits_saved_before if racing is not None else 0
+
+    return best_mean_score, best_features, best_model, best_score, n_evaluated, fits_saved
+
+
+def __get_blind_search_combinations(molecules_df: pd.DataFrame,
+                                    max_evaluations: Optional[int]) -> Iterable[Tuple[str, ...]]:
+    """
+    Gets all the combinations of features to evaluate in the Blind Search, from the smallest to the biggest ones. If
+    max_evaluations is set, only the first max_evaluations combinations are returned.
+    """
+    list_of_molecules: List[str] = molecules_df.index.tolist()
+    combinations = __all_combinations(list_of_molecules)
+    if max_evaluations is not None:
+        combinations = itertools.islice(combinations, max_evaluations)
+    return combinations
+
+
+def __log_blind_search_budget_exhausted(n_evaluated: int, molecules_df: pd.DataFrame):
+    """Logs that the Blind Search budget was reached before evaluating all the combinations."""
+    n_combinations = 2 ** molecules_df.shape[0] - 1
+    if n_evaluated < n_combinations:
+        logging.warning(f'Blind Search budget reached. Evaluated {n_evaluated} of {n_combinations} combinations. '
+                        f'Returning the best combination found so far')
+
+
+def blind_search_sequential(classifier: SurvModel,
+                            molecules_df: pd.DataFrame,
+                            clinical_data: np.ndarray,
+                            is_clustering: bool,
+                            cross_validations_folds: int,
+                            clustering_score_method: Optional[ClusteringScoringMethod],
+                            deadline: Optional[float] = None,
+                            max_evaluations: Optional[int] = None,
+                            racing: Optional[CVRacing] = None,
+                            is_aborted: Optional[AbortEvent] = None,
+                            times_recorder: Optional[FSTimesRecorder] = None,
+                            fold_plan: Optional[CVFoldPlan] = None) -> FSResult:
+    """
+    Runs a Blind Search running a specific classifier using the molecular and clinical data passed by params.
+    @param classifier: Classifier to use in every blind search iteration.
+    @param molecules_df: DataFrame with all the molecules' data.
+    @param clinical_data: Numpy array with the time and event columns.
+    @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
+    @param cross_validations_folds: Number of folds to use in the Cross Validation.
+    @param clustering_score_method: Clustering scoring method to optimize.
+    @param deadline: Timestamp (as returned by time.time()) from which no more combinations are evaluated and the
+    best combination found so far is returned. None to evaluate all of them.
+    @param max_evaluations: Maximum number of combinations to evaluate (from the smallest to the biggest ones).
+    None to evaluate all of them.
+    @param racing: CVRacing instance to abandon the candidates that can't beat the best one after some CV folds. None
+    to evaluate all the folds.
+    @param is_aborted: Method to call to check if the experiment has been stopped. None to not check it.
+    @param times_recorder: FSTimesRecorder instance to record the execution time of every evaluation. None to not
+    record them.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The combination of features with the highest fitness score and the highest fitness score achieved by
+    any combination of features.
+    """
+    combinations = __get_blind_search_combinations(molecules_df, max_evaluations)
+
+    _best_mean_score, best_features, best_model, best_score, n_evaluated, _fits_saved = evaluate_blind_search_chunk(
+        classifier,
+        molecules_df,
+        clinical_data,
+        is_clustering,
+        cross_validations_folds,
+        clustering_score_method,
+        combinations,
+        deadline,
+        racing,
+        is_aborted=is_aborted,
+        times_recorder=times_recorder,
+        fold_plan=fold_plan
+    )
+    __log_blind_search_budget_exhausted(n_evaluated, molecules_df)
+
+    return best_features, best_model, best_score
+
+
+def blind_search_parallel(classifier: SurvModel,
+                          molecules_df: pd.DataFrame,
+                          clinical_data: np.ndarray,
+                          is_clustering: bool,
+                          cross_validations_folds: int,
+                          clustering_score_method: Optional[ClusteringScoringMethod],
+                          n_jobs: int,
+                          deadline: Optional[float] = None,
+                          max_evaluations: Optional[int] = None,
+                          racing: Optional[CVRacing] = None,
+                          is_aborted: Optional[AbortEvent] = None,
+                          fold_plan: Optional[CVFoldPlan] = None) -> FSResult:
+    """
+    Same as blind_search_sequential but the combinations of features are partitioned in chunks which are evaluated
+    in a pool of processes. The chunks are sent in rounds, so the results of every round are merged as soon as
+    they're ready and the time budget is checked between rounds and inside every chunk. The abort event is only
+    checked between rounds as it can't be sent to the worker processes.
+    @param classifier: Classifier to use in every blind search iteration.
+    @param molecules_df: DataFrame with all the molecules' data.
+    @param clinical_data: Numpy array with the time and event columns.
+    @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
+    @param cross_validations_folds: Number of folds to use in the Cross Validation.
+    @param clustering_score_method: Clustering scoring method to optimize.
+    @param n_jobs: Number of processes to use. -1 to use all the cores.
+    @param deadline: Timestamp (as returned by time.time()) from which no more combinations are evaluated and the
+    best combination found so far is returned. None to evaluate all of them.
+    @param max_evaluations: Maximum number of combinations to evaluate (from the smallest to the biggest ones).
+    None to evaluate all of them.
+    @param racing: CVRacing instance to abandon the candidates that can't beat the best one after some CV folds. None
+    to evaluate all the folds.
+    @param is_aborted: Method to call to check if the experiment has been stopped. None to not check it.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The combination of features with the highest fitness score and the highest fitness score achieved by
+    any combination of features.
+    """
+    # Imported here to prevent circular imports as the workers' module imports this one lazily
+    from feature_selection.fs_workers import evaluate_blind_search_chunk_in_worker
+
+    # Even in case of Log-likelihood (only used in clustering) it has to be maximized:
+    # https://github.com/CamDavidsonPilon/lifelines/issues/1545
+    # For the moment there is no model that needs to be minimized
+    more_is_better = True
+
+    combinations = iter(__get_blind_search_combinations(molecules_df, max_evaluations))
+
+    # Enum values are sent as int as the workers can't unpickle Django models' classes before setting up Django
+    score_method_value = int(clustering_score_method) if clustering_score_method is not None else None
+
+    best_mean_score = NEG_INF if more_is_better else POS_INF
+    best_features: Optional[List[str]] = None
+    best_model: Optional[SurvModel] = None
+    best_score: Optional[float] = None
+    n_evaluated = 0
+
+    chunks_per_round = effective_n_jobs(n_jobs) * 2  # Keeps all the processes busy between rounds
+    with Parallel(n_jobs=n_jobs) as parallel:
+        while not __deadline_reached(deadline):
+            if is_aborted is not None:
+                check_if_stopped(is_aborted, ExperimentStopped)
+
+            round_chunks = [
+                chunk
+                for chunk in (list(itertools.islice(combinations, BLIND_SEARCH_CHUNK_SIZE))
+                              for _ in range(chunks_per_round))
+                if chunk
+            ]
+            if not round_chunks:
+                break
+
+            round_results: List[BlindSearchChunkResult] = parallel(
+                delayed(evaluate_blind_search_chunk_in_worker)(classifier, molecules_df, clinical_data, is_clustering,
+                                                               cross_validations_folds, score_method_value, chunk,
+                                                               deadline, racing, best_mean_score, fold_plan)
+                for chunk in round_chunks
+            )
+
+            # Merges in the same order as the sequential version to keep the same result
+            for chunk_mean_score, chunk_features, chunk_model, chunk_score, chunk_evaluated, chunk_fits_saved \
+                    in round_results:
+                n_evaluated += chunk_evaluated
+                if racing is not None:
+                    racing.add_saved_fits(chunk_fits_saved)
+                if (more_is_better and chunk_mean_score > best_mean_score) or \
+                        (not more_is_better and chunk_mean_score < best_mean_score):
+                    best_mean_score = chunk_mean_score
+                    best_features = chunk_features
+                    best_model = chunk_model
+                    best_score = chunk_score
+
+    __log_blind_search_budget_exhausted(n_evaluated, molecules_df)
+
     return best_features, best_model, best_score
 
 
 def __compute_fitness_function(classifier: SurvModel, subset: pd.DataFrame, clinical_data: np.ndarray,
                                is_clustering: bool, clustering_score_method: Optional[ClusteringScoringMethod],
-                               cross_validation_folds: int, more_is_better: bool) -> Tuple[float, SurvModel]:
-    """Computes clustering or CV algorithm depending on the parameters. Return avg fitness value and best model."""
+                               cross_validation_folds: int, more_is_better: bool,
+                               incumbent_score: Optional[float] = None,
+                               racing: Optional[CVRacing] = None,
+                               warm_start: Optional[CVWarmStart] = None,
+                               fold_plan: Optional[CVFoldPlan] = None) -> Tuple[float, SurvModel]:
+    """
+    Computes clustering or CV algorithm depending on the parameters. Return avg fitness value and best model. The
+    incumbent_score, racing, warm_start and fold_plan parameters are only used in CV (see
+    __compute_cross_validation_sequential).
+    """
     if is_clustering:
         current_mean_score, current_best_model, _best_score = __compute_clustering_sequential(
             classifier,
@@ -253,7 +631,11 @@ def __compute_fitness_function(classifier: SurvModel, subset: pd.DataFrame, clin
             subset,
             clinical_data,
             cross_validation_folds,
-            more_is_better=more_is_better  # False is only for Clustering Log-Likelihood metric, not for C-Index
+            more_is_better=more_is_better,  # False is only for Clustering Log-Likelihood metric, not for C-Index
+            incumbent_score=incumbent_score,
+            racing=racing,
+            warm_start=warm_start,
+            fold_plan=fold_plan
         )
 
     return current_mean_score, current_best_model
@@ -272,6 +654,13 @@ def binary_black_hole_sequential(
         binary_threshold: Optional[float] = 0.6,
         coeff_1: float = 2.2,
         coeff_2: float = 0.1,
+        racing: Optional[CVRacing] = None,
+        checkpoint: Optional[FSCheckpoint] = None,
+        is_aborted: Optional[AbortEvent] = None,
+        deadline: Optional[float] = None,
+        times_recorder: Optional[FSTimesRecorder] = None,
+        warm_start: Optional[CVWarmStart] = None,
+        fold_plan: Optional[CVFoldPlan] = None
 ) -> FSResult:
     """
     Computes the metaheuristic Binary Black Hole Algorithm. Taken from the paper
@@ -292,6 +681,20 @@ def binary_black_hole_sequential(
     @param binary_threshold: Binary threshold to set 1 or 0 the feature. If None it'll be computed randomly.
     @param coeff_1: Coefficient 1 to compute the new position of the stars. Only used if is_improved_version is True.
     @param coeff_2: Coefficient 2 to compute the new position of the stars. Only used if is_improved_version is True.
+    @param racing: CVRacing instance to abandon the stars that can't beat the black hole after some CV folds. None
+    to evaluate all the folds.
+    @param checkpoint: FSCheckpoint instance to periodically store the state of the stars and resume from it. None to
+    disable checkpoints.
+    @param is_aborted: Method to call before every evaluation to check if the experiment has been stopped. None to not
+    check it.
+    @param deadline: Timestamp (as returned by time.time()) from which no more stars are evaluated and the black hole
+    found so far is returned. None to run all the iterations.
+    @param times_recorder: FSTimesRecorder instance to record the execution time of every star's evaluation. None to
+    not record them.
+    @param warm_start: CVWarmStart instance to start the fit of every CV fold from the model fitted with the most
+    similar subset of features. None to fit every fold from scratch.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
     @return: The combination of features with the highest fitness score and the highest fitness score achieved by
     any combination of features.
     """
@@ -329,43 +732,125 @@ def binary_black_hole_sequential(
     # For the moment there is no model that needs to be minimized
     more_is_better = True
 
-    # Initializes the stars with their subsets and their fitness values
-    for i in range(n_stars):
-        random_features_to_select = get_random_subset_of_features_bbha(n_features)
-        stars_subsets[i] = random_features_to_select  # Initialize 'Population'
-
-        subset_to_predict = get_subset_of_features(molecules_df, combination=stars_subsets[i])
-        mean_score, initial_best_model = __compute_fitness_function(classifier, subset_to_predict,
-                                                                    clinical_data, is_clustering,
-                                                                    clustering_score_method,
-                                                                    cross_validation_folds, more_is_better)
-
-        stars_fitness_values[i] = mean_score
-        stars_model[i] = initial_best_model
-
-        # Best fitness and position
-        stars_best_subset[i] = stars_subsets[i]
-        stars_best_fitness_values[i] = stars_fitness_values[i]
-
-    # The star with the best fitness is the Black Hole
-    black_hole_idx, best_features, best_mean_score = get_best_bbha(stars_subsets, stars_fitness_values, more_is_better)
-    best_model: SurvModel = cast(SurvModel, stars_model[black_hole_idx])
+    # For the improved version with a linear SVM every star keeps its Gram matrix, which is updated incrementally
+    # as only a few features are toggled between evaluations
+    n_samples = molecules_df.shape[1]
+    use_incremental_gram = __can_use_incremental_gram(classifier, is_clustering, is_improved_version, n_stars,
+                                                      n_samples)
+    if use_incremental_gram:
+        x_values = molecules_df.transpose().to_numpy(dtype=float)
+        stars_gram: List[Optional[np.ndarray]] = [None] * n_stars
+        stars_gram_subsets: List[Optional[np.ndarray]] = [None] * n_stars
+        stars_gram_updates: List[int] = [0] * n_stars
+
+    def compute_star_fitness(star_idx: int, incumbent_score: Optional[float]) -> Tuple[float, Optional[SurvModel]]:
+        """
+        Computes the fitness of a star. The model is None if it was computed with a precomputed Gram matrix. The
+        incumbent_score is the best fitness found so far, used to abandon the star during racing.
+        """
+        star_subset = stars_subsets[star_idx]
+        evaluation_start = FSTimesRecorder.start()
+        if use_incremental_gram:
+            stars_gram[star_idx], stars_gram_updates[star_idx] = __update_gram_matrix(
+                stars_gram[star_idx], x_values, stars_gram_subsets[star_idx], star_subset,
+                stars_gram_updates[star_idx]
+            )
+            stars_gram_subsets[star_idx] = star_subset.copy()
+            star_score = __compute_cross_validation_precomputed(classifier, stars_gram[star_idx], clinical_data,
+                                                                cross_validation_folds, more_is_better,
+                                                                incumbent_score, racing, warm_start,
+                                                                molecules_df.index[star_subset.astype(bool)],
+                                                                fold_plan)
+            star_model = None
+        else:
+            subset_to_predict = get_subset_of_features(molecules_df, combination=star_subset)
+            star_score, star_model = __compute_fitness_function(classifier, subset_to_predict, clinical_data,
+                                                                is_clustering, clustering_score_method,
+                                                                cross_validation_folds, more_is_better,
+                                                                incumbent_score, racing, warm_start, fold_plan)
+
+        if times_recorder is not None:
+            times_recorder.record(evaluation_start, int(np.count_nonzero(star_subset)), n_samples, star_score,
+                                  star_model)
+
+        return star_score, star_model
+
+    # Resumes from the last checkpoint (if any). Gram matrices are not stored, they're computed again from scratch
+    checkpoint_state = checkpoint.load('BBHA') if checkpoint is not None else None
+    if checkpoint_state is not None:
+        start_iteration: int = checkpoint_state['iteration']
+        stars_subsets = checkpoint_state['stars_subsets']
+        stars_best_subset = checkpoint_state['stars_best_subset']
+        stars_fitness_values = checkpoint_state['stars_fitness_values']
+        stars_best_fitness_values = checkpoint_state['stars_best_fitness_values']
+        stars_model = checkpoint_state['stars_model']
+        black_hole_idx = checkpoint_state['black_hole_idx']
+        best_features = checkpoint_state['best_features']
+        best_mean_score = checkpoint_state['best_mean_score']
+        best_model: SurvModel = checkpoint_state['best_model']
+        if racing is not None:
+            racing.fits_saved = checkpoint_state['fits_saved']
+        if warm_start is not None and checkpoint_state.get('warm_start') is not None:
+            warm_start.add_stats(checkpoint_state['warm_start'])
+    else:
+        start_iteration = 0
+
+        # Initializes the stars with their subsets and their fitness values
+        for i in range(n_stars):
+            if is_aborted is not None:
+                check_if_stopped(is_aborted, ExperimentStopped)
+
+            # If the deadline is reached, only the initialized stars are kept
+            if __deadline_reached(deadline):
+                if i == 0:
+                    logging.warning('BBHA deadline reached before evaluating any star')
+                    return None, None, None
+                n_stars = i
+                stars_subsets, stars_best_subset = stars_subsets[:i], stars_best_subset[:i]
+                stars_fitness_values, stars_best_fitness_values = stars_fitness_values[:i], \
+                    stars_best_fitness_values[:i]
+                stars_model = stars_model[:i]
+                break
+
+            random_features_to_select = get_random_subset_of_features_bbha(n_features)
+            stars_subsets[i] = random_features_to_select  # Initialize 'Population'
+
+            # The best star computed so far is the incumbent for racing
+            initial_incumbent = np.max(stars_fitness_values[:i]) if i > 0 else None
+            mean_score, initial_best_model = compute_star_fitness(i, initial_incumbent)
+
+            stars_fitness_values[i] = mean_score
+            stars_model[i] = initial_best_model
+
+            # Best fitness and position
+            stars_best_subset[i] = stars_subsets[i]
+            stars_best_fitness_values[i] = stars_fitness_values[i]
+
+        # The star with the best fitness is the Black Hole
+        black_hole_idx, best_features, best_mean_score = get_best_bbha(stars_subsets, stars_fitness_values,
+                                                                       more_is_better)
+        best_model = cast(SurvModel, stars_model[black_hole_idx])
 
     # Iterations
-    for i in range(n_iterations):
+    deadline_reached = False
+    for i in range(start_iteration, n_iterations):
         for a in range(n_stars):
             # If it's the black hole, skips the computation
             if a == black_hole_idx:
                 continue
 
+            if is_aborted is not None:
+                check_if_stopped(is_aborted, ExperimentStopped)
+
+            deadline_reached = __deadline_reached(deadline)
+            if deadline_reached:
+                logging.warning(f'BBHA deadline reached in iteration {i + 1} of {n_iterations}. Returning the best '
+                                f'combination found so far')
+                break
+
             # Computes the current star fitness
             current_star_combination = stars_subsets[a]
-            subset = get_subset_of_features(molecules_df, combination=current_star_combination)
-            current_mean_score, current_best_model = __compute_fitness_function(classifier, subset, clinical_data,
-                                                                                is_clustering,
-                                                                                clustering_score_method,
-                                                                                cross_validation_folds,
-                                                                                more_is_better)
+            current_mean_score, current_best_model = compute_star_fitness(a, best_mean_score)
 
             # Sets the best fitness and position (only used in the improved version)
             if is_improved_version and current_mean_score > stars_best_fitness_values[a]:
@@ -405,6 +890,9 @@ def binary_black_hole_sequential(
                 else:
                     stars_subsets[a] = get_random_subset_of_features_bbha(n_features)
 
+        if deadline_reached:
+            break
+
         # Improvement 3: new formula to 'move' the star
         w = 1 - (i / n_iterations)
         d1 = coeff_1 + w
@@ -439,66 +927,131 @@ def binary_black_hole_sequential(
                 features_are_valid = np.count_nonzero(star_subset_new) > 0
             stars_subsets[a] = star_subset_new
 
+        if checkpoint is not None and checkpoint.must_save():
+            checkpoint.save('BBHA', {
+                'iteration': i + 1,
+                'stars_subsets': stars_subsets,
+                'stars_best_subset': stars_best_subset,
+                'stars_fitness_values': stars_fitness_values,
+                'stars_best_fitness_values': stars_best_fitness_values,
+                'stars_model': stars_model,
+                'black_hole_idx': black_hole_idx,
+                'best_features': best_features,
+                'best_mean_score': best_mean_score,
+                'best_model': best_model,
+                'fits_saved': racing.fits_saved if racing is not None else 0,
+                'warm_start': warm_start
+            })
+
+    # Models fitted with the precomputed Gram matrix can't make predictions with the molecules' data, so the final
+    # model is trained with the original linear kernel using the best subset of features
+    if use_incremental_gram:
+        best_subset = get_subset_of_features(molecules_df, combination=best_features)
+        _, best_model = __compute_fitness_function(classifier, best_subset, clinical_data, is_clustering,
+                                                   clustering_score_method, cross_validation_folds, more_is_better,
+                                                   warm_start=warm_start, fold_plan=fold_plan)
+
     best_features = best_features.astype(bool)  # Pandas needs a boolean array to select the rows
     best_features_str: List[str] = molecules_df.iloc[best_features].index.tolist()
     return best_features_str, best_model, best_mean_score
 
 
+def __get_cox_net_input_hash(x: pd.DataFrame, clinical_data: np.ndarray) -> str:
+    """Gets a hash of the molecules' data (with the molecules' names) and the clinical data."""
+    hasher = hashlib.sha256()
+    hasher.update(np.ascontiguousarray(x.to_numpy(dtype=float)).tobytes())
+    hasher.update('\x00'.join(map(str, x.columns)).encode('utf-8'))
+    hasher.update(np.ascontiguousarray(clinical_data).tobytes())
+    return hasher.hexdigest()
+
+
 def select_top_cox_regression(molecules_df: pd.DataFrame, clinical_data: np.ndarray,
-                              filter_zero_coeff: bool, top_n: Optional[int]) -> CoxNetAnalysisResult:
+                              filter_zero_coeff: bool, top_n: Optional[int],
+                              is_aborted: Optional[AbortEvent] = None,
+                              deadline: Optional[float] = None) -> CoxNetAnalysisResult:
     """
-    Get the top features using CoxNetSurvivalAnalysis model. It uses a GridSearch with Cross Validation to get the best
-    alpha parameter and the filters the best features sorting by coefficients.
+    Get the top features using CoxNetSurvivalAnalysis model. The regularization path is fitted once with all the data,
+    and the best alpha is selected by Cross Validation: every fold fits the whole path (warm-starting every alpha from
+    the previous one) and scores all the alphas. Then the features are sorted by the coefficients of the best alpha.
+    Results are cached by a hash of the input data.
     Taken from https://scikit-survival.readthedocs.io/en/stable/user_guide/coxnet.html#Elastic-Net.
     TODO: check if can make predictions with this model
     @param molecules_df: DataFrame with all the molecules' data.
     @param clinical_data: Numpy array with the time and event columns.
     @param filter_zero_coeff: If True removes features with coefficient == 0.
     @param top_n: Top N features to keep.
+    @param is_aborted: Method to call to check if the experiment has been stopped. None to not check it.
+    @param deadline: Timestamp (as returned by time.time()) from which the CV is skipped. In that case, the
+    coefficients of the median alpha of the regularization path are used. None to always compute the CV.
     @return: The combination of features with the highest fitness score and the highest fitness score achieved by
     any None as no fitness value is got from this CoxRegression process.
     """
     # NOTE: molecules have to be as columns
     x = molecules_df.transpose()
 
-    cox_net_pipe = make_pipeline(
-        StandardScaler(),
-        CoxnetSurvivalAnalysis(l1_ratio=0.9, alpha_min_ratio=0.01, max_iter=100)
-    )
+    input_hash = __get_cox_net_input_hash(x, clinical_data)
+    cached_coefficients = __cox_net_cache.get(input_hash)
+    if cached_coefficients is not None:
+        __cox_net_cache.move_to_end(input_hash)
+        return __sort_cox_net_coefficients(cached_coefficients, x.columns, filter_zero_coeff, top_n)
 
-    # Fits to get alphas (ignoring some GridSearch warnings)
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", UserWarning)
+    cox_net_pipe = make_pipeline(StandardScaler(), get_cox_net_model())
+
+    # Fits the regularization path with all the data. Its coefficients are the returned ones, so convergence issues
+    # are logged
+    with warnings.catch_warnings(record=True) as fit_warnings:
+        warnings.simplefilter("always", ConvergenceWarning)
         warnings.simplefilter("ignore", FitFailedWarning)
         cox_net_pipe.fit(x, clinical_data)
 
-    # Gets alphas to compute the GridSearch
-    estimated_alphas_np = np.array(cox_net_pipe.named_steps["coxnetsurvivalanalysis"].alphas_)
+    if any(issubclass(fit_warning.category, ConvergenceWarning) for fit_warning in fit_warnings):
+        logging.warning(f'CoxNet regularization path did not converge in {COX_NET_MAX_ITER} iterations')
 
-    # To improve performance. Generates a list of at most 3 items consisting of the minimum value,
-    # the mean and the maximum
-    estimated_alphas = []
-    if len(estimated_alphas_np) > 3:
-        estimated_alphas.append(np.min(estimated_alphas_np))
-        estimated_alphas.append(np.median(estimated_alphas_np))
-        estimated_alphas.append(np.max(estimated_alphas_np))
-    else:
-        estimated_alphas = estimated_alphas_np.tolist()
+    if is_aborted is not None:
+        check_if_stopped(is_aborted, ExperimentStopped)
+
+    cox_net = cox_net_pipe.named_steps["coxnetsurvivalanalysis"]
+    path_alphas = np.array(cox_net.alphas_)
+    path_coefficients = cox_net.coef_
 
+    if __deadline_reached(deadline):
+        logging.warning('CoxNet deadline reached. Skipping CV and using the median alpha of the path')
+        return __sort_cox_net_coefficients(path_coefficients[:, path_coefficients.shape[1] // 2], x.columns,
+                                           filter_zero_coeff, top_n)
+
+    # Scores the whole path in every fold (in parallel)
+    x_values = x.to_numpy(dtype=float)
     cv = StratifiedKFold(n_splits=GRID_SEARCH_CV_FOLDS, shuffle=True)
-    gcv = GridSearchCV(
-        make_pipeline(StandardScaler(), CoxnetSurvivalAnalysis(l1_ratio=0.9)),
-        param_grid={"coxnetsurvivalanalysis__alphas": [[v] for v in estimated_alphas]},
-        cv=cv,
-        error_score=0.5,
-        n_jobs=settings.COX_NET_GRID_SEARCH_N_JOBS
-    ).fit(x, clinical_data)
-
-    # Keeps best model from the GridSearch
-    best_model = gcv.best_estimator_.named_steps["coxnetsurvivalanalysis"]
+    folds_scores = Parallel(n_jobs=settings.COX_NET_GRID_SEARCH_N_JOBS)(
+        delayed(compute_cox_net_fold_path_scores)(x_values, clinical_data, train_index, test_index, path_alphas)
+        for train_index, test_index in cv.split(x_values, clinical_data)
+    )
+
+    # Keeps the coefficients of the alpha with the best mean C-Index. In case of ties, the biggest alpha (i.e. the
+    # sparsest model) is kept
+    best_alpha_idx = int(np.argmax(np.mean(folds_scores, axis=0)))
+    best_coefficients = path_coefficients[:, best_alpha_idx]
+
+    __cox_net_cache[input_hash] = best_coefficients
+    if len(__cox_net_cache) > COX_NET_CACHE_SIZE:
+        __cox_net_cache.popitem(last=False)
+
+    return __sort_cox_net_coefficients(best_coefficients, x.columns, filter_zero_coeff, top_n)
+
+
+def __sort_cox_net_coefficients(coefficients: np.ndarray, molecules: pd.Index, filter_zero_coeff: bool,
+                                top_n: Optional[int]) -> CoxNetAnalysisResult:
+    """
+    Sorts the molecules by the absolute value of their CoxNet coefficients.
+    @param coefficients: CoxNet coefficients (one per molecule).
+    @param molecules: Molecules' names.
+    @param filter_zero_coeff: If True removes features with coefficient == 0.
+    @param top_n: Top N features to keep.
+    @return: Same as select_top_cox_regression.
+    """
     best_coefficients = pd.DataFrame(
-        best_model.coef_,
-        index=x.columns,
+        coefficients,
+        index=molecules,
         columns=["coefficient"]
     )
 
@@ -519,66 +1072,447 @@ def select_top_cox_regression(molecules_df: pd.DataFrame, clinical_data: np.ndar
     return best_features, None, best_features_coeff
 
 
-def genetic_algorithms_sequential(
+def __evaluate_ga_population(
         classifier: SurvModel,
         molecules_df: pd.DataFrame,
-        population_size: int,
+        population: np.ndarray,
+        clinical_data: np.ndarray,
+        is_clustering: bool,
+        clustering_score_method: Optional[ClusteringScoringMethod],
+        cross_validation_folds: int,
+        more_is_better: bool,
+        fitness_cache: Dict[bytes, float],
+        racing: Optional[CVRacing],
+        warm_start: Optional[CVWarmStart],
+        fold_plan: Optional[CVFoldPlan],
+        is_aborted: Optional[AbortEvent],
+        deadline: Optional[float]
+) -> Tuple[np.ndarray, List[Optional[SurvModel]]]:
+    """
+    Computes the fitness of every solution of a GA population. Solutions which were already evaluated are taken from
+    the fitness cache (so they don't have a model) and solutions without molecules have a fitness of 0.
+    @return: The fitness value and the model (None if it was cached) of every solution. If the deadline is reached,
+    only the values of the first evaluated solutions are returned.
+    """
+    scores = np.empty((population.shape[0],), dtype=float)
+    models: List[Optional[SurvModel]] = []
+    generation_best_score: Optional[float] = None  # The best solution of the generation is the incumbent for racing
+    for solution_idx, solution in enumerate(population):
+        if is_aborted is not None:
+            check_if_stopped(is_aborted, ExperimentStopped)
+        if __deadline_reached(deadline):
+            return scores[:solution_idx], models
+
+        solution_key = solution.tobytes()
+        if solution_key in fitness_cache:
+            solution_score = fitness_cache[solution_key]
+            solution_model = None
+        elif np.count_nonzero(solution) == 0:
+            # Solutions without molecules can't be fitted, so they won't be selected as parents
+            solution_score = 0.0
+            solution_model = None
+        else:
+            solution_score, solution_model = __compute_fitness_function(
+                classifier, get_subset_of_features(molecules_df, combination=solution), clinical_data, is_clustering,
+                clustering_score_method, cross_validation_folds, more_is_better, generation_best_score, racing,
+                warm_start, fold_plan
+            )
+            fitness_cache[solution_key] = solution_score
+
+        scores[solution_idx] = solution_score
+        models.append(solution_model)
+        if generation_best_score is None or solution_score > generation_best_score:
+            generation_best_score = solution_score
+
+    return scores, models
+
+
+def __generate_ga_offspring(population: np.ndarray, scores: np.ndarray, mutation_rate: float) -> np.ndarray:
+    """Generates the next GA generation using roulette selection, single-point crossover and mutation."""
+    population_size, n_molecules = population.shape
+
+    # Select parents based on fitness scores
+    parents = population[
+        np.random.choice(population_size, size=population_size, p=scores / scores.sum())
+    ]
+
+    # Crossover (single-point crossover)
+    crossover_point = np.random.randint(1, n_molecules)
+    offspring = np.zeros_like(population)
+    for i in range(population_size // 2):
+        parent1, parent2 = parents[i], parents[population_size - i - 1]
+        offspring[i] = np.concatenate((parent1[:crossover_point], parent2[crossover_point:]))
+        offspring[population_size - i - 1] = np.concatenate((parent2[:crossover_point], parent1[crossover_point:]))
+
+    # Mutation
+    mask = np.random.rand(population_size, n_molecules) < mutation_rate
+    offspring[mask] = 1 - offspring[mask]
+
+    return offspring
+
+
+def evolve_ga_island(
+        classifier: SurvModel,
+        molecules_df: pd.DataFrame,
+        population: np.ndarray,
         mutation_rate: float,
-        n_iterations: int,
+        n_generations: int,
         clinical_data: np.ndarray,
         is_clustering: bool,
         clustering_score_method: Optional[ClusteringScoringMethod],
         cross_validation_folds: int,
-) -> FSResult:
+        n_elites: int,
+        fitness_cache: Optional[Dict[bytes, float]] = None,
+        racing: Optional[CVRacing] = None,
+        is_aborted: Optional[AbortEvent] = None,
+        deadline: Optional[float] = None,
+        warm_start: Optional[CVWarmStart] = None,
+        fold_plan: Optional[CVFoldPlan] = None
+) -> GAIslandResult:
+    """
+    Evolves a GA population (the whole population in the sequential version or an island in the parallel one) during
+    some generations keeping the best solution found in all of them.
+    @param classifier: Classifier to use to compute the fitness of every solution.
+    @param molecules_df: DataFrame with all the molecules' data.
+    @param population: Binary matrix with a solution (subset of molecules) in every row.
+    @param mutation_rate: Probability of toggling every molecule in the offspring.
+    @param n_generations: Number of generations to evolve.
+    @param clinical_data: Numpy array with the time and event columns.
+    @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
+    @param clustering_score_method: Clustering scoring method to optimize.
+    @param cross_validation_folds: Number of folds in the CrossValidation process.
+    @param n_elites: Number of best solutions of the last evaluated generation to return (used to migrate them).
+    @param fitness_cache: Fitness values of the solutions already evaluated in this population. It's updated in place.
+    @param racing: CVRacing instance to abandon the solutions that can't beat the best one of their generation after
+    some CV folds. None to evaluate all the folds.
+    @param is_aborted: Method to call before every evaluation to check if the experiment has been stopped. None to not
+    check it.
+    @param deadline: Timestamp (as returned by time.time()) from which no more solutions are evaluated. In that case
+    the population is returned without evolving it.
+    @param warm_start: CVWarmStart instance to start the fit of every CV fold from the model fitted with the most
+    similar subset of features. None to fit every fold from scratch.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The offspring to evaluate in the next generation, the elites of the last generation and their fitness
+    values, the best solution found, its fitness value and model, the updated fitness cache, the number of CV fits
+    saved by racing and the warm_start instance (to get it back from the worker processes).
+    """
     # Even in case of Log-likelihood (only used in clustering) it has to be maximized:
     # https://github.com/CamDavidsonPilon/lifelines/issues/1545
     # For the moment there is no model that needs to be minimized
     more_is_better = True
 
-    # Initialize population randomly
-    n_molecules = molecules_df.shape[0]
-    population = np.random.randint(2, size=(population_size, n_molecules))
+    if fitness_cache is None:
+        fitness_cache = {}
+    fits_saved_before = racing.fits_saved if racing is not None else 0
 
-    fitness_scores = np.empty((population_size, 2))
+    best_solution: Optional[np.ndarray] = None
+    best_mean_score = NEG_INF
+    best_model: Optional[SurvModel] = None
+    elites = population[:0]
+    elites_scores = np.empty((0,), dtype=float)
 
-    for _iteration in range(n_iterations):
+    for _generation in range(n_generations):
         # Calculate fitness scores for each solution
-        fitness_scores = np.array([
-            __compute_fitness_function(classifier, get_subset_of_features(molecules_df, combination=solution),
-                                       clinical_data, is_clustering,
-                                       clustering_score_method,
-                                       cross_validation_folds, more_is_better)
-            for solution in population
-        ])
-
-        # Gets scores and casts the type to float to prevent errors due to 'safe' option
-        scores = fitness_scores[:, 0].astype(float)
-
-        # Select parents based on fitness scores
-        parents = population[
-            np.random.choice(population_size, size=population_size, p=scores / scores.sum())
-        ]
-
-        # Crossover (single-point crossover)
-        crossover_point = np.random.randint(1, n_molecules)
-        offspring = np.zeros_like(population)
-        for i in range(population_size // 2):
-            parent1, parent2 = parents[i], parents[population_size - i - 1]
-            offspring[i] = np.concatenate((parent1[:crossover_point], parent2[crossover_point:]))
-            offspring[population_size - i - 1] = np.concatenate((parent2[:crossover_point], parent1[crossover_point:]))
-
-        # Mutation
-        mask = np.random.rand(population_size, n_molecules) < mutation_rate
-        offspring[mask] = 1 - offspring[mask]
-
-        population = offspring
-
-    # Get the best solution
-    best_idx = np.argmax(fitness_scores[:, 0]) if more_is_better else np.argmin(fitness_scores[:, 0])
-    best_features = population[best_idx]
-    best_features = best_features.astype(bool)  # Pandas needs a boolean array to select the rows
-    best_features_str: List[str] = molecules_df.iloc[best_features].index.tolist()
+        scores, models = __evaluate_ga_population(classifier, molecules_df, population, clinical_data, is_clustering,
+                                                  clustering_score_method, cross_validation_folds, more_is_better,
+                                                  fitness_cache, racing, warm_start, fold_plan, is_aborted,
+                                                  deadline)
+        deadline_reached = scores.shape[0] < population.shape[0]
+
+        # Keeps the best solution of all the generations. The solutions without any molecule are discarded
+        for solution_idx in np.argsort(-scores, kind='stable'):
+            if np.count_nonzero(population[solution_idx]) == 0:
+                continue
+            if scores[solution_idx] > best_mean_score and models[solution_idx] is not None:
+                best_solution = population[solution_idx].copy()
+                best_mean_score = cast(float, scores[solution_idx])
+                best_model = models[solution_idx]
+            break
 
-    best_model = cast(SurvModel, fitness_scores[best_idx][1])
-    best_mean_score = cast(float, fitness_scores[best_idx][0])
+        elites_idx = np.argsort(-scores, kind='stable')[:n_elites]
+        elites, elites_scores = population[elites_idx].copy(), scores[elites_idx]
+
+        if deadline_reached:
+            break
+
+        population = __generate_ga_offspring(population, scores, mutation_rate)
+
+    fits_saved = racing.fits_saved - fits_saved_before if racing is not None else 0
+
+    return population, elites, elites_scores, best_solution, best_mean_score, best_model, fitness_cache, fits_saved, \
+        warm_start
+
+
+def __ga_result(molecules_df: pd.DataFrame, best_solution: Optional[np.ndarray], best_model: Optional[SurvModel],
+                best_mean_score: float) -> FSResult:
+    """Converts the best GA solution to the FS algorithms' result."""
+    if best_solution is None:
+        return None, None, None
+
+    best_features = best_solution.astype(bool)  # Pandas needs a boolean array to select the rows
+    best_features_str: List[str] = molecules_df.iloc[best_features].index.tolist()
     return best_features_str, best_model, best_mean_score
+
+
+def genetic_algorithms_sequential(
+        classifier: SurvModel,
+        molecules_df: pd.DataFrame,
+        population_size: int,
+        mutation_rate: float,
+        n_iterations: int,
+        clinical_data: np.ndarray,
+        is_clustering: bool,
+        clustering_score_method: Optional[ClusteringScoringMethod],
+        cross_validation_folds: int,
+        racing: Optional[CVRacing] = None,
+        checkpoint: Optional[FSCheckpoint] = None,
+        is_aborted: Optional[AbortEvent] = None,
+        deadline: Optional[float] = None,
+        warm_start: Optional[CVWarmStart] = None,
+        fold_plan: Optional[CVFoldPlan] = None
+) -> FSResult:
+    """
+    Computes a Genetic Algorithm with roulette selection, single-point crossover and mutation. Solutions already
+    evaluated are not computed again.
+    @param classifier: Classifier to use to compute the fitness of every solution.
+    @param molecules_df: DataFrame with all the molecules' data.
+    @param population_size: Number of solutions in the population.
+    @param mutation_rate: Probability of toggling every molecule in the offspring.
+    @param n_iterations: Number of generations.
+    @param clinical_data: Numpy array with the time and event columns.
+    @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
+    @param clustering_score_method: Clustering scoring method to optimize.
+    @param cross_validation_folds: Number of folds in the CrossValidation process.
+    @param racing: CVRacing instance to abandon the solutions that can't beat the best one of their generation after
+    some CV folds. None to evaluate all the folds.
+    @param checkpoint: FSCheckpoint instance to periodically store the population and resume from it. None to
+    disable checkpoints.
+    @param is_aborted: Method to call before every evaluation to check if the experiment has been stopped. None to not
+    check it.
+    @param deadline: Timestamp (as returned by time.time()) from which no more solutions are evaluated and the best
+    solution found so far is returned. None to run all the generations.
+    @param warm_start: CVWarmStart instance to start the fit of every CV fold from the model fitted with the most
+    similar subset of features. None to fit every fold from scratch.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The combination of features with the highest fitness score and the highest fitness score achieved by
+    any combination of features.
+    """
+    checkpoint_state = checkpoint.load('GA') if checkpoint is not None else None
+    if checkpoint_state is not None:
+        start_iteration: int = checkpoint_state['iteration']
+        population = checkpoint_state['population']
+        fitness_cache: Dict[bytes, float] = checkpoint_state['fitness_cache']
+        best_solution: Optional[np.ndarray] = checkpoint_state['best_solution']
+        best_mean_score: float = checkpoint_state['best_mean_score']
+        best_model: Optional[SurvModel] = checkpoint_state['best_model']
+        if racing is not None:
+            racing.fits_saved = checkpoint_state['fits_saved']
+        if warm_start is not None and checkpoint_state.get('warm_start') is not None:
+            warm_start.add_stats(checkpoint_state['warm_start'])
+    else:
+        # Initialize population randomly
+        start_iteration = 0
+        n_molecules = molecules_df.shape[0]
+        population = np.random.randint(2, size=(population_size, n_molecules))
+        fitness_cache = {}
+        best_solution = None
+        best_mean_score = NEG_INF
+        best_model = None
+
+    # Evolves generation by generation to store checkpoints
+    for iteration in range(start_iteration, n_iterations):
+        population, _elites, _elites_scores, generation_best_solution, generation_best_score, generation_best_model, \
+            fitness_cache, _fits_saved, _warm_start = evolve_ga_island(classifier, molecules_df, population,
+                                                                       mutation_rate, 1, clinical_data, is_clustering,
+                                                                       clustering_score_method,
+                                                                       cross_validation_folds, n_elites=0,
+                                                                       fitness_cache=fitness_cache, racing=racing,
+                                                                       is_aborted=is_aborted, deadline=deadline,
+                                                                       warm_start=warm_start, fold_plan=fold_plan)
+
+        if generation_best_solution is not None and generation_best_score > best_mean_score:
+            best_solution = generation_best_solution
+            best_mean_score = generation_best_score
+            best_model = generation_best_model
+
+        if __deadline_reached(deadline):
+            logging.warning(f'GA deadline reached in generation {iteration + 1} of {n_iterations}. Returning the best '
+                            f'solution found so far')
+            break
+
+        if checkpoint is not None and checkpoint.must_save():
+            checkpoint.save('GA', {
+                'iteration': iteration + 1,
+                'population': population,
+                'fitness_cache': fitness_cache,
+                'best_solution': best_solution,
+                'best_mean_score': best_mean_score,
+                'best_model': best_model,
+                'fits_saved': racing.fits_saved if racing is not None else 0,
+                'warm_start': warm_start
+            })
+
+    return __ga_result(molecules_df, best_solution, best_model, best_mean_score)
+
+
+def genetic_algorithms_parallel(
+        classifier: SurvModel,
+        molecules_df: pd.DataFrame,
+        population_size: int,
+        mutation_rate: float,
+        n_iterations: int,
+        clinical_data: np.ndarray,
+        is_clustering: bool,
+        clustering_score_method: Optional[ClusteringScoringMethod],
+        cross_validation_folds: int,
+        n_islands: int,
+        migration_interval: int,
+        n_migrants: int,
+        racing: Optional[CVRacing] = None,
+        checkpoint: Optional[FSCheckpoint] = None,
+        is_aborted: Optional[AbortEvent] = None,
+        deadline: Optional[float] = None,
+        warm_start: Optional[CVWarmStart] = None,
+        fold_plan: Optional[CVFoldPlan] = None
+) -> FSResult:
+    """
+    Island model of the Genetic Algorithm: the population is split in n_islands sub-populations which evolve in
+    parallel in a pool of processes. Every migration_interval generations, the n_migrants best solutions of every
+    island replace random solutions of the next island (ring topology). Every island keeps its own fitness cache.
+    @param classifier: Classifier to use to compute the fitness of every solution.
+    @param molecules_df: DataFrame with all the molecules' data.
+    @param population_size: Total number of solutions (split among all the islands).
+    @param mutation_rate: Probability of toggling every molecule in the offspring.
+    @param n_iterations: Number of generations.
+    @param clinical_data: Numpy array with the time and event columns.
+    @param is_clustering: If True, no CV is computed as clustering needs all the samples to make predictions.
+    @param clustering_score_method: Clustering scoring method to optimize.
+    @param cross_validation_folds: Number of folds in the CrossValidation process.
+    @param n_islands: Number of islands (and processes).
+    @param migration_interval: Number of generations between migrations.
+    @param n_migrants: Number of best solutions of every island to migrate.
+    @param racing: CVRacing instance to abandon the solutions that can't beat the best one of their generation after
+    some CV folds. None to evaluate all the folds.
+    @param checkpoint: FSCheckpoint instance to store the islands after every migration and resume from them. None to
+    disable checkpoints.
+    @param is_aborted: Method to call between migrations to check if the experiment has been stopped (it can't be
+    sent to the worker processes). None to not check it.
+    @param deadline: Timestamp (as returned by time.time()) from which no more solutions are evaluated and the best
+    solution found so far is returned. None to run all the generations.
+    @param warm_start: CVWarmStart instance to start the fit of every CV fold from the model fitted with the most
+    similar subset of features. In the island model every island keeps its own copy, whose stats are added to this
+    instance at the end. None to fit every fold from scratch.
+    @param fold_plan: CVFoldPlan of the experiment to use the same CV folds in every evaluation. None to compute new
+    random folds in every evaluation.
+    @return: The combination of features with the highest fitness score and the highest fitness score achieved by
+    any combination of features.
+    """
+    # Imported here to prevent circular imports as the workers' module imports this one lazily
+    from feature_selection.fs_workers import evolve_ga_island_in_worker
+
+    # Every island needs at least 2 solutions to make the crossover
+    n_islands = max(min(n_islands, population_size // 2), 1)
+    island_size = population_size // n_islands
+    n_migrants = min(n_migrants, island_size - 1)
+    migration_interval = max(migration_interval, 1)
+
+    # Enum values are sent as int as the workers can't unpickle Django models' classes before setting up Django
+    score_method_value = int(clustering_score_method) if clustering_score_method is not None else None
+
+    # NOTE: only the RNG state of this process is stored in the checkpoint, not the workers' ones
+    checkpoint_state = checkpoint.load('GA_ISLANDS') if checkpoint is not None else None
+    if checkpoint_state is not None:
+        populations: List[np.ndarray] = checkpoint_state['populations']
+        fitness_caches: List[Dict[bytes, float]] = checkpoint_state['fitness_caches']
+        remaining_generations: int = checkpoint_state['remaining_generations']
+        best_solution: Optional[np.ndarray] = checkpoint_state['best_solution']
+        best_mean_score: float = checkpoint_state['best_mean_score']
+        best_model: Optional[SurvModel] = checkpoint_state['best_model']
+        if racing is not None:
+            racing.fits_saved = checkpoint_state['fits_saved']
+        islands_warm_starts: List[Optional[CVWarmStart]] = checkpoint_state.get('islands_warm_starts',
+                                                                                [None] * n_islands)
+    else:
+        n_molecules = molecules_df.shape[0]
+        populations = [np.random.randint(2, size=(island_size, n_molecules)) for _ in range(n_islands)]
+        fitness_caches = [{} for _ in range(n_islands)]
+        islands_warm_starts = [None] * n_islands
+        remaining_generations = n_iterations
+        best_solution = None
+        best_mean_score = NEG_INF
+        best_model = None
+
+    # Every island keeps its own seeds (and stats) for the warm-started fits between rounds
+    if warm_start is not None:
+        islands_warm_starts = [island_warm_start if island_warm_start is not None
+                               else CVWarmStart(warm_start.calibration_period)
+                               for island_warm_start in islands_warm_starts]
+
+    with Parallel(n_jobs=n_islands) as parallel:
+        while remaining_generations > 0:
+            if is_aborted is not None:
+                check_if_stopped(is_aborted, ExperimentStopped)
+
+            if __deadline_reached(deadline):
+                logging.warning(f'GA deadline reached with {remaining_generations} generations remaining. Returning '
+                                f'the best solution found so far')
+                break
+
+            n_generations = min(migration_interval, remaining_generations)
+            remaining_generations -= n_generations
+
+            islands_results: List[GAIslandResult] = parallel(
+                delayed(evolve_ga_island_in_worker)(classifier, molecules_df, populations[island_idx], mutation_rate,
+                                                    n_generations, clinical_data, is_clustering, score_method_value,
+                                                    cross_validation_folds, n_migrants, fitness_caches[island_idx],
+                                                    racing, deadline, islands_warm_starts[island_idx], fold_plan)
+                for island_idx in range(n_islands)
+            )
+
+            elites: List[Tuple[np.ndarray, np.ndarray]] = []
+            for island_idx, (island_population, island_elites, island_elites_scores, island_best_solution,
+                             island_best_score, island_best_model, island_cache, island_fits_saved,
+                             island_warm_start) in enumerate(islands_results):
+                populations[island_idx] = island_population
+                fitness_caches[island_idx] = island_cache
+                islands_warm_starts[island_idx] = island_warm_start
+                elites.append((island_elites, island_elites_scores))
+                if racing is not None:
+                    racing.add_saved_fits(island_fits_saved)
+
+                if island_best_solution is not None and island_best_score > best_mean_score:
+                    best_solution = island_best_solution
+                    best_mean_score = island_best_score
+                    best_model = island_best_model
+
+            # Migration (ring topology). The fitness of the migrants is already known, so it's added to the cache of
+            # the destination island
+            if remaining_generations > 0 and n_islands > 1 and n_migrants > 0:
+                for island_idx, (island_elites, island_elites_scores) in enumerate(elites):
+                    destination_idx = (island_idx + 1) % n_islands
+                    destination = populations[destination_idx]
+                    replaced_idx = np.random.choice(destination.shape[0], size=island_elites.shape[0],
+                                                    replace=False)
+                    destination[replaced_idx] = island_elites
+                    for migrant, migrant_score in zip(island_elites, island_elites_scores):
+                        fitness_caches[destination_idx][migrant.tobytes()] = float(migrant_score)
+
+            if checkpoint is not None and remaining_generations > 0 and checkpoint.must_save():
+                checkpoint.save('GA_ISLANDS', {
+                    'populations': populations,
+                    'fitness_caches': fitness_caches,
+                    'remaining_generations': remaining_generations,
+                    'best_solution': best_solution,
+                    'best_mean_score': best_mean_score,
+                    'best_model': best_model,
+                    'fits_saved': racing.fits_saved if racing is not None else 0,
+                    'islands_warm_starts': islands_warm_starts
+                })
+
+    if warm_start is not None:
+        for island_warm_start in islands_warm_starts:
+            warm_start.add_stats(island_warm_start)
+
+    return __ga_result(molecules_df, best_solution, best_model, best_mean_score)
@@ -14,11 +14,36 @@ from feature_selection.models import ClusteringScoringMethod, FitnessFunction, T
 from feature_selection.utils import get_svm_kernel
 
 
+# Compression of the Parquet datasets shared with the EMR integration
+PARQUET_COMPRESSION = 'zstd'
+
+
 class EMRAlgorithms(Enum):
     BLIND_SEARCH = 0
     BBHA = 1
 
 
+def __save_shared_dataset(df: pd.DataFrame, app_name: str, dataset_name: str) -> str:
+    """
+    Saves a dataset inside the shared volume with the EMR integration service in the format defined by the
+    EMR_DATASETS_FORMAT setting ('parquet' or 'csv').
+    @param df: DataFrame to save.
+    @param app_name: Name of the app. Datasets are saved in a folder with the same name.
+    @param dataset_name: Name of the file (without extension).
+    @return: Relative path of the file to the shared volume.
+    """
+    extension = 'parquet' if settings.EMR_DATASETS_FORMAT == 'parquet' else 'csv'
+    relative_path = os.path.join(app_name, f'{dataset_name}.{extension}')
+    file_path = os.path.join(settings.AWS_EMR_SETTINGS['shared_folder_data'], relative_path)
+
+    if extension == 'parquet':
+        df.to_parquet(file_path, compression=PARQUET_COMPRESSION)
+    else:
+        df.to_csv(file_path, sep='\t', decimal='.')
+
+    return relative_path
+
+
 def __get_model_value(fitness_function: FitnessFunction) -> str:
     """Gets the corresponding string value for the parameter 'model' of the EMR integration."""
     if fitness_function == FitnessFunction.SVM:
@@ -242,15 +267,9 @@ def binary_black_hole_spark(
     app_data_folder = os.path.join(data_folder, app_name)
     create_folder_with_permissions(app_data_folder)
 
-    # Saves datasets inside the shared volume
-    molecules_path = os.path.join(app_data_folder, 'molecules.csv')
-    molecules_df.to_csv(molecules_path, sep='\t', decimal='.')
-    clinical_path = os.path.join(app_data_folder, 'clinical.csv')
-    clinical_df.to_csv(clinical_path, sep='\t', decimal='.')
-
-    # Gets relative paths to the shared volume for the EMR integration service
-    molecules_relative_path = os.path.join(app_name, 'molecules.csv')
-    clinical_relative_path = os.path.join(app_name, 'clinical.csv')
+    # Saves datasets inside the shared volume and gets their relative paths for the EMR integration service
+    molecules_relative_path = __save_shared_dataset(molecules_df, app_name, 'molecules')
+    clinical_relative_path = __save_shared_dataset(clinical_df, app_name, 'clinical')
 
     # Prepares some parameters
     job_name = remove_non_alphanumeric_chars(job_name)
@@ -0,0 +1,82 @@
+import logging
+import os
+import pickle
+import random
+import time
+from typing import Optional, Dict, Any
+import numpy as np
+
+
+class FSCheckpoint:
+    """
+    Periodic checkpoints of the state of a FS metaheuristic (BBHA/GA) stored in a file. If the Celery worker is lost
+    during the experiment, the task is re-queued (acks_late=True) and the metaheuristic resumes from the last
+    checkpoint instead of starting from the first iteration. The RNG states of the random and numpy.random modules are
+    stored and restored along with the algorithm's state.
+    """
+    file_path: str  # Path of the checkpoint file
+    signature: str  # Hash of the experiment's inputs. Checkpoints with a different signature are discarded
+    interval: float  # Minimum number of seconds between checkpoints
+    last_save: float  # Timestamp of the last checkpoint
+
+    def __init__(self, file_path: str, signature: str, interval: float):
+        self.file_path = file_path
+        self.signature = signature
+        self.interval = interval
+        self.last_save = time.time()
+
+    def load(self, algorithm: str) -> Optional[Dict[str, Any]]:
+        """
+        Loads the last checkpoint of the experiment restoring the RNG states.
+        @param algorithm: Name of the algorithm which stored the checkpoint.
+        @return: The stored state of the algorithm or None if there's no valid checkpoint for this experiment.
+        """
+        if not os.path.exists(self.file_path):
+            return None
+
+        try:
+            with open(self.file_path, 'rb') as fp:
+                checkpoint = pickle.load(fp)
+        except Exception as ex:
+            logging.warning(f'Invalid FS checkpoint {self.file_path}: {ex}. Starting from scratch')
+            return None
+
+        if checkpoint.get('signature') != self.signature or checkpoint.get('algorithm') != algorithm:
+            logging.warning(f'FS checkpoint {self.file_path} belongs to a different experiment configuration. '
+                            f'Starting from scratch')
+            return None
+
+        random.setstate(checkpoint['random_state'])
+        np.random.set_state(checkpoint['numpy_random_state'])
+        logging.warning(f'Resuming FS experiment from checkpoint {self.file_path}')
+        return checkpoint['state']
+
+    def save(self, algorithm: str, state: Dict[str, Any]):
+        """
+        Stores the state of the algorithm and the RNG states. The file is replaced atomically so a worker lost
+        during the writing does not corrupt the previous checkpoint.
+        @param algorithm: Name of the algorithm.
+        @param state: State of the algorithm to store.
+        """
+        checkpoint = {
+            'signature': self.signature,
+            'algorithm': algorithm,
+            'random_state': random.getstate(),
+            'numpy_random_state': np.random.get_state(),
+            'state': state
+        }
+        temp_file_path = f'{self.file_path}.tmp'
+        with open(temp_file_path, 'wb') as fp:
+            pickle.dump(checkpoint, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_file_path, self.file_path)
+        self.last_save = time.time()
+
+    def must_save(self) -> bool:
+        """Returns True if the interval between checkpoints has elapsed."""
+        return time.time() - self.last_save >= self.interval
+
+    def remove(self):
+        """Removes the checkpoint file (if exists)."""
+        for path in [self.file_path, f'{self.file_path}.tmp']:
+            if os.path.exists(path):
+                os.unlink(path)
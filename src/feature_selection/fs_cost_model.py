@@ -0,0 +1,132 @@
+import logging
+from typing import Dict, Any, Optional, Tuple, List, Type
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum, Count
+from sklearn.linear_model import LinearRegression
+from feature_selection.models import FitnessFunction, SVMTimesRecord, RFTimesRecord, ClusteringTimesRecord, \
+    FSExperiment, TimesRecord
+
+# Estimated local and remote (Spark) execution times in seconds
+FSTimeEstimation = Tuple[float, float]
+
+# Fitted models are cached by fitness function (or 'remote' for the Spark wall-clock model) along with the number of
+# records used to fit them, so they're only fitted again when new records are stored
+__fitted_models: Dict[Any, Tuple[int, LinearRegression]] = {}
+
+
+def __get_times_record_class(fitness_function: FitnessFunction) -> Tuple[Type[TimesRecord], str]:
+    """Gets the TimesRecord model for a fitness function and the name of the field with the model's parameter."""
+    if fitness_function == FitnessFunction.SVM:
+        return SVMTimesRecord, 'max_iterations'
+    if fitness_function == FitnessFunction.RF:
+        return RFTimesRecord, 'number_of_trees'
+    return ClusteringTimesRecord, 'number_of_clusters'
+
+
+def __get_model_parameter(fitness_function: FitnessFunction, fitness_function_parameters: Dict[str, Any]) -> float:
+    """
+    Gets the model parameter which affects the execution time the most (SVM max iterations, number of trees in RF or
+    number of clusters) from the parameters sent by the user. Uses the same defaults as
+    create_models_parameters_and_classifier().
+    """
+    if fitness_function == FitnessFunction.SVM:
+        svm_parameters = fitness_function_parameters['svmParameters']
+        return float(svm_parameters['maxIterations']) if svm_parameters['maxIterations'] else 1000.0
+    if fitness_function == FitnessFunction.RF:
+        return float(fitness_function_parameters['rfParameters']['nEstimators'])
+    return float(fitness_function_parameters['clusteringParameters']['nClusters'])
+
+
+def __log_features(values: np.ndarray) -> np.ndarray:
+    """Power-law features: times are modeled as a linear function of the logarithm of the inputs."""
+    return np.log1p(np.asarray(values, dtype=float))
+
+
+def __get_evaluation_time_model(fitness_function: FitnessFunction) -> Optional[LinearRegression]:
+    """
+    Fits (or gets from cache) a regressor to predict the execution time of a single fitness evaluation in the Spark
+    cluster from the number of features, the number of samples and the model's parameter.
+    @param fitness_function: Fitness function to get the TimesRecord instances from.
+    @return: The fitted regressor or None if there are fewer records than FS_COST_MODEL_MIN_RECORDS.
+    """
+    times_record_class, parameter_field = __get_times_record_class(fitness_function)
+    records = times_record_class.objects.filter(execution_time__gt=0)
+    n_records = records.count()
+    if n_records < settings.FS_COST_MODEL_MIN_RECORDS:
+        return None
+
+    cached = __fitted_models.get(fitness_function)
+    if cached is not None and cached[0] == n_records:
+        return cached[1]
+
+    data = np.array(records.values_list('number_of_features', 'number_of_samples', parameter_field,
+                                        'execution_time'), dtype=float)
+    model = LinearRegression().fit(__log_features(data[:, :3]), np.log(data[:, 3]))
+    __fitted_models[fitness_function] = (n_records, model)
+    return model
+
+
+def __get_remote_wall_time_model() -> Optional[LinearRegression]:
+    """
+    Fits (or gets from cache) a regressor to predict the total execution time of a Spark job from the sum of the
+    execution times of all its fitness evaluations. The intercept represents the overhead of the job (data transfer,
+    cluster scheduling, etc.) and the slope the inverse of the parallelism of the cluster.
+    @return: The fitted regressor or None if there are fewer than FS_COST_MODEL_MIN_EXPERIMENTS Spark jobs with times.
+    """
+    experiments_work: List[Tuple[float, float]] = []
+    for related_name in ['svm_times_records', 'rf_times_records', 'clustering_times_records']:
+        experiments = FSExperiment.objects.filter(emr_job_id__isnull=False, execution_time__gt=0) \
+            .annotate(n_records=Count(related_name), total_work=Sum(f'{related_name}__execution_time')) \
+            .filter(n_records__gt=0) \
+            .values_list('total_work', 'execution_time')
+        experiments_work.extend(experiments)
+
+    n_experiments = len(experiments_work)
+    if n_experiments < settings.FS_COST_MODEL_MIN_EXPERIMENTS:
+        return None
+
+    cached = __fitted_models.get('remote')
+    if cached is not None and cached[0] == n_experiments:
+        return cached[1]
+
+    data = np.array(experiments_work, dtype=float)
+    model = LinearRegression(positive=True).fit(data[:, [0]], data[:, 1])
+    __fitted_models['remote'] = (n_experiments, model)
+    return model
+
+
+def estimate_fs_execution_times(fitness_function: FitnessFunction, fitness_function_parameters: Dict[str, Any],
+                                n_features: int, n_samples: int, n_agents: int,
+                                n_iterations: int) -> Optional[FSTimeEstimation]:
+    """
+    Estimates the local and remote (Spark) execution time of a FS experiment using cost models fitted on the
+    TimesRecord instances stored from previous Spark jobs. Every agent evaluates on average half of the features.
+    The local time is the total work (in the Spark executors' time) scaled by FS_COST_MODEL_LOCAL_SPEED_FACTOR.
+    @param fitness_function: Fitness function of the experiment.
+    @param fitness_function_parameters: Parameters of the fitness function sent by the user.
+    @param n_features: Number of features of the dataset.
+    @param n_samples: Number of samples of the dataset.
+    @param n_agents: Number of agents of the metaheuristic.
+    @param n_iterations: Number of iterations of the metaheuristic.
+    @return: The estimated local and remote execution times in seconds, or None if there are not enough records to
+    fit the cost models.
+    """
+    evaluation_model = __get_evaluation_time_model(fitness_function)
+    remote_model = __get_remote_wall_time_model()
+    if evaluation_model is None or remote_model is None:
+        return None
+
+    try:
+        model_parameter = __get_model_parameter(fitness_function, fitness_function_parameters)
+    except (KeyError, TypeError, ValueError) as ex:
+        logging.warning(f'Invalid fitness function parameters to estimate the execution time: {ex}')
+        return None
+
+    evaluation_features = __log_features([[max(n_features / 2, 1), n_samples, model_parameter]])
+    evaluation_time = float(np.exp(evaluation_model.predict(evaluation_features)[0]))
+    total_work = evaluation_time * n_agents * n_iterations
+
+    local_time = total_work * settings.FS_COST_MODEL_LOCAL_SPEED_FACTOR
+    remote_time = float(remote_model.predict(np.array([[total_work]]))[0])
+    return local_time, remote_time
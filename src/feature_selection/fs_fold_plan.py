@@ -0,0 +1,40 @@
+from typing import List, Tuple, Iterator, Optional
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+# Indexes of the training and testing samples of a fold and their survival data
+CVFold = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class CVFoldPlan:
+    """
+    Stratified CrossValidation folds computed once for a FS experiment and reused in every fitness evaluation, so the
+    scores of different subsets of features are computed on the same folds (and are comparable) and the samples are
+    not split again for every candidate. The survival data of every fold is sliced only once too.
+    NOTE: this module must not import any Django model, so instances can be sent to the pool's worker processes.
+    """
+    n_splits: int  # Number of folds
+    random_state: Optional[int]  # Seed used to shuffle the samples. None for a random plan
+    folds: List[CVFold]  # Training indexes, testing indexes, training survival data and testing survival data
+
+    def __init__(self, clinical_data: np.ndarray, n_splits: int, random_state: Optional[int]):
+        """
+        Computes the folds.
+        @param clinical_data: Numpy structured array with the event and time columns of all the samples.
+        @param n_splits: Number of folds.
+        @param random_state: Seed to shuffle the samples. None to get a different plan every time.
+        """
+        self.n_splits = n_splits
+        self.random_state = random_state
+
+        skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+        self.folds = [
+            (train_index, test_index, clinical_data[train_index], clinical_data[test_index])
+            for train_index, test_index in skf.split(np.zeros(clinical_data.shape[0]), clinical_data)
+        ]
+
+    def __iter__(self) -> Iterator[CVFold]:
+        return iter(self.folds)
+
+    def __len__(self) -> int:
+        return len(self.folds)
@@ -0,0 +1,457 @@
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, Future, CancelledError
+from datetime import datetime, timezone
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple, List
+import requests
+from django.conf import settings
+from common.datasets_utils import create_folder_with_permissions, format_data
+from common.exceptions import ExperimentStopped, ExperimentFailed
+from feature_selection.fs_algorithms import binary_black_hole_sequential, blind_search_sequential, SurvModel
+from feature_selection.fs_algorithms_spark import EMRAlgorithms
+from feature_selection.fs_models import get_survival_svm_model, get_rf_model, get_clustering_model
+from feature_selection.fs_times_recorder import FSTimesRecorder
+from feature_selection.fs_workers import setup_django_in_worker, run_fs_job_in_worker
+from feature_selection.models import ClusteringAlgorithm, ClusteringScoringMethod
+
+# Number of attempts to notify Multiomix about a finished job. Multiomix stores the job id after the job is
+# submitted, so the first attempts could get a 404 if the job finishes too quickly
+NOTIFICATION_ATTEMPTS: int = 5
+
+# Seconds to wait between notification attempts (multiplied by the attempt number)
+NOTIFICATION_RETRY_DELAY: float = 5.0
+
+# Seconds a finished job is kept in memory if Multiomix could not be notified (notified jobs are removed right away)
+FINISHED_JOBS_TTL: float = 24 * 3600
+
+# Format of the dates sent to FeatureSelectionExperimentAWSNotification
+NOTIFICATION_DATE_FORMAT = '%Y-%m-%d %H:%M:%S+00:00'
+
+# Path of a job in the API
+JOB_PATH_REGEX = re.compile(r'^/job/(?P<job_id>[0-9a-f]+)/?$')
+
+# Entrypoint arguments with a path relative to a shared folder: the datasets (data folder) and the app (results folder)
+DATA_PATH_ARGUMENTS = ['molecules-dataset', 'clinical-dataset']
+RESULTS_PATH_ARGUMENTS = ['app-name']
+
+
+class FSJobState(Enum):
+    """States of a job. Same as the ones sent by the Multiomix AWS EMR integration service."""
+    PENDING = 'PENDING'
+    RUNNING = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+    CANCELLED = 'CANCELLED'
+
+
+def __get_classifier(arguments: Dict[str, str]) -> Tuple[SurvModel, Optional[ClusteringScoringMethod], bool, bool,
+                                                          str]:
+    """
+    Gets the classifier from the 'entrypoint_arguments' of the job. These are the same arguments generated by
+    binary_black_hole_spark().
+    @param arguments: Dict with the name and value of every entrypoint argument.
+    @return: The classifier, the clustering scoring method, two flags to indicate if it's a clustering model and a
+    regression task and the description of the model's parameters for the times records.
+    @raise ExperimentFailed: If the model is not valid.
+    """
+    model = arguments.get('model')
+    random_state = int(arguments['random-state']) if arguments.get('random-state') else None
+
+    if model == 'svm':
+        kernel = arguments.get('svm-kernel', 'linear')
+        optimizer = arguments.get('svm-optimizer', 'avltree')
+        max_iterations = int(arguments.get('svm-max-iterations', 1000))
+        is_regression = arguments.get('svm-is-regression', 'true') == 'true'
+        classifier = get_survival_svm_model(is_svm_regression=is_regression, svm_kernel=kernel,
+                                            svm_optimizer=optimizer, max_iterations=max_iterations,
+                                            random_state=random_state)
+        task = 'regression' if is_regression else 'ranking'
+        parameters = f'{task}_{max_iterations}_max-iterations_optimizer_{optimizer}_kernel_{kernel}'
+        return classifier, None, False, is_regression, parameters
+
+    if model == 'rf':
+        n_estimators = int(arguments['rf-n-estimators'])
+        classifier = get_rf_model(n_estimators=n_estimators, max_depth=None, random_state=random_state)
+        return classifier, None, False, True, f'{n_estimators}_trees'
+
+    if model == 'clustering':
+        n_clusters = int(arguments['number-of-clusters'])
+        algorithm = ClusteringAlgorithm.SPECTRAL if arguments.get('clustering-algorithm') == 'spectral' \
+            else ClusteringAlgorithm.K_MEANS
+        scoring_method = ClusteringScoringMethod.C_INDEX \
+            if arguments.get('clustering-scoring-method') == 'concordance_index' \
+            else ClusteringScoringMethod.LOG_LIKELIHOOD
+        classifier = get_clustering_model(algorithm, number_of_clusters=n_clusters, random_state=random_state)
+
+        # Same descriptions parsed by FeatureSelectionExperimentAWSNotification
+        algorithm_description = 'k-means' if algorithm == ClusteringAlgorithm.K_MEANS else 'spectral'
+        scoring_description = 'concordance-index' if scoring_method == ClusteringScoringMethod.C_INDEX \
+            else 'log-likelihood'
+        parameters = f'{n_clusters}_clusters_{algorithm_description}_algorithm_{scoring_description}_scoring'
+        return classifier, scoring_method, True, False, parameters
+
+    logging.error(f'Invalid model parameter in FS job: {model}')
+    raise ExperimentFailed
+
+
+def get_path_inside_folder(folder: str, relative_path: str) -> str:
+    """
+    Joins a path received in the entrypoint arguments of a job to a shared folder checking that it doesn't point
+    outside it (e.g. absolute paths or '..' components), as the arguments come from the request's body.
+    @param folder: Shared folder.
+    @param relative_path: Path relative to the shared folder.
+    @return: The joined path.
+    @raise ValueError: If the path is not inside the shared folder.
+    """
+    path = os.path.join(folder, relative_path)
+    root = os.path.realpath(folder)
+    real_path = os.path.realpath(path)
+    if real_path == root or os.path.commonpath([root, real_path]) != root:
+        raise ValueError(f'The path "{relative_path}" is not inside the shared folder')
+    return path
+
+
+def run_fs_job(algorithm: int, arguments: Dict[str, str], data_folder: str, results_folder: str,
+               cancel_event: Any):
+    """
+    Runs a FS job storing the results in the same format of the Multiomix AWS EMR integration service: a result.json
+    file with the best features and fitness, a model.pkl file with the best model and a times JSON file with the
+    execution time of every fitness evaluation.
+    @param algorithm: EMRAlgorithms value.
+    @param arguments: Dict with the name and value of every entrypoint argument.
+    @param data_folder: Shared folder with the datasets.
+    @param results_folder: Shared folder where the results are stored.
+    @param cancel_event: Event (shared with the server process) which is set when the job is cancelled.
+    @raise ExperimentStopped: If the job was cancelled.
+    @raise ExperimentFailed: If the job parameters are invalid or no features were selected.
+    @raise ValueError: If a dataset or the app name point outside the shared folders.
+    """
+    app_name = arguments['app-name']
+    app_results_folder = get_path_inside_folder(results_folder, app_name)
+    classifier, clustering_score_method, is_clustering, is_regression, parameters = __get_classifier(arguments)
+
+    molecules_path = get_path_inside_folder(data_folder, arguments['molecules-dataset'])
+    clinical_path = get_path_inside_folder(data_folder, arguments['clinical-dataset'])
+    molecules_df, _clinical_df, clinical_data = format_data(molecules_path, clinical_path, is_regression)
+
+    cross_validation_folds = int(arguments.get('cv-folds', 10))
+    times_recorder = FSTimesRecorder(parameters)
+
+    if algorithm == EMRAlgorithms.BBHA.value:
+        best_features, best_model, best_score = binary_black_hole_sequential(
+            classifier,
+            molecules_df,
+            n_stars=int(arguments['n-stars']),
+            n_iterations=int(arguments['bbha-iterations']),
+            clinical_data=clinical_data,
+            is_clustering=is_clustering,
+            clustering_score_method=clustering_score_method,
+            cross_validation_folds=cross_validation_folds,
+            is_improved_version=False,  # The EMR integration runs the original version
+            is_aborted=cancel_event.is_set,
+            times_recorder=times_recorder
+        )
+    else:
+        best_features, best_model, best_score = blind_search_sequential(
+            classifier,
+            molecules_df,
+            clinical_data,
+            is_clustering=is_clustering,
+            cross_validations_folds=cross_validation_folds,
+            clustering_score_method=clustering_score_method,
+            is_aborted=cancel_event.is_set,
+            times_recorder=times_recorder
+        )
+
+    if not best_features:
+        logging.error(f'No features were selected in the FS job {app_name}')
+        raise ExperimentFailed
+
+    # Stores the results in the shared folder
+    create_folder_with_permissions(app_results_folder)
+
+    with open(os.path.join(app_results_folder, 'result.json'), 'w') as fp:
+        json.dump({'features': ' | '.join(best_features), 'best_metric': float(best_score)}, fp)
+
+    if best_model is not None:
+        with open(os.path.join(app_results_folder, 'model.pkl'), 'wb') as fp:
+            pickle.dump(best_model, fp)
+
+    with open(os.path.join(app_results_folder, 'times.json'), 'w') as fp:
+        json.dump(times_recorder.to_dict(), fp)
+
+
+class FSJob:
+    """A FS job submitted to the job server."""
+    id: str
+    name: str
+    algorithm: int
+    arguments: Dict[str, str]
+    state: FSJobState
+    created_at: float
+    finished_at: Optional[float]
+    cancel_event: Any  # Manager's Event shared with the worker process
+    future: Optional[Future]
+
+    def __init__(self, name: str, algorithm: int, arguments: Dict[str, str], cancel_event: Any):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.algorithm = algorithm
+        self.arguments = arguments
+        self.state = FSJobState.PENDING
+        self.created_at = time.time()
+        self.finished_at = None
+        self.cancel_event = cancel_event
+        self.future = None
+
+    @staticmethod
+    def __get_utc_date(timestamp: float) -> str:
+        """Formats a timestamp in the format expected by FeatureSelectionExperimentAWSNotification."""
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(NOTIFICATION_DATE_FORMAT)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Gets the job's data in the format of the notifications sent to Multiomix."""
+        state = self.state
+        if state == FSJobState.PENDING and self.future is not None and self.future.running():
+            state = FSJobState.RUNNING
+
+        return {
+            'id': self.id,
+            'name': self.name,
+            'state': state.value,
+            'createdAt': self.__get_utc_date(self.created_at),
+            'finishedAt': self.__get_utc_date(self.finished_at) if self.finished_at is not None else None
+        }
+
+
+class FSJobServer:
+    """
+    Runs the FS jobs in a pool of processes implementing the same protocol of the Multiomix AWS EMR integration
+    service: jobs are submitted through the '/job' endpoint, datasets and results are exchanged through the shared
+    folders and Multiomix is notified when the job finishes.
+    """
+    jobs: Dict[str, FSJob]
+    lock: threading.Lock
+    executor: ProcessPoolExecutor
+    manager: Any  # Multiprocessing manager to share the cancellation events with the workers
+    notification_url: str
+    data_folder: str
+    results_folder: str
+
+    def __init__(self, n_workers: int, notification_url: str, data_folder: str, results_folder: str):
+        self.jobs = {}
+        self.lock = threading.Lock()
+        self.notification_url = notification_url
+        self.data_folder = data_folder
+        self.results_folder = results_folder
+
+        # Spawns the workers (instead of forking) as the server is multithreaded
+        context = multiprocessing.get_context('spawn')
+        self.manager = context.Manager()
+        self.executor = ProcessPoolExecutor(max_workers=n_workers, mp_context=context,
+                                            initializer=setup_django_in_worker)
+
+    def submit(self, name: str, algorithm: int, arguments: Dict[str, str]) -> FSJob:
+        """Submits a job to the pool."""
+        job = FSJob(name, algorithm, arguments, self.manager.Event())
+        with self.lock:
+            self.__prune_finished_jobs()
+            self.jobs[job.id] = job
+
+        job.future = self.executor.submit(run_fs_job_in_worker, algorithm, arguments, self.data_folder,
+                                          self.results_folder, job.cancel_event)
+        job.future.add_done_callback(lambda future: self.__on_job_done(job, future))
+        return job
+
+    def get(self, job_id: str) -> Optional[FSJob]:
+        """Gets a job by its id."""
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[FSJob]:
+        """
+        Cancels a job. If it's running, the FS algorithm stops before the next fitness evaluation.
+        @param job_id: Job's id.
+        @return: The job or None if it does not exist.
+        """
+        job = self.get(job_id)
+        if job is not None and job.future is not None and not job.future.done():
+            job.cancel_event.set()
+            job.future.cancel()  # Only works if it's not running yet
+        return job
+
+    def __prune_finished_jobs(self):
+        """Removes the jobs that finished more than FINISHED_JOBS_TTL seconds ago. The lock must be acquired."""
+        expiration = time.time() - FINISHED_JOBS_TTL
+        expired = [job_id for job_id, job in self.jobs.items()
+                   if job.finished_at is not None and job.finished_at <= expiration]
+        for job_id in expired:
+            del self.jobs[job_id]
+
+    def __remove(self, job: FSJob):
+        """Removes a finished job from memory."""
+        with self.lock:
+            self.jobs.pop(job.id, None)
+
+    def __on_job_done(self, job: FSJob, future: Future):
+        """Updates the state of the finished job and notifies Multiomix."""
+        try:
+            future.result()
+            job.state = FSJobState.COMPLETED
+        except (CancelledError, ExperimentStopped):
+            job.state = FSJobState.CANCELLED
+        except Exception as ex:
+            logging.error(f'FS job {job.id} ({job.name}) failed')
+            logging.exception(ex)
+            job.state = FSJobState.FAILED
+        job.finished_at = time.time()
+
+        threading.Thread(target=self.__notify, args=(job,), daemon=True).start()
+
+    def __notify(self, job: FSJob):
+        """
+        Sends the job's final state to Multiomix FeatureSelectionExperimentAWSNotification endpoint. Once it's notified
+        the job is removed from memory. Otherwise, it's kept FINISHED_JOBS_TTL seconds.
+        """
+        url = f'{self.notification_url.rstrip("/")}/{job.id}/'
+        for attempt in range(1, NOTIFICATION_ATTEMPTS + 1):
+            try:
+                response = requests.post(url, json=job.to_dict(), timeout=60)
+                response.raise_for_status()
+                logging.info(f'FS job {job.id} notified with state {job.state.value}')
+                self.__remove(job)
+                return
+            except requests.RequestException as ex:
+                logging.warning(f'Could not notify FS job {job.id} (attempt {attempt}/{NOTIFICATION_ATTEMPTS}): {ex}')
+                time.sleep(NOTIFICATION_RETRY_DELAY * attempt)
+        logging.error(f'FS job {job.id} could not be notified to {url}')
+
+    def shutdown(self):
+        """Cancels the running jobs and stops the pool."""
+        with self.lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            self.cancel(job.id)
+        self.executor.shutdown(wait=True)
+        self.manager.shutdown()
+
+
+class FSJobRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the '/job' API of the Multiomix AWS EMR integration service:
+        - POST /job: submits a job. Body: {name, algorithm, entrypoint_arguments: [{name, value}, ...]}. Responds with
+        the job id and its relative url in the Location header.
+        - GET /job/<id>: gets the job's state.
+        - DELETE /job/<id>: cancels the job.
+    """
+    server: 'FSJobHTTPServer'
+
+    def __send_json(self, status: int, content: Dict[str, Any], location: Optional[str] = None):
+        """Sends a JSON response."""
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if location is not None:
+            self.send_header('Location', location)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __get_job_from_path(self) -> Optional[FSJob]:
+        """Gets the job from the '/job/<id>' path. Sends a 404 response if it does not exist."""
+        match = JOB_PATH_REGEX.match(self.path)
+        job = self.server.job_server.get(match.group('job_id')) if match is not None else None
+        if job is None:
+            self.__send_json(404, {'detail': 'Job not found'})
+        return job
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/job':
+            self.__send_json(404, {'detail': 'Not found'})
+            return
+
+        try:
+            content_length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(content_length))
+            algorithm = int(body.get('algorithm', EMRAlgorithms.BLIND_SEARCH.value))
+            entrypoint_arguments: List[Dict[str, Any]] = body.get('entrypoint_arguments') or []
+            arguments = {str(argument['name']): str(argument['value']) for argument in entrypoint_arguments}
+        except (ValueError, TypeError, KeyError, AttributeError) as ex:
+            self.__send_json(400, {'detail': f'Invalid job: {ex}'})
+            return
+
+        if algorithm not in [emr_algorithm.value for emr_algorithm in EMRAlgorithms]:
+            self.__send_json(400, {'detail': f'Invalid algorithm: {algorithm}'})
+            return
+
+        for required_argument in ['app-name', 'molecules-dataset', 'clinical-dataset', 'model']:
+            if required_argument not in arguments:
+                self.__send_json(400, {'detail': f'Missing entrypoint argument: {required_argument}'})
+                return
+
+        job_server = self.server.job_server
+        path_arguments = [(job_server.data_folder, name) for name in DATA_PATH_ARGUMENTS] + \
+                         [(job_server.results_folder, name) for name in RESULTS_PATH_ARGUMENTS]
+        for folder, path_argument in path_arguments:
+            try:
+                get_path_inside_folder(folder, arguments[path_argument])
+            except ValueError:
+                self.__send_json(400, {'detail': f'Invalid entrypoint argument: {path_argument}'})
+                return
+
+        job = job_server.submit(body.get('name', ''), algorithm, arguments)
+        self.__send_json(201, {'id': job.id}, location=f'/job/{job.id}')
+
+    def do_GET(self):
+        job = self.__get_job_from_path()
+        if job is not None:
+            self.__send_json(200, job.to_dict())
+
+    def do_DELETE(self):
+        job = self.__get_job_from_path()
+        if job is not None:
+            self.server.job_server.cancel(job.id)
+            self.__send_json(200, job.to_dict())
+
+    def log_message(self, format_str: str, *args):
+        logging.info(f'{self.address_string()} - {format_str % args}')
+
+
+class FSJobHTTPServer(ThreadingHTTPServer):
+    """HTTP server with a reference to the FSJobServer."""
+    job_server: FSJobServer
+
+    def __init__(self, server_address: Tuple[str, int], job_server: FSJobServer):
+        super().__init__(server_address, FSJobRequestHandler)
+        self.job_server = job_server
+
+
+def run_fs_job_server(host: str, port: int, n_workers: int):
+    """
+    Runs the FS job server until it's interrupted.
+    @param host: Host to listen.
+    @param port: Port to listen.
+    @param n_workers: Number of processes to run the jobs.
+    """
+    emr_settings = settings.AWS_EMR_SETTINGS
+    job_server = FSJobServer(n_workers, settings.FS_JOB_SERVER_NOTIFICATION_URL,
+                             data_folder=emr_settings['shared_folder_data'],
+                             results_folder=emr_settings['shared_folder_results'])
+    http_server = FSJobHTTPServer((host, port), job_server)
+    logging.warning(f'FS job server listening on {host}:{port} with {n_workers} workers')
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        job_server.shutdown()
@@ -1,6 +1,10 @@
-from typing import Literal, Union, Optional
+from typing import Literal, Union, Optional, Dict, Tuple
+import numpy as np
 from django.conf import settings
-from sklearn.cluster import KMeans, SpectralClustering
+from sklearn.base import BaseEstimator, ClusterMixin
+from sklearn.cluster import KMeans, SpectralClustering, MiniBatchKMeans
+from sklearn.metrics.pairwise import rbf_kernel
+from sklearn.utils import check_random_state
 from sksurv.ensemble import RandomSurvivalForest
 from sksurv.svm import FastKernelSurvivalSVM
 from .models import ClusteringAlgorithm
@@ -11,22 +15,134 @@ SVMKernelOptions = Literal["linear", "poly", "rbf", "sigmoid", "cosine", "precom
 # Available options for the SVM optimizer
 SVMOptimizerOptions = Literal["avltree", "rbtree"]
 
+# Samples used as the basis of the Nyström approximation by number of samples, number of components and seed.
+# This way every fitness evaluation of a FS experiment uses the same basis
+__nystroem_basis_cache: Dict[Tuple[int, int, int], np.ndarray] = {}
+
+# Maximum number of bases kept in the cache (the oldest one is removed), as a worker process runs many experiments
+NYSTROEM_BASIS_CACHE_SIZE = 32
+
+
+def get_nystroem_basis(n_samples: int, n_components: int, seed: Optional[int]) -> np.ndarray:
+    """
+    Gets the indexes of the samples used as the basis of the Nyström approximation of the affinity matrix. They're
+    always cached, so all the fitness evaluations of an experiment use the same basis and their scores are comparable.
+    @param n_samples: Number of samples in the dataset.
+    @param n_components: Number of samples of the basis.
+    @param seed: Seed to draw the basis (the model's random state or the experiment's basis seed). None to derive it
+    from the number of samples.
+    @return: Sorted indexes of the basis samples.
+    """
+    if seed is None:
+        seed = n_samples
+
+    cache_key = (n_samples, n_components, seed)
+    if cache_key in __nystroem_basis_cache:
+        return __nystroem_basis_cache[cache_key]
+
+    basis = np.sort(check_random_state(seed).choice(n_samples, size=n_components, replace=False))
+    if len(__nystroem_basis_cache) >= NYSTROEM_BASIS_CACHE_SIZE:
+        del __nystroem_basis_cache[next(iter(__nystroem_basis_cache))]
+    __nystroem_basis_cache[cache_key] = basis
+    return basis
+
+
+class NystroemSpectralClustering(ClusterMixin, BaseEstimator):
+    """
+    Spectral clustering with the RBF affinity matrix approximated by the Nyström method. Instead of the dense
+    (n_samples x n_samples) affinity of SpectralClustering, only the affinities between all the samples and
+    n_components basis samples are computed, so fitting is linear in the number of samples. Unlike SpectralClustering,
+    it can assign clusters to new samples (Nyström extension of the spectral embedding). The basis is drawn with the
+    random state or, if it's not set, with basis_seed, so every fit of an experiment uses the same basis.
+    """
+
+    def __init__(self, n_clusters: int = 8, n_components: int = 300, gamma: float = 1.0,
+                 random_state: Optional[int] = None, basis_seed: Optional[int] = None):
+        self.n_clusters = n_clusters
+        self.n_components = n_components
+        self.gamma = gamma
+        self.random_state = random_state
+        self.basis_seed = basis_seed
+
+    def __get_embedding(self, x: np.ndarray) -> np.ndarray:
+        """Gets the (row-normalized) spectral embedding of some samples using the fitted basis."""
+        features = rbf_kernel(x, self.basis_samples_, gamma=self.gamma) @ self.normalization_
+        degrees = np.maximum(features @ self.features_sum_, np.finfo(float).eps)
+        embedding = (features / np.sqrt(degrees)[:, np.newaxis]) @ self.projection_
+        norms = np.linalg.norm(embedding, axis=1, keepdims=True)
+        return embedding / np.maximum(norms, np.finfo(float).eps)
+
+    def fit(self, x, y=None):
+        """
+        Computes the spectral embedding of the normalized (approximated) affinity matrix and clusters it with KMeans.
+        @param x: Matrix of shape (n_samples, n_features).
+        @param y: Ignored.
+        @return: self.
+        """
+        x = self._validate_data(x)
+        n_samples = x.shape[0]
+        n_components = min(self.n_components, n_samples)
+
+        # Affinities with the basis samples mapped to a feature space where their dot product approximates the affinity
+        # matrix: K ~ features @ features.T with features = K_nm @ K_mm^(-1/2)
+        seed = self.random_state if self.random_state is not None else self.basis_seed
+        self.basis_samples_ = x[get_nystroem_basis(n_samples, n_components, seed)]
+        basis_affinity = rbf_kernel(self.basis_samples_, gamma=self.gamma)
+        eigenvalues, eigenvectors = np.linalg.eigh(basis_affinity)
+        eigenvalues = np.maximum(eigenvalues, 1e-12)
+        self.normalization_ = (eigenvectors / np.sqrt(eigenvalues)) @ eigenvectors.T
+        features = rbf_kernel(x, self.basis_samples_, gamma=self.gamma) @ self.normalization_
+
+        # Top eigenvectors of D^(-1/2) K D^(-1/2) from the SVD of D^(-1/2) features (degrees: D = K @ 1)
+        self.features_sum_ = features.sum(axis=0)
+        degrees = np.maximum(features @ self.features_sum_, np.finfo(float).eps)
+        _, singular_values, v_t = np.linalg.svd(features / np.sqrt(degrees)[:, np.newaxis], full_matrices=False)
+        n_eigenvectors = min(self.n_clusters, singular_values.shape[0])
+        self.projection_ = v_t[:n_eigenvectors].T / np.maximum(singular_values[:n_eigenvectors],
+                                                               np.finfo(float).eps)
+
+        self.kmeans_ = KMeans(n_clusters=self.n_clusters, random_state=self.random_state, n_init='auto')
+        self.kmeans_.fit(self.__get_embedding(x))
+        self.labels_ = self.kmeans_.labels_
+        return self
+
+    def predict(self, x) -> np.ndarray:
+        """
+        Assigns every sample to a cluster.
+        @param x: Matrix of shape (n_samples, n_features).
+        @return: Cluster of every sample.
+        """
+        x = self._validate_data(x, reset=False)
+        return self.kmeans_.predict(self.__get_embedding(x))
+
+
 # Available models for clustering
-ClusteringModels = Union[KMeans, SpectralClustering]
+ClusteringModels = Union[KMeans, SpectralClustering, MiniBatchKMeans, NystroemSpectralClustering]
 
 
 def get_clustering_model(clustering_algorithm: ClusteringAlgorithm,
-                         number_of_clusters: int, random_state: Optional[float]) -> ClusteringModels:
+                         number_of_clusters: int, random_state: Optional[float],
+                         scalable: bool = False, basis_seed: Optional[int] = None) -> ClusteringModels:
     """
     Generates a clustering model with some specific parameters.
     @param clustering_algorithm: ClusteringAlgorithm enum value.
     @param number_of_clusters: Number of clusters to generate.
     @param random_state: Random state to use.
+    @param scalable: If True, MiniBatchKMeans or a Nyström-approximated spectral clustering is returned to be used
+    with a large number of samples.
+    @param basis_seed: Seed of the Nyström basis if random_state is None (e.g. the TrainedModel's pk), so every
+    fitness evaluation of the experiment uses the same basis.
     @return: a clustering model instance.
     """
     if clustering_algorithm == ClusteringAlgorithm.K_MEANS:
+        if scalable:
+            return MiniBatchKMeans(n_clusters=number_of_clusters, random_state=random_state, n_init='auto')
         return KMeans(n_clusters=number_of_clusters, random_state=random_state, n_init='auto')
     elif clustering_algorithm == ClusteringAlgorithm.SPECTRAL:
+        if scalable:
+            return NystroemSpectralClustering(n_clusters=number_of_clusters,
+                                              n_components=settings.CLUSTERING_NYSTROEM_N_COMPONENTS,
+                                              random_state=random_state, basis_seed=basis_seed)
         return SpectralClustering(n_clusters=number_of_clusters, random_state=random_state)
 
     raise Exception(f'Invalid clustering_algorithm parameter: {clustering_algorithm}')
@@ -0,0 +1,42 @@
+from typing import List, Optional
+import numpy as np
+
+
+class CVRacing:
+    """
+    Racing evaluation for the CrossValidation of the FS algorithms: the folds of a candidate subset of features are
+    evaluated incrementally and the candidate is abandoned as soon as an upper confidence bound of its mean score
+    falls below the incumbent (i.e. the best mean score found so far by the algorithm). It also counts the number of
+    fits saved during the experiment.
+    NOTE: this module must not import any Django model, so instances can be sent to the pool's worker processes.
+    """
+    min_folds: int  # Minimum number of folds to evaluate before abandoning a candidate
+    z_value: float  # Number of standard errors of the confidence bound
+    fits_saved: int  # Number of folds that were not fitted thanks to abandoned candidates
+
+    def __init__(self, min_folds: int, z_value: float):
+        self.min_folds = max(min_folds, 2)  # At least 2 folds are needed to compute the standard error
+        self.z_value = z_value
+        self.fits_saved = 0
+
+    def must_abandon(self, scores: List[float], incumbent_score: Optional[float], more_is_better: bool) -> bool:
+        """
+        Checks if a candidate can be abandoned as it's unlikely to beat the incumbent.
+        @param scores: Scores obtained in the folds evaluated so far.
+        @param incumbent_score: Best mean score found so far. None if there's no incumbent yet.
+        @param more_is_better: If True, higher scores are better.
+        @return: True if the confidence bound of the mean score of the candidate is worse than the incumbent.
+        """
+        n_folds = len(scores)
+        if incumbent_score is None or not np.isfinite(incumbent_score) or n_folds < self.min_folds:
+            return False
+
+        mean_score = np.mean(scores)
+        margin = self.z_value * np.std(scores, ddof=1) / np.sqrt(n_folds)
+        if more_is_better:
+            return mean_score + margin < incumbent_score
+        return mean_score - margin > incumbent_score
+
+    def add_saved_fits(self, n_fits: int):
+        """Adds the number of fits that were not computed due to an abandoned candidate."""
+        self.fits_saved += n_fits
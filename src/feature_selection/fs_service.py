@@ -1,19 +1,34 @@
-from typing import Dict, Tuple, Any
+import hashlib
+import json
+import os
+import random
+import time
+from typing import Dict, Tuple, Any, Optional
 import numpy as np
+import pandas as pd
 from django.conf import settings
+from statsmodels.stats.multitest import multipletests
 from biomarkers.models import BiomarkerState, TrainedModelState
 from common.datasets_utils import get_common_samples, generate_molecules_file, format_data, generate_clinical_file, \
-    check_sample_classes
+    check_sample_classes, create_folder_with_permissions
 from common.exceptions import ExperimentStopped
 from common.functions import check_if_stopped
 from common.typing import AbortEvent
 from common.utils import limit_between_min_max
+from statistical_properties.survival_scoring import cox_score_test
 from .fs_algorithms import blind_search_sequential, binary_black_hole_sequential, select_top_cox_regression, \
-    genetic_algorithms_sequential
+    genetic_algorithms_sequential, blind_search_parallel, genetic_algorithms_parallel
 from .fs_algorithms_spark import binary_black_hole_spark
+from .fs_checkpoint import FSCheckpoint
+from .fs_cost_model import estimate_fs_execution_times
+from .fs_fold_plan import CVFoldPlan
+from .fs_racing import CVRacing
+from .fs_warm_start import CVWarmStart
 from .models import FSExperiment, FitnessFunction, FeatureSelectionAlgorithm, TrainedModel, \
-    BBHAParameters, CoxRegressionParameters, GeneticAlgorithmsParameters, BBHAVersion
-from .utils import save_model_dump_and_best_score, create_models_parameters_and_classifier, save_molecule_identifiers
+    BBHAParameters, CoxRegressionParameters, GeneticAlgorithmsParameters, BBHAVersion, ScreeningParameters, \
+    ScreenedOutMolecule
+from .utils import save_model_dump_and_best_score, create_models_parameters_and_classifier, save_molecule_identifiers, \
+    get_clustering_model_for_samples
 
 # Common event values
 COMMON_INTEREST_VALUES = ['DEAD', 'DECEASE', 'DEATH']
@@ -38,22 +53,141 @@ def __generate_df_molecules_and_clinical(experiment: FSExperiment,
     return molecules_temp_file_path, clinical_temp_file_path
 
 
-def __should_run_in_spark(n_agents: int, n_iterations: int) -> bool:
+def __should_run_in_spark(n_agents: int, n_iterations: int, fit_fun_enum: FitnessFunction,
+                          fitness_function_parameters: Dict[str, Any], molecules_df: pd.DataFrame) -> bool:
     """
-    Return True if the number of combinations to be executed is greater than or equal to the
-    threshold (MIN_COMBINATIONS_SPARK parameter).
+    Return True if the estimated execution time in Spark is lower than the local one. The times are estimated with
+    the cost models fitted on the TimesRecord instances of previous Spark jobs. If there are not enough records, returns
+    True if the number of combinations to be executed is greater than or equal to the threshold
+    (MIN_COMBINATIONS_SPARK parameter).
     @param n_agents: Number of agents in the metaheuristic.
     @param n_iterations: Number of iterations in the metaheuristic.
-    @return: True if the number of combinations to be executed is greater than or equal to the threshold.
+    @param fit_fun_enum: Selected fitness function to compute.
+    @param fitness_function_parameters: Parameters of the fitness function to compute.
+    @param molecules_df: DataFrame with the molecules (rows) and samples (columns) of the experiment.
+    @return: True if the experiment should run in Spark.
     """
+    n_features, n_samples = molecules_df.shape
+    estimation = estimate_fs_execution_times(fit_fun_enum, fitness_function_parameters, n_features, n_samples,
+                                             n_agents, n_iterations)
+    if estimation is not None:
+        local_time, remote_time = estimation
+        return remote_time < local_time
+
     return n_agents * n_iterations >= settings.MIN_COMBINATIONS_SPARK
 
 
+def __screen_molecules(experiment: FSExperiment, molecules_df: pd.DataFrame,
+                       clinical_data: np.ndarray) -> pd.DataFrame:
+    """
+    Univariate survival pre-screening of the molecules: computes the Cox score (log-rank) test of every molecule at
+    once and keeps the molecules that pass both enabled filters: being among the FS_SCREENING_TOP_K molecules with the
+    lowest p-values and having a Benjamini-Hochberg q-value <= FS_SCREENING_MAX_Q_VALUE. At least
+    MIN_FEATURES_METAHEURISTICS molecules (the ones with the lowest p-values) are always kept. The discarded molecules
+    are stored as ScreenedOutMolecule instances.
+    @param experiment: FSExperiment instance.
+    @param molecules_df: DataFrame with all the molecules' data (molecules as rows).
+    @param clinical_data: Numpy structured array with the time and event columns.
+    @return: DataFrame with the kept molecules. The same DataFrame if the screening is disabled.
+    """
+    top_k = settings.FS_SCREENING_TOP_K
+    max_q_value = settings.FS_SCREENING_MAX_Q_VALUE
+    if top_k <= 0 and max_q_value <= 0:
+        return molecules_df
+
+    statistics, p_values = cox_score_test(clinical_data['time'], clinical_data['event'],
+                                          molecules_df.to_numpy(dtype=float).transpose())
+    q_values = multipletests(p_values, method='fdr_bh')[1]
+
+    # Molecules sorted from the most to the least associated with the survival
+    order = np.argsort(p_values, kind='stable')
+    keep = np.ones(molecules_df.shape[0], dtype=bool)
+    if top_k > 0:
+        keep[order[top_k:]] = False
+    if max_q_value > 0:
+        keep &= q_values <= max_q_value
+    keep[order[:settings.MIN_FEATURES_METAHEURISTICS]] = True
+
+    # Stores the screening results. Previous ones are replaced in case the task is retried
+    ScreeningParameters.objects.update_or_create(
+        fs_experiment=experiment,
+        defaults={
+            'top_k': top_k if top_k > 0 else None,
+            'max_q_value': max_q_value if max_q_value > 0 else None,
+            'n_molecules_before': molecules_df.shape[0],
+            'n_molecules_after': int(keep.sum())
+        }
+    )
+    experiment.screened_out_molecules.all().delete()
+
+    screened_out_molecules = []
+    for idx in np.flatnonzero(~keep):
+        molecule_name, file_type = molecules_df.index[idx].rsplit('_', maxsplit=1)
+        screened_out_molecules.append(ScreenedOutMolecule(
+            identifier=molecule_name,
+            type=int(file_type),
+            statistic=statistics[idx],
+            p_value=p_values[idx],
+            q_value=q_values[idx],
+            fs_experiment=experiment
+        ))
+    ScreenedOutMolecule.objects.bulk_create(screened_out_molecules)
+
+    return molecules_df.loc[keep]
+
+
+def __get_checkpoint_file_path(experiment: FSExperiment) -> str:
+    """Gets the path of the checkpoint file of an FSExperiment in the media volume."""
+    return os.path.join(settings.MEDIA_ROOT, settings.FS_CHECKPOINTS_FOLDER, f'fs_experiment_{experiment.pk}.pkl')
+
+
+def __get_checkpoint(experiment: FSExperiment, molecules_df: pd.DataFrame, fit_fun_enum: FitnessFunction,
+                     fitness_function_parameters: Dict[str, Any], algorithm_parameters: Dict[str, Any],
+                     cross_validation_folds: int) -> Optional[FSCheckpoint]:
+    """
+    Gets an FSCheckpoint instance for the experiment. Its signature is a hash of all the inputs of the experiment, so
+    a checkpoint is only restored if the experiment is retried with the same data and parameters.
+    @return: The FSCheckpoint instance or None if checkpoints are disabled.
+    """
+    if settings.FS_CHECKPOINT_INTERVAL <= 0:
+        return None
+
+    create_folder_with_permissions(os.path.join(settings.MEDIA_ROOT, settings.FS_CHECKPOINTS_FOLDER))
+
+    signature_data = {
+        'algorithm': experiment.algorithm,
+        'fitness_function': fit_fun_enum,
+        'fitness_function_parameters': fitness_function_parameters,
+        'algorithm_parameters': algorithm_parameters,
+        'cross_validation_folds': cross_validation_folds,
+        'molecules': molecules_df.index.tolist(),
+        'samples': molecules_df.columns.tolist(),
+        'ga_islands': [settings.GA_N_ISLANDS, settings.GA_MIGRATION_INTERVAL, settings.GA_N_MIGRANTS]
+    }
+    signature = hashlib.sha256(json.dumps(signature_data, sort_keys=True, default=str).encode()).hexdigest()
+
+    return FSCheckpoint(__get_checkpoint_file_path(experiment), signature, settings.FS_CHECKPOINT_INTERVAL)
+
+
+def remove_fs_checkpoint(experiment: FSExperiment):
+    """Removes the checkpoint file of an FSExperiment (if exists) once it doesn't need to be resumed."""
+    FSCheckpoint(__get_checkpoint_file_path(experiment), signature='', interval=0).remove()
+
+
+def __get_cv_random_state(experiment: FSExperiment) -> int:
+    """
+    Gets the seed of the CV folds of an experiment. It's derived from the experiment's id, so a retried experiment
+    (e.g. resumed from a checkpoint) uses the same folds.
+    """
+    return random.Random(experiment.pk).randrange(2 ** 31)
+
+
 def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path: str,
                             clinical_temp_file_path: str, fit_fun_enum: FitnessFunction,
                             fitness_function_parameters: Dict[str, Any],
                             algorithm_parameters: Dict[str, Any],
-                            cross_validation_parameters: Dict[str, Any], is_aborted: AbortEvent) -> bool:
+                            cross_validation_parameters: Dict[str, Any], is_aborted: AbortEvent,
+                            deadline: float) -> bool:
     """
     Computes the Feature Selection experiment using the params defined by the user.
     @param experiment: FSExperiment instance.
@@ -64,6 +198,8 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
     @param algorithm_parameters: Parameters of the FS algorithm (Blind Search, BBHA, PSO, etc.) to compute.
     @param cross_validation_parameters: Parameters of the CrossValidation process.
     @param is_aborted: Method to call to check if the experiment has been stopped.
+    @param deadline: Timestamp (as returned by time.time()) from which the FS algorithms stop and return the best
+    result found so far.
     @return A flag to indicate whether the experiment is running in spark
     """
     # Creates TrainedModel instance
@@ -76,6 +212,7 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
         fitness_function=fit_fun_enum,
         state=BiomarkerState.IN_PROCESS,
         cross_validation_folds=cross_validation_folds,
+        cv_random_state=__get_cv_random_state(experiment),
         fs_experiment=experiment
     )
 
@@ -88,18 +225,64 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
     check_if_stopped(is_aborted, ExperimentStopped)
     molecules_df, clinical_df, clinical_data = format_data(molecules_temp_file_path, clinical_temp_file_path,
                                                            is_regression)
+    classifier = get_clustering_model_for_samples(trained_model, classifier, n_samples=molecules_df.shape[1])
 
     # Checks if there are fewer samples than splits in the CV to prevent ValueError
     check_if_stopped(is_aborted, ExperimentStopped)
     check_sample_classes(trained_model, clinical_data, cross_validation_folds)
 
-    # Gets FS algorithm
-    # TODO: send is_aborted to all the algorithms!
+    # Univariate pre-screening to reduce the search space of the metaheuristics
+    if experiment.algorithm in [FeatureSelectionAlgorithm.BBHA, FeatureSelectionAlgorithm.GA]:
+        check_if_stopped(is_aborted, ExperimentStopped)
+        molecules_df = __screen_molecules(experiment, molecules_df, clinical_data)
+
+    # Checkpoints to resume the metaheuristics if the worker is lost
+    checkpoint = __get_checkpoint(experiment, molecules_df, fit_fun_enum, fitness_function_parameters,
+                                  algorithm_parameters, cross_validation_folds)
+
+    # Racing evaluation of the CV folds to abandon the candidates that can't beat the best one
+    racing = CVRacing(settings.FS_CV_RACING_MIN_FOLDS, settings.FS_CV_RACING_Z) \
+        if settings.FS_CV_RACING_ENABLED else None
+
+    # The same CV folds are used in all the evaluations of the FS algorithms, so their scores are comparable
+    fold_plan = CVFoldPlan(clinical_data, trained_model.cross_validation_folds, trained_model.cv_random_state)
+
+    # Warm-started SVM fits in the CV of the metaheuristics
+    warm_start = CVWarmStart(settings.FS_WARM_START_CALIBRATION_PERIOD) if settings.FS_WARM_START_ENABLED else None
+
+    # Gets FS algorithm. All the algorithms check the is_aborted event between evaluations
     if experiment.algorithm == FeatureSelectionAlgorithm.BLIND_SEARCH:
         check_if_stopped(is_aborted, ExperimentStopped)
-        best_features, best_model, best_score = blind_search_sequential(classifier, molecules_df, clinical_data,
-                                                                        is_clustering, clustering_scoring_method,
-                                                                        trained_model.cross_validation_folds)
+        blind_search_deadline = min(deadline, time.time() + settings.BLIND_SEARCH_TIME_LIMIT)
+        if settings.N_JOBS_BLIND_SEARCH != 1:
+            best_features, best_model, best_score = blind_search_parallel(
+                classifier,
+                molecules_df,
+                clinical_data,
+                is_clustering=is_clustering,
+                cross_validations_folds=trained_model.cross_validation_folds,
+                clustering_score_method=clustering_scoring_method,
+                n_jobs=settings.N_JOBS_BLIND_SEARCH,
+                deadline=blind_search_deadline,
+                max_evaluations=settings.BLIND_SEARCH_MAX_EVALUATIONS,
+                racing=racing,
+                is_aborted=is_aborted,
+                fold_plan=fold_plan
+            )
+        else:
+            best_features, best_model, best_score = blind_search_sequential(
+                classifier,
+                molecules_df,
+                clinical_data,
+                is_clustering=is_clustering,
+                cross_validations_folds=trained_model.cross_validation_folds,
+                clustering_score_method=clustering_scoring_method,
+                deadline=blind_search_deadline,
+                max_evaluations=settings.BLIND_SEARCH_MAX_EVALUATIONS,
+                racing=racing,
+                is_aborted=is_aborted,
+                fold_plan=fold_plan
+            )
     elif experiment.algorithm == FeatureSelectionAlgorithm.BBHA:
         check_if_stopped(is_aborted, ExperimentStopped)
 
@@ -120,7 +303,9 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
         )
 
         if settings.ENABLE_AWS_EMR_INTEGRATION and use_spark and \
-                __should_run_in_spark(n_agents=n_stars, n_iterations=ga_iterations):
+                __should_run_in_spark(n_agents=n_stars, n_iterations=ga_iterations, fit_fun_enum=fit_fun_enum,
+                                      fitness_function_parameters=fitness_function_parameters,
+                                      molecules_df=molecules_df):
             check_if_stopped(is_aborted, ExperimentStopped)
 
             app_name = f'BBHA_{experiment.pk}'
@@ -156,7 +341,13 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
                 coeff_1=coeff_1,
                 coeff_2=coeff_2,
                 clustering_score_method=clustering_scoring_method,
-                cross_validation_folds=trained_model.cross_validation_folds
+                cross_validation_folds=trained_model.cross_validation_folds,
+                racing=racing,
+                checkpoint=checkpoint,
+                is_aborted=is_aborted,
+                deadline=deadline,
+                warm_start=warm_start,
+                fold_plan=fold_plan
             )
     elif experiment.algorithm == FeatureSelectionAlgorithm.COX_REGRESSION:
         check_if_stopped(is_aborted, ExperimentStopped)
@@ -178,7 +369,9 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
             molecules_df,
             clinical_data,
             filter_zero_coeff=True,  # Keeps only != 0 coefficient
-            top_n=top_n
+            top_n=top_n,
+            is_aborted=is_aborted,
+            deadline=deadline
         )
     elif experiment.algorithm == FeatureSelectionAlgorithm.GA:
         # Genetic Algorithms metaheuristic
@@ -195,17 +388,45 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
             mutation_rate=mutation_rate,
         )
 
-        best_features, best_model, best_score = genetic_algorithms_sequential(
-            classifier,
-            molecules_df,
-            population_size=population_size,
-            mutation_rate=mutation_rate,
-            n_iterations=ga_iterations,
-            clinical_data=clinical_data,
-            is_clustering=is_clustering,
-            clustering_score_method=clustering_scoring_method,
-            cross_validation_folds=trained_model.cross_validation_folds
-        )
+        if settings.GA_N_ISLANDS > 1:
+            best_features, best_model, best_score = genetic_algorithms_parallel(
+                classifier,
+                molecules_df,
+                population_size=population_size,
+                mutation_rate=mutation_rate,
+                n_iterations=ga_iterations,
+                clinical_data=clinical_data,
+                is_clustering=is_clustering,
+                clustering_score_method=clustering_scoring_method,
+                cross_validation_folds=trained_model.cross_validation_folds,
+                n_islands=settings.GA_N_ISLANDS,
+                migration_interval=settings.GA_MIGRATION_INTERVAL,
+                n_migrants=settings.GA_N_MIGRANTS,
+                racing=racing,
+                checkpoint=checkpoint,
+                is_aborted=is_aborted,
+                deadline=deadline,
+                warm_start=warm_start,
+                fold_plan=fold_plan
+            )
+        else:
+            best_features, best_model, best_score = genetic_algorithms_sequential(
+                classifier,
+                molecules_df,
+                population_size=population_size,
+                mutation_rate=mutation_rate,
+                n_iterations=ga_iterations,
+                clinical_data=clinical_data,
+                is_clustering=is_clustering,
+                clustering_score_method=clustering_scoring_method,
+                cross_validation_folds=trained_model.cross_validation_folds,
+                racing=racing,
+                checkpoint=checkpoint,
+                is_aborted=is_aborted,
+                deadline=deadline,
+                warm_start=warm_start,
+                fold_plan=fold_plan
+            )
     else:
 
         # TODO: implement PSO
@@ -226,6 +447,16 @@ def __compute_fs_experiment(experiment: FSExperiment, molecules_temp_file_path:
 
     trained_model.save(update_fields=['state'])
 
+    # Stores the number of CV fits saved by racing
+    if racing is not None:
+        experiment.cv_fits_saved = racing.fits_saved
+        experiment.save(update_fields=['cv_fits_saved'])
+
+    # Stores the number of optimizer iterations saved by the warm-started fits
+    if warm_start is not None:
+        experiment.warm_start_iterations_saved = warm_start.iterations_saved
+        experiment.save(update_fields=['warm_start_iterations_saved'])
+
     return False  # It is not running in spark
 
 
@@ -244,6 +475,10 @@ def prepare_and_compute_fs_experiment(experiment: FSExperiment, fit_fun_enum: Fi
     @param is_aborted: Method to call to check if the experiment has been stopped.
     @return Both molecules and clinical files paths.
     """
+    # The algorithms return the best result found so far when the deadline is reached to prevent the Celery's
+    # SoftTimeLimitExceeded exception
+    deadline = time.time() + settings.FS_ALGORITHMS_TIME_LIMIT
+
     # Get samples in common
     check_if_stopped(is_aborted, ExperimentStopped)
     samples_in_common = get_common_samples(experiment)
@@ -258,6 +493,7 @@ def prepare_and_compute_fs_experiment(experiment: FSExperiment, fit_fun_enum: Fi
     check_if_stopped(is_aborted, ExperimentStopped)
     running_in_spark = __compute_fs_experiment(experiment, molecules_temp_file_path, clinical_temp_file_path,
                                                fit_fun_enum, fitness_function_parameters,
-                                               algorithm_parameters, cross_validation_parameters, is_aborted)
+                                               algorithm_parameters, cross_validation_parameters, is_aborted,
+                                               deadline)
 
     return molecules_temp_file_path, clinical_temp_file_path, running_in_spark
@@ -0,0 +1,76 @@
+import time
+from typing import List, Optional, Dict, Any
+
+
+class FSTimesRecorder:
+    """
+    Records the execution time of every fitness evaluation of a FS algorithm in the same format of the times JSON files
+    generated by the Multiomix AWS EMR integration jobs, so they can be stored as SVMTimesRecord, RFTimesRecord or
+    ClusteringTimesRecord instances by FeatureSelectionExperimentAWSNotification.
+    NOTE: this module must not import any Django model, so instances can be sent to the pool's worker processes.
+    """
+    parameters: str  # Description of the model's parameters in the format expected by the notification endpoint
+    number_of_features: List[int]
+    number_of_samples: List[int]
+    execution_times: List[float]
+    fitness: List[Optional[float]]
+    times_by_iteration: List[float]
+    test_times: List[float]
+    train_scores: List[Optional[float]]
+    number_of_iterations: List[int]
+
+    def __init__(self, parameters: str):
+        self.parameters = parameters
+        self.number_of_features = []
+        self.number_of_samples = []
+        self.execution_times = []
+        self.fitness = []
+        self.times_by_iteration = []
+        self.test_times = []
+        self.train_scores = []
+        self.number_of_iterations = []
+
+    @staticmethod
+    def start() -> float:
+        """Gets the timestamp to pass to record() once the fitness evaluation finishes."""
+        return time.perf_counter()
+
+    def record(self, start: float, n_features: int, n_samples: int, fitness: Optional[float], model: Any):
+        """
+        Records a fitness evaluation.
+        @param start: Timestamp returned by start() before the evaluation.
+        @param n_features: Number of features of the evaluated subset.
+        @param n_samples: Number of samples.
+        @param fitness: Fitness value obtained.
+        @param model: Best model of the evaluation (used to get the number of iterations of the SVM). None if it's not
+        available.
+        """
+        execution_time = time.perf_counter() - start
+        n_iterations = int(getattr(model, 'n_iter_', 0) or 0)
+
+        self.number_of_features.append(n_features)
+        self.number_of_samples.append(n_samples)
+        self.execution_times.append(execution_time)
+        self.fitness.append(fitness)
+        self.times_by_iteration.append(execution_time / n_iterations if n_iterations > 0 else 0.0)
+        # Testing time is not measured apart from the execution time of the CV
+        self.test_times.append(0.0)
+        self.train_scores.append(None)
+        self.number_of_iterations.append(n_iterations)
+
+    def __len__(self) -> int:
+        return len(self.execution_times)
+
+    def to_dict(self) -> Dict[str, List]:
+        """Gets the records as a dict of lists with the keys of the times JSON files of the EMR integration."""
+        return {
+            'number_of_features': self.number_of_features,
+            'number_of_samples': self.number_of_samples,
+            'execution_times': self.execution_times,
+            'fitness': self.fitness,
+            'times_by_iteration': self.times_by_iteration,
+            'test_times': self.test_times,
+            'train_scores': self.train_scores,
+            'number_of_iterations': self.number_of_iterations,
+            'parameters': [self.parameters] * len(self)
+        }
@@ -0,0 +1,211 @@
+import inspect
+import logging
+from collections import OrderedDict
+from typing import Optional, Iterable, Hashable, FrozenSet, Any
+import numpy as np
+from sksurv.svm import FastKernelSurvivalSVM
+
+# Maximum number of fitted models' coefficients kept to seed the next fits
+WARM_START_MAX_SEEDS: int = 16
+
+
+def __supports_seeded_fit() -> bool:
+    """
+    Checks that the installed scikit-survival has the FastKernelSurvivalSVM and optimizer internals overridden by
+    CVWarmStart to start the optimization from some coefficients (checked with scikit-survival 0.22).
+    @return: True if the seeded fits can be used. False to fit every model from zero.
+    """
+    try:
+        from sksurv.svm.survival_svm import RankSVMOptimizer
+    except ImportError:
+        return False
+
+    expected_parameters = {
+        FastKernelSurvivalSVM: {'_fit': ['self', 'X', 'time', 'event', 'samples_order'],
+                                '_create_optimizer': ['self', 'kernel_mat', 'y', 'status']},
+        RankSVMOptimizer: {'_init_coefficients': ['self'], '_update_constraints': ['self', 'w']}
+    }
+    for cls, methods in expected_parameters.items():
+        for method_name, parameters in methods.items():
+            method = getattr(cls, method_name, None)
+            if method is None or list(inspect.signature(method).parameters) != parameters:
+                logging.warning(f'{cls.__name__}.{method_name} has changed in the installed scikit-survival. '
+                                f'FastKernelSurvivalSVM fits will not be warm-started')
+                return False
+    return True
+
+
+# If False, the installed scikit-survival is not compatible with the seeded fits and every model is fitted from zero
+SEEDED_FIT_SUPPORTED: bool = __supports_seeded_fit()
+
+
+class CVWarmStart:
+    """
+    Warm-started fits for the CrossValidation of the FS metaheuristics. Consecutive evaluations of BBHA/GA differ in a
+    few features and the CV folds share most of the samples, so the optimization of every FastKernelSurvivalSVM starts
+    from the coefficients (one per training sample) of the nearest previously fitted model (i.e. the one whose subset
+    of features has the fewest different features) instead of from zero. Other models are fitted as usual:
+    RandomSurvivalForest's warm_start only adds trees to an already fitted forest, which is not valid with a
+    different subset of features or different training samples.
+    Every calibration_period-th fit is computed from zero to estimate the number of optimizer iterations saved.
+    NOTE: this module must not import any Django model, so instances can be sent to the pool's worker processes.
+    """
+    calibration_period: int  # Every calibration_period-th seeded fit is computed from zero. 0 to never do it
+    warm_fits: int  # Number of fits started from the coefficients of a previous model
+    warm_iterations: int  # Number of optimizer iterations of the warm-started fits
+    cold_fits: int  # Number of fits started from zero
+    cold_iterations: int  # Number of optimizer iterations of the fits started from zero
+
+    def __init__(self, calibration_period: int):
+        self.calibration_period = calibration_period
+        self.warm_fits = 0
+        self.warm_iterations = 0
+        self.cold_fits = 0
+        self.cold_iterations = 0
+        self.__n_seeded = 0  # Number of fits which had a model to start from (including the calibration ones)
+
+        # Coefficients of the last fitted models (one per sample of the whole dataset, 0 for the samples that were not
+        # used to train) by subset of features. The most recently used are at the end
+        self.__seeds: 'OrderedDict[FrozenSet[Hashable], np.ndarray]' = OrderedDict()
+
+    @staticmethod
+    def __supports_warm_start(model: Any) -> bool:
+        """
+        Only the FastKernelSurvivalSVM optimization can be started from some coefficients (if the installed
+        scikit-survival is compatible).
+        """
+        return SEEDED_FIT_SUPPORTED and isinstance(model, FastKernelSurvivalSVM)
+
+    def __get_nearest_seed(self, features: FrozenSet[Hashable], n_samples: int) -> Optional[np.ndarray]:
+        """
+        Gets the coefficients of the model fitted with the most similar subset of features (the most recent one in
+        case of ties). None if there's no model fitted with the same number of samples.
+        """
+        nearest_seed: Optional[np.ndarray] = None
+        nearest_distance: Optional[int] = None
+        for seed_features, seed in reversed(self.__seeds.items()):
+            if seed.shape[0] != n_samples:
+                continue
+            distance = len(seed_features ^ features)
+            if nearest_distance is None or distance < nearest_distance:
+                nearest_seed, nearest_distance = seed, distance
+                if distance == 0:
+                    break
+        return nearest_seed
+
+    def __must_calibrate(self) -> bool:
+        """Checks if the next seeded fit has to start from zero to keep estimating the iterations saved."""
+        if self.calibration_period <= 0:
+            return False
+        return self.__n_seeded % self.calibration_period == 0
+
+    @staticmethod
+    def __fit_from_coefficients(model: FastKernelSurvivalSVM, x_train: Any, y_train: np.ndarray,
+                                initial_coefficients: np.ndarray) -> bool:
+        """
+        Fits a FastKernelSurvivalSVM starting the optimization from some coefficients. The optimizer's initialization
+        is overridden only during the fit, so the fitted instance is a regular FastKernelSurvivalSVM.
+        @param model: Model to fit.
+        @param x_train: Training data (or kernel matrix if it's precomputed).
+        @param y_train: Training classes.
+        @param initial_coefficients: Initial coefficient of every training sample (in the same order as x_train).
+        @return: True if the optimization started from the coefficients. False if the optimizer was fitted from zero.
+        """
+        samples_order_holder = []
+        seeded_optimizers = []
+
+        def fit_keeping_order(x, time, event, samples_order):
+            samples_order_holder.append(samples_order)
+            return type(model)._fit(model, x, time, event, samples_order)
+
+        def create_seeded_optimizer(kernel_mat, y, status):
+            optimizer = type(model)._create_optimizer(model, kernel_mat, y, status)
+            if not hasattr(optimizer, '_last_w'):
+                return optimizer  # Unknown optimizer, starts from zero
+
+            default_init_coefficients = optimizer._init_coefficients
+
+            def init_coefficients():
+                # The default initialization checks that there are comparable pairs and sets the intercept
+                w = default_init_coefficients()
+                seed = initial_coefficients[samples_order_holder[-1]]  # The optimizer sorts the samples by time
+                if w.shape[0] == seed.shape[0] + 1:
+                    w[1:] = seed
+                else:
+                    w[:] = seed
+                optimizer._update_constraints(w)
+                optimizer._last_w = w.copy()
+                seeded_optimizers.append(optimizer)
+                return w
+
+            optimizer._init_coefficients = init_coefficients
+            return optimizer
+
+        model._fit = fit_keeping_order
+        model._create_optimizer = create_seeded_optimizer
+        try:
+            model.fit(x_train, y_train)
+        finally:
+            del model._fit
+            del model._create_optimizer
+        return len(seeded_optimizers) > 0
+
+    def fit(self, model: Any, x_train: Any, y_train: np.ndarray, train_index: np.ndarray, n_samples: int,
+            features: Iterable[Hashable]):
+        """
+        Fits a model of a CV fold starting from the coefficients of the nearest previously fitted model (if the model
+        supports it) and stores its coefficients to seed the next fits.
+        @param model: Model to fit (already cloned).
+        @param x_train: Training data of the fold (or kernel matrix if it's precomputed).
+        @param y_train: Training classes of the fold.
+        @param train_index: Indexes of the training samples in the whole dataset.
+        @param n_samples: Number of samples of the whole dataset.
+        @param features: Identifiers of the features used to train the model.
+        """
+        if not self.__supports_warm_start(model):
+            model.fit(x_train, y_train)
+            return
+
+        features = frozenset(features)
+        nearest_seed = self.__get_nearest_seed(features, n_samples)
+        if nearest_seed is not None:
+            self.__n_seeded += 1
+
+        if nearest_seed is not None and not self.__must_calibrate():
+            is_warm_fit = self.__fit_from_coefficients(model, x_train, y_train, nearest_seed[train_index])
+        else:
+            model.fit(x_train, y_train)
+            is_warm_fit = False
+
+        if is_warm_fit:
+            self.warm_fits += 1
+            self.warm_iterations += model.n_iter_
+        else:
+            self.cold_fits += 1
+            self.cold_iterations += model.n_iter_
+
+        # Stores the coefficients of the fitted model keeping the ones of the nearest model for the other samples
+        seed = nearest_seed.copy() if nearest_seed is not None else np.zeros(n_samples)
+        seed[train_index] = model.coef_
+        self.__seeds[features] = seed
+        self.__seeds.move_to_end(features)
+        if len(self.__seeds) > WARM_START_MAX_SEEDS:
+            self.__seeds.popitem(last=False)
+
+    @property
+    def iterations_saved(self) -> int:
+        """
+        Estimates the number of optimizer iterations saved by the warm-started fits, comparing them with the average
+        number of iterations of the fits started from zero.
+        """
+        if self.cold_fits == 0:
+            return 0
+        mean_cold_iterations = self.cold_iterations / self.cold_fits
+        return max(int(round(mean_cold_iterations * self.warm_fits - self.warm_iterations)), 0)
+
+    def add_stats(self, other: 'CVWarmStart'):
+        """Adds the fits and iterations of another instance (e.g. used in a worker process or stored in a checkpoint)."""
+        self.warm_fits += other.warm_fits
+        self.warm_iterations += other.warm_iterations
+        self.cold_fits += other.cold_fits
+        self.cold_iterations += other.cold_iterations
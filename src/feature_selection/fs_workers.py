@@ -0,0 +1,121 @@
+import logging
+import warnings
+from typing import Iterable, Tuple, Optional, Any, Dict
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+from sksurv.linear_model import CoxnetSurvivalAnalysis
+from feature_selection.fs_fold_plan import CVFoldPlan
+from feature_selection.fs_racing import CVRacing
+from feature_selection.fs_warm_start import CVWarmStart
+from statistical_properties.survival_scoring import concordance_index
+
+# Score of the alphas of the CoxNet path which could not be fitted or scored in a fold (same as the 'error_score' of
+# the previous GridSearchCV)
+COX_NET_ERROR_SCORE: float = 0.5
+
+# Maximum number of iterations of the CoxNet fits. Same as the default of CoxnetSurvivalAnalysis (used by the previous
+# GridSearchCV refit), so the coefficients of the regularization path converge
+COX_NET_MAX_ITER: int = 100000
+
+
+def setup_django_in_worker():
+    """
+    Sets up Django in a pool's worker process. It's needed as the FS modules import Django models, and the worker
+    processes (spawned by joblib) don't run the Django/Celery initialization.
+    """
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup()
+
+
+def get_cox_net_model(alphas: Optional[np.ndarray] = None) -> CoxnetSurvivalAnalysis:
+    """
+    Gets the CoxNet model used to rank the features in select_top_cox_regression().
+    @param alphas: Alphas of the regularization path (in decreasing order to warm-start every fit from the previous
+    one). None to estimate the path from the data.
+    @return: CoxnetSurvivalAnalysis instance.
+    """
+    return CoxnetSurvivalAnalysis(l1_ratio=0.9, alpha_min_ratio=0.01, max_iter=COX_NET_MAX_ITER, alphas=alphas)
+
+
+def compute_cox_net_fold_path_scores(x_values: np.ndarray, y: np.ndarray, train_index: np.ndarray,
+                                     test_index: np.ndarray, alphas: np.ndarray) -> np.ndarray:
+    """
+    Fits the whole CoxNet regularization path in a CV fold (the data is standardized once and every alpha is
+    warm-started from the previous one) and gets the C-Index of every alpha in the test samples. It doesn't need Django,
+    so it can run in the pool's worker processes.
+    @param x_values: Matrix of shape (n_samples, n_features).
+    @param y: Numpy structured array with the event and time columns.
+    @param train_index: Indexes of the training samples.
+    @param test_index: Indexes of the testing samples.
+    @param alphas: Alphas of the regularization path in decreasing order.
+    @return: The C-Index of every alpha. COX_NET_ERROR_SCORE for the alphas which could not be fitted or scored.
+    """
+    scores = np.full(alphas.shape[0], COX_NET_ERROR_SCORE)
+
+    scaler = StandardScaler().fit(x_values[train_index])
+    x_train = scaler.transform(x_values[train_index])
+    x_test = scaler.transform(x_values[test_index])
+    y_test = y[test_index]
+
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            model = get_cox_net_model(alphas).fit(x_train, y[train_index])
+    except (ArithmeticError, ValueError) as ex:
+        logging.warning(f'CoxNet path could not be fitted in a CV fold: {ex}')
+        return scores
+
+    # Risk scores of every alpha. Higher risk means shorter survival
+    risk_scores = x_test @ model.coef_
+    for alpha_idx in range(min(risk_scores.shape[1], alphas.shape[0])):
+        try:
+            scores[alpha_idx] = concordance_index(y_test['time'], -risk_scores[:, alpha_idx], y_test['event'])
+        except ZeroDivisionError:
+            pass  # No comparable pairs in the testing samples
+
+    return scores
+
+
+def evaluate_blind_search_chunk_in_worker(classifier: Any, molecules_df: pd.DataFrame, clinical_data: np.ndarray,
+                                          is_clustering: bool, cross_validation_folds: int,
+                                          clustering_score_method: Optional[int],
+                                          combinations: Iterable[Tuple[str, ...]], deadline: Optional[float],
+                                          racing: Optional[CVRacing], incumbent_score: float,
+                                          fold_plan: Optional[CVFoldPlan]):
+    """
+    Runs evaluate_blind_search_chunk() in a worker process. This module must not import any Django model at
+    module level, so the function can be unpickled before setting up Django.
+    """
+    setup_django_in_worker()
+    from feature_selection.fs_algorithms import evaluate_blind_search_chunk
+
+    return evaluate_blind_search_chunk(classifier, molecules_df, clinical_data, is_clustering, cross_validation_folds,
+                                       clustering_score_method, combinations, deadline, racing, incumbent_score,
+                                       fold_plan=fold_plan)
+
+
+def evolve_ga_island_in_worker(classifier: Any, molecules_df: pd.DataFrame, population: np.ndarray,
+                               mutation_rate: float, n_generations: int, clinical_data: np.ndarray,
+                               is_clustering: bool, clustering_score_method: Optional[int],
+                               cross_validation_folds: int, n_elites: int, fitness_cache: Dict[bytes, float],
+                               racing: Optional[CVRacing], deadline: Optional[float],
+                               warm_start: Optional[CVWarmStart], fold_plan: Optional[CVFoldPlan]):
+    """Runs evolve_ga_island() in a worker process. See evaluate_blind_search_chunk_in_worker()."""
+    setup_django_in_worker()
+    from feature_selection.fs_algorithms import evolve_ga_island
+
+    return evolve_ga_island(classifier, molecules_df, population, mutation_rate, n_generations, clinical_data,
+                            is_clustering, clustering_score_method, cross_validation_folds, n_elites, fitness_cache,
+                            racing, deadline=deadline, warm_start=warm_start, fold_plan=fold_plan)
+
+
+def run_fs_job_in_worker(algorithm: int, arguments: Dict[str, str], data_folder: str, results_folder: str,
+                         cancel_event: Any):
+    """Runs run_fs_job() of the FS job server in a worker process. See evaluate_blind_search_chunk_in_worker()."""
+    setup_django_in_worker()
+    from feature_selection.fs_job_server import run_fs_job
+
+    return run_fs_job(algorithm, arguments, data_folder, results_folder, cancel_event)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from feature_selection.fs_job_server import run_fs_job_server
+
+
+class Command(BaseCommand):
+    help = 'Runs a local job server which implements the Multiomix AWS EMR integration protocol to run the FS ' \
+           'experiments (BBHA and Blind Search) in a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='0.0.0.0', help='Host to listen. Default 0.0.0.0')
+        parser.add_argument('--port', type=int, default=int(settings.AWS_EMR_SETTINGS['port']),
+                            help='Port to listen. Default AWS_EMR_PORT')
+        parser.add_argument('--workers', type=int, default=settings.FS_JOB_SERVER_N_WORKERS,
+                            help='Number of processes to run the jobs. Default FS_JOB_SERVER_N_WORKERS')
+
+    def handle(self, *args, **options):
+        run_fs_job_server(options['host'], options['port'], options['workers'])
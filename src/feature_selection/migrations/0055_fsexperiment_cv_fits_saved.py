@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2024-06-10 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_selection', '0054_alter_trainedmodel_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fsexperiment',
+            name='cv_fits_saved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.11 on 2024-06-17 11:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_selection', '0055_fsexperiment_cv_fits_saved'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreeningParameters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('top_k', models.PositiveIntegerField(blank=True, null=True)),
+                ('max_q_value', models.FloatField(blank=True, null=True)),
+                ('n_molecules_before', models.PositiveIntegerField()),
+                ('n_molecules_after', models.PositiveIntegerField()),
+                ('fs_experiment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='feature_selection.fsexperiment')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ScreenedOutMolecule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identifier', models.CharField(max_length=50)),
+                ('type', models.IntegerField(choices=[(1, 'Mrna'), (2, 'Mirna'), (3, 'Cna'), (4, 'Methylation'), (5, 'Clinical')])),
+                ('statistic', models.FloatField()),
+                ('p_value', models.FloatField()),
+                ('q_value', models.FloatField()),
+                ('fs_experiment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='screened_out_molecules', to='feature_selection.fsexperiment')),
+            ],
+        ),
+    ]
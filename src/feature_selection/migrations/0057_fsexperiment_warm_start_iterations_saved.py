@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2024-06-18 10:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_selection', '0056_screeningparameters_screenedoutmolecule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fsexperiment',
+            name='warm_start_iterations_saved',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2024-06-19 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_selection', '0057_fsexperiment_warm_start_iterations_saved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainedmodel',
+            name='cv_random_state',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
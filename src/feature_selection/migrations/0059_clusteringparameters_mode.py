@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2024-06-20 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feature_selection', '0058_trainedmodel_cv_random_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clusteringparameters',
+            name='mode',
+            field=models.IntegerField(choices=[(1, 'Auto'), (2, 'Exact'), (3, 'Scalable')], default=1),
+        ),
+    ]
@@ -33,6 +33,13 @@ class ClusteringAlgorithm(models.IntegerChoices):
     SPECTRAL = 2  # TODO: implement in backend
 
 
+class ClusteringMode(models.IntegerChoices):
+    """Clustering implementation used depending on the number of samples."""
+    AUTO = 1  # Scalable if there are at least CLUSTERING_SCALABLE_MIN_SAMPLES samples. Replaced once it's decided
+    EXACT = 2  # KMeans or SpectralClustering
+    SCALABLE = 3  # MiniBatchKMeans or Nyström-approximated spectral clustering
+
+
 class ClusteringMetric(models.IntegerChoices):
     """Clustering metric to optimize."""
     COX_REGRESSION = 1
@@ -73,6 +80,7 @@ class ClusteringParameters(models.Model):
     penalizer = models.FloatField(default=0.0)
     random_state = models.SmallIntegerField(null=True, blank=True)
     n_clusters = models.SmallIntegerField(default=2, validators=[MinValueValidator(2), MaxValueValidator(10)])
+    mode = models.IntegerField(choices=ClusteringMode.choices, default=ClusteringMode.AUTO)
     trained_model = models.OneToOneField('TrainedModel', on_delete=models.CASCADE, related_name='clustering_parameters')
 
 
@@ -125,6 +133,12 @@ class FSExperiment(models.Model):
     app_name = models.CharField(max_length=100, null=True, blank=True)  # Spark app name to get the results
     emr_job_id = models.CharField(max_length=100, null=True, blank=True)  # Job ID in the Spark cluster
 
+    # Number of CV fits that were not computed thanks to the racing evaluation (see FS_CV_RACING_ENABLED setting)
+    cv_fits_saved = models.PositiveIntegerField(default=0)
+
+    # Estimated number of SVM optimizer iterations saved by the warm-started fits (see FS_WARM_START_ENABLED setting)
+    warm_start_iterations_saved = models.PositiveIntegerField(default=0)
+
     def get_all_sources(self) -> List[Optional['api_service.ExperimentSource']]:
         """Returns a list with all the sources."""
         return [
@@ -177,6 +191,27 @@ class GeneticAlgorithmsParameters(AlgorithmParameters):
     mutation_rate = models.FloatField(default=0.01)
 
 
+class ScreeningParameters(AlgorithmParameters):
+    """
+    Parameters of the univariate survival pre-screening of the molecules before running the metaheuristics (see
+    FS_SCREENING_TOP_K and FS_SCREENING_MAX_Q_VALUE settings).
+    """
+    top_k = models.PositiveIntegerField(null=True, blank=True)
+    max_q_value = models.FloatField(null=True, blank=True)
+    n_molecules_before = models.PositiveIntegerField()  # Number of molecules before the screening
+    n_molecules_after = models.PositiveIntegerField()  # Number of molecules kept by the screening
+
+
+class ScreenedOutMolecule(models.Model):
+    """A molecule discarded by the univariate survival pre-screening of a FSExperiment."""
+    identifier = models.CharField(max_length=50)
+    type = models.IntegerField(choices=FileType.choices)
+    statistic = models.FloatField()  # Cox score (log-rank) test chi-squared statistic
+    p_value = models.FloatField()
+    q_value = models.FloatField()  # Benjamini-Hochberg adjusted p-value
+    fs_experiment = models.ForeignKey(FSExperiment, on_delete=models.CASCADE, related_name='screened_out_molecules')
+
+
 def user_directory_path_for_trained_models(instance, filename: str):
     """File will be uploaded to MEDIA_ROOT/uploads/user_<id>/trained_models/<filename>"""
     return f'uploads/user_{instance.biomarker.user.id}/trained_models/{filename}'
@@ -202,6 +237,8 @@ class TrainedModel(models.Model):
                                                                                       MaxValueValidator(10)])
     # Indicates if the cross validation folds were modified to be stratified
     cv_folds_modified = models.BooleanField(default=False)
+    # Seed of the CV folds used in all the evaluations of the FS experiment (see CVFoldPlan)
+    cv_random_state = models.PositiveIntegerField(null=True, blank=True)
 
     # Sources
     clinical_source = models.ForeignKey('api_service.ExperimentClinicalSource', on_delete=models.CASCADE, null=True,
@@ -7,7 +7,7 @@ from django.conf import settings
 from pymongo.errors import ServerSelectionTimeoutError
 from biomarkers.models import Biomarker, BiomarkerState, TrainedModelState
 from common.exceptions import NumberOfSamplesFewerThanCVFolds, ExperimentStopped, NoSamplesInCommon, ExperimentFailed
-from feature_selection.fs_service import prepare_and_compute_fs_experiment
+from feature_selection.fs_service import prepare_and_compute_fs_experiment, remove_fs_checkpoint
 from feature_selection.models import FSExperiment, FitnessFunction
 from multiomics_intermediate.celery import app
 from celery.exceptions import SoftTimeLimitExceeded
@@ -111,6 +111,10 @@ def eval_feature_selection_experiment(self, experiment_pk: int, fit_fun_enum: Fi
         if clinical_temp_file_path is not None:
             os.unlink(clinical_temp_file_path)
 
+        # The experiment has finished (successfully or not), so it doesn't need to be resumed. If the worker is lost
+        # this is not executed, and the checkpoint is used when the task is re-queued
+        remove_fs_checkpoint(experiment)
+
     # Saves changes in DB
     biomarker.save()
     experiment.save()
@@ -0,0 +1,483 @@
+import itertools
+import random
+import threading
+import time
+import warnings
+from types import SimpleNamespace
+from typing import Optional, List, Dict, Tuple, Any
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from joblib import parallel_backend, effective_n_jobs
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import GridSearchCV, StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sksurv.linear_model import CoxnetSurvivalAnalysis
+from feature_selection import fs_algorithms, fs_workers
+from feature_selection.fs_fold_plan import CVFoldPlan
+from feature_selection.fs_models import get_survival_svm_model, get_clustering_model
+from feature_selection.models import ClusteringAlgorithm, ClusteringScoringMethod
+
+# Private functions of the FS algorithms module
+update_gram_matrix = getattr(fs_algorithms, '__update_gram_matrix')
+compute_cross_validation_sequential = getattr(fs_algorithms, '__compute_cross_validation_sequential')
+compute_cross_validation_precomputed = getattr(fs_algorithms, '__compute_cross_validation_precomputed')
+compute_clustering_sequential = getattr(fs_algorithms, '__compute_clustering_sequential')
+sort_cox_net_coefficients = getattr(fs_algorithms, '__sort_cox_net_coefficients')
+
+
+def get_random_survival_data(rng: np.random.Generator, n_features: int, n_samples: int,
+                             n_informative: int = 3):
+    """
+    Generates a random molecules DataFrame (molecules as rows, samples as columns) and its clinical data as a
+    structured array. The survival times depend on the first n_informative molecules and are grouped in ranks of 4
+    samples (so the stratified folds have enough members of every class).
+    """
+    x_values = rng.normal(size=(n_features, n_samples))
+    molecules_df = pd.DataFrame(
+        x_values,
+        index=[f'GENE_{i}' for i in range(n_features)],
+        columns=[f'SAMPLE_{i}' for i in range(n_samples)]
+    )
+    risk = x_values[:n_informative].sum(axis=0) + rng.normal(scale=0.5, size=n_samples)
+    times = (risk.argsort().argsort() // 4 + 1).astype(float)
+    events = rng.random(n_samples) < 0.7
+    clinical_data = np.core.records.fromarrays([events, times], names='event, time', formats='bool, float')
+    return molecules_df, clinical_data
+
+
+class IncrementalGramMatrixTestCase(SimpleTestCase):
+    rng: np.random.Generator
+    x_values: np.ndarray
+
+    def setUp(self):
+        self.rng = np.random.default_rng(2024)
+        self.x_values = self.rng.normal(size=(60, 40))  # Samples as rows, features as columns
+
+    def __expected_gram(self, subset: np.ndarray) -> np.ndarray:
+        x_subset = self.x_values[:, subset.astype(bool)]
+        return x_subset @ x_subset.T
+
+    def test_update_after_bit_flips(self):
+        """Tests that the updated Gram matrix is the same as the one computed from scratch after some bit flips."""
+        subset = (self.rng.random(self.x_values.shape[1]) < 0.5).astype(int)
+        gram, n_updates = update_gram_matrix(None, self.x_values, None, subset)
+        self.assertEqual(n_updates, 0)
+
+        for _i in range(200):
+            new_subset = subset.copy()
+            flipped = self.rng.choice(self.x_values.shape[1], size=self.rng.integers(1, 3), replace=False)
+            new_subset[flipped] ^= 1
+            if not new_subset.any():
+                continue
+
+            gram, n_updates = update_gram_matrix(gram, self.x_values, subset, new_subset, n_updates)
+            subset = new_subset
+            np.testing.assert_allclose(gram, self.__expected_gram(subset), rtol=1e-10, atol=1e-10)
+
+    def test_rebuild_interval(self):
+        """Tests that the Gram matrix is computed from scratch after GRAM_MATRIX_REBUILD_INTERVAL updates."""
+        subset = np.zeros(self.x_values.shape[1], dtype=int)
+        subset[:10] = 1
+        gram, n_updates = update_gram_matrix(None, self.x_values, None, subset)
+
+        for i in range(fs_algorithms.GRAM_MATRIX_REBUILD_INTERVAL):
+            new_subset = subset.copy()
+            new_subset[20] ^= 1
+            gram, n_updates = update_gram_matrix(gram, self.x_values, subset, new_subset, n_updates)
+            subset = new_subset
+            self.assertEqual(n_updates, i + 1)
+
+        # A corrupted matrix is discarded as it must be computed from scratch
+        gram += 1.0
+        new_subset = subset.copy()
+        new_subset[20] ^= 1
+        gram, n_updates = update_gram_matrix(gram, self.x_values, subset, new_subset, n_updates)
+        self.assertEqual(n_updates, 0)
+        np.testing.assert_allclose(gram, self.__expected_gram(new_subset), rtol=1e-10, atol=1e-10)
+
+    def test_precomputed_cross_validation(self):
+        """
+        Tests that the CV score computed with the precomputed Gram matrix is the same as the one computed with a
+        linear-kernel SVM using the same folds.
+        """
+        molecules_df, clinical_data = get_random_survival_data(self.rng, n_features=15, n_samples=80)
+        subset = molecules_df.iloc[:8].transpose()
+        classifier = get_survival_svm_model(is_svm_regression=False, svm_kernel='linear', svm_optimizer='avltree',
+                                            max_iterations=1000, random_state=None)
+        fold_plan = CVFoldPlan(clinical_data, n_splits=3, random_state=10)
+
+        expected, _, _ = compute_cross_validation_sequential(classifier, subset, clinical_data,
+                                                             cross_validation_folds=3, more_is_better=True,
+                                                             fold_plan=fold_plan)
+
+        x_values = subset.to_numpy(dtype=float)
+        score = compute_cross_validation_precomputed(classifier, x_values @ x_values.T, clinical_data,
+                                                     cross_validation_folds=3, more_is_better=True,
+                                                     fold_plan=fold_plan)
+        # The SVM optimizer is not bit-reproducible (two fits with the same data get slightly different
+        # coefficients), so the scores can't be exactly the same
+        self.assertAlmostEqual(score, expected, delta=0.02)
+
+
+class BlindSearchTestCase(SimpleTestCase):
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=7, n_samples=60)
+
+    def __blind_search(self, parallel: bool, deadline: Optional[float] = None,
+                       max_evaluations: Optional[int] = None) -> fs_algorithms.FSResult:
+        """
+        Runs the sequential or the parallel Blind Search with a deterministic clustering model. The parallel version
+        uses threads to not set up Django in the spawned processes (the chunks are merged in the same way).
+        """
+        classifier = get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=2, random_state=0)
+        if not parallel:
+            return fs_algorithms.blind_search_sequential(classifier, self.molecules_df, self.clinical_data,
+                                                         is_clustering=True, cross_validations_folds=3,
+                                                         clustering_score_method=ClusteringScoringMethod.C_INDEX,
+                                                         deadline=deadline, max_evaluations=max_evaluations)
+
+        with parallel_backend('threading'):
+            return fs_algorithms.blind_search_parallel(classifier, self.molecules_df, self.clinical_data,
+                                                       is_clustering=True, cross_validations_folds=3,
+                                                       clustering_score_method=ClusteringScoringMethod.C_INDEX,
+                                                       n_jobs=2, deadline=deadline, max_evaluations=max_evaluations)
+
+    def test_parallel_same_result(self):
+        """Tests that the parallel Blind Search returns the same combination as the sequential one."""
+        features, _, score = self.__blind_search(parallel=False)
+        parallel_features, _, parallel_score = self.__blind_search(parallel=True)
+        self.assertIsNotNone(features)
+        self.assertEqual(parallel_features, features)
+        self.assertEqual(parallel_score, score)
+
+    def test_evaluations_budget(self):
+        """Tests that the best of the first max_evaluations combinations is returned."""
+        max_evaluations = 10
+        combinations = list(itertools.islice(
+            itertools.chain.from_iterable(
+                itertools.combinations(self.molecules_df.index, i + 1) for i in range(self.molecules_df.shape[0])
+            ),
+            max_evaluations
+        ))
+        classifier = get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=2, random_state=0)
+        best_mean_score, expected_features, _, _, n_evaluated, _ = fs_algorithms.evaluate_blind_search_chunk(
+            classifier, self.molecules_df, self.clinical_data, is_clustering=True, cross_validation_folds=3,
+            clustering_score_method=ClusteringScoringMethod.C_INDEX, combinations=combinations, deadline=None
+        )
+        self.assertEqual(n_evaluated, max_evaluations)
+
+        for parallel in [False, True]:
+            features, _, score = self.__blind_search(parallel=parallel, max_evaluations=max_evaluations)
+            self.assertEqual(features, expected_features)
+            self.assertEqual(score, best_mean_score)
+
+    def test_time_budget(self):
+        """Tests that the best combination evaluated before the deadline is returned."""
+        # Sequential: the clock advances one second every time the deadline is checked (once per combination)
+        clock = itertools.count()
+        with mock.patch.object(fs_algorithms, 'time', SimpleNamespace(time=lambda: next(clock))):
+            features, _, score = self.__blind_search(parallel=False, deadline=5.5)
+        self.assertEqual((features, score), self.__blind_search(parallel=False, max_evaluations=6)[::2])
+
+        # Parallel: the clock only advances in the main thread, so the deadline is reached after the first round
+        # of chunks
+        main_clock = itertools.count()
+
+        def parallel_time() -> int:
+            return next(main_clock) if threading.current_thread() is threading.main_thread() else 0
+
+        chunks_per_round = effective_n_jobs(2) * 2
+        with mock.patch.object(fs_algorithms, 'time', SimpleNamespace(time=parallel_time)):
+            features, _, score = self.__blind_search(parallel=True, deadline=0.5)
+        self.assertEqual(next(main_clock), 2)  # Checked before the first and the second rounds
+        expected = self.__blind_search(parallel=False,
+                                       max_evaluations=chunks_per_round * fs_algorithms.BLIND_SEARCH_CHUNK_SIZE)
+        self.assertEqual((features, score), expected[::2])
+
+
+class BinaryBlackHoleTestCase(SimpleTestCase):
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+    n_stars = 5
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=10, n_samples=60)
+
+    def __bbha(self, n_stars: int, n_iterations: int, deadline: Optional[float] = None) -> fs_algorithms.FSResult:
+        """Runs the BBHA with a deterministic clustering model and the same RNGs states."""
+        random.seed(0)
+        np.random.seed(0)
+        classifier = get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=2, random_state=0)
+        return fs_algorithms.binary_black_hole_sequential(classifier, self.molecules_df, n_stars=n_stars,
+                                                          n_iterations=n_iterations, clinical_data=self.clinical_data,
+                                                          is_clustering=True,
+                                                          clustering_score_method=ClusteringScoringMethod.C_INDEX,
+                                                          cross_validation_folds=3, is_improved_version=True,
+                                                          deadline=deadline)
+
+    def __bbha_until(self, n_evaluations: int) -> fs_algorithms.FSResult:
+        """
+        Runs 6 iterations of the BBHA, but the deadline is reached after n_evaluations star evaluations: the clock
+        advances one second every time the deadline is checked (once per evaluation).
+        """
+        clock = itertools.count()
+        with mock.patch.object(fs_algorithms, 'time', SimpleNamespace(time=lambda: next(clock))):
+            return self.__bbha(self.n_stars, n_iterations=6, deadline=n_evaluations - 0.5)
+
+    def test_time_budget(self):
+        """Tests that the black hole found before the deadline is returned."""
+        # In the middle of the initialization, only the initialized stars are kept
+        self.assertEqual(self.__bbha_until(0), (None, None, None))
+        self.assertEqual(self.__bbha_until(3)[::2], self.__bbha(n_stars=3, n_iterations=0)[::2])
+
+        # After the first iteration (the black hole is not evaluated again)
+        features, model, score = self.__bbha_until(self.n_stars + self.n_stars - 1)
+        self.assertIsNotNone(model)
+        self.assertEqual((features, score), self.__bbha(self.n_stars, n_iterations=1)[::2])
+
+
+class GeneticAlgorithmsTestCase(SimpleTestCase):
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+
+    def setUp(self):
+        np.random.seed(2024)
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=12, n_samples=60)
+
+    @staticmethod
+    def __get_classifier():
+        """Gets a deterministic clustering model, so the fitness of a solution can be computed again."""
+        return get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=2, random_state=0)
+
+    def __evaluate(self, features: List[str]) -> float:
+        """Computes the fitness of a subset of features from scratch."""
+        fitness, _, _ = compute_clustering_sequential(self.__get_classifier(), self.molecules_df.loc[features].T,
+                                                      self.clinical_data, ClusteringScoringMethod.C_INDEX,
+                                                      more_is_better=True)
+        return fitness
+
+    def __evolve_island(self, population: np.ndarray, fitness_cache: Dict[bytes, float],
+                        n_generations: int) -> fs_algorithms.GAIslandResult:
+        return fs_algorithms.evolve_ga_island(self.__get_classifier(), self.molecules_df, population,
+                                              mutation_rate=0.1, n_generations=n_generations,
+                                              clinical_data=self.clinical_data, is_clustering=True,
+                                              clustering_score_method=ClusteringScoringMethod.C_INDEX,
+                                              cross_validation_folds=3, n_elites=2, fitness_cache=fitness_cache)
+
+    def test_time_budget(self):
+        """Tests that the best solution evaluated before the deadline is returned."""
+        population_size = 10
+        kwargs = dict(classifier=self.__get_classifier(), molecules_df=self.molecules_df,
+                      population_size=population_size, mutation_rate=0.1, clinical_data=self.clinical_data,
+                      is_clustering=True, clustering_score_method=ClusteringScoringMethod.C_INDEX,
+                      cross_validation_folds=3)
+
+        def run_until(n_checks: float) -> fs_algorithms.FSResult:
+            """
+            Runs 5 generations, but the clock advances one second every time the deadline is checked (once per solution
+            and once per generation), so it's reached in the check number n_checks.
+            """
+            clock = itertools.count()
+            np.random.seed(0)
+            with mock.patch.object(fs_algorithms, 'time', SimpleNamespace(time=lambda: next(clock))):
+                return fs_algorithms.genetic_algorithms_sequential(n_iterations=5, deadline=n_checks - 0.5, **kwargs)
+
+        # After the first generation
+        np.random.seed(0)
+        expected = fs_algorithms.genetic_algorithms_sequential(n_iterations=1, **kwargs)
+        self.assertEqual(run_until(population_size + 1)[::2], expected[::2])
+
+        # In the middle of the second generation: the best of all the evaluated solutions
+        compute_fitness = getattr(fs_algorithms, '__compute_fitness_function')
+        scores: List[float] = []
+
+        def record_fitness(*args) -> Tuple[float, Any]:
+            fitness, fitness_model = compute_fitness(*args)
+            scores.append(fitness)
+            return fitness, fitness_model
+
+        with mock.patch.object(fs_algorithms, '__compute_fitness_function', side_effect=record_fitness):
+            features, model, score = run_until(population_size + 4)
+        self.assertIsNotNone(model)
+        self.assertEqual(score, max(scores))
+        self.assertAlmostEqual(self.__evaluate(features), score, places=10)
+
+    def test_best_solution(self):
+        """Tests that the best solution of all the generations is returned with its own fitness value."""
+        population = np.random.randint(2, size=(10, self.molecules_df.shape[0]))
+        fitness_cache: Dict[bytes, float] = {}
+        _, _, _, best_solution, best_score, best_model, fitness_cache, _, _ = self.__evolve_island(population,
+                                                                                                 fitness_cache,
+                                                                                                 n_generations=5)
+        self.assertIsNotNone(best_model)
+        self.assertEqual(best_score, max(fitness_cache.values()))
+        self.assertEqual(fitness_cache[best_solution.tobytes()], best_score)
+
+        best_features = self.molecules_df.index[best_solution.astype(bool)].tolist()
+        self.assertAlmostEqual(self.__evaluate(best_features), best_score, places=10)
+
+    def test_returned_score(self):
+        """Tests that the score returned by the sequential and the island model GA is the fitness of the subset."""
+        kwargs = dict(classifier=self.__get_classifier(), molecules_df=self.molecules_df, population_size=10,
+                      mutation_rate=0.1, n_iterations=4, clinical_data=self.clinical_data, is_clustering=True,
+                      clustering_score_method=ClusteringScoringMethod.C_INDEX, cross_validation_folds=3)
+        features, _, score = fs_algorithms.genetic_algorithms_sequential(**kwargs)
+        self.assertAlmostEqual(self.__evaluate(features), score, places=10)
+
+        # Threads are used to not set up Django in the spawned processes
+        with parallel_backend('threading'):
+            features, _, score = fs_algorithms.genetic_algorithms_parallel(n_islands=2, migration_interval=2,
+                                                                           n_migrants=2, **kwargs)
+        self.assertAlmostEqual(self.__evaluate(features), score, places=10)
+
+    def test_cached_solutions_not_evaluated(self):
+        """Tests that the solutions in the fitness cache (e.g. migrants) are not evaluated again."""
+        migrant = np.zeros(self.molecules_df.shape[0], dtype=int)
+        migrant[:3] = 1
+        population = np.random.randint(2, size=(6, self.molecules_df.shape[0]))
+        population[:3] = migrant
+        migrant_score = 0.99  # Not its real fitness, to check that it's taken from the cache
+
+        with mock.patch.object(fs_algorithms, '__compute_fitness_function',
+                               wraps=getattr(fs_algorithms, '__compute_fitness_function')) as compute_fitness:
+            _, elites, elites_scores, best_solution, _, _, fitness_cache, _, _ = self.__evolve_island(
+                population, {migrant.tobytes(): migrant_score}, n_generations=1
+            )
+
+        evaluated = [call.args[1] for call in compute_fitness.call_args_list]
+        self.assertFalse(any(subset.columns.equals(self.molecules_df.index[:3]) for subset in evaluated))
+        self.assertEqual(len(evaluated), len({solution.tobytes() for solution in population[3:]
+                                              if solution.any() and not np.array_equal(solution, migrant)}))
+        np.testing.assert_array_equal(elites[0], migrant)
+        self.assertEqual(elites_scores[0], migrant_score)
+        self.assertEqual(fitness_cache[migrant.tobytes()], migrant_score)
+
+        # The migrant has no model in this island, so it's not returned as the best solution
+        self.assertFalse(best_solution is not None and np.array_equal(best_solution, migrant))
+
+    def test_migration(self):
+        """Tests that the elites of every island migrate with their fitness values to the cache of the next island."""
+        calls: List[Tuple[np.ndarray, Dict[bytes, float], fs_algorithms.GAIslandResult]] = []
+        evolve_island_in_worker = fs_workers.evolve_ga_island_in_worker
+
+        def record_island(*args) -> fs_algorithms.GAIslandResult:
+            population, fitness_cache = args[2].copy(), dict(args[10])
+            result = evolve_island_in_worker(*args)
+            calls.append((population, fitness_cache, result))
+            return result
+
+        # The sequential backend evolves the islands in order
+        with parallel_backend('sequential'), \
+                mock.patch.object(fs_workers, 'evolve_ga_island_in_worker', side_effect=record_island):
+            fs_algorithms.genetic_algorithms_parallel(
+                self.__get_classifier(), self.molecules_df, population_size=8, mutation_rate=0.1, n_iterations=2,
+                clinical_data=self.clinical_data, is_clustering=True,
+                clustering_score_method=ClusteringScoringMethod.C_INDEX, cross_validation_folds=3, n_islands=2,
+                migration_interval=1, n_migrants=2
+            )
+
+        # Two rounds of two islands
+        self.assertEqual(len(calls), 4)
+        for island_idx in range(2):
+            _, _, (_, elites, elites_scores, *_rest) = calls[island_idx]
+            destination_population, destination_cache, _ = calls[2 + (island_idx + 1) % 2]
+            for migrant, migrant_score in zip(elites, elites_scores):
+                self.assertTrue((destination_population == migrant).all(axis=1).any())
+                self.assertEqual(destination_cache[migrant.tobytes()], migrant_score)
+
+
+class CoxNetTestCase(SimpleTestCase):
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=15, n_samples=90,
+                                                                         n_informative=3)
+        getattr(fs_algorithms, '__cox_net_cache').clear()
+
+    def __grid_search_coefficients(self) -> np.ndarray:
+        """Gets the coefficients of the GridSearchCV used by select_top_cox_regression() before the path CV."""
+        x = self.molecules_df.transpose()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            path = make_pipeline(StandardScaler(), CoxnetSurvivalAnalysis(l1_ratio=0.9, alpha_min_ratio=0.01,
+                                                                          max_iter=100)).fit(x, self.clinical_data)
+            alphas = np.array(path.named_steps['coxnetsurvivalanalysis'].alphas_)
+            gcv = GridSearchCV(
+                make_pipeline(StandardScaler(), CoxnetSurvivalAnalysis(l1_ratio=0.9)),
+                param_grid={'coxnetsurvivalanalysis__alphas': [[np.min(alphas)], [np.median(alphas)],
+                                                               [np.max(alphas)]]},
+                cv=StratifiedKFold(n_splits=fs_algorithms.GRID_SEARCH_CV_FOLDS, shuffle=True),
+                error_score=0.5
+            ).fit(x, self.clinical_data)
+
+        return gcv.best_estimator_.named_steps['coxnetsurvivalanalysis'].coef_[:, 0]
+
+    def test_same_features_as_grid_search(self):
+        """
+        Tests that the path CV ranks first the same features as the previous GridSearchCV. The GridSearchCV only tried 3
+        alphas, so the number of non-zero coefficients can differ, but not the strongest ones.
+        """
+        np.random.seed(0)  # Same shuffled folds in both methods
+        grid_search_features, _, _ = sort_cox_net_coefficients(self.__grid_search_coefficients(),
+                                                               self.molecules_df.index, True, None)
+        np.random.seed(0)
+        best_features, _, best_coefficients = fs_algorithms.select_top_cox_regression(
+            self.molecules_df, self.clinical_data, filter_zero_coeff=True, top_n=None
+        )
+
+        # Molecules are sorted by ascending absolute value of their coefficients
+        self.assertSetEqual(set(best_features[-3:]), {'GENE_0', 'GENE_1', 'GENE_2'})
+        self.assertSetEqual(set(best_features[-3:]), set(grid_search_features[-3:]))
+        self.assertTrue(set(best_features).issubset(grid_search_features))
+        self.assertTrue(all(coefficient != 0.0 for coefficient in best_coefficients))
+
+    def test_path_converges(self):
+        """Tests that the regularization path is fitted until convergence."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', ConvergenceWarning)
+            fs_algorithms.select_top_cox_regression(self.molecules_df, self.clinical_data, filter_zero_coeff=True,
+                                                    top_n=3)
+
+    def test_time_budget(self):
+        """Tests that the CV is skipped once the deadline is reached and the median alpha of the path is used."""
+        x = self.molecules_df.transpose()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            path = make_pipeline(StandardScaler(), fs_workers.get_cox_net_model()).fit(x, self.clinical_data)
+        path_coefficients = path.named_steps['coxnetsurvivalanalysis'].coef_
+        expected_features, _, expected_coefficients = sort_cox_net_coefficients(
+            path_coefficients[:, path_coefficients.shape[1] // 2], self.molecules_df.index, True, None
+        )
+        self.assertGreater(len(expected_features), 0)
+
+        with mock.patch.object(fs_algorithms, 'compute_cox_net_fold_path_scores') as fold_path_scores:
+            best_features, _, best_coefficients = fs_algorithms.select_top_cox_regression(
+                self.molecules_df, self.clinical_data, filter_zero_coeff=True, top_n=None, deadline=time.time()
+            )
+        fold_path_scores.assert_not_called()
+        self.assertListEqual(best_features, expected_features)
+        self.assertListEqual(best_coefficients, expected_coefficients)
+
+        # It's not the CV result, so it's not cached
+        self.assertEqual(len(getattr(fs_algorithms, '__cox_net_cache')), 0)
+
+    def test_cached_result(self):
+        """Tests that the CV is not computed again for the same data."""
+        first_result = fs_algorithms.select_top_cox_regression(self.molecules_df, self.clinical_data,
+                                                               filter_zero_coeff=False, top_n=None)
+        with mock.patch.object(fs_algorithms, 'compute_cox_net_fold_path_scores') as fold_path_scores:
+            second_result = fs_algorithms.select_top_cox_regression(self.molecules_df, self.clinical_data,
+                                                                    filter_zero_coeff=False, top_n=None)
+        fold_path_scores.assert_not_called()
+        self.assertListEqual(first_result[0], second_result[0])
@@ -0,0 +1,132 @@
+import os
+import pickle
+import random
+import tempfile
+from types import SimpleNamespace
+from typing import Optional
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from common.exceptions import ExperimentStopped
+from feature_selection import fs_algorithms, fs_service
+from feature_selection.fs_checkpoint import FSCheckpoint
+from feature_selection.fs_models import get_clustering_model
+from feature_selection.models import ClusteringAlgorithm, ClusteringScoringMethod, FeatureSelectionAlgorithm, \
+    FitnessFunction
+from feature_selection.tests.tests_fs_algorithms import get_random_survival_data
+
+# Private function of the FS service to get the checkpoint of an experiment
+get_checkpoint = getattr(fs_service, '__get_checkpoint')
+
+# Number of stars and iterations of the BBHA runs
+N_STARS = 5
+N_ITERATIONS = 6
+
+
+class BBHACheckpointTestCase(SimpleTestCase):
+    """Tests that a BBHA run resumed from a checkpoint reaches the same result as an uninterrupted one."""
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+    checkpoint_path: str
+    n_evaluations: int  # Number of evaluations of the last run
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=10, n_samples=60)
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.checkpoint_path = os.path.join(temp_dir.name, 'fs_experiment_1.pkl')
+
+    def __bbha(self, checkpoint: Optional[FSCheckpoint] = None, stop_after: Optional[int] = None,
+               seed: Optional[int] = 0) -> fs_algorithms.FSResult:
+        """
+        Runs the BBHA with a deterministic clustering model.
+        @param checkpoint: FSCheckpoint to store the state after every iteration and resume from it.
+        @param stop_after: Number of evaluations after which the experiment is stopped (as if the worker was lost).
+        @param seed: Seed of the RNGs. None to keep their state (e.g. to check that it's restored from the checkpoint).
+        """
+        if seed is not None:
+            random.seed(seed)
+            np.random.seed(seed)
+
+        self.n_evaluations = 0
+
+        def is_aborted() -> bool:
+            """Counts the evaluations (it's checked before every one) and stops after stop_after of them."""
+            if self.n_evaluations == stop_after:
+                return True
+            self.n_evaluations += 1
+            return False
+
+        classifier = get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=2, random_state=0)
+        return fs_algorithms.binary_black_hole_sequential(
+            classifier, self.molecules_df, n_stars=N_STARS, n_iterations=N_ITERATIONS,
+            clinical_data=self.clinical_data, is_clustering=True,
+            clustering_score_method=ClusteringScoringMethod.C_INDEX, cross_validation_folds=3,
+            is_improved_version=True, checkpoint=checkpoint, is_aborted=is_aborted
+        )
+
+    def __get_checkpoint(self, signature: str = 'experiment') -> FSCheckpoint:
+        """Gets a checkpoint which is stored after every iteration."""
+        return FSCheckpoint(self.checkpoint_path, signature, interval=0)
+
+    def __stored_iteration(self) -> int:
+        with open(self.checkpoint_path, 'rb') as fp:
+            return pickle.load(fp)['state']['iteration']
+
+    def test_resume(self):
+        """Tests that the run stopped in the middle of an iteration resumes from the last completed one."""
+        features, _, score = self.__bbha()
+
+        # Stopped in the fourth iteration: all the stars are initialized and 3 iterations are completed
+        n_evaluations = N_STARS + 3 * (N_STARS - 1) + 2
+        with self.assertRaises(ExperimentStopped):
+            self.__bbha(self.__get_checkpoint(), stop_after=n_evaluations)
+        self.assertEqual(self.__stored_iteration(), 3)
+
+        # RNGs are in another state, they must be restored from the checkpoint
+        random.seed(1)
+        np.random.seed(1)
+        resumed_features, _, resumed_score = self.__bbha(self.__get_checkpoint(), seed=None)
+        self.assertEqual(self.n_evaluations, (N_ITERATIONS - 3) * (N_STARS - 1))
+        self.assertListEqual(resumed_features, features)
+        self.assertEqual(resumed_score, score)
+
+    def test_different_signature(self):
+        """Tests that a checkpoint of another configuration is discarded and the run starts from scratch."""
+        features, _, score = self.__bbha()
+        with self.assertRaises(ExperimentStopped):
+            self.__bbha(self.__get_checkpoint(), stop_after=N_STARS + 2 * (N_STARS - 1))
+        self.assertIsNone(self.__get_checkpoint('other_experiment').load('BBHA'))
+        self.assertIsNone(self.__get_checkpoint().load('GA'))
+
+        other_features, _, other_score = self.__bbha(self.__get_checkpoint('other_experiment'))
+        self.assertEqual(self.n_evaluations, N_STARS + N_ITERATIONS * (N_STARS - 1))
+        self.assertListEqual(other_features, features)
+        self.assertEqual(other_score, score)
+
+    def test_experiment_signature(self):
+        """Tests that the signature of the experiment's checkpoint changes with its data and parameters."""
+        experiment = SimpleNamespace(pk=1, algorithm=FeatureSelectionAlgorithm.BBHA)
+        arguments = dict(experiment=experiment, molecules_df=self.molecules_df,
+                         fit_fun_enum=FitnessFunction.CLUSTERING, fitness_function_parameters={'n_clusters': 2},
+                         algorithm_parameters={'n_stars': N_STARS, 'n_iterations': N_ITERATIONS},
+                         cross_validation_folds=3)
+        with tempfile.TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root,
+                                                                        FS_CHECKPOINT_INTERVAL=60):
+            signature = get_checkpoint(**arguments).signature
+            self.assertEqual(get_checkpoint(**arguments).signature, signature)
+
+            changes = [
+                {'molecules_df': self.molecules_df.iloc[1:]},
+                {'molecules_df': self.molecules_df.iloc[:, 1:]},
+                {'fitness_function_parameters': {'n_clusters': 3}},
+                {'algorithm_parameters': {'n_stars': N_STARS, 'n_iterations': N_ITERATIONS + 1}},
+                {'cross_validation_folds': 5},
+                {'experiment': SimpleNamespace(pk=1, algorithm=FeatureSelectionAlgorithm.GA)}
+            ]
+            for change in changes:
+                self.assertNotEqual(get_checkpoint(**{**arguments, **change}).signature, signature, change)
+
+            with self.settings(FS_CHECKPOINT_INTERVAL=0):
+                self.assertIsNone(get_checkpoint(**arguments))
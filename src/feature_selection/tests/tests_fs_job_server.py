@@ -0,0 +1,296 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+from unittest import mock
+import pandas as pd
+import requests
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from biomarkers.models import Biomarker, BiomarkerOrigin, BiomarkerState
+from common.exceptions import ExperimentStopped
+from feature_selection import fs_job_server
+from feature_selection.fs_algorithms_spark import EMRAlgorithms
+from feature_selection.fs_job_server import FSJobServer, FSJobHTTPServer, FSJobState, get_path_inside_folder
+from feature_selection.fs_times_recorder import FSTimesRecorder
+from feature_selection.models import FSExperiment, FeatureSelectionAlgorithm, SVMTimesRecord, ClusteringTimesRecord, \
+    RFTimesRecord, SVMKernel, ClusteringAlgorithm, ClusteringScoringMethod
+from feature_selection.views import FeatureSelectionExperimentAWSNotification, JSON_KEYS
+
+# Seconds to wait for a job to finish and be notified
+WAIT_TIMEOUT = 10
+
+# Private function of the job server to get the classifier and its parameters description
+get_classifier = getattr(fs_job_server, '__get_classifier')
+
+# Entrypoint arguments of a valid job
+VALID_ARGUMENTS = {
+    'app-name': 'test-app',
+    'molecules-dataset': 'molecules.parquet',
+    'clinical-dataset': 'clinical.parquet',
+    'model': 'clustering',
+    'number-of-clusters': '2'
+}
+
+
+class FSJobServerTestCase(SimpleTestCase):
+    """Tests the '/job' HTTP API. The jobs run in threads with a fake FS algorithm."""
+    job_server: FSJobServer
+    http_server: FSJobHTTPServer
+    base_url: str
+    notifications: List[Dict[str, Any]]
+    notified: threading.Event
+    notification_status: int
+    session: requests.Session  # Not affected by the mocked requests.post() used by the job server to notify
+
+    def setUp(self):
+        self.job_server = FSJobServer(n_workers=1, notification_url='http://multiomix/notification',
+                                      data_folder='data', results_folder='results')
+        # No process has been spawned yet, so the pool is replaced by threads which can use the mocked functions
+        self.job_server.executor.shutdown()
+        self.job_server.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.http_server = FSJobHTTPServer(('127.0.0.1', 0), self.job_server)
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        self.base_url = f'http://127.0.0.1:{self.http_server.server_address[1]}'
+
+        self.notifications = []
+        self.notified = threading.Event()
+        self.notification_status = 200
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+
+        # The FS algorithm waits until it's cancelled or for 0.5 seconds
+        run_job_patcher = mock.patch.object(fs_job_server, 'run_fs_job_in_worker', side_effect=self.__fake_fs_job)
+        notify_patcher = mock.patch.object(fs_job_server.requests, 'post', side_effect=self.__fake_notification)
+        run_job_patcher.start()
+        notify_patcher.start()
+        self.addCleanup(run_job_patcher.stop)
+        self.addCleanup(notify_patcher.stop)
+
+    def tearDown(self):
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.job_server.shutdown()
+
+    @staticmethod
+    def __fake_fs_job(_algorithm: int, _arguments: Dict[str, str], _data_folder: str, _results_folder: str,
+                      cancel_event: Any):
+        if cancel_event.wait(0.5):
+            raise ExperimentStopped
+
+    def __fake_notification(self, url: str, json: Dict[str, Any], timeout: int) -> requests.Response:
+        self.notifications.append({'url': url, 'content': json})
+        response = requests.Response()
+        response.status_code = self.notification_status
+        response.url = url
+        self.notified.set()
+        return response
+
+    def __submit(self, body: Any) -> requests.Response:
+        data = body if isinstance(body, str) else json.dumps(body)
+        return self.session.post(f'{self.base_url}/job', data=data, headers={'Content-Type': 'application/json'})
+
+    def __submit_valid_job(self) -> str:
+        response = self.__submit({
+            'name': 'Test job',
+            'algorithm': EMRAlgorithms.BBHA.value,
+            'entrypoint_arguments': [{'name': name, 'value': value} for name, value in VALID_ARGUMENTS.items()]
+        })
+        self.assertEqual(response.status_code, 201)
+        job_id = response.json()['id']
+        self.assertEqual(response.headers['Location'], f'/job/{job_id}')
+        return job_id
+
+    def __wait_notification(self) -> Dict[str, Any]:
+        self.assertTrue(self.notified.wait(WAIT_TIMEOUT))
+        return self.notifications[-1]
+
+    def test_submit_and_notify(self):
+        """Tests that a submitted job can be requested and that it's notified and removed once it finishes."""
+        job_id = self.__submit_valid_job()
+        response = self.session.get(f'{self.base_url}/job/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['id'], job_id)
+        self.assertEqual(response.json()['name'], 'Test job')
+        self.assertIn(response.json()['state'], [FSJobState.PENDING.value, FSJobState.RUNNING.value])
+        self.assertIsNone(response.json()['finishedAt'])
+
+        notification = self.__wait_notification()
+        self.assertEqual(notification['url'], f'http://multiomix/notification/{job_id}/')
+        self.assertEqual(notification['content']['state'], FSJobState.COMPLETED.value)
+
+        # The dates are in the format expected by the notification view
+        view = FeatureSelectionExperimentAWSNotification()
+        execution_time = view._FeatureSelectionExperimentAWSNotification__compute_execution_time(
+            notification['content']['createdAt'], notification['content']['finishedAt']
+        )
+        self.assertGreaterEqual(execution_time, 0)
+
+        # Notified jobs are removed
+        time.sleep(0.1)
+        self.assertIsNone(self.job_server.get(job_id))
+        self.assertEqual(self.session.get(f'{self.base_url}/job/{job_id}').status_code, 404)
+
+    def test_cancel(self):
+        """Tests that a DELETE request cancels the job."""
+        job_id = self.__submit_valid_job()
+        response = self.session.delete(f'{self.base_url}/job/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.__wait_notification()['content']['state'], FSJobState.CANCELLED.value)
+
+    def test_not_notified_jobs_ttl(self):
+        """Tests that the jobs that could not be notified are kept until FINISHED_JOBS_TTL."""
+        self.notification_status = 500
+        with mock.patch.object(fs_job_server, 'NOTIFICATION_ATTEMPTS', 1), \
+                mock.patch.object(fs_job_server, 'NOTIFICATION_RETRY_DELAY', 0.0):
+            job_id = self.__submit_valid_job()
+            self.__wait_notification()
+            time.sleep(0.1)
+
+        job = self.job_server.get(job_id)
+        self.assertIsNotNone(job)
+        self.assertEqual(self.session.get(f'{self.base_url}/job/{job_id}').json()['state'], FSJobState.COMPLETED.value)
+
+        # Expired jobs are removed when a new one is submitted
+        self.notification_status = 200
+        with mock.patch.object(fs_job_server, 'FINISHED_JOBS_TTL', 0.0):
+            new_job_id = self.__submit_valid_job()
+        self.assertIsNone(self.job_server.get(job_id))
+        self.assertIsNotNone(self.job_server.get(new_job_id))
+
+    def test_invalid_requests(self):
+        """Tests that invalid requests get a 400 or 404 response."""
+        valid_arguments = [{'name': name, 'value': value} for name, value in VALID_ARGUMENTS.items()]
+        missing_argument = [argument for argument in valid_arguments if argument['name'] != 'model']
+        invalid_bodies = [
+            'not a JSON',
+            {'algorithm': 'abc', 'entrypoint_arguments': valid_arguments},
+            {'algorithm': 99, 'entrypoint_arguments': valid_arguments},
+            {'algorithm': EMRAlgorithms.BBHA.value, 'entrypoint_arguments': [{'name': 'model'}]},
+            {'algorithm': EMRAlgorithms.BBHA.value, 'entrypoint_arguments': missing_argument},
+            {'algorithm': EMRAlgorithms.BBHA.value},
+        ]
+        for body in invalid_bodies:
+            self.assertEqual(self.__submit(body).status_code, 400, body)
+
+        # Paths outside the shared folders
+        invalid_paths = [
+            ('molecules-dataset', '../molecules.parquet'),
+            ('molecules-dataset', '/etc/passwd'),
+            ('clinical-dataset', 'subfolder/../../clinical.parquet'),
+            ('app-name', '../test-app'),
+            ('app-name', '/tmp/test-app'),
+            ('app-name', '.'),
+        ]
+        for name, value in invalid_paths:
+            arguments = [{'name': name, 'value': value}] + \
+                        [argument for argument in valid_arguments if argument['name'] != name]
+            response = self.__submit({'algorithm': EMRAlgorithms.BBHA.value, 'entrypoint_arguments': arguments})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertEqual(response.json()['detail'], f'Invalid entrypoint argument: {name}')
+
+        self.assertEqual(self.session.post(f'{self.base_url}/other', data='{}').status_code, 404)
+        self.assertEqual(self.session.get(f'{self.base_url}/job/abc123').status_code, 404)
+        self.assertEqual(self.session.get(f'{self.base_url}/job/not-an-id').status_code, 404)
+        self.assertEqual(self.session.delete(f'{self.base_url}/job/abc123').status_code, 404)
+        self.assertEqual(len(self.job_server.jobs), 0)
+
+
+class SharedFolderPathTestCase(SimpleTestCase):
+    """Tests that the paths of the entrypoint arguments can't point outside the shared folders."""
+
+    def test_get_path_inside_folder(self):
+        self.assertEqual(get_path_inside_folder('data', 'molecules.parquet'), os.path.join('data', 'molecules.parquet'))
+        self.assertEqual(get_path_inside_folder('data', 'study/../molecules.parquet'),
+                         os.path.join('data', 'study/../molecules.parquet'))
+        for path in ['../molecules.parquet', '/data/molecules.parquet', '.', 'study/../..', '../data2/file']:
+            with self.assertRaises(ValueError, msg=path):
+                get_path_inside_folder('data', path)
+
+    def test_symlink_outside_folder(self):
+        """Tests that a symlink inside the folder pointing outside it is rejected too."""
+        with tempfile.TemporaryDirectory() as data_folder, tempfile.TemporaryDirectory() as other_folder:
+            os.symlink(other_folder, os.path.join(data_folder, 'link'))
+            with self.assertRaises(ValueError):
+                get_path_inside_folder(data_folder, 'link/molecules.parquet')
+
+    def test_run_fs_job(self):
+        """Tests that the job fails before reading the datasets or writing the results."""
+        arguments = {**VALID_ARGUMENTS, 'app-name': '../test-app'}
+        with mock.patch.object(fs_job_server, 'format_data') as format_data:
+            with self.assertRaises(ValueError):
+                fs_job_server.run_fs_job(EMRAlgorithms.BBHA.value, arguments, 'data', 'results', threading.Event())
+        format_data.assert_not_called()
+
+
+class FSTimesRecorderTestCase(TestCase):
+    """Tests that the times recorded by the job server are stored by the notification view."""
+    fs_experiment: FSExperiment
+
+    def setUp(self):
+        user = User.objects.create_user(username='test_user', email='test@test.com', password='test')
+        biomarker = Biomarker.objects.create(name='Test', origin=BiomarkerOrigin.MANUAL, state=BiomarkerState.COMPLETED,
+                                             user=user)
+        self.fs_experiment = FSExperiment.objects.create(origin_biomarker=biomarker, user=user,
+                                                         algorithm=FeatureSelectionAlgorithm.BBHA)
+
+    def __get_times_df(self, arguments: Dict[str, str], model: Optional[Any] = None) -> pd.DataFrame:
+        """
+        Records some evaluations with the model's parameters description of the job server and reads them as the
+        notification view does.
+        """
+        _, _, _, _, parameters = get_classifier(arguments)
+        times_recorder = FSTimesRecorder(parameters)
+        for n_features in [3, 5]:
+            times_recorder.record(FSTimesRecorder.start(), n_features, 100, 0.7, model)
+
+        json_content = json.loads(json.dumps(times_recorder.to_dict()))
+        return pd.DataFrame.from_dict({key: json_content[key] for key in JSON_KEYS})
+
+    def __save_times(self, method: str, times_df: pd.DataFrame):
+        view = FeatureSelectionExperimentAWSNotification()
+        getattr(view, f'_FeatureSelectionExperimentAWSNotification__save_{method}_times_data')(self.fs_experiment,
+                                                                                               times_df)
+
+    def test_svm_times(self):
+        svm_model = mock.Mock(n_iter_=20)
+        times_df = self.__get_times_df({'model': 'svm', 'svm-kernel': 'rbf', 'svm-optimizer': 'avltree',
+                                        'svm-max-iterations': '500', 'svm-is-regression': 'false'}, svm_model)
+        self.__save_times('svm', times_df)
+
+        records = SVMTimesRecord.objects.filter(fs_experiment=self.fs_experiment).order_by('number_of_features')
+        self.assertListEqual([record.number_of_features for record in records], [3, 5])
+        for record in records:
+            self.assertEqual(record.number_of_samples, 100)
+            self.assertEqual(record.fitness, 0.7)
+            self.assertEqual(record.max_iterations, 500)
+            self.assertEqual(record.optimizer, 'avltree')
+            self.assertEqual(record.kernel, SVMKernel.RBF)
+            self.assertEqual(record.number_of_iterations, 20)
+            self.assertGreaterEqual(record.execution_time, 0.0)
+
+    def test_clustering_times(self):
+        times_df = self.__get_times_df({'model': 'clustering', 'number-of-clusters': '3',
+                                        'clustering-algorithm': 'spectral',
+                                        'clustering-scoring-method': 'concordance_index'})
+        self.__save_times('clustering', times_df)
+
+        records = ClusteringTimesRecord.objects.filter(fs_experiment=self.fs_experiment)
+        self.assertEqual(records.count(), 2)
+        for record in records:
+            self.assertEqual(record.number_of_clusters, 3)
+            self.assertEqual(record.algorithm, ClusteringAlgorithm.SPECTRAL)
+            self.assertEqual(record.scoring_method, ClusteringScoringMethod.C_INDEX)
+
+    def test_rf_times(self):
+        times_df = self.__get_times_df({'model': 'rf', 'rf-n-estimators': '15'})
+        self.__save_times('rf', times_df)
+
+        records = RFTimesRecord.objects.filter(fs_experiment=self.fs_experiment)
+        self.assertEqual(records.count(), 2)
+        for record in records:
+            self.assertEqual(record.number_of_trees, 15)
@@ -0,0 +1,127 @@
+from unittest import mock
+import numpy as np
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from sklearn.cluster import KMeans, MiniBatchKMeans, SpectralClustering
+from sklearn.datasets import make_blobs
+from sklearn.metrics import adjusted_rand_score
+from biomarkers.models import Biomarker, BiomarkerOrigin, BiomarkerState, TrainedModelState
+from feature_selection import fs_models
+from feature_selection.fs_models import get_nystroem_basis, NystroemSpectralClustering, get_clustering_model, \
+    NYSTROEM_BASIS_CACHE_SIZE
+from feature_selection.models import TrainedModel, FitnessFunction, ClusteringParameters, ClusteringAlgorithm, \
+    ClusteringMode
+from feature_selection.utils import get_clustering_model_for_samples
+
+# Private cache of the Nyström bases
+nystroem_basis_cache = getattr(fs_models, '__nystroem_basis_cache')
+
+
+class NystroemSpectralClusteringTestCase(SimpleTestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(nystroem_basis_cache, clear=True))
+
+    def test_basis_without_seed(self):
+        """Tests that the basis is deterministic and cached even if no seed is set."""
+        basis = get_nystroem_basis(500, 50, None)
+        self.assertEqual(basis.shape, (50,))
+        self.assertEqual(np.unique(basis).shape, (50,))
+        self.assertTrue(np.all(np.diff(basis) > 0))
+        self.assertIs(get_nystroem_basis(500, 50, None), basis)
+
+        # Another seed draws (and caches) another basis
+        other_basis = get_nystroem_basis(500, 50, 1)
+        self.assertFalse(np.array_equal(basis, other_basis))
+        self.assertEqual(len(nystroem_basis_cache), 2)
+
+    def test_basis_cache_size(self):
+        """Tests that the oldest basis is removed when the cache is full."""
+        for seed in range(NYSTROEM_BASIS_CACHE_SIZE + 1):
+            get_nystroem_basis(100, 10, seed)
+        self.assertEqual(len(nystroem_basis_cache), NYSTROEM_BASIS_CACHE_SIZE)
+        self.assertNotIn((100, 10, 0), nystroem_basis_cache)
+        self.assertIn((100, 10, NYSTROEM_BASIS_CACHE_SIZE), nystroem_basis_cache)
+
+    def test_same_basis_in_every_fit(self):
+        """
+        Tests that every fit of an experiment (same basis seed, no random state) uses the same basis, and that the
+        clusters of well-separated blobs are found and assigned to new samples.
+        """
+        x, labels = make_blobs(n_samples=400, centers=3, n_features=4, cluster_std=0.5, random_state=0)
+        first = NystroemSpectralClustering(n_clusters=3, n_components=60, gamma=0.1, basis_seed=7).fit(x)
+        second = NystroemSpectralClustering(n_clusters=3, n_components=60, gamma=0.1, basis_seed=7).fit(x)
+        np.testing.assert_array_equal(first.basis_samples_, second.basis_samples_)
+
+        self.assertGreater(adjusted_rand_score(labels, first.labels_), 0.95)
+        self.assertGreater(adjusted_rand_score(labels[:50], first.predict(x[:50])), 0.95)
+
+        # The random state has priority over the basis seed
+        with_random_state = NystroemSpectralClustering(n_clusters=3, n_components=60, gamma=0.1, random_state=3,
+                                                       basis_seed=7).fit(x)
+        self.assertFalse(np.array_equal(first.basis_samples_, with_random_state.basis_samples_))
+
+    def test_scalable_models(self):
+        with self.settings(CLUSTERING_NYSTROEM_N_COMPONENTS=40):
+            spectral = get_clustering_model(ClusteringAlgorithm.SPECTRAL, number_of_clusters=4, random_state=None,
+                                            scalable=True, basis_seed=5)
+        self.assertIsInstance(spectral, NystroemSpectralClustering)
+        self.assertListEqual([spectral.n_clusters, spectral.n_components, spectral.basis_seed], [4, 40, 5])
+        self.assertIsInstance(get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=4,
+                                                   random_state=None, scalable=True), MiniBatchKMeans)
+
+        self.assertIsInstance(get_clustering_model(ClusteringAlgorithm.SPECTRAL, number_of_clusters=4,
+                                                   random_state=None), SpectralClustering)
+        self.assertIsInstance(get_clustering_model(ClusteringAlgorithm.K_MEANS, number_of_clusters=4,
+                                                   random_state=None), KMeans)
+
+
+class ClusteringModeTestCase(TestCase):
+    """Tests the resolution of the AUTO clustering mode once the number of samples is known."""
+    trained_model: TrainedModel
+
+    def setUp(self):
+        self.enterContext(self.settings(CLUSTERING_SCALABLE_MIN_SAMPLES=100))
+        user = User.objects.create_user(username='test_user', email='test@test.com', password='test')
+        biomarker = Biomarker.objects.create(name='Test', origin=BiomarkerOrigin.MANUAL, state=BiomarkerState.COMPLETED,
+                                             user=user)
+        self.trained_model = TrainedModel.objects.create(name='Test', biomarker=biomarker,
+                                                         state=TrainedModelState.IN_PROCESS,
+                                                         fitness_function=FitnessFunction.CLUSTERING)
+
+    def __create_parameters(self, mode: ClusteringMode) -> ClusteringParameters:
+        return ClusteringParameters.objects.create(algorithm=ClusteringAlgorithm.SPECTRAL, n_clusters=3, mode=mode,
+                                                   trained_model=self.trained_model)
+
+    def __resolve(self, n_samples: int):
+        """Resolves the mode for a classifier as created for the EXACT mode."""
+        classifier = SpectralClustering(n_clusters=3)
+        return classifier, get_clustering_model_for_samples(self.trained_model, classifier, n_samples)
+
+    def test_auto_scalable(self):
+        parameters = self.__create_parameters(ClusteringMode.AUTO)
+        _, model = self.__resolve(100)
+        self.assertIsInstance(model, NystroemSpectralClustering)
+        self.assertEqual(model.n_clusters, 3)
+        self.assertEqual(model.basis_seed, self.trained_model.pk)
+        parameters.refresh_from_db()
+        self.assertEqual(parameters.mode, ClusteringMode.SCALABLE)
+
+    def test_auto_exact(self):
+        parameters = self.__create_parameters(ClusteringMode.AUTO)
+        classifier, model = self.__resolve(99)
+        self.assertIs(model, classifier)
+        parameters.refresh_from_db()
+        self.assertEqual(parameters.mode, ClusteringMode.EXACT)
+
+    def test_chosen_mode(self):
+        """Tests that the mode chosen by the user is kept whatever the number of samples is."""
+        parameters = self.__create_parameters(ClusteringMode.EXACT)
+        classifier, model = self.__resolve(1000)
+        self.assertIs(model, classifier)
+        parameters.refresh_from_db()
+        self.assertEqual(parameters.mode, ClusteringMode.EXACT)
+
+    def test_other_fitness_function(self):
+        self.trained_model.fitness_function = FitnessFunction.SVM
+        classifier, model = self.__resolve(1000)
+        self.assertIs(model, classifier)
@@ -0,0 +1,172 @@
+import os
+import random
+import tempfile
+import time
+from typing import List, Optional
+from unittest import mock
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from biomarkers.models import Biomarker, BiomarkerOrigin, BiomarkerState
+from feature_selection import fs_algorithms, fs_service
+from feature_selection.fs_fold_plan import CVFoldPlan
+from feature_selection.fs_models import get_rf_model
+from feature_selection.fs_racing import CVRacing
+from feature_selection.models import FSExperiment, FeatureSelectionAlgorithm, FitnessFunction, BBHAVersion
+from feature_selection.tests.tests_fs_algorithms import get_random_survival_data
+from user_files.models_choices import FileType
+
+# Private functions of the FS modules
+compute_cross_validation_sequential = getattr(fs_algorithms, '__compute_cross_validation_sequential')
+compute_fs_experiment = getattr(fs_service, '__compute_fs_experiment')
+
+# Number of CV folds (the survival times are grouped in ranks of 4 samples to stratify them)
+N_FOLDS = 4
+
+
+def get_classifier():
+    """Gets a RF with a fixed random state, so the same fold gets the same score in every evaluation."""
+    return get_rf_model(n_estimators=10, max_depth=3, random_state=0)
+
+
+class CVRacingTestCase(SimpleTestCase):
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+    fold_plan: CVFoldPlan
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=12, n_samples=100)
+        self.fold_plan = CVFoldPlan(self.clinical_data, n_splits=N_FOLDS, random_state=0)
+
+    def __cross_validation(self, molecules: List[int], incumbent_score: Optional[float] = None,
+                           racing: Optional[CVRacing] = None) -> float:
+        """Computes the mean CV score of a subset of molecules (by position) with the test's fold plan."""
+        subset = self.molecules_df.iloc[molecules].transpose()
+        score, _, _ = compute_cross_validation_sequential(get_classifier(), subset, self.clinical_data, N_FOLDS,
+                                                          more_is_better=True, incumbent_score=incumbent_score,
+                                                          racing=racing, fold_plan=self.fold_plan)
+        return score
+
+    def test_must_abandon(self):
+        racing = CVRacing(min_folds=3, z_value=1.0)
+        self.assertFalse(racing.must_abandon([0.5, 0.5], incumbent_score=0.9, more_is_better=True))
+        self.assertTrue(racing.must_abandon([0.5, 0.5, 0.5], incumbent_score=0.9, more_is_better=True))
+        self.assertFalse(racing.must_abandon([0.6, 1.0, 0.8], incumbent_score=0.85, more_is_better=True))
+        self.assertFalse(racing.must_abandon([0.5, 0.5, 0.5], incumbent_score=None, more_is_better=True))
+        self.assertFalse(racing.must_abandon([0.5, 0.5, 0.5], incumbent_score=np.nan, more_is_better=True))
+        self.assertTrue(racing.must_abandon([0.5, 0.5, 0.5], incumbent_score=0.1, more_is_better=False))
+
+        # The standard error needs at least 2 folds
+        self.assertEqual(CVRacing(min_folds=1, z_value=1.0).min_folds, 2)
+
+    def test_worse_candidate_abandoned(self):
+        """Tests that a candidate with only noise molecules is abandoned before fitting all the folds."""
+        incumbent_score = self.__cross_validation([0, 1, 2])
+        racing = CVRacing(min_folds=2, z_value=1.0)
+        with mock.patch.object(fs_algorithms, 'clone', wraps=fs_algorithms.clone) as clone:
+            score = self.__cross_validation([6, 7, 8], incumbent_score, racing)
+
+        n_fits = clone.call_count
+        self.assertLess(n_fits, N_FOLDS)
+        self.assertEqual(racing.fits_saved, N_FOLDS - n_fits)
+        self.assertLess(score, incumbent_score)
+
+        # A candidate as good as the incumbent is evaluated in all the folds with the same score
+        self.assertEqual(self.__cross_validation([0, 1, 2], incumbent_score, racing), incumbent_score)
+        self.assertEqual(racing.fits_saved, N_FOLDS - n_fits)
+
+    def test_same_scores_without_abandoned_candidates(self):
+        """Tests that the scores are bit-identical with racing off or if no candidate is abandoned."""
+        never_abandons = CVRacing(min_folds=2, z_value=1e6)
+        for molecules in [[0, 1, 2], [6, 7, 8], [3, 9]]:
+            score = self.__cross_validation(molecules)
+            self.assertEqual(self.__cross_validation(molecules, incumbent_score=1.0, racing=never_abandons), score)
+            self.assertEqual(self.__cross_validation(molecules, incumbent_score=None,
+                                                     racing=CVRacing(min_folds=2, z_value=1.0)), score)
+        self.assertEqual(never_abandons.fits_saved, 0)
+
+        # The whole BBHA gets the same result too
+        results = []
+        for racing in [None, never_abandons]:
+            random.seed(0)
+            np.random.seed(0)
+            results.append(fs_algorithms.binary_black_hole_sequential(
+                get_classifier(), self.molecules_df, n_stars=4, n_iterations=2, clinical_data=self.clinical_data,
+                is_clustering=False, clustering_score_method=None, cross_validation_folds=N_FOLDS,
+                is_improved_version=True, racing=racing, fold_plan=self.fold_plan
+            ))
+        (features, _, score), (racing_features, _, racing_score) = results
+        self.assertListEqual(racing_features, features)
+        self.assertEqual(racing_score, score)
+
+
+class CVRacingExperimentTestCase(TestCase):
+    """Tests that the CV fits saved by racing are stored in the FSExperiment."""
+    experiment: FSExperiment
+    molecules_file_path: str
+    clinical_file_path: str
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=temp_dir.name, FS_CHECKPOINT_INTERVAL=0, FS_CV_RACING_MIN_FOLDS=2,
+                                        FS_CV_RACING_Z=1.0, FS_WARM_START_ENABLED=False))
+
+        user = User.objects.create_user(username='test_user', email='test@test.com', password='test')
+        origin_biomarker = Biomarker.objects.create(name='Test', origin=BiomarkerOrigin.MANUAL,
+                                                    state=BiomarkerState.COMPLETED, user=user)
+        created_biomarker = Biomarker.objects.create(name='Test FS', origin=BiomarkerOrigin.FEATURE_SELECTION,
+                                                     state=BiomarkerState.IN_PROCESS, user=user)
+        self.experiment = FSExperiment.objects.create(origin_biomarker=origin_biomarker,
+                                                      created_biomarker=created_biomarker, user=user,
+                                                      algorithm=FeatureSelectionAlgorithm.BBHA)
+
+        # Files as generated for the experiment: molecules suffixed with their type and event and time columns
+        rng = np.random.default_rng(2024)
+        molecules_df, clinical_data = get_random_survival_data(rng, n_features=12, n_samples=100)
+        molecules_df.index = [f'{molecule}_{int(FileType.MRNA)}' for molecule in molecules_df.index]
+        clinical_df = pd.DataFrame({'event': clinical_data['event'].astype(int), 'time': clinical_data['time']},
+                                   index=molecules_df.columns)
+        self.molecules_file_path = os.path.join(temp_dir.name, 'molecules.tsv')
+        self.clinical_file_path = os.path.join(temp_dir.name, 'clinical.tsv')
+        molecules_df.to_csv(self.molecules_file_path, sep='\t')
+        clinical_df.to_csv(self.clinical_file_path, sep='\t')
+
+    def __compute_experiment(self) -> List[CVRacing]:
+        """Runs a BBHA experiment with a RF and returns the CVRacing instance used (if any)."""
+        racings = []
+
+        def create_racing(*args) -> CVRacing:
+            racings.append(CVRacing(*args))
+            return racings[-1]
+
+        random.seed(0)
+        np.random.seed(0)
+        with mock.patch.object(fs_service, 'CVRacing', side_effect=create_racing):
+            compute_fs_experiment(
+                self.experiment, self.molecules_file_path, self.clinical_file_path, FitnessFunction.RF,
+                fitness_function_parameters={'rfParameters': {'nEstimators': 10, 'maxDepth': 3, 'randomState': 1}},
+                algorithm_parameters={'BBHA': {'numberOfStars': 5, 'numberOfIterations': 3,
+                                               'BBHAVersion': BBHAVersion.IMPROVED.value, 'coeff1': 2.2,
+                                               'coeff2': 0.1, 'useSpark': False}},
+                cross_validation_parameters={'folds': N_FOLDS}, is_aborted=lambda: False,
+                deadline=time.time() + 600
+            )
+        return racings
+
+    def test_fits_saved_stored(self):
+        with self.settings(FS_CV_RACING_ENABLED=True):
+            racings = self.__compute_experiment()
+
+        self.assertEqual(len(racings), 1)
+        self.assertGreater(racings[0].fits_saved, 0)
+        self.experiment.refresh_from_db()
+        self.assertEqual(self.experiment.cv_fits_saved, racings[0].fits_saved)
+
+    def test_racing_disabled(self):
+        with self.settings(FS_CV_RACING_ENABLED=False):
+            self.assertListEqual(self.__compute_experiment(), [])
+        self.experiment.refresh_from_db()
+        self.assertEqual(self.experiment.cv_fits_saved, 0)
@@ -0,0 +1,115 @@
+from typing import List, Set, Tuple
+import numpy as np
+import pandas as pd
+from django.contrib.auth.models import User
+from django.test import TestCase
+from statsmodels.stats.multitest import multipletests
+from biomarkers.models import Biomarker, BiomarkerOrigin, BiomarkerState
+from feature_selection import fs_service
+from feature_selection.models import FSExperiment, FeatureSelectionAlgorithm, ScreeningParameters
+from feature_selection.tests.tests_fs_algorithms import get_random_survival_data
+from statistical_properties.survival_scoring import cox_score_test
+from user_files.models_choices import FileType
+
+# Private function of the FS service to screen the molecules
+screen_molecules = getattr(fs_service, '__screen_molecules')
+
+# Identifier and type of every molecule. Identifiers can contain underscores
+MOLECULES: List[Tuple[str, FileType]] = [
+    (f'GENE_{i}', FileType.MRNA) if i % 3 == 0 else
+    (f'hsa-mir-{i}', FileType.MIRNA) if i % 3 == 1 else
+    (f'cg_{i}_probe', FileType.METHYLATION)
+    for i in range(12)
+]
+
+
+class ScreeningTestCase(TestCase):
+    """Tests the univariate survival pre-screening of the molecules before running the metaheuristics."""
+    experiment: FSExperiment
+    molecules_df: pd.DataFrame
+    clinical_data: np.ndarray
+    p_values: np.ndarray
+    q_values: np.ndarray
+
+    def setUp(self):
+        user = User.objects.create_user(username='test_user', email='test@test.com', password='test')
+        biomarker = Biomarker.objects.create(name='Test', origin=BiomarkerOrigin.MANUAL, state=BiomarkerState.COMPLETED,
+                                             user=user)
+        self.experiment = FSExperiment.objects.create(origin_biomarker=biomarker, user=user,
+                                                      algorithm=FeatureSelectionAlgorithm.BBHA)
+
+        # Molecules' names are suffixed with their type as in the generated molecules file
+        rng = np.random.default_rng(2024)
+        self.molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=len(MOLECULES),
+                                                                         n_samples=80, n_informative=6)
+        self.molecules_df.index = [f'{identifier}_{int(file_type)}' for identifier, file_type in MOLECULES]
+
+        _, self.p_values = cox_score_test(self.clinical_data['time'], self.clinical_data['event'],
+                                          self.molecules_df.to_numpy().transpose())
+        self.q_values = multipletests(self.p_values, method='fdr_bh')[1]
+
+    def __screen(self, top_k: int, max_q_value: float, min_features: int) -> pd.DataFrame:
+        with self.settings(FS_SCREENING_TOP_K=top_k, FS_SCREENING_MAX_Q_VALUE=max_q_value,
+                           MIN_FEATURES_METAHEURISTICS=min_features):
+            return screen_molecules(self.experiment, self.molecules_df, self.clinical_data)
+
+    def __expected_kept(self, top_k: int, max_q_value: float, min_features: int) -> Set[int]:
+        """Indexes of the molecules that pass both filters plus the min_features ones with the lowest p-values."""
+        order = np.argsort(self.p_values)
+        top_k_molecules = set(order[:top_k]) if top_k > 0 else set(range(len(MOLECULES)))
+        q_value_molecules = set(np.flatnonzero(self.q_values <= max_q_value)) if max_q_value > 0 \
+            else set(range(len(MOLECULES)))
+        return (top_k_molecules & q_value_molecules) | set(order[:min_features])
+
+    def __assert_screening(self, screened_df: pd.DataFrame, expected_kept: Set[int]):
+        """Checks the kept molecules, the stored parameters and the screened out molecules with their parsed names."""
+        self.assertListEqual(screened_df.index.tolist(), self.molecules_df.index[sorted(expected_kept)].tolist())
+        pd.testing.assert_frame_equal(screened_df, self.molecules_df.iloc[sorted(expected_kept)])
+
+        parameters = ScreeningParameters.objects.get(fs_experiment=self.experiment)
+        self.assertEqual(parameters.n_molecules_before, len(MOLECULES))
+        self.assertEqual(parameters.n_molecules_after, len(expected_kept))
+
+        screened_out = {(molecule.identifier, molecule.type): molecule
+                        for molecule in self.experiment.screened_out_molecules.all()}
+        expected_screened_out = {i: MOLECULES[i] for i in range(len(MOLECULES)) if i not in expected_kept}
+        self.assertSetEqual(set(screened_out.keys()), set(expected_screened_out.values()))
+        for i, key in expected_screened_out.items():
+            self.assertAlmostEqual(screened_out[key].p_value, self.p_values[i])
+            self.assertAlmostEqual(screened_out[key].q_value, self.q_values[i])
+
+    def test_q_value_filter(self):
+        """Tests that the top-K molecules with a q-value greater than the maximum are discarded."""
+        expected_kept = self.__expected_kept(top_k=7, max_q_value=0.05, min_features=2)
+        self.assertEqual(len(expected_kept), 5)
+        self.__assert_screening(self.__screen(top_k=7, max_q_value=0.05, min_features=2), expected_kept)
+
+        parameters = ScreeningParameters.objects.get(fs_experiment=self.experiment)
+        self.assertEqual(parameters.top_k, 7)
+        self.assertEqual(parameters.max_q_value, 0.05)
+
+    def test_top_k_filter(self):
+        """Tests that the molecules with a valid q-value that are not in the top-K are discarded."""
+        self.assertEqual((self.q_values <= 0.05).sum(), 5)
+        expected_kept = self.__expected_kept(top_k=3, max_q_value=0.05, min_features=2)
+        self.assertSetEqual(expected_kept, set(np.argsort(self.p_values)[:3]))
+        self.__assert_screening(self.__screen(top_k=3, max_q_value=0.05, min_features=2), expected_kept)
+
+    def test_min_features(self):
+        """Tests that at least MIN_FEATURES_METAHEURISTICS molecules are kept even if they don't pass the filters."""
+        expected_kept = self.__expected_kept(top_k=0, max_q_value=0.01, min_features=4)
+        self.assertEqual(len(expected_kept), 4)
+        self.assertEqual((self.q_values <= 0.01).sum(), 3)
+        self.__assert_screening(self.__screen(top_k=0, max_q_value=0.01, min_features=4), expected_kept)
+        self.assertIsNone(ScreeningParameters.objects.get(fs_experiment=self.experiment).top_k)
+
+    def test_retry(self):
+        """Tests that the results of a previous attempt are replaced."""
+        self.__screen(top_k=3, max_q_value=0, min_features=2)
+        expected_kept = self.__expected_kept(top_k=7, max_q_value=0, min_features=2)
+        self.__assert_screening(self.__screen(top_k=7, max_q_value=0, min_features=2), expected_kept)
+
+    def test_disabled(self):
+        self.assertIs(self.__screen(top_k=0, max_q_value=0, min_features=2), self.molecules_df)
+        self.assertFalse(ScreeningParameters.objects.filter(fs_experiment=self.experiment).exists())
+        self.assertFalse(self.experiment.screened_out_molecules.exists())
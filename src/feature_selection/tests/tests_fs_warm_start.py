@@ -0,0 +1,103 @@
+from typing import Tuple, List, Any
+from unittest import mock
+import numpy as np
+from django.test import SimpleTestCase
+from sklearn import clone
+from sklearn.model_selection import KFold
+from feature_selection import fs_warm_start
+from feature_selection.fs_models import get_survival_svm_model
+from feature_selection.fs_warm_start import CVWarmStart
+from feature_selection.tests.tests_fs_algorithms import get_random_survival_data
+
+# Number of samples and features of the random data
+N_SAMPLES = 120
+N_FEATURES = 20
+
+
+class CVWarmStartTestCase(SimpleTestCase):
+    molecules: np.ndarray  # Samples as rows, features as columns
+    features: List[str]
+    clinical_data: np.ndarray
+    model: Any  # FastKernelSurvivalSVM
+
+    def setUp(self):
+        rng = np.random.default_rng(2024)
+        molecules_df, self.clinical_data = get_random_survival_data(rng, n_features=N_FEATURES, n_samples=N_SAMPLES)
+        self.molecules = molecules_df.transpose().to_numpy()
+        self.features = molecules_df.index.tolist()
+        self.model = get_survival_svm_model(is_svm_regression=False, svm_kernel='linear', svm_optimizer='avltree',
+                                            max_iterations=1000, random_state=None)
+
+    def __fit_folds(self, calibration_period: int) -> Tuple[CVWarmStart, List[Any], List[Any], List[np.ndarray]]:
+        """
+        Fits every CV fold as two consecutive BBHA/GA evaluations would do: first with all the features but one (which
+        seeds the next fit) and then with all the features.
+        @param calibration_period: Calibration period of the CVWarmStart instances (one per fold).
+        @return: A CVWarmStart with the stats of all the folds, the models fitted with all the features (warm-started)
+        and the same models fitted from zero, and the testing indexes of every fold.
+        """
+        stats = CVWarmStart(calibration_period)
+        warm_models, cold_models, test_indexes = [], [], []
+        subset = list(range(N_FEATURES - 1))
+        for train_index, test_index in KFold(n_splits=4, shuffle=True, random_state=0).split(self.molecules):
+            x_train, y_train = self.molecules[train_index], self.clinical_data[train_index]
+
+            warm_start = CVWarmStart(calibration_period)
+            warm_start.fit(clone(self.model), x_train[:, subset], y_train, train_index, N_SAMPLES,
+                           [self.features[i] for i in subset])
+            warm_model = clone(self.model)
+            warm_start.fit(warm_model, x_train, y_train, train_index, N_SAMPLES, self.features)
+            stats.add_stats(warm_start)
+
+            warm_models.append(warm_model)
+            cold_models.append(clone(self.model).fit(x_train, y_train))
+            test_indexes.append(test_index)
+
+        return stats, warm_models, cold_models, test_indexes
+
+    def test_same_model_as_cold_fit(self):
+        """
+        Tests that a warm-started fit reaches the same model and C-Index as a fit from zero in fewer iterations. The
+        coefficients of the samples are not unique with a linear kernel (the kernel matrix is not full rank), so the
+        weights of the features are compared. The optimizer stops at its tolerance (and two fits from zero don't get
+        exactly the same solution either), so they are compared with some tolerance.
+        """
+        stats, warm_models, cold_models, test_indexes = self.__fit_folds(calibration_period=0)
+        self.assertEqual(stats.warm_fits, len(warm_models))
+        self.assertEqual(stats.cold_fits, len(warm_models))
+
+        for warm_model, cold_model, test_index in zip(warm_models, cold_models, test_indexes):
+            train_index = np.setdiff1d(np.arange(N_SAMPLES), test_index)
+            warm_weights = self.molecules[train_index].T @ warm_model.coef_
+            cold_weights = self.molecules[train_index].T @ cold_model.coef_
+            self.assertLess(np.linalg.norm(warm_weights - cold_weights) / np.linalg.norm(cold_weights), 0.1)
+
+            x_test, y_test = self.molecules[test_index], self.clinical_data[test_index]
+            self.assertAlmostEqual(warm_model.score(x_test, y_test), cold_model.score(x_test, y_test), delta=0.02)
+
+        warm_iterations = sum(model.n_iter_ for model in warm_models)
+        cold_iterations = sum(model.n_iter_ for model in cold_models)
+        self.assertLess(warm_iterations, cold_iterations)
+        self.assertEqual(stats.warm_iterations, warm_iterations)
+
+    def test_calibration(self):
+        """Tests that every calibration_period-th seeded fit starts from zero."""
+        stats, _, _, _ = self.__fit_folds(calibration_period=1)
+        self.assertEqual(stats.warm_fits, 0)
+        self.assertEqual(stats.cold_fits, 8)
+
+    def test_unsupported_scikit_survival(self):
+        """Tests that all the models are fitted from zero if the scikit-survival internals are not the expected ones."""
+        with mock.patch.object(fs_warm_start, 'SEEDED_FIT_SUPPORTED', False), \
+                mock.patch.object(CVWarmStart, '_CVWarmStart__fit_from_coefficients') as fit_from_coefficients:
+            stats, warm_models, _, _ = self.__fit_folds(calibration_period=0)
+
+        # Models are fitted as the ones which don't support warm start (e.g. RandomSurvivalForest)
+        fit_from_coefficients.assert_not_called()
+        self.assertEqual(stats.warm_fits, 0)
+        self.assertEqual(stats.iterations_saved, 0)
+        self.assertTrue(all(model.n_iter_ > 0 for model in warm_models))
+
+    def test_supported_scikit_survival(self):
+        """Tests that the installed scikit-survival is compatible with the seeded fits."""
+        self.assertTrue(fs_warm_start.SEEDED_FIT_SUPPORTED)
@@ -0,0 +1,132 @@
+import json
+from typing import Dict, Any, Optional
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from biomarkers.models import Biomarker, BiomarkerOrigin, BiomarkerState, MRNAIdentifier
+from feature_selection.models import FSExperiment, FeatureSelectionAlgorithm, FitnessFunction, \
+    ClusteringTimesRecord, ClusteringAlgorithm, ClusteringScoringMethod
+
+# Test user's password
+USER_PASSWORD = 'test'
+
+# Minimum number of records and Spark jobs to fit the cost models during tests
+MIN_RECORDS = 6
+MIN_EXPERIMENTS = 3
+
+
+@override_settings(FS_COST_MODEL_MIN_RECORDS=MIN_RECORDS, FS_COST_MODEL_MIN_EXPERIMENTS=MIN_EXPERIMENTS,
+                   FS_COST_MODEL_LOCAL_SPEED_FACTOR=1.0)
+class FeatureSelectionTimeEstimationTestCase(TestCase):
+    user: User
+    biomarker: Biomarker
+
+    def setUp(self):
+        """Tests setup"""
+        self.user = User.objects.create_user(username='test_user', email='test@test.com', password=USER_PASSWORD)
+        self.client.login(username='test_user', password=USER_PASSWORD)
+        self.biomarker = self.__create_biomarker(n_molecules=20)
+
+    def __create_biomarker(self, n_molecules: int) -> Biomarker:
+        """Creates a Biomarker with some genes."""
+        biomarker = Biomarker.objects.create(name='Test', origin=BiomarkerOrigin.MANUAL, state=BiomarkerState.COMPLETED,
+                                             user=self.user)
+        MRNAIdentifier.objects.bulk_create([
+            MRNAIdentifier(identifier=f'GENE_{i}', biomarker=biomarker) for i in range(n_molecules)
+        ])
+        return biomarker
+
+    def __create_spark_jobs(self, n_experiments: int, records_by_experiment: int):
+        """Creates FSExperiments run in Spark with the clustering time records of their fitness evaluations."""
+        for experiment_idx in range(n_experiments):
+            experiment = FSExperiment.objects.create(origin_biomarker=self.biomarker, user=self.user,
+                                                     algorithm=FeatureSelectionAlgorithm.BBHA,
+                                                     emr_job_id=f'job-{experiment_idx}',
+                                                     execution_time=30 + 10 * experiment_idx)
+            ClusteringTimesRecord.objects.bulk_create([
+                ClusteringTimesRecord(fs_experiment=experiment, number_of_features=5 + record_idx,
+                                      number_of_samples=100 + 50 * experiment_idx, number_of_clusters=2,
+                                      execution_time=0.1 * (record_idx + 1) * (experiment_idx + 1),
+                                      algorithm=ClusteringAlgorithm.K_MEANS,
+                                      scoring_method=ClusteringScoringMethod.C_INDEX)
+                for record_idx in range(records_by_experiment)
+            ])
+
+    def __get_estimation(self, biomarker: Biomarker, algorithm: FeatureSelectionAlgorithm,
+                         algorithm_parameters: Dict[str, Any], params: Optional[Dict[str, Any]] = None):
+        """Requests the estimation of a clustering FS experiment. The params replace the default request params."""
+        query = {
+            'biomarkerPk': biomarker.pk,
+            'numberOfSamples': 200,
+            'algorithm': int(algorithm),
+            'algorithmParameters': json.dumps(algorithm_parameters),
+            'fitnessFunction': int(FitnessFunction.CLUSTERING),
+            'fitnessFunctionParameters': json.dumps({'clusteringParameters': {'nClusters': 2}}),
+        }
+        if params is not None:
+            query.update(params)
+        return self.client.get(reverse('fs_time_estimation'), query)
+
+    @staticmethod
+    def __bbha_parameters(n_stars: int) -> Dict[str, Any]:
+        return {'BBHA': {'numberOfStars': n_stars, 'numberOfIterations': 10}}
+
+    def test_estimation(self):
+        """Tests that the local time is proportional to the number of agents and a remote time is returned."""
+        self.__create_spark_jobs(n_experiments=MIN_EXPERIMENTS, records_by_experiment=MIN_RECORDS)
+
+        response = self.__get_estimation(self.biomarker, FeatureSelectionAlgorithm.BBHA, self.__bbha_parameters(10))
+        self.assertEqual(response.status_code, 200)
+        estimation = response.json()
+        self.assertGreater(estimation['local_time'], 0.0)
+        self.assertIsNotNone(estimation['remote_time'])
+
+        double_agents = self.__get_estimation(self.biomarker, FeatureSelectionAlgorithm.BBHA,
+                                              self.__bbha_parameters(20)).json()
+        self.assertAlmostEqual(double_agents['local_time'], 2 * estimation['local_time'])
+
+    def test_not_enough_records(self):
+        """Tests that no estimation is returned if there are not enough records to fit the cost models."""
+        self.__create_spark_jobs(n_experiments=MIN_EXPERIMENTS - 1, records_by_experiment=MIN_RECORDS)
+
+        response = self.__get_estimation(self.biomarker, FeatureSelectionAlgorithm.BBHA, self.__bbha_parameters(10))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['local_time'])
+        self.assertIsNone(response.json()['remote_time'])
+
+    def test_invalid_params(self):
+        """Tests that invalid params return a 400 error."""
+        self.__create_spark_jobs(n_experiments=MIN_EXPERIMENTS, records_by_experiment=MIN_RECORDS)
+        bbha = FeatureSelectionAlgorithm.BBHA
+        invalid_requests = [
+            {'numberOfSamples': 'abc'},
+            {'algorithm': 99},
+            {'fitnessFunction': 99},
+            {'algorithmParameters': json.dumps({'BBHA': {'numberOfStars': 'abc', 'numberOfIterations': 10}})},
+            {'algorithmParameters': json.dumps({'GA': {}})},
+            {'algorithmParameters': 'not a JSON'},
+        ]
+        for params in invalid_requests:
+            response = self.__get_estimation(self.biomarker, bbha, self.__bbha_parameters(10), params)
+            self.assertEqual(response.status_code, 400, params)
+
+        # Missing params
+        response = self.client.get(reverse('fs_time_estimation'), {'biomarkerPk': self.biomarker.pk})
+        self.assertEqual(response.status_code, 400)
+
+        # Biomarker of another user
+        other_user = User.objects.create_user(username='other_user', email='other@test.com', password=USER_PASSWORD)
+        other_biomarker = Biomarker.objects.create(name='Other', origin=BiomarkerOrigin.MANUAL,
+                                                   state=BiomarkerState.COMPLETED, user=other_user)
+        response = self.__get_estimation(other_biomarker, bbha, self.__bbha_parameters(10))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MAX_FEATURES_BLIND_SEARCH=12, BLIND_SEARCH_MAX_EVALUATIONS=None)
+    def test_blind_search_many_features(self):
+        """Tests that a Blind Search with a lot of features doesn't overflow (it's capped to the allowed features)."""
+        self.__create_spark_jobs(n_experiments=MIN_EXPERIMENTS, records_by_experiment=MIN_RECORDS)
+        big_biomarker = self.__create_biomarker(n_molecules=1100)
+
+        response = self.__get_estimation(big_biomarker, FeatureSelectionAlgorithm.BLIND_SEARCH, {})
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(response.json()['local_time'], 0.0)
@@ -2,13 +2,14 @@ import pickle
 import random
 from typing import Optional, Union, List, Tuple, Dict
 import numpy as np
+from django.conf import settings
 from django.core.files.base import ContentFile
 from rest_framework.exceptions import ValidationError
 from biomarkers.models import Biomarker, MRNAIdentifier, MiRNAIdentifier, CNAIdentifier, MethylationIdentifier
 from common.utils import limit_between_min_max
 from feature_selection.fs_models import SVMKernelOptions, get_survival_svm_model, get_rf_model, get_clustering_model
 from feature_selection.models import SVMKernel, TrainedModel, FitnessFunction, ClusteringScoringMethod, SVMParameters, \
-    SVMTask, ClusteringParameters, RFParameters
+    SVMTask, ClusteringParameters, RFParameters, ClusteringMode
 from user_files.models_choices import FileType
 
 
@@ -135,6 +136,7 @@ def create_models_parameters_and_classifier(
         random_state = int(models_parameters['randomState']) if models_parameters['randomState'] else None
         penalizer = float(models_parameters['penalizer']) if models_parameters['penalizer'] is not None else 0.0
         penalizer = limit_between_min_max(penalizer, min_value=0.0, max_value=1.0)
+        mode = int(models_parameters['mode']) if models_parameters.get('mode') else ClusteringMode.AUTO
 
         clustering_parameters: ClusteringParameters = ClusteringParameters.objects.create(
             algorithm=int(models_parameters['algorithm']),
@@ -143,19 +145,52 @@ def create_models_parameters_and_classifier(
             n_clusters=n_clusters,
             scoring_method=int(models_parameters['scoringMethod']),
             random_state=random_state,
+            mode=mode,
             trained_model=trained_model
         )
 
         clustering_scoring_method = clustering_parameters.scoring_method
         classifier = get_clustering_model(clustering_parameters.algorithm,
                                           number_of_clusters=clustering_parameters.n_clusters,
-                                          random_state=clustering_parameters.random_state)
+                                          random_state=clustering_parameters.random_state,
+                                          scalable=clustering_parameters.mode == ClusteringMode.SCALABLE,
+                                          basis_seed=trained_model.pk)
     else:
         raise ValidationError(f'Parameter fitness_function invalid: {fitness_function} ({type(fitness_function)})')
 
     return classifier, clustering_scoring_method, is_clustering, is_regression
 
 
+def get_clustering_model_for_samples(trained_model: TrainedModel, classifier: 'SurvModel',
+                                     n_samples: int) -> 'SurvModel':
+    """
+    Resolves the AUTO clustering mode once the number of samples is known: the scalable clustering model is used if
+    there are at least CLUSTERING_SCALABLE_MIN_SAMPLES samples. The chosen mode is stored in the ClusteringParameters.
+    @param trained_model: TrainedModel instance.
+    @param classifier: Classifier returned by create_models_parameters_and_classifier().
+    @param n_samples: Number of samples of the dataset.
+    @return: The classifier to use.
+    """
+    if trained_model.fitness_function != FitnessFunction.CLUSTERING:
+        return classifier
+
+    clustering_parameters: ClusteringParameters = trained_model.clustering_parameters
+    if clustering_parameters.mode != ClusteringMode.AUTO:
+        return classifier
+
+    scalable = n_samples >= settings.CLUSTERING_SCALABLE_MIN_SAMPLES
+    clustering_parameters.mode = ClusteringMode.SCALABLE if scalable else ClusteringMode.EXACT
+    clustering_parameters.save(update_fields=['mode'])
+
+    if not scalable:
+        return classifier
+
+    return get_clustering_model(clustering_parameters.algorithm,
+                                number_of_clusters=clustering_parameters.n_clusters,
+                                random_state=clustering_parameters.random_state,
+                                scalable=True, basis_seed=trained_model.pk)
+
+
 def save_model_dump_and_best_score(trained_model: TrainedModel, best_model: 'SurvModel', best_score: float):
     """Saves a model instance and best score in a TrainedModel instance."""
     trained_content = pickle.dumps(best_model)
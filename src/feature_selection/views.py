@@ -20,9 +20,11 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from api_service.utils import get_experiment_source
 from biomarkers.models import Biomarker, BiomarkerState, TrainedModelState, BiomarkerOrigin
+from common.functions import get_integer_enum_from_value
 from common.utils import get_source_pk
+from feature_selection.fs_cost_model import estimate_fs_execution_times
 from feature_selection.models import FSExperiment, FitnessFunction, SVMTimesRecord, TrainedModel, ClusteringTimesRecord, \
-    ClusteringAlgorithm, RFTimesRecord, ClusteringScoringMethod, SVMKernel
+    ClusteringAlgorithm, RFTimesRecord, ClusteringScoringMethod, SVMKernel, FeatureSelectionAlgorithm
 from feature_selection.utils import save_molecule_identifiers, get_svm_kernel_enum, save_model_dump_and_best_score
 from user_files.models_choices import FileType
 
@@ -186,8 +188,14 @@ class FeatureSelectionExperimentAWSNotification(APIView):
         else:
             logging.warning(f'Trying to remove folder in {path}. But it does not exist')
 
-    def __remove_datasets(self, fs_experiment: FSExperiment, emr_settings: Dict[str, Any]):
-        """Removes the datasets from the shared folder."""
+    def __remove_datasets(self, fs_experiment: FSExperiment, emr_settings: Dict[str, Any], remove_results: bool):
+        """
+        Removes the datasets (CSV or Parquet files) from the shared folder.
+        @param fs_experiment: FSExperiment instance.
+        @param emr_settings: EMR settings to get the shared folders paths.
+        @param remove_results: If True, removes the results folder too (i.e. the results were already saved in the
+        database). Otherwise, they're kept to check the errors.
+        """
         # Gets paths of both molecules_df and clinical_df in the shared volume with the microservice
         data_folder = emr_settings['shared_folder_data']
         app_folder_path = os.path.join(data_folder, fs_experiment.app_name)
@@ -195,6 +203,10 @@ class FeatureSelectionExperimentAWSNotification(APIView):
         # Removes datasets folder
         self.__remove_folder_if_exists(app_folder_path)
 
+        if remove_results:
+            results_folder_path = os.path.join(emr_settings['shared_folder_results'], fs_experiment.app_name)
+            self.__remove_folder_if_exists(results_folder_path)
+
     @staticmethod
     def __get_svm_parameters_columns(row: pd.Series) -> Tuple[str, str, str, SVMKernel]:
         """Iterates over rows generating some columns with SVM model parameters"""
@@ -444,8 +456,8 @@ class FeatureSelectionExperimentAWSNotification(APIView):
         trained_model_is_ok = created_biomarker.state == BiomarkerState.COMPLETED
         self.__update_trained_model_state(fs_experiment, trained_model_is_ok)
 
-        # Removes the molecules and clinical datasets from the shared folder
-        self.__remove_datasets(fs_experiment, emr_settings)
+        # Removes the molecules and clinical datasets (and the results, if they were saved) from the shared folders
+        self.__remove_datasets(fs_experiment, emr_settings, remove_results=trained_model_is_ok)
 
         return Response({'ok': True})
 
@@ -508,3 +520,68 @@ class StopFSExperiment(APIView):
 
         # Formats to JSON the ResponseStatus object
         return Response(response)
+
+
+class FeatureSelectionTimeEstimation(APIView):
+    """
+    Estimates the local and remote (Spark) execution time of a FS experiment before submitting it using the cost
+    models fitted on the TimesRecord instances of previous Spark jobs.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @staticmethod
+    def __get_agents_and_iterations(algorithm: FeatureSelectionAlgorithm, algorithm_parameters: Dict[str, Any],
+                                    n_features: int) -> Optional[Tuple[int, int]]:
+        """Gets the number of agents and iterations of the FS algorithm. None if it's not a search algorithm."""
+        if algorithm == FeatureSelectionAlgorithm.BBHA:
+            bbha_parameters = algorithm_parameters['BBHA']
+            return int(bbha_parameters['numberOfStars']), int(bbha_parameters['numberOfIterations'])
+        if algorithm == FeatureSelectionAlgorithm.GA:
+            ga_parameters = algorithm_parameters['GA']
+            return int(ga_parameters['populationSize']), int(ga_parameters['numberOfIterations'])
+        if algorithm == FeatureSelectionAlgorithm.BLIND_SEARCH:
+            # Blind Search is not allowed with more than MAX_FEATURES_BLIND_SEARCH features. Capping the number of
+            # features also prevents overflowing the float operations of the cost model
+            n_combinations = 2 ** min(n_features, settings.MAX_FEATURES_BLIND_SEARCH) - 1
+            if settings.BLIND_SEARCH_MAX_EVALUATIONS is not None:
+                n_combinations = min(n_combinations, settings.BLIND_SEARCH_MAX_EVALUATIONS)
+            return n_combinations, 1
+        return None
+
+    def get(self, request: Request):
+        biomarker_pk = request.GET.get('biomarkerPk')
+        number_of_samples = request.GET.get('numberOfSamples')
+        algorithm = request.GET.get('algorithm')
+        algorithm_parameters = request.GET.get('algorithmParameters')
+        fitness_function = request.GET.get('fitnessFunction')
+        fitness_function_parameters = request.GET.get('fitnessFunctionParameters')
+        if biomarker_pk is None or number_of_samples is None or algorithm is None or algorithm_parameters is None \
+                or fitness_function is None or fitness_function_parameters is None:
+            raise ValidationError('Invalid request params')
+
+        try:
+            biomarker: Biomarker = get_object_or_404(Biomarker, pk=biomarker_pk, user=request.user)
+            n_features = biomarker.number_of_mrnas + biomarker.number_of_mirnas + biomarker.number_of_cnas + \
+                biomarker.number_of_methylations
+            algorithm_enum = get_integer_enum_from_value(algorithm, FeatureSelectionAlgorithm)
+            fit_fun_enum = get_integer_enum_from_value(fitness_function, FitnessFunction)
+            if algorithm_enum is None or fit_fun_enum is None:
+                raise ValidationError('Invalid algorithm or fitness function')
+
+            agents_and_iterations = self.__get_agents_and_iterations(algorithm_enum, json.loads(algorithm_parameters),
+                                                                     n_features)
+            estimation = None
+            if agents_and_iterations is not None:
+                n_agents, n_iterations = agents_and_iterations
+                estimation = estimate_fs_execution_times(fit_fun_enum, json.loads(fitness_function_parameters),
+                                                         n_features, int(number_of_samples), n_agents, n_iterations)
+        except (ValueError, KeyError, TypeError, OverflowError):
+            raise ValidationError('Invalid request params type')
+
+        # If there are not enough records to fit the cost models, no estimation is returned
+        local_time, remote_time = estimation if estimation is not None else (None, None)
+        return Response({
+            'local_time': local_time,
+            'remote_time': remote_time,
+            'spark_is_enabled': settings.ENABLE_AWS_EMR_INTEGRATION
+        })
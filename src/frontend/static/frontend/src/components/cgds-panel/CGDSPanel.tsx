@@ -683,7 +683,17 @@ class CGDSPanel extends React.Component<{}, CGDSPanelState> {
                     iconName: 'circle',
                     color: 'red',
                     loading: false,
-                    title: 'The synchronization has finished with errors. See logs and try again'
+                    title: CGDSDataset.sync_error
+                        ? `The synchronization has finished with errors: ${CGDSDataset.sync_error}`
+                        : 'The synchronization has finished with errors. See logs and try again'
+                }
+                break
+            case CGDSDatasetSynchronizationState.IN_PROCESS:
+                stateIcon = {
+                    iconName: 'sync alternate',
+                    color: 'yellow',
+                    loading: true,
+                    title: `The dataset is being synchronized (${CGDSDataset.sync_progress ?? 0}%)`
                 }
                 break
             case CGDSDatasetSynchronizationState.FILE_DOES_NOT_EXIST:
@@ -92,6 +92,8 @@ interface MiRNAPipelineProps {
     numberOfSamplesMRNA: number,
     numberOfSamplesMiRNA: number,
     numberOfSamplesInCommon: number,
+    numberOfMoleculesKeptMRNA: Nullable<number>,
+    numberOfMoleculesKeptGEM: Nullable<number>,
     getAllUserExperiments: (retryIfNotFound?: boolean) => void,
     selectTagForNewExperiment: (selectedTagId: any) => void,
     handleKeyDownForNewExperiment: (e) => void,
@@ -876,6 +878,8 @@ class MiRNAPipeline extends React.Component<MiRNAPipelineProps, MiRNAPipelineSta
                                 numberOfSamplesMRNA={this.props.numberOfSamplesMRNA}
                                 numberOfSamplesMiRNA={this.props.numberOfSamplesMiRNA}
                                 numberOfSamplesInCommon={this.props.numberOfSamplesInCommon}
+                                numberOfMoleculesKeptMRNA={this.props.numberOfMoleculesKeptMRNA}
+                                numberOfMoleculesKeptGEM={this.props.numberOfMoleculesKeptGEM}
                                 gettingCommonSamples={this.props.gettingCommonSamples}
                                 addingTagForNewExperiment={this.props.addingTagForNewExperiment}
                                 handleKeyDownForNewExperiment={this.props.handleKeyDownForNewExperiment}
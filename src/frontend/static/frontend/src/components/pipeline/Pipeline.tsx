@@ -4,7 +4,7 @@ import { Base } from '../Base'
 import { WebsocketConfig, FileType, Source, SourceType, ResponseRequestWithPagination, AllExperimentsTableControl, AllExperimentsSortField, NewExperiment, Nullable, KySearchParams } from '../../utils/interfaces'
 import { getDjangoHeader, alertGeneralError, getDefaultNewTag, getDefaultSource, getInputFileCSVColumns, getFilenameFromSource, cleanRef, generatesOrderingQuery, getFileSizeInMB, makeSourceAndAppend } from '../../utils/util_functions'
 import ky from 'ky'
-import { DjangoResponseCode, DjangoCommonResponse, DjangoExperiment, ExperimentType, DjangoUserFile, DjangoCGDSStudy, CorrelationMethod, DjangoTag, TagType, DjangoNumberSamplesInCommonResult, DjangoNumberSamplesInCommonOneFrontResult, PValuesAdjustmentMethod, DjangoUserFileUploadErrorInternalCode } from '../../utils/django_interfaces'
+import { DjangoResponseCode, DjangoCommonResponse, DjangoExperiment, ExperimentType, DjangoUserFile, DjangoCGDSStudy, CorrelationMethod, DjangoTag, TagType, DjangoNumberSamplesInCommonResult, DjangoNumberSamplesInCommonOneFrontResult, DjangoNumberOfMoleculesKeptResult, PValuesAdjustmentMethod, DjangoUserFileUploadErrorInternalCode } from '../../utils/django_interfaces'
 import { WebsocketClientCustom } from '../../websockets/WebsocketClient'
 import isEqual from 'lodash/isEqual'
 import intersection from 'lodash/intersection'
@@ -22,6 +22,7 @@ declare const urlUserExperiments: string
 declare const urlTagsCRUD: string
 declare const urlGetCommonSamples: string
 declare const urlGetCommonSamplesOneFront: string
+declare const urlGetNumberOfMoleculesKept: string
 
 /**
  * AllExperiments Request structure.
@@ -58,6 +59,10 @@ type PipelineState = {
     numberOfSamplesMRNA: number,
     numberOfSamplesGEM: number,
     numberOfSamplesInCommon: number,
+    /** Number of molecules of the mRNA dataset kept with the selected minimum std (only for datasets in backend) */
+    numberOfMoleculesKeptMRNA: Nullable<number>,
+    /** Number of molecules of the GEM dataset kept with the selected minimum std (only for datasets in backend) */
+    numberOfMoleculesKeptGEM: Nullable<number>,
     sendingRequest: boolean,
     gettingExperiments: boolean,
     lastExperiments: DjangoExperiment[],
@@ -77,6 +82,7 @@ type PipelineState = {
 class Pipeline extends React.Component<{}, PipelineState> {
     websocketClient: WebsocketClientCustom
     filterTimeout: number | undefined
+    moleculesKeptTimeouts: { [sourceStateName in NewExperimentSourceStateName]?: number } = {}
     defaultNewExperiment: NewExperiment
     abortController = new AbortController()
 
@@ -99,6 +105,8 @@ class Pipeline extends React.Component<{}, PipelineState> {
             numberOfSamplesMRNA: 0,
             numberOfSamplesGEM: 0,
             numberOfSamplesInCommon: 0,
+            numberOfMoleculesKeptMRNA: null,
+            numberOfMoleculesKeptGEM: null,
             sendingRequest: false,
             lastExperiments: [],
             gettingExperiments: false,
@@ -132,6 +140,13 @@ class Pipeline extends React.Component<{}, PipelineState> {
         }
 
         this.setState({ newExperiment })
+
+        // Updates the number of molecules kept by the std filter (waits for the user to stop moving the slider)
+        if (name === 'standardDeviationGene' || name === 'standardDeviationGEM') {
+            const sourceStateName: NewExperimentSourceStateName = name === 'standardDeviationGene' ? 'mRNASource' : 'gemSource'
+            clearTimeout(this.moleculesKeptTimeouts[sourceStateName])
+            this.moleculesKeptTimeouts[sourceStateName] = window.setTimeout(() => this.checkMoleculesKeptInBackend(sourceStateName), 300)
+        }
     }
 
     /**
@@ -150,7 +165,58 @@ class Pipeline extends React.Component<{}, PipelineState> {
         this.setState({
             numberOfSamplesMRNA: 0,
             numberOfSamplesGEM: 0,
-            numberOfSamplesInCommon: 0
+            numberOfSamplesInCommon: 0,
+            numberOfMoleculesKeptMRNA: null,
+            numberOfMoleculesKeptGEM: null
+        })
+    }
+
+    /**
+     * Sets the number of molecules kept by the std filter of a Source
+     * @param sourceStateName Source's field in the new experiment
+     * @param numberOfMoleculesKept Number of molecules kept or null to hide it
+     */
+    setNumberOfMoleculesKept (sourceStateName: NewExperimentSourceStateName, numberOfMoleculesKept: Nullable<number>) {
+        if (sourceStateName === 'mRNASource') {
+            this.setState({ numberOfMoleculesKeptMRNA: numberOfMoleculesKept })
+        } else {
+            this.setState({ numberOfMoleculesKeptGEM: numberOfMoleculesKept })
+        }
+    }
+
+    /**
+     * Gets the number of molecules of a dataset hosted in backend which are kept with
+     * the selected minimum standard deviation (using the statistics computed over all its samples)
+     * @param sourceStateName Source's field in the new experiment
+     */
+    checkMoleculesKeptInBackend = (sourceStateName: NewExperimentSourceStateName) => {
+        const isMRNA = sourceStateName === 'mRNASource'
+        const source = this.state.newExperiment[sourceStateName]
+        const sourceId = this.getIdInBackend(source)
+
+        if (sourceId === null) {
+            this.setNumberOfMoleculesKept(sourceStateName, null)
+            return
+        }
+
+        const searchParams = {
+            sourceId,
+            sourceType: source.type,
+            fileType: isMRNA ? FileType.MRNA : this.state.gemFileType,
+            minimumStd: isMRNA ? this.state.newExperiment.standardDeviationGene : this.state.newExperiment.standardDeviationGEM
+        }
+
+        ky.get(urlGetNumberOfMoleculesKept, { signal: this.abortController.signal, searchParams: searchParams as KySearchParams }).then((response) => {
+            response.json().then((jsonResponse: DjangoNumberOfMoleculesKeptResult) => {
+                const numberOfMoleculesKept = jsonResponse.status.code === DjangoResponseCode.SUCCESS
+                    ? jsonResponse.data.number_of_molecules_kept
+                    : null
+                this.setNumberOfMoleculesKept(sourceStateName, numberOfMoleculesKept)
+            }).catch((err) => {
+                console.log('Error parsing JSON ->', err)
+            })
+        }).catch((err) => {
+            console.log('Error getting the number of molecules kept', err)
         })
     }
 
@@ -642,7 +708,7 @@ class Pipeline extends React.Component<{}, PipelineState> {
             newExperiment.correlationMethod = CorrelationMethod.PEARSON
         }
 
-        this.setState({ newExperiment }, this.updateSourceFilenames)
+        this.setState({ newExperiment, numberOfMoleculesKeptGEM: null }, this.updateSourceFilenames)
     }
 
     /**
@@ -858,6 +924,8 @@ class Pipeline extends React.Component<{}, PipelineState> {
     updateSourceFilenamesAndCommonSamples = () => {
         this.updateSourceFilenames()
         this.checkCommonSamples()
+        this.checkMoleculesKeptInBackend('mRNASource')
+        this.checkMoleculesKeptInBackend('gemSource')
     }
 
     /**
@@ -987,6 +1055,8 @@ class Pipeline extends React.Component<{}, PipelineState> {
                         numberOfSamplesMRNA={this.state.numberOfSamplesMRNA}
                         numberOfSamplesMiRNA={this.state.numberOfSamplesGEM}
                         numberOfSamplesInCommon={this.state.numberOfSamplesInCommon}
+                        numberOfMoleculesKeptMRNA={this.state.numberOfMoleculesKeptMRNA}
+                        numberOfMoleculesKeptGEM={this.state.numberOfMoleculesKeptGEM}
                         newTagForNewExperiment={this.state.newTagForNewExperiment}
                         addingTagForNewExperiment={this.state.addingTagForNewExperiment}
                         handleKeyDownForNewExperiment={this.handleKeyDownForNewExperiment}
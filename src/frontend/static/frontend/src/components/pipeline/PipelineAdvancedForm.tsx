@@ -1,7 +1,7 @@
 import React, { useState } from 'react'
 import { Form, Select, Label, Icon, PopupContentProps } from 'semantic-ui-react'
 import { SingleRangeSlider, SingleRangeSliderProps, SliderProps } from 'neo-react-semantic-ui-range'
-import { NewExperiment, FileType } from '../../utils/interfaces'
+import { NewExperiment, FileType, Nullable } from '../../utils/interfaces'
 import { getCorrelationMethodSelectOptions, getAdjustmentMethodSelectOptions } from '../../utils/util_functions'
 import { InfoPopup } from './experiment-result/gene-gem-details/InfoPopup'
 import { SemanticShorthandItem } from 'semantic-ui-react/dist/commonjs/generic'
@@ -55,6 +55,10 @@ interface PipelineAdvancedFormProps {
     gemDescription: string,
     /** To check if we need to show some GEM extra fields */
     gemFileType: FileType
+    /** Number of molecules of the mRNA dataset kept with the selected std. Null if it's not available */
+    numberOfMoleculesKeptMRNA: Nullable<number>,
+    /** Number of molecules of the GEM dataset kept with the selected std. Null if it's not available */
+    numberOfMoleculesKeptGEM: Nullable<number>,
     /** Callback to handle advance form changes */
     handleFormInputsChange: (name: string, value) => void
 }
@@ -189,6 +193,12 @@ export const PipelineAdvancedForm = (props: PipelineAdvancedFormProps) => {
 
                         <Label color="blue">0</Label>
                         <Label color="blue" className="pull-right">{MAX_FILTER_VALUE}</Label>
+
+                        {props.numberOfMoleculesKeptMRNA !== null &&
+                            <Label className='full-width align-center margin-top-5'>
+                                {props.numberOfMoleculesKeptMRNA} genes kept (considering all the samples)
+                            </Label>
+                        }
                     </Form.Field>
 
                     {/* Minimum Standard Deviation for GEM */}
@@ -202,6 +212,12 @@ export const PipelineAdvancedForm = (props: PipelineAdvancedFormProps) => {
                         <SingleRangeSlider {...stdGemSliderSettings} />
                         <Label color="blue">0</Label>
                         <Label color="blue" className="pull-right">{MAX_FILTER_VALUE}</Label>
+
+                        {props.numberOfMoleculesKeptGEM !== null &&
+                            <Label className='full-width align-center margin-top-5'>
+                                {props.numberOfMoleculesKeptGEM} {props.gemDescription}s kept (considering all the samples)
+                            </Label>
+                        }
                     </Form.Field>
 
                     {/* P-value adjustment method */}
@@ -1,6 +1,6 @@
 import React from 'react'
 import { Segment, Grid, Icon, Header, Button, Form, Label, DropdownMenuProps, Progress, Select, DropdownItemProps } from 'semantic-ui-react'
-import { FileType, SourceType, NewExperiment } from '../../utils/interfaces'
+import { FileType, SourceType, NewExperiment, Nullable } from '../../utils/interfaces'
 import { checkedValidityCallback, experimentSourceIsValid, getExperimentTypeObj } from '../../utils/util_functions'
 import { ExperimentTagInfo } from './ExperimentTagInfo'
 import { DjangoTag, DjangoUserFile, DjangoCGDSStudy } from '../../utils/django_interfaces'
@@ -27,6 +27,8 @@ interface PipelineFormProps {
     numberOfSamplesMRNA: number,
     numberOfSamplesMiRNA: number,
     numberOfSamplesInCommon: number,
+    numberOfMoleculesKeptMRNA: Nullable<number>,
+    numberOfMoleculesKeptGEM: Nullable<number>,
     selectTagForNewExperiment: (selectedTagId: any) => void,
     handleKeyDownForNewExperiment: (e) => void,
     handleAddTagInputsChangeForNewExperiment: (name: string, value: any) => void,
@@ -254,6 +256,8 @@ export class PipelineForm extends React.Component<PipelineFormProps, {}> {
                         isEditing={isEditing}
                         gemDescription={gemData.description}
                         gemFileType={this.props.gemFileType}
+                        numberOfMoleculesKeptMRNA={this.props.numberOfMoleculesKeptMRNA}
+                        numberOfMoleculesKeptGEM={this.props.numberOfMoleculesKeptGEM}
                         handleFormInputsChange={this.props.handleFormInputsChange}
                     />
 
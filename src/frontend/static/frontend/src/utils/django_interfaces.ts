@@ -41,7 +41,8 @@ enum CGDSDatasetSynchronizationState {
     FINISHED_WITH_ERROR = 2,
     FILE_DOES_NOT_EXIST = 3,
     COULD_NOT_SAVE_IN_MONGO = 4,
-    NO_PATIENT_ID_COLUMN_FOUND = 5
+    NO_PATIENT_ID_COLUMN_FOUND = 5,
+    IN_PROCESS = 6
 }
 
 /**
@@ -144,6 +145,8 @@ interface DjangoCGDSDataset {
     header_row_index: number,
     date_last_synchronization?: string,
     state?: CGDSDatasetSynchronizationState,
+    sync_progress?: number,
+    sync_error?: Nullable<string>,
     number_of_rows?: number,
     number_of_samples?: number,
     is_cpg_site_id: boolean,
@@ -356,6 +359,15 @@ interface DjangoSamplesInCommonOneFrontResultJSON {
     number_samples_backend: number
 }
 
+/**
+ * JSON structure of the service that returns the number of molecules of a dataset (UserFile or CGDSDataset)
+ * which are kept with a minimum standard deviation
+ */
+interface DjangoNumberOfMoleculesKeptResultJSON {
+    number_of_molecules: number,
+    number_of_molecules_kept: number
+}
+
 /**
  * JSON Structure of Correlation Graph info
  */
@@ -537,6 +549,13 @@ interface DjangoNumberSamplesInCommonOneFrontResult extends DjangoCommonResponse
     data: DjangoSamplesInCommonOneFrontResultJSON
 }
 
+/**
+ * Django number of molecules kept service Response
+ */
+interface DjangoNumberOfMoleculesKeptResult extends DjangoCommonResponse<DjangoSamplesInCommonResultInternalCode> {
+    data: DjangoNumberOfMoleculesKeptResultJSON
+}
+
 /**
  * Django correlation graph service response. It's a common response
  * but with the field 'data'
@@ -652,6 +671,7 @@ export {
     DjangoMiRNADiseasesJSON,
     DjangoMiRNADrugsJSON,
     DjangoNumberSamplesInCommonOneFrontResult,
+    DjangoNumberOfMoleculesKeptResult,
     DjangoExperiment,
     DjangoUser,
     DjangoInstitution,
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Gene
+from .models import Gene, StandardSymbol
 
 
 class GeneAdmin(admin.ModelAdmin):
@@ -9,3 +9,12 @@ class GeneAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Gene, GeneAdmin)
+
+
+class StandardSymbolAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'source', 'standard_symbols', 'date_updated')
+    list_filter = ('source', )
+    search_fields = ('symbol', )
+
+
+admin.site.register(StandardSymbol, StandardSymbolAdmin)
@@ -0,0 +1,48 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from api_service.standard_symbols import store_standard_symbols
+from genes.models import StandardSymbol, StandardSymbolSource
+
+# Sources by the name used in the command's arguments
+SOURCES = {
+    'bioapi': StandardSymbolSource.BIOAPI,
+    'modulector': StandardSymbolSource.MODULECTOR
+}
+
+
+class Command(BaseCommand):
+    help = 'Loads (or exports) the stored standard symbols of genes (BioAPI) or miRNAs (Modulector) from (or to) a ' \
+           'JSON file with the molecules as keys and their standard symbols as values (the same format returned by ' \
+           'the services). It allows to seed the symbols offline, so the datasets can be synchronized without ' \
+           'requesting them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=SOURCES.keys(), help='Service which standardizes the molecules')
+        parser.add_argument('file', help='JSON file path')
+        parser.add_argument('--export', action='store_true',
+                            help='Exports the stored standard symbols to the file instead of loading them')
+
+    def handle(self, *args, **options):
+        source = SOURCES[options['source']]
+        file_path = options['file']
+
+        if options['export']:
+            standard_symbols = dict(
+                StandardSymbol.objects.filter(source=source).values_list('symbol', 'standard_symbols')
+            )
+            with open(file_path, 'w') as fp:
+                json.dump(standard_symbols, fp)
+            self.stdout.write(f'{len(standard_symbols)} standard symbols exported to "{file_path}"')
+            return
+
+        try:
+            with open(file_path) as fp:
+                standard_symbols = json.load(fp)
+        except (OSError, ValueError) as ex:
+            raise CommandError(f'Error reading "{file_path}": {ex}')
+
+        if not isinstance(standard_symbols, dict):
+            raise CommandError('The file must contain a JSON object with the molecules as keys')
+
+        store_standard_symbols(source, standard_symbols)
+        self.stdout.write(f'{len(standard_symbols)} standard symbols loaded from "{file_path}"')
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('genes', '0002_auto_20210114_2331'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandardSymbol',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.PositiveSmallIntegerField(choices=[(1, 'BioAPI'), (2, 'Modulector')])),
+                ('symbol', models.CharField(max_length=100)),
+                ('standard_symbols', models.JSONField(null=True)),
+                ('date_updated', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='standardsymbol',
+            constraint=models.UniqueConstraint(fields=('source', 'symbol'), name='unique_standard_symbol_by_source'),
+        ),
+    ]
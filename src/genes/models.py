@@ -11,3 +11,29 @@ class Gene(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class StandardSymbolSource(models.IntegerChoices):
+    """Service which standardizes the molecules' symbols"""
+    BIOAPI = 1, 'BioAPI'  # Genes (mRNA and CNA datasets)
+    MODULECTOR = 2, 'Modulector'  # miRNAs
+
+
+class StandardSymbol(models.Model):
+    """
+    Standard symbol/s of a molecule retrieved from BioAPI or Modulector. It's used as a persistent cache to standardize
+    the datasets without requesting the same molecules again in every sync or upload
+    """
+    source = models.PositiveSmallIntegerField(choices=StandardSymbolSource.choices)
+    symbol = models.CharField(max_length=100)
+    # List of symbols for genes, a single symbol for miRNAs. Null if the molecule was not found
+    standard_symbols = models.JSONField(null=True)
+    date_updated = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'symbol'], name='unique_standard_symbol_by_source')
+        ]
+
+    def __str__(self):
+        return f'{self.symbol} -> {self.standard_symbols}'
@@ -221,6 +221,14 @@ EXPERIMENT_CHUNK_SIZE: int = int(os.getenv('EXPERIMENT_CHUNK_SIZE', 500))
 # Number of elements to compute external sorting in Rust
 SORT_BUFFER_SIZE: int = int(os.getenv('SORT_BUFFER_SIZE', 2_000_000))
 
+# Per-molecule statistics (mean, standard deviation and number of NaNs over all the samples) of every UserFile and
+# CGDSDataset are computed at ingestion time and stored in MEDIA_ROOT/MOLECULES_STATS_FOLDER. They are used to skip the
+# molecules removed by the minimum standard deviation filter before fetching them and to preview the number of
+# molecules kept. Up to MOLECULES_STATS_MAX_SKIPPED_IN_QUERY molecules are excluded in the MongoDB query, if there are
+# more they are removed after fetching each chunk
+MOLECULES_STATS_FOLDER: str = os.getenv('MOLECULES_STATS_FOLDER', 'molecules_stats')
+MOLECULES_STATS_MAX_SKIPPED_IN_QUERY: int = int(os.getenv('MOLECULES_STATS_MAX_SKIPPED_IN_QUERY', 20_000))
+
 # Time limit in seconds for a correlation analysis to be computed. If the experiment is not finished in this time, it is
 # marked as TIMEOUT_EXCEEDED
 COR_ANALYSIS_SOFT_TIME_LIMIT: int = int(os.getenv('COR_ANALYSIS_SOFT_TIME_LIMIT', 10800))  # 3 hours
@@ -263,6 +271,36 @@ CGDS_READ_TIMEOUT: int = int(os.getenv('CGDS_READ_TIMEOUT', 60))
 # Chunk size (in bytes) in which CGDSStudy file is retrieved during CGDSStudy synchronization
 CGDS_CHUNK_SIZE: int = int(os.getenv('CGDS_CHUNK_SIZE', 2097152))  # Default 2MB
 
+# Number of rows of every chunk in which the CGDSDatasets' files are parsed, standardized and inserted in MongoDB during
+# CGDSStudy synchronization. The memory used by every dataset being synchronized depends on this value, not on the
+# file's size
+CGDS_SYNC_CHUNK_SIZE: int = int(os.getenv('CGDS_SYNC_CHUNK_SIZE', 5000))
+
+# Downloaded CGDSStudy archives are stored in MEDIA_ROOT/CGDS_ARCHIVES_FOLDER named by the SHA-256 of their content.
+# Re-syncs use conditional requests (ETag/Last-Modified), so unchanged archives are not downloaded again, and interrupted
+# downloads are resumed with HTTP Range requests (up to CGDS_DOWNLOAD_RETRIES times in the same sync). The least recently
+# used archives are removed when they exceed CGDS_ARCHIVES_CACHE_MAX_SIZE MB. Set it to 0 to remove the archive after
+# every sync
+CGDS_ARCHIVES_FOLDER: str = os.getenv('CGDS_ARCHIVES_FOLDER', 'cgds_archives')
+CGDS_ARCHIVES_CACHE_MAX_SIZE: int = int(os.getenv('CGDS_ARCHIVES_CACHE_MAX_SIZE', 10240))  # Default 10GB
+CGDS_DOWNLOAD_RETRIES: int = int(os.getenv('CGDS_DOWNLOAD_RETRIES', 3))
+
+# If True, CGDSStudy URLs can be local sources (file:// URLs or paths to a tar/tar.gz file or to an extracted study
+# directory) which are read in place. If CGDS_LOCAL_SOURCES_ROOT is set, they must be inside that folder. Disabled by
+# default as any file of the server could be read
+CGDS_ALLOW_LOCAL_SOURCES: bool = os.getenv('CGDS_ALLOW_LOCAL_SOURCES', 'false') == 'true'
+CGDS_LOCAL_SOURCES_ROOT: str = os.getenv('CGDS_LOCAL_SOURCES_ROOT', '')
+
+# Maximum number of datasets of a CGDSStudy that are parsed and inserted concurrently during its synchronization
+CGDS_MAX_PARALLEL_DATASETS: int = int(os.getenv('CGDS_MAX_PARALLEL_DATASETS', 3))
+
+# If True, the new versions of a CGDSStudy (and the re-syncs of failed datasets) are compared row by row (using content
+# hashes stored in MEDIA_ROOT/CGDS_ROWS_HASHES_FOLDER) with the previous version of the study, and only the added,
+# removed and changed rows are written in MongoDB. The "Sync all" strategy always rewrites all the rows. Disabled by
+# default (opt-in)
+CGDS_INCREMENTAL_SYNC: bool = os.getenv('CGDS_INCREMENTAL_SYNC', 'false') == 'true'
+CGDS_ROWS_HASHES_FOLDER: str = os.getenv('CGDS_ROWS_HASHES_FOLDER', 'cgds_rows_hashes')
+
 # Threshold to check if the GEM data is ordinal or continuous. If the number of different values is <= this value
 # it's considered ordinal
 THRESHOLD_ORDINAL: int = int(os.getenv('THRESHOLD_ORDINAL', 5))
@@ -309,6 +347,18 @@ BIOAPI_SETTINGS = {
     'port': os.getenv('BIOAPI_PORT', '8002')
 }
 
+# Number of retries of the requests to Modulector/BioAPI (connection errors and 502, 503 and 504 responses) and number
+# of connections kept open to every service
+MODULECTOR_BIOAPI_RETRIES: int = int(os.getenv('MODULECTOR_BIOAPI_RETRIES', 3))
+MODULECTOR_BIOAPI_POOL_SIZE: int = int(os.getenv('MODULECTOR_BIOAPI_POOL_SIZE', 10))
+
+# The standard symbols of the genes and miRNAs retrieved from BioAPI/Modulector are stored in the DB (StandardSymbol
+# model) and reused in the next datasets' syncs and uploads. The missing symbols are requested in batches of
+# STANDARD_SYMBOLS_BATCH_SIZE molecules. Stored symbols older than STANDARD_SYMBOLS_CACHE_DAYS days are requested again
+# (0 to never request them again). If the request fails, the stored ones are used anyway
+STANDARD_SYMBOLS_BATCH_SIZE: int = int(os.getenv('STANDARD_SYMBOLS_BATCH_SIZE', 2000))
+STANDARD_SYMBOLS_CACHE_DAYS: int = int(os.getenv('STANDARD_SYMBOLS_CACHE_DAYS', 30))
+
 # Multiomix-aws-emr
 AWS_EMR_SETTINGS = {
     'host': os.getenv('AWS_EMR_HOST', '127.0.0.1'),
@@ -324,6 +374,16 @@ ENABLE_AWS_EMR_INTEGRATION: bool = os.getenv('ENABLE_AWS_EMR_INTEGRATION', 'fals
 # If True, sends the 'debug' parameter to Multiomix-aws-emr service to log the Spark execution
 EMR_DEBUG_IS_ENABLED: bool = os.getenv('EMR_DEBUG_IS_ENABLED', 'false') == 'true'
 
+# Format of the datasets shared with the Multiomix-aws-emr service: 'parquet' (compressed and typed, faster to write
+# and read) or 'csv' (tab separated, for versions of the service which don't support Parquet)
+EMR_DATASETS_FORMAT: str = os.getenv('EMR_DATASETS_FORMAT', 'parquet')
+
+# Local FS job server (python manage.py run_fs_job_server) which implements the same protocol of Multiomix-aws-emr.
+# Number of processes to run the jobs and URL of the Multiomix endpoint to notify when a job finishes
+FS_JOB_SERVER_N_WORKERS: int = int(os.getenv('FS_JOB_SERVER_N_WORKERS', 2))
+FS_JOB_SERVER_NOTIFICATION_URL: str = os.getenv('FS_JOB_SERVER_NOTIFICATION_URL',
+                                                'http://127.0.0.1:8000/feature-selection/aws-notification/')
+
 # Value used to indicate tha data is not present in a dataset
 NON_DATA_VALUE: str = 'NA'
 
@@ -333,12 +393,24 @@ NON_DATA_VALUE: str = 'NA'
 # Number of cores used to run the survival RF model
 N_JOBS_RF: int = int(os.getenv('N_JOBS_RF', 1))
 
+# Clustering fitness functions use MiniBatchKMeans (instead of KMeans) or a Nyström-approximated spectral clustering with
+# CLUSTERING_NYSTROEM_N_COMPONENTS basis samples (instead of SpectralClustering) when the dataset has at least
+# CLUSTERING_SCALABLE_MIN_SAMPLES samples (only if the user didn't choose a specific mode)
+CLUSTERING_SCALABLE_MIN_SAMPLES: int = int(os.getenv('CLUSTERING_SCALABLE_MIN_SAMPLES', 2000))
+CLUSTERING_NYSTROEM_N_COMPONENTS: int = int(os.getenv('CLUSTERING_NYSTROEM_N_COMPONENTS', 300))
+
 # Number of cores used to compute CrossValidation
 N_JOBS_CV: int = int(os.getenv('N_JOBS_CV', 1))
 
 # Number of cores used to compute GridSearch for the CoxNetSurvivalAnalysis
 COX_NET_GRID_SEARCH_N_JOBS: int = int(os.getenv('COX_NET_GRID_SEARCH_N_JOBS', 2))
 
+# Maximum memory (in MB) allowed to keep a Gram matrix (samples x samples) for every star in the improved BBHA when
+# a linear-kernel SVM is used as fitness function. The Gram matrices are updated incrementally when a star toggles some
+# features instead of computing the kernel from scratch in every evaluation. If the needed memory exceeds this value,
+# the kernel is computed by the model in every evaluation
+FS_INCREMENTAL_GRAM_MAX_MEMORY_MB: int = int(os.getenv('FS_INCREMENTAL_GRAM_MAX_MEMORY_MB', 512))
+
 # Minimum and maximum number of iterations user can select to run the BBHA/PSO algorithm
 MIN_ITERATIONS_METAHEURISTICS: int = int(os.getenv('MIN_ITERATIONS_METAHEURISTICS', 1))
 MAX_ITERATIONS_METAHEURISTICS: int = int(os.getenv('MAX_ITERATIONS_METAHEURISTICS', 20))
@@ -356,9 +428,68 @@ MAX_FEATURES_COX_REGRESSION: int = int(os.getenv('MAX_FEATURES_COX_REGRESSION',
 
 # Maximum number of features to allow to run a Blind Search algorithm (the number of computed combination is _N!_).
 # If the number of features is greater than this value, the algorithm is disabled and only metaheuristic
-# algorithms are allowed
+# algorithms are allowed. 10-12 features are feasible evaluating the combinations in parallel (N_JOBS_BLIND_SEARCH)
+# with a time budget (BLIND_SEARCH_TIME_LIMIT)
 MAX_FEATURES_BLIND_SEARCH: int = int(os.getenv('MAX_FEATURES_BLIND_SEARCH', 7))
 
+# Time limit in seconds for the FS algorithms (Blind Search, BBHA, GA and CoxNet). When it's reached, the best result
+# found so far is returned. By default, it leaves a margin of 5 minutes before FS_SOFT_TIME_LIMIT to store the results
+FS_ALGORITHMS_TIME_LIMIT: int = int(os.getenv('FS_ALGORITHMS_TIME_LIMIT', max(FS_SOFT_TIME_LIMIT - 300, 60)))
+
+# Number of processes used to evaluate the combinations of features in the Blind Search algorithm. Set it to -1 to use
+# all the cores. If it's 1 the combinations are evaluated sequentially in the Celery worker process. Every FS worker
+# process runs its own pool, so it should be at most the number of cores divided by the FS workers' concurrency
+N_JOBS_BLIND_SEARCH: int = int(os.getenv('N_JOBS_BLIND_SEARCH', 1))
+
+# Time limit in seconds to evaluate combinations in the Blind Search algorithm. When it's reached, the best combination
+# found so far is returned. It's always limited by FS_ALGORITHMS_TIME_LIMIT
+BLIND_SEARCH_TIME_LIMIT: int = int(os.getenv('BLIND_SEARCH_TIME_LIMIT', FS_ALGORITHMS_TIME_LIMIT))
+
+# Maximum number of combinations to evaluate in the Blind Search algorithm (from the smallest to the biggest ones). If
+# it's None all the combinations are evaluated (always respecting BLIND_SEARCH_TIME_LIMIT)
+BLIND_SEARCH_MAX_EVALUATIONS: Optional[int]
+blind_search_max_evaluations_str: Optional[str] = os.getenv('BLIND_SEARCH_MAX_EVALUATIONS')
+if blind_search_max_evaluations_str is not None:
+    BLIND_SEARCH_MAX_EVALUATIONS = int(blind_search_max_evaluations_str)
+else:
+    BLIND_SEARCH_MAX_EVALUATIONS = None
+
+# Island model of the Genetic Algorithms: the population is split in GA_N_ISLANDS sub-populations which evolve in
+# parallel processes. Every GA_MIGRATION_INTERVAL generations the GA_N_MIGRANTS best solutions of every island migrate
+# to the next one. If GA_N_ISLANDS is 1 the sequential version is used
+GA_N_ISLANDS: int = int(os.getenv('GA_N_ISLANDS', 1))
+GA_MIGRATION_INTERVAL: int = int(os.getenv('GA_MIGRATION_INTERVAL', 5))
+GA_N_MIGRANTS: int = int(os.getenv('GA_N_MIGRANTS', 2))
+
+# Minimum number of seconds between checkpoints of the state of the BBHA and GA algorithms. Checkpoints are stored in
+# MEDIA_ROOT/FS_CHECKPOINTS_FOLDER and are used to resume the experiment if the worker is lost. Set it to 0 to disable
+# checkpoints
+FS_CHECKPOINT_INTERVAL: int = int(os.getenv('FS_CHECKPOINT_INTERVAL', 300))
+FS_CHECKPOINTS_FOLDER: str = os.getenv('FS_CHECKPOINTS_FOLDER', 'fs_checkpoints')
+
+# Racing evaluation of the CrossValidation in the FS algorithms: the CV folds of every candidate subset of features are
+# evaluated incrementally and the candidate is abandoned when an upper confidence bound of its mean score (mean +
+# FS_CV_RACING_Z standard errors) falls below the best score found so far. It's only checked after evaluating at least
+# FS_CV_RACING_MIN_FOLDS folds
+FS_CV_RACING_ENABLED: bool = os.getenv('FS_CV_RACING_ENABLED', 'false') == 'true'
+FS_CV_RACING_MIN_FOLDS: int = int(os.getenv('FS_CV_RACING_MIN_FOLDS', 3))
+FS_CV_RACING_Z: float = float(os.getenv('FS_CV_RACING_Z', 1.96))
+
+# Warm-started fits in the CrossValidation of BBHA and GA: every SVM is fitted starting from the coefficients of the
+# model fitted with the most similar subset of features instead of from zero. Every FS_WARM_START_CALIBRATION_PERIOD-th
+# fit starts from zero to estimate the number of optimizer iterations saved (0 to never do it)
+FS_WARM_START_ENABLED: bool = os.getenv('FS_WARM_START_ENABLED', 'false') == 'true'
+FS_WARM_START_CALIBRATION_PERIOD: int = int(os.getenv('FS_WARM_START_CALIBRATION_PERIOD', 10))
+
+# Cost models to decide if a BBHA experiment runs locally or in Spark. They're fitted on the TimesRecord instances of
+# previous Spark jobs and are used only if there are at least FS_COST_MODEL_MIN_RECORDS records for the fitness function
+# and FS_COST_MODEL_MIN_EXPERIMENTS Spark jobs. Otherwise, MIN_COMBINATIONS_SPARK is used.
+# FS_COST_MODEL_LOCAL_SPEED_FACTOR is the ratio between the time of a fitness evaluation in the Celery workers and in
+# the Spark executors (e.g. 2.0 if the workers are twice as slow)
+FS_COST_MODEL_MIN_RECORDS: int = int(os.getenv('FS_COST_MODEL_MIN_RECORDS', 100))
+FS_COST_MODEL_MIN_EXPERIMENTS: int = int(os.getenv('FS_COST_MODEL_MIN_EXPERIMENTS', 5))
+FS_COST_MODEL_LOCAL_SPEED_FACTOR: float = float(os.getenv('FS_COST_MODEL_LOCAL_SPEED_FACTOR', 1.0))
+
 # Minimum number of features to allow the user to run metaheuristics algorithms (>=). This prevents to run metaheuristic
 # on datasets with a small number of features which leads to experiments with more metaheuristics agents than number
 # of total features combinations. We recommend to set this parameter to a value N such that
@@ -366,6 +497,13 @@ MAX_FEATURES_BLIND_SEARCH: int = int(os.getenv('MAX_FEATURES_BLIND_SEARCH', 7))
 # Also, this must be less than or equal to the MAX_FEATURES_BLIND_SEARCH value
 MIN_FEATURES_METAHEURISTICS: int = int(os.getenv('MIN_FEATURES_METAHEURISTICS', 7))
 
+# Univariate survival pre-screening of the molecules before running the metaheuristics (BBHA and GA). A Cox score
+# (log-rank) test is computed for every molecule and only the molecules among the FS_SCREENING_TOP_K ones with the
+# lowest p-values and with a Benjamini-Hochberg q-value <= FS_SCREENING_MAX_Q_VALUE are kept (both filters apply if
+# they're enabled). 0 disables each filter. At least MIN_FEATURES_METAHEURISTICS molecules are always kept
+FS_SCREENING_TOP_K: int = int(os.getenv('FS_SCREENING_TOP_K', 0))
+FS_SCREENING_MAX_Q_VALUE: float = float(os.getenv('FS_SCREENING_MAX_Q_VALUE', 0))
+
 # Minimum number of combinations to allow the Spark execution (if less, the execution is done locally). This is computed
 # as the number of agents in the metaheuristic multiplied by the number of iterations. This prevents to run Spark jobs
 # (which are slow to start) on small experiments to save time and resources.
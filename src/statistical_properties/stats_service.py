@@ -2,7 +2,6 @@ import warnings
 from typing import Dict, Tuple, cast, Optional, Union, List
 import numpy as np
 import pandas as pd
-from lifelines import CoxPHFitter
 from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sksurv.metrics import concordance_index_censored
@@ -17,8 +16,10 @@ from feature_selection.fs_algorithms import SurvModel, select_top_cox_regression
 from feature_selection.fs_models import ClusteringModels
 from feature_selection.models import TrainedModel, ClusteringScoringMethod, ClusteringParameters, FitnessFunction, \
     RFParameters
-from feature_selection.utils import create_models_parameters_and_classifier, save_model_dump_and_best_score
+from feature_selection.utils import create_models_parameters_and_classifier, save_model_dump_and_best_score, \
+    get_clustering_model_for_samples
 from statistical_properties.models import StatisticalValidation, MoleculeWithCoefficient
+from statistical_properties.survival_scoring import cox_c_index_and_log_likelihood
 from user_files.models_choices import MoleculeType
 
 
@@ -179,23 +180,14 @@ def __compute_trained_model(trained_model: TrainedModel, molecules_temp_file_pat
         """
         clustering_result = model.fit(subset.values)
 
-        # Generates a DataFrame with a column for time, event and the group
+        # Fits a Cox Regression model using the cluster of every sample as the variable to consider
         labels = clustering_result.labels_
-        dfs: List[pd.DataFrame] = []
-        for cluster_id in range(model.n_clusters):
-            current_group_y = y[np.where(labels == cluster_id)]
-            dfs.append(
-                pd.DataFrame({'E': current_group_y['event'], 'T': current_group_y['time'], 'group': cluster_id})
-            )
-        df = pd.concat(dfs)
-
-        # Fits a Cox Regression model using the column group as the variable to consider
-        cph: CoxPHFitter = CoxPHFitter(penalizer=penalizer).fit(df, duration_col='T', event_col='E')
+        c_index, log_likelihood = cox_c_index_and_log_likelihood(y['time'], y['event'], labels,
+                                                                 penalizer=penalizer if penalizer else 0.0)
 
         # This documentation recommends using log-likelihood to optimize:
         # https://lifelines.readthedocs.io/en/latest/fitters/regression/CoxPHFitter.html#lifelines.fitters.coxph_fitter.SemiParametricPHFitter.score
-        scoring_method = 'concordance_index' if score_method == ClusteringScoringMethod.C_INDEX else 'log_likelihood'
-        return cph.score(df, scoring_method=scoring_method)
+        return c_index if score_method == ClusteringScoringMethod.C_INDEX else log_likelihood
 
     # Gets model instance and stores its parameters
     check_if_stopped(is_aborted, ExperimentStopped)
@@ -207,6 +199,7 @@ def __compute_trained_model(trained_model: TrainedModel, molecules_temp_file_pat
     check_if_stopped(is_aborted, ExperimentStopped)
     molecules_df, clinical_df, clinical_data = format_data(molecules_temp_file_path, clinical_temp_file_path,
                                                            is_regression)
+    classifier = get_clustering_model_for_samples(trained_model, classifier, n_samples=molecules_df.shape[1])
 
     # Gets all the molecules in the needed order. It's necessary to call get_subset_of_features to fix the
     # structure of data
@@ -1,10 +1,11 @@
 from typing import Tuple, Literal, List, Dict, cast, Union
 import numpy as np
 import pandas as pd
-from lifelines import KaplanMeierFitter, CoxPHFitter
+from lifelines import KaplanMeierFitter
 from lifelines.statistics import logrank_test
 from common.utils import get_subset_of_features
 from feature_selection.fs_models import ClusteringModels
+from statistical_properties.survival_scoring import cox_c_index_and_log_likelihood
 
 KaplanMeierSample = Tuple[
     int,
@@ -112,10 +113,7 @@ def compute_c_index_and_log_likelihood(df: pd.DataFrame) -> Tuple[float, float]:
     if len(df['group'].unique()) <= 1:
         return 0.0, 0.0
 
-    cph: CoxPHFitter = CoxPHFitter().fit(df, duration_col='T', event_col='E')
-    concordance_index = cph.score(df, scoring_method='concordance_index')
-    log_likelihood = cph.score(df, scoring_method='log_likelihood')
-    return concordance_index, log_likelihood
+    return cox_c_index_and_log_likelihood(df['T'].to_numpy(), df['E'].to_numpy(), df['group'].to_numpy())
 
 
 def generate_survival_groups_by_clustering(
@@ -0,0 +1,291 @@
+from typing import Tuple
+import numpy as np
+from lifelines.exceptions import ConvergenceError
+from scipy.stats import chi2
+
+# Newton-Raphson parameters for the Cox regression fitting. Same as the lifelines' defaults
+NEWTON_MAX_STEPS: int = 500
+NEWTON_PRECISION: float = 1e-7
+NEWTON_R_PRECISION: float = 1e-9
+
+# Number of covariates processed at once in cox_score_test() to limit the memory usage
+SCORE_TEST_CHUNK_SIZE: int = 1000
+
+
+def __fenwick_add(tree: np.ndarray, position: int):
+    """Adds 1 to the position (1-based) of a Fenwick tree."""
+    size = tree.shape[0]
+    while position < size:
+        tree[position] += 1
+        position += position & -position
+
+
+def __fenwick_prefix_sum(tree: np.ndarray, position: int) -> int:
+    """Gets the sum of the elements in the positions [1, position] of a Fenwick tree."""
+    res = 0
+    while position > 0:
+        res += tree[position]
+        position -= position & -position
+    return res
+
+
+def concordance_index(event_times: np.ndarray, predicted_scores: np.ndarray, event_observed: np.ndarray) -> float:
+    """
+    Computes the Harrell's concordance index in O(n log n) time using a Fenwick tree over the ranks of the predicted
+    scores of the samples which had the event. It's the same as lifelines.utils.concordance_index (i.e. higher
+    predicted scores mean longer survival times, tied predictions count as 0.5 and censored samples are only
+    comparable with the samples which had the event before or at the same time) but without the overhead of the
+    lifelines' validations.
+    @param event_times: Observed times.
+    @param predicted_scores: Predicted scores (e.g. negative partial hazards).
+    @param event_observed: Boolean array, True if the event was observed, False if the sample is censored.
+    @return: The concordance index.
+    @raise ZeroDivisionError: If there are no comparable pairs in the dataset.
+    """
+    event_times = np.asarray(event_times, dtype=float)
+    predicted_scores = np.asarray(predicted_scores, dtype=float)
+    died_mask = np.asarray(event_observed, dtype=bool)
+
+    # Ranks (1-based) of the predictions among the unique values of the predictions of samples which had the event.
+    # Censored samples' ranks are only needed to count how many of the died ones are lower/tied
+    died_unique_preds = np.unique(predicted_scores[died_mask])
+    lower_ranks = np.searchsorted(died_unique_preds, predicted_scores, side='left')  # Number of preds strictly lower
+    upper_ranks = np.searchsorted(died_unique_preds, predicted_scores, side='right')  # Number of preds lower or tied
+
+    # Sorts by time. Samples which had the event are processed before censored ones with the same time
+    order = np.lexsort((~died_mask, event_times))
+    sorted_times = event_times[order]
+    sorted_died = died_mask[order]
+
+    tree = np.zeros(died_unique_preds.shape[0] + 1, dtype=np.int64)
+    pool_size = 0
+    num_pairs = 0
+    num_correct = 0
+    num_tied = 0
+
+    n_samples = order.shape[0]
+    i = 0
+    while i < n_samples:
+        # Gets the batch of samples with the same time and the same event value
+        j = i
+        while j < n_samples and sorted_times[j] == sorted_times[i] and sorted_died[j] == sorted_died[i]:
+            j += 1
+
+        batch = order[i:j]
+        num_pairs += pool_size * batch.shape[0]
+        for sample_idx in batch:
+            lower = __fenwick_prefix_sum(tree, lower_ranks[sample_idx])
+            lower_or_tied = __fenwick_prefix_sum(tree, upper_ranks[sample_idx])
+            num_correct += lower
+            num_tied += lower_or_tied - lower
+
+        # Only samples which had the event are comparable with the following ones
+        if sorted_died[i]:
+            for sample_idx in batch:
+                __fenwick_add(tree, upper_ranks[sample_idx])
+            pool_size += batch.shape[0]
+
+        i = j
+
+    if num_pairs == 0:
+        raise ZeroDivisionError('No admissable pairs in the dataset.')
+
+    return (num_correct + 0.5 * num_tied) / num_pairs
+
+
+def __efron_values(sorted_x: np.ndarray, risk_start_idx: np.ndarray, died_mask: np.ndarray,
+                   died_time_group: np.ndarray, died_tie_position: np.ndarray, died_tie_count: np.ndarray,
+                   n_time_groups: int, beta: float) -> Tuple[float, float, float]:
+    """
+    Computes the partial log-likelihood (Efron's method for ties), its gradient and its hessian for a single covariate
+    Cox regression model. All the arrays must be sorted by time.
+    @return: Log-likelihood, gradient and hessian.
+    """
+    phi = np.exp(beta * sorted_x)
+    phi_x = phi * sorted_x
+    phi_x_x = phi_x * sorted_x
+
+    # Risk set sums: every sample with time >= the current time (i.e. reversed cumulative sums)
+    risk_phi = np.cumsum(phi[::-1])[::-1][risk_start_idx]
+    risk_phi_x = np.cumsum(phi_x[::-1])[::-1][risk_start_idx]
+    risk_phi_x_x = np.cumsum(phi_x_x[::-1])[::-1][risk_start_idx]
+
+    # Sums of the tied deaths at every time
+    tie_phi = np.bincount(died_time_group, weights=phi[died_mask], minlength=n_time_groups)[died_time_group]
+    tie_phi_x = np.bincount(died_time_group, weights=phi_x[died_mask], minlength=n_time_groups)[died_time_group]
+    tie_phi_x_x = np.bincount(died_time_group, weights=phi_x_x[died_mask], minlength=n_time_groups)[died_time_group]
+
+    increasing_proportion = died_tie_position / died_tie_count
+    denom = risk_phi - increasing_proportion * tie_phi
+    numer = (risk_phi_x - increasing_proportion * tie_phi_x) / denom
+    numer_2 = (risk_phi_x_x - increasing_proportion * tie_phi_x_x) / denom
+
+    x_death_sum = sorted_x[died_mask].sum()
+    log_likelihood = beta * x_death_sum - np.log(denom).sum()
+    gradient = x_death_sum - numer.sum()
+    hessian = -(numer_2 - numer ** 2).sum()
+
+    return log_likelihood, gradient, hessian
+
+
+def fit_cox_single_covariate(event_times: np.ndarray, event_observed: np.ndarray, covariate: np.ndarray,
+                             penalizer: float = 0.0) -> Tuple[float, float]:
+    """
+    Fits a Cox Proportional Hazards model with a single covariate (e.g. the cluster of every sample) using
+    Newton-Raphson with the Efron's method for ties. Every iteration is vectorized and costs O(n) after an initial
+    O(n log n) sorting. Gets the same results as lifelines.CoxPHFitter(penalizer=penalizer) (the covariate is
+    standardized before fitting so the L2 penalizer has the same meaning).
+    @param event_times: Observed times.
+    @param event_observed: Boolean array, True if the event was observed, False if the sample is censored.
+    @param covariate: Covariate values.
+    @param penalizer: L2 penalizer to apply to the coefficient.
+    @return: The coefficient (in the original scale of the covariate) and the unpenalized partial log-likelihood.
+    @raise ConvergenceError: If the covariate has no variance, there are no events or the Newton-Raphson fitting
+    does not converge.
+    """
+    event_times = np.asarray(event_times, dtype=float)
+    event_observed = np.asarray(event_observed, dtype=bool)
+    covariate = np.asarray(covariate, dtype=float)
+    n_samples = covariate.shape[0]
+
+    # Standardizes the covariate as lifelines does (std with ddof=1)
+    std = covariate.std(ddof=1) if n_samples > 1 else 0.0
+    if not np.isfinite(std) or std == 0.0:
+        raise ConvergenceError('The covariate has no variance. Convergence halted.', None)
+    x = (covariate - covariate.mean()) / std
+
+    # Sorts by time and precomputes the structures of the risk sets and ties
+    order = np.argsort(event_times, kind='stable')
+    sorted_times = event_times[order]
+    sorted_x = x[order]
+    died_mask = event_observed[order]
+
+    _, risk_start_by_group, time_group = np.unique(sorted_times, return_index=True, return_inverse=True)
+    n_time_groups = risk_start_by_group.shape[0]
+    died_time_group = time_group[died_mask]
+    risk_start_idx = risk_start_by_group[died_time_group]
+    died_tie_count = np.bincount(died_time_group, minlength=n_time_groups)[died_time_group]
+
+    # Position of every death among the deaths tied at the same time (died_time_group is sorted)
+    n_deaths = died_time_group.shape[0]
+    if n_deaths == 0:
+        raise ConvergenceError('There are no events in the dataset. Convergence halted.', None)
+    first_death_of_group = np.searchsorted(died_time_group, died_time_group, side='left')
+    died_tie_position = np.arange(n_deaths) - first_death_of_group
+
+    def penalized_values(current_beta: float) -> Tuple[float, float, float, float]:
+        """Returns the unpenalized log-likelihood and the penalized log-likelihood, gradient and hessian."""
+        ll, grad, hess = __efron_values(sorted_x, risk_start_idx, died_mask, died_time_group, died_tie_position,
+                                        died_tie_count, n_time_groups, current_beta)
+        if penalizer > 0.0:
+            penalized_ll = ll - n_samples * penalizer * 0.5 * current_beta ** 2
+            grad -= n_samples * penalizer * current_beta
+            hess -= n_samples * penalizer
+        else:
+            penalized_ll = ll
+        return ll, penalized_ll, grad, hess
+
+    beta = 0.0
+    log_likelihood, penalized_ll, gradient, hessian = penalized_values(beta)
+    for _step in range(NEWTON_MAX_STEPS):
+        if hessian >= 0.0:
+            # The hessian is not negative definite (e.g. all the risk sets have the same covariate value)
+            break
+
+        delta = -gradient / hessian
+
+        # Halves the step until the penalized log-likelihood does not decrease
+        step_size = 1.0
+        new_beta = beta + delta
+        new_ll, new_penalized_ll, new_gradient, new_hessian = penalized_values(new_beta)
+        while (not np.isfinite(new_penalized_ll) or new_penalized_ll < penalized_ll) and step_size > 1e-10:
+            step_size /= 2
+            new_beta = beta + step_size * delta
+            new_ll, new_penalized_ll, new_gradient, new_hessian = penalized_values(new_beta)
+
+        if not np.isfinite(new_penalized_ll):
+            raise ConvergenceError('Log-likelihood contains nan or inf values. Convergence halted.', None)
+
+        previous_penalized_ll = penalized_ll
+        beta, log_likelihood, penalized_ll, gradient, hessian = new_beta, new_ll, new_penalized_ll, new_gradient, \
+            new_hessian
+
+        # Convergence criteria (same as lifelines)
+        newton_decrement = -(gradient ** 2) / hessian / 2 if hessian < 0.0 else 0.0
+        if abs(step_size * delta) < NEWTON_PRECISION or newton_decrement < NEWTON_PRECISION:
+            break
+        if previous_penalized_ll != 0 and \
+                abs(penalized_ll - previous_penalized_ll) / (-previous_penalized_ll) < NEWTON_R_PRECISION:
+            break
+
+    return beta / std, log_likelihood
+
+
+def cox_c_index_and_log_likelihood(event_times: np.ndarray, event_observed: np.ndarray, covariate: np.ndarray,
+                                   penalizer: float = 0.0) -> Tuple[float, float]:
+    """
+    Fits a single covariate Cox regression model and scores it on the same data. Equivalent to fit a
+    lifelines.CoxPHFitter and call score() with 'concordance_index' and 'log_likelihood' scoring methods.
+    @param event_times: Observed times.
+    @param event_observed: Boolean array, True if the event was observed, False if the sample is censored.
+    @param covariate: Covariate values (e.g. the cluster of every sample).
+    @param penalizer: L2 penalizer to apply to the coefficient.
+    @return: The C-Index and the average partial log-likelihood.
+    @raise ConvergenceError: If the covariate has no variance or the fitting does not converge.
+    """
+    covariate = np.asarray(covariate, dtype=float)
+    beta, log_likelihood = fit_cox_single_covariate(event_times, event_observed, covariate, penalizer)
+
+    # Higher partial hazard means shorter survival
+    c_index = concordance_index(event_times, -beta * covariate, event_observed)
+    return c_index, log_likelihood / covariate.shape[0]
+
+
+def cox_score_test(event_times: np.ndarray, event_observed: np.ndarray,
+                   covariates: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the score test (at beta = 0) of a univariate Cox regression model for every covariate at once. The
+    variance of tied events uses the hypergeometric correction, so for a binary covariate it's exactly the log-rank
+    test. The risk sets sums are computed for all the covariates with reversed cumulative sums, so no model is fitted.
+    @param event_times: Observed times.
+    @param event_observed: Boolean array, True if the event was observed, False if the sample is censored.
+    @param covariates: Matrix of shape (n_samples, n_covariates).
+    @return: The chi-squared statistics (1 degree of freedom) and p-values of every covariate. Covariates with no
+    variance in the risk sets get a statistic of 0 and a p-value of 1.
+    """
+    event_times = np.asarray(event_times, dtype=float)
+    event_observed = np.asarray(event_observed, dtype=bool)
+    covariates = np.asarray(covariates, dtype=float)
+    n_covariates = covariates.shape[1]
+
+    # Sorts by time. Every death uses the risk set which starts at the first sample with the same time
+    order = np.argsort(event_times, kind='stable')
+    sorted_times = event_times[order]
+    died_mask = event_observed[order]
+    _, risk_start_by_group, time_group = np.unique(sorted_times, return_index=True, return_inverse=True)
+    died_time_group = time_group[died_mask]
+    died_risk_start = risk_start_by_group[died_time_group]
+    at_risk = (sorted_times.shape[0] - died_risk_start)[:, np.newaxis]
+
+    # Correction of the variance for tied events: (n - d) / (n - 1) where n is the size of the risk set and d the
+    # number of events at the same time
+    tied_events = np.bincount(died_time_group, minlength=risk_start_by_group.shape[0])[died_time_group]
+    tied_events = tied_events[:, np.newaxis]
+    ties_correction = np.where(at_risk > 1, (at_risk - tied_events) / np.maximum(at_risk - 1, 1), 1.0)
+
+    statistics = np.zeros(n_covariates, dtype=float)
+    for start in range(0, n_covariates, SCORE_TEST_CHUNK_SIZE):
+        chunk = covariates[order, start:start + SCORE_TEST_CHUNK_SIZE]
+        chunk = chunk - chunk.mean(axis=0)  # Centers the values for numerical stability
+
+        risk_sum = np.cumsum(chunk[::-1], axis=0)[::-1][died_risk_start]
+        risk_sum_squares = np.cumsum((chunk ** 2)[::-1], axis=0)[::-1][died_risk_start]
+        risk_mean = risk_sum / at_risk
+
+        score = (chunk[died_mask] - risk_mean).sum(axis=0)
+        information = ((risk_sum_squares / at_risk - risk_mean ** 2) * ties_correction).sum(axis=0)
+
+        valid = information > 1e-12
+        statistics[start:start + SCORE_TEST_CHUNK_SIZE][valid] = score[valid] ** 2 / information[valid]
+
+    return statistics, chi2.sf(statistics, df=1)
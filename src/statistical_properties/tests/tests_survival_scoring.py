@@ -0,0 +1,94 @@
+import warnings
+import numpy as np
+import pandas as pd
+from django.test import SimpleTestCase
+from lifelines import CoxPHFitter
+from lifelines.exceptions import ConvergenceError
+from lifelines.statistics import logrank_test
+from lifelines.utils import concordance_index as lifelines_concordance_index
+from statistical_properties.survival_scoring import concordance_index, cox_c_index_and_log_likelihood, \
+    cox_score_test
+
+# Number of random datasets to cross-check against lifelines
+N_RANDOM_DATASETS = 30
+
+
+class SurvivalScoringTestCase(SimpleTestCase):
+    rng: np.random.Generator
+
+    def setUp(self):
+        self.rng = np.random.default_rng(2024)
+
+    def __random_survival_data(self, n_samples: int, integer_times: bool):
+        """Generates random times, events and groups with ties in times and in groups."""
+        if integer_times:
+            times = self.rng.integers(1, 30, n_samples).astype(float)
+        else:
+            times = self.rng.exponential(5, n_samples)
+        events = self.rng.random(n_samples) < 0.6
+        groups = self.rng.integers(0, 4, n_samples)
+        return times, events, groups
+
+    def test_concordance_index(self):
+        """Tests that the C-Index is the same as the lifelines one."""
+        for i in range(N_RANDOM_DATASETS):
+            times, events, _ = self.__random_survival_data(n_samples=100, integer_times=i % 2 == 0)
+            predictions = self.rng.integers(0, 10, times.shape[0]).astype(float)
+
+            expected = lifelines_concordance_index(times, predictions, events)
+            self.assertAlmostEqual(concordance_index(times, predictions, events), expected, places=10)
+
+    def test_concordance_index_no_pairs(self):
+        """Tests that a ZeroDivisionError is raised as lifelines does when there are no comparable pairs."""
+        times = np.array([1.0, 2.0, 3.0])
+        events = np.array([False, False, False])
+        with self.assertRaises(ZeroDivisionError):
+            concordance_index(times, np.array([1.0, 2.0, 3.0]), events)
+
+    def test_cox_scores(self):
+        """Tests that the C-Index and log-likelihood are the same as the ones got with lifelines' CoxPHFitter."""
+        for i in range(N_RANDOM_DATASETS):
+            times, events, groups = self.__random_survival_data(n_samples=150, integer_times=i % 2 == 0)
+            penalizer = [0.0, 0.1][i % 2]
+
+            df = pd.DataFrame({'T': times, 'E': events, 'group': groups})
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                cph = CoxPHFitter(penalizer=penalizer).fit(df, duration_col='T', event_col='E')
+            expected_c_index = cph.score(df, scoring_method='concordance_index')
+            expected_log_likelihood = cph.score(df, scoring_method='log_likelihood')
+
+            c_index, log_likelihood = cox_c_index_and_log_likelihood(times, events, groups, penalizer)
+            self.assertAlmostEqual(c_index, expected_c_index, places=10)
+            self.assertAlmostEqual(log_likelihood, expected_log_likelihood, places=4)
+
+    def test_cox_single_group(self):
+        """Tests that a ConvergenceError is raised when all the samples are in the same group."""
+        times, events, _ = self.__random_survival_data(n_samples=20, integer_times=True)
+        with self.assertRaises(ConvergenceError):
+            cox_c_index_and_log_likelihood(times, events, np.zeros(20))
+
+    def test_cox_score_test(self):
+        """Tests that the score test of a binary covariate is the same as the lifelines' log-rank test."""
+        groups_matrix = []
+        expected_statistics = []
+        times, events, _ = self.__random_survival_data(n_samples=150, integer_times=True)
+        for _i in range(N_RANDOM_DATASETS):
+            groups = self.rng.integers(0, 2, times.shape[0])
+            groups_matrix.append(groups)
+
+            group_a, group_b = groups == 0, groups == 1
+            result = logrank_test(times[group_a], times[group_b], events[group_a], events[group_b])
+            expected_statistics.append(result.test_statistic)
+
+        # All the covariates are tested at once
+        statistics, p_values = cox_score_test(times, events, np.column_stack(groups_matrix))
+        np.testing.assert_allclose(statistics, expected_statistics, rtol=1e-10)
+        self.assertTrue(np.all((p_values >= 0.0) & (p_values <= 1.0)))
+
+    def test_cox_score_test_no_variance(self):
+        """Tests that a covariate with no variance gets a p-value of 1."""
+        times, events, _ = self.__random_survival_data(n_samples=20, integer_times=True)
+        statistics, p_values = cox_score_test(times, events, np.ones((20, 1)))
+        self.assertEqual(statistics[0], 0.0)
+        self.assertEqual(p_values[0], 1.0)
@@ -410,7 +410,8 @@ class ModelDetails(APIView):
             response = {
                 'algorithm': parameters.algorithm,
                 'scoring_method': parameters.scoring_method,
-                'n_clusters': parameters.n_clusters
+                'n_clusters': parameters.n_clusters,
+                'mode': parameters.mode
             }
         elif model_used == FitnessFunction.SVM:
             parameters: SVMParameters = trained_model.svm_parameters
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2024-07-02 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('user_files', '0015_alter_userfile_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('barcode', models.TextField(unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userfile',
+            name='samples_bitmap',
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+    ]
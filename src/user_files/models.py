@@ -4,6 +4,9 @@ from django.db import models
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 from common.methylation import MethylationPlatform
+from common.molecules_stats import compute_molecules_stats, save_molecules_stats, read_molecules_stats, \
+    remove_molecules_stats
+from common.samples_bitmap import SamplesBitmap
 from institutions.models import Institution
 from tags.models import Tag
 from typing import List, TextIO, Optional, Iterable, Union, cast
@@ -16,6 +19,60 @@ from django.conf import settings
 from api_service.websocket_functions import send_update_user_file_command
 
 
+# Number of samples retrieved/registered per query in the Sample registry
+SAMPLES_REGISTRY_BATCH_SIZE = 1000
+
+
+class Sample(models.Model):
+    """
+    Registry of all the samples barcodes seen in UserFiles and CGDSDatasets. The (integer) pk is the bit of the sample
+    in the SamplesBitmap of every dataset
+    """
+    barcode = models.TextField(unique=True)
+
+    def __str__(self):
+        return self.barcode
+
+
+def get_samples_bitmap_from_barcodes(barcodes: Iterable, register: bool = True) -> SamplesBitmap:
+    """
+    Gets the bitmap of a collection of samples barcodes
+    @param barcodes: Samples barcodes
+    @param register: If True, the barcodes which are not in the registry are added. Otherwise, they are ignored (as they
+    can't be in common with any dataset)
+    @return: SamplesBitmap with the IDs of the samples
+    """
+    barcodes = list({str(barcode) for barcode in barcodes})
+    ids: List[int] = []
+    for i in range(0, len(barcodes), SAMPLES_REGISTRY_BATCH_SIZE):
+        batch = barcodes[i:i + SAMPLES_REGISTRY_BATCH_SIZE]
+        registered = dict(Sample.objects.filter(barcode__in=batch).values_list('barcode', 'pk'))
+
+        missing = [barcode for barcode in batch if barcode not in registered]
+        if register and missing:
+            # Other processes could be registering the same samples
+            Sample.objects.bulk_create([Sample(barcode=barcode) for barcode in missing], ignore_conflicts=True)
+            registered.update(Sample.objects.filter(barcode__in=missing).values_list('barcode', 'pk'))
+
+        ids += registered.values()
+
+    return SamplesBitmap.from_ids(ids)
+
+
+def get_samples_barcodes(bitmap: SamplesBitmap) -> np.ndarray:
+    """
+    Gets the barcodes of the samples of a bitmap
+    @param bitmap: SamplesBitmap to decode
+    @return: Sorted Numpy array with the samples barcodes
+    """
+    ids = bitmap.ids().tolist()
+    barcodes: List[str] = []
+    for i in range(0, len(ids), SAMPLES_REGISTRY_BATCH_SIZE):
+        batch = ids[i:i + SAMPLES_REGISTRY_BATCH_SIZE]
+        barcodes += Sample.objects.filter(pk__in=batch).values_list('barcode', flat=True)
+    return np.sort(np.array(barcodes, dtype=str))
+
+
 def user_directory_path(instance, filename: str):
     """File will be uploaded to MEDIA_ROOT/uploads/user_<id>/<filename>"""
     return f'uploads/user_{instance.user.id}/{filename}'
@@ -47,6 +104,9 @@ class UserFile(models.Model):
     is_cpg_site_id = models.BooleanField(blank=False, null=False, default=False)
     platform = models.IntegerField(choices=MethylationPlatform.choices, blank=True, null=True)
 
+    # Compressed SamplesBitmap of the samples (rows for clinical files, columns for the rest). None if not computed yet
+    samples_bitmap = models.BinaryField(blank=True, null=True, editable=False)
+
     def __str__(self):
         description = self.description if self.description is not None else '-'
         return f'{self.name}: {description}'
@@ -83,6 +143,55 @@ class UserFile(models.Model):
         decimal_separator = get_decimal_separator_and_numerical_data(self.file_obj.file.name, seek_beginning=False, all_rows=False)
         self.decimal_separator = decimal_separator if decimal_separator is not None else FileDecimalSeparator.DOT
 
+    def __compute_samples_bitmap(self) -> SamplesBitmap:
+        """Registers the samples of the UserFile and computes its samples_bitmap field"""
+        samples = self.get_row_indexes() if self.file_type == FileType.CLINICAL else self.get_column_names()
+        bitmap = get_samples_bitmap_from_barcodes(samples)
+        self.samples_bitmap = bitmap.to_bytes()
+        return bitmap
+
+    @property
+    def molecules_stats_file_name(self) -> str:
+        """File's name of the per-molecule statistics (see common.molecules_stats)"""
+        return f'user_file_{self.pk}.parquet'
+
+    def __compute_molecules_stats(self) -> Optional[pd.DataFrame]:
+        """
+        Computes and stores the per-molecule statistics over all the samples. Clinical files have the samples in rows,
+        so they don't have statistics
+        @return: DataFrame with the statistics or None if it's a clinical file
+        """
+        if self.file_type == FileType.CLINICAL:
+            return None
+
+        stats_df = compute_molecules_stats(self.get_df_in_chunks(), self.get_column_names())
+        save_molecules_stats(stats_df, self.molecules_stats_file_name)
+        return stats_df
+
+    def get_molecules_stats(self, compute_if_missing: bool = False) -> Optional[pd.DataFrame]:
+        """
+        Gets the per-molecule statistics (mean, std and NaN count over all the samples) computed at upload time
+        @param compute_if_missing: If True, computes them if they weren't computed (e.g. files uploaded before the
+        statistics were introduced)
+        @return: DataFrame with the statistics or None if they aren't available
+        """
+        stats_df = read_molecules_stats(self.molecules_stats_file_name)
+        if stats_df is None and compute_if_missing:
+            stats_df = self.__compute_molecules_stats()
+        return stats_df
+
+    def get_samples_bitmap(self) -> SamplesBitmap:
+        """
+        Gets the SamplesBitmap of the UserFile. It's computed (and stored) only the first time
+        @return: SamplesBitmap instance
+        """
+        if self.samples_bitmap is not None:
+            return SamplesBitmap.from_bytes(self.samples_bitmap)
+
+        bitmap = self.__compute_samples_bitmap()
+        UserFile.objects.filter(pk=self.pk).update(samples_bitmap=self.samples_bitmap)
+        return bitmap
+
     def compute_post_saved_field(self):
         """Computes fields that need the instance to be saved in the DB before be computed, such as number of
         row, columns, NaN values, etc"""
@@ -98,9 +207,15 @@ class UserFile(models.Model):
         # Gets the decimal separator
         self.__compute_decimal_separator()
 
+        # Registers the samples
+        self.__compute_samples_bitmap()
+
+        # Computes the statistics of every molecule (needs the decimal separator)
+        self.__compute_molecules_stats()
+
         # Saves again with the new computed fields
         super().save(update_fields=['number_of_rows', 'number_of_samples', 'contains_nan_values',
-                                    'column_used_as_index', 'decimal_separator'])
+                                    'column_used_as_index', 'decimal_separator', 'samples_bitmap'])
 
     def get_row_indexes(self) -> List[str]:
         """
@@ -170,14 +285,19 @@ class UserFile(models.Model):
         """
         return self.__get_dataframe()
 
-    def get_df_in_chunks(self, _only_matching: bool = False) -> Iterable[pd.DataFrame]:
+    def get_df_in_chunks(self, _only_matching: bool = False,
+                         molecules_to_skip: Optional[pd.Index] = None) -> Iterable[pd.DataFrame]:
         """
         Returns an Iterator of a DataFrame in divided in chunks from an UserFile.
         @param _only_matching: If True, returns only the matching samples. Not used for UserFiles sources (only
         for CGDSDatasets).
+        @param molecules_to_skip: Molecules (rows) to remove from every chunk (optional).
         @return: A DataFrame Iterator with the data to work.
         """
-        return self.__get_dataframe(chunk_size=settings.EXPERIMENT_CHUNK_SIZE)
+        chunks = self.__get_dataframe(chunk_size=settings.EXPERIMENT_CHUNK_SIZE)
+        if molecules_to_skip is None or molecules_to_skip.empty:
+            return chunks
+        return (chunk[~chunk.index.astype(str).isin(molecules_to_skip)] for chunk in chunks)
 
     def get_column_names(self, include_first_column: Optional[bool] = False) -> List[str]:
         """
@@ -243,8 +363,10 @@ class UserFile(models.Model):
 @receiver(post_delete, sender=UserFile)
 def user_file_post_delete(sender, instance, **kwargs):
     """
-    Deletes file from filesystem when corresponding `UserFile` object is deleted.
+    Deletes file (and its molecules statistics) from filesystem when corresponding `UserFile` object is deleted.
     """
     if instance.file_obj:
         if os.path.isfile(instance.file_obj.path):
             os.remove(instance.file_obj.path)
+
+    remove_molecules_stats(instance.molecules_stats_file_name)
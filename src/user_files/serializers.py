@@ -4,6 +4,7 @@ from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.db import transaction
 from rest_framework import serializers
 from common.functions import get_enum_from_value, create_survival_columns_from_json
+from common.molecules_stats import remove_molecules_stats
 from datasets_synchronization.models import SurvivalColumnsTupleUserFile
 from .models_choices import FileType
 from .utils import has_uploaded_file_valid_format, get_invalid_format_response
@@ -119,7 +120,13 @@ class UserFileSerializer(serializers.ModelSerializer):
         # Updates the UserFile instance
         with transaction.atomic():
             instance.name = validated_data.get('name', instance.name)
-            instance.file_type = validated_data.get('file_type', instance.file_type)
+            file_type = validated_data.get('file_type', instance.file_type)
+            if file_type != instance.file_type:
+                # Clinical files have the samples in rows, so the samples bitmap and the molecules statistics must be
+                # computed again
+                instance.samples_bitmap = None
+                remove_molecules_stats(instance.molecules_stats_file_name)
+            instance.file_type = file_type
             instance.description = validated_data.get('description', instance.description)
             instance.tag = validated_data.get('tag')
             instance.institutions.set(validated_data.get('institutions', []))
@@ -1,8 +1,10 @@
+import tempfile
 from django.test import TestCase
 from common.tests_utils import create_user_file
-from user_files.models import UserFile
+from user_files.models import UserFile, get_samples_barcodes
 from user_files.models_choices import FileType, FileDecimalSeparator
 import os
+import numpy as np
 from django.contrib.auth.models import User
 
 # Test user's password
@@ -29,6 +31,11 @@ class ExperimentCommonsTestCase(TestCase):
 
     def setUp(self):
         """Tests setup"""
+        # Uploaded files and molecules stats are stored in a temporary MEDIA_ROOT
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.enterContext(self.settings(MEDIA_ROOT=temp_dir.name))
+
         # Creates a test user
         self.user = User.objects.create_user(username='test_user', email='test@test.com', password=USER_PASSWORD)
 
@@ -58,3 +65,22 @@ class ExperimentCommonsTestCase(TestCase):
         """Test correct decimal separator inference"""
         self.assertEqual(self.with_dots.decimal_separator, FileDecimalSeparator.DOT)
         self.assertEqual(self.with_commas.decimal_separator, FileDecimalSeparator.COMMA)
+
+    def test_samples_bitmap(self):
+        """Tests that the samples bitmaps intersection is the same as the intersection of the columns names"""
+        with_dots_bitmap = self.with_dots.get_samples_bitmap()
+        with_commas_bitmap = self.with_commas.get_samples_bitmap()
+        self.assertEqual(len(with_dots_bitmap), len(self.with_dots.get_column_names()))
+
+        expected = np.intersect1d(self.with_dots.get_column_names(), self.with_commas.get_column_names())
+        intersection = get_samples_barcodes(with_dots_bitmap & with_commas_bitmap)
+        self.assertListEqual(intersection.tolist(), expected.tolist())
+
+    def test_molecules_stats(self):
+        """Tests that the molecules statistics are computed on upload and match the dataset"""
+        stats_df = self.with_dots.get_molecules_stats()
+        self.assertIsNotNone(stats_df)
+
+        df = self.with_dots.get_df()
+        self.assertEqual(stats_df.shape[0], df.shape[0])
+        self.assertListEqual(stats_df['std'].round(6).tolist(), df.std(axis=1).round(6).tolist())